@@ -3,10 +3,27 @@ Inicialização da aplicação Flask.
 Este módulo configura a aplicação Flask, registra os blueprints e inicializa as extensões.
 """
 import os
+from datetime import datetime
+from importlib import import_module
+from zoneinfo import ZoneInfo
+import click
 from flask import Flask
-from app.extensions import db, migrate, login_manager, csrf, bcrypt, limiter
+from markupsafe import Markup, escape
+from app.extensions import db, login_manager, csrf, limiter
 from app.config import config
 
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Blueprints disponíveis: nome -> (módulo, atributo, prefixo de URL)
+BLUEPRINTS = {
+    'auth': ('app.auth', 'auth_bp', None),
+    'admin': ('app.admin', 'admin_bp', '/admin'),
+    'ordens': ('app.ordens', 'ordens_bp', '/ordens'),
+    'dashboard': ('app.dashboard', 'dashboard_bp', '/dashboard'),
+    'api': ('app.api', 'api_bp', '/api'),
+}
+
 
 def create_app(config_name=None):
     """
@@ -24,41 +41,117 @@ def create_app(config_name=None):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Dimensionamento do pool de conexões
+    from app.utils.pool import configurar_pool, init_pool_metrics
+    configurar_pool(app)
+    
     # Inicializa extensões
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_migrate(app)
     login_manager.init_app(app)
     csrf.init_app(app)
-    bcrypt.init_app(app)
     limiter.init_app(app)
     
-    # Configura login_manager
-    login_manager.login_view = 'auth.login'
+    # Sessões no servidor
+    from app.utils.sessoes import init_sessoes
+    init_sessoes(app)
+    
+    # Métricas dos pools de conexões (primário e réplica)
+    with app.app_context():
+        for chave, engine in db.engines.items():
+            init_pool_metrics(app, engine, chave or 'primario')
+    
+    # Registro de consultas lentas
+    if app.config.get('SLOW_QUERY_LOG_ENABLED'):
+        from app.utils.query_log import init_query_log
+        with app.app_context():
+            for engine in db.engines.values():
+                init_query_log(app, engine)
+    
+    # Configura login_manager (sem o blueprint de autenticação, o acesso anônimo recebe 401)
+    login_manager.login_view = 'auth.login' if 'auth' in app.config['BLUEPRINTS_HABILITADOS'] else None
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.login_message_category = 'warning'
+    from app.utils.usuario_cache import carregar_usuario, limpar_cache
+    login_manager.user_loader(carregar_usuario)
+    
+    # Caches do processo ligados ao banco desta aplicação
+    from app.utils.opcoes import invalidar_opcoes
+    # Registro das alterações das ordens para a sincronização (eventos da sessão)
+    import_module('app.utils.alteracoes')
+    limpar_cache()
+    invalidar_opcoes()
     
     # Registra blueprints
-    from app.auth import auth_bp
-    from app.admin import admin_bp
-    from app.ordens import ordens_bp
-    from app.dashboard import dashboard_bp
-    from app.api import api_bp
-    
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(admin_bp, url_prefix='/admin')
-    app.register_blueprint(ordens_bp, url_prefix='/ordens')
-    app.register_blueprint(dashboard_bp, url_prefix='/dashboard')
-    app.register_blueprint(api_bp, url_prefix='/api')
+    register_blueprints(app)
+    
+    # Variáveis comuns aos templates
+    @app.context_processor
+    def inject_now():
+        return {'now': datetime.now(FORTALEZA_TZ)}
+    
+    @app.template_filter('nl2br')
+    def nl2br(texto):
+        """Converte quebras de linha em <br>, escapando o restante do texto."""
+        if not texto:
+            return ''
+        return Markup('<br>\n').join(escape(texto).splitlines())
     
     # Registra handlers de erro
     register_error_handlers(app)
     
+    # Registra comandos CLI
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Cria diretório de uploads se não existir
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
     return app
 
 
+def init_migrate(app):
+    """
+    Inicializa o Flask-Migrate só quando necessário.
+    
+    O Flask-Migrate importa o Alembic inteiro (cerca de 120 ms), usado apenas pelos comandos
+    `flask db`. Com MIGRATE_ENABLED indefinido, a extensão é carregada somente quando a
+    aplicação é criada pela linha de comando do Flask.
+    
+    Args:
+        app (Flask): Aplicação Flask
+    """
+    habilitado = app.config.get('MIGRATE_ENABLED')
+    if habilitado is None:
+        habilitado = click.get_current_context(silent=True) is not None
+    if habilitado:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+
+def register_blueprints(app):
+    """
+    Importa e registra os blueprints listados em BLUEPRINTS_HABILITADOS.
+    
+    Os módulos dos blueprints desabilitados não são importados, o que reduz o tempo de
+    inicialização e a memória de workers dedicados (ex.: BLUEPRINTS=api).
+    
+    Args:
+        app (Flask): Aplicação Flask
+        
+    Raises:
+        ValueError: Se algum nome não corresponder a um blueprint conhecido
+    """
+    habilitados = app.config['BLUEPRINTS_HABILITADOS']
+    desconhecidos = set(habilitados) - set(BLUEPRINTS)
+    if desconhecidos:
+        raise ValueError(f"Blueprints desconhecidos: {', '.join(sorted(desconhecidos))}")
+    
+    for nome, (modulo, atributo, prefixo) in BLUEPRINTS.items():
+        if nome in habilitados:
+            app.register_blueprint(getattr(import_module(modulo), atributo), url_prefix=prefixo)
+
+
 def register_error_handlers(app):
     """
     Registra handlers para erros HTTP.
@@ -68,15 +161,18 @@ def register_error_handlers(app):
     """
     @app.errorhandler(404)
     def page_not_found(e):
-        return render_template('errors/404.html'), 404
+        return render_template('errors/error.html', code=404, title='Página Não Encontrada',
+                               message='A página que você está procurando não existe ou foi movida.'), 404
     
     @app.errorhandler(403)
     def forbidden(e):
-        return render_template('errors/403.html'), 403
+        return render_template('errors/error.html', code=403, title='Acesso Negado',
+                               message='Você não tem permissão para acessar esta página.'), 403
     
     @app.errorhandler(500)
     def internal_server_error(e):
-        return render_template('errors/500.html'), 500
+        return render_template('errors/error.html', code=500, title='Erro Interno do Servidor',
+                               message='Ocorreu um erro interno no servidor. Nossa equipe foi notificada.'), 500
 
 # Importação necessária para o handler de erro
 from flask import render_template
@@ -3,7 +3,7 @@ Formulários para administração.
 Este módulo define os formulários relacionados à administração do sistema.
 """
 from flask_wtf import FlaskForm
-from flask_wtf.file import FileField, FileAllowed
+from flask_wtf.file import FileField, FileAllowed, FileRequired
 from wtforms import StringField, PasswordField, BooleanField, SubmitField, SelectField
 from wtforms import TextAreaField, SelectMultipleField, DecimalField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Optional
@@ -121,3 +121,14 @@ class ApproveUserForm(FlaskForm):
     """Formulário para aprovar usuários pendentes."""
     roles = SelectMultipleField('Papéis', coerce=int, validators=[DataRequired()])
     submit = SubmitField('Aprovar Usuário')
+
+
+class ImportacaoForm(FlaskForm):
+    """Formulário para importação em lote de cadastros."""
+    tipo = SelectField('Tipo de cadastro', validators=[DataRequired()])
+    administradora_id = SelectField('Administradora', coerce=int, validators=[Optional()])
+    arquivo = FileField('Arquivo', validators=[
+        FileRequired('Selecione um arquivo.'),
+        FileAllowed(['csv', 'xlsx'], 'Apenas arquivos CSV ou XLSX são permitidos!')
+    ])
+    submit = SubmitField('Importar')
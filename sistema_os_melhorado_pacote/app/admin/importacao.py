@@ -0,0 +1,414 @@
+"""
+Importação em lote de cadastros.
+Este módulo importa condomínios, áreas, fornecedores e usuários a partir de arquivos CSV
+ou XLSX: as linhas são lidas e validadas uma a uma, duplicados são descartados por busca
+em conjuntos, os registros válidos são inseridos em lotes e os erros formam um relatório.
+"""
+import codecs
+import csv
+import io
+import logging
+import secrets
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from email_validator import EmailNotValidError, validate_email
+from flask import current_app
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Condominio, Area, Fornecedor, User, UserCondominio
+from app.utils.senhas import gerar_hashes_senhas
+
+logger = logging.getLogger(__name__)
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Tipos de cadastro aceitos na importação
+TIPOS_IMPORTACAO = {
+    'condominios': 'Condomínios',
+    'areas': 'Áreas',
+    'fornecedores': 'Fornecedores',
+    'usuarios': 'Usuários',
+}
+
+# Colunas de cada tipo: nome -> (obrigatória, tamanho máximo)
+COLUNAS_IMPORTACAO = {
+    'condominios': {
+        'nome': (True, 255), 'endereco': (False, 255), 'cep': (False, 10), 'cidade': (False, 100),
+        'estado': (False, 2), 'telefone': (False, 20), 'email': (False, 120),
+    },
+    'areas': {
+        'condominio': (True, 255), 'nome': (True, 100), 'descricao': (False, None),
+    },
+    'fornecedores': {
+        'nome': (True, 255), 'cnpj_cpf': (False, 18), 'email': (False, 120), 'telefone': (False, 20),
+        'endereco': (False, 255), 'tipo_servico': (False, 100), 'observacoes': (False, None),
+    },
+    'usuarios': {
+        'nome': (True, 255), 'email': (True, 120), 'senha': (False, None), 'condominios': (False, None),
+    },
+}
+
+
+class ErroImportacao(ValueError):
+    """Erro que impede a importação do arquivo inteiro (formato ou cabeçalho inválido)."""
+
+
+def ler_linhas(arquivo, nome_arquivo):
+    """
+    Lê as linhas de um arquivo CSV ou XLSX sem carregá-lo inteiro em memória.
+
+    Args:
+        arquivo: Arquivo binário aberto
+        nome_arquivo (str): Nome original, usado para identificar o formato
+
+    Yields:
+        tuple: Número da linha no arquivo e dicionário coluna -> valor
+    """
+    extensao = nome_arquivo.rsplit('.', 1)[-1].lower()
+
+    if extensao == 'csv':
+        _validar_codificacao(arquivo)
+        texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+        amostra = texto.read(4096)
+        texto.seek(0)
+        delimitador = ';' if amostra.count(';') > amostra.count(',') else ','
+        leitor = csv.reader(texto, delimiter=delimitador)
+    elif extensao == 'xlsx':
+        from openpyxl import load_workbook
+        planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+        leitor = planilha.iter_rows(values_only=True)
+    else:
+        raise ErroImportacao('Formato não suportado. Envie um arquivo CSV ou XLSX.')
+
+    cabecalho = next(leitor, None)
+    if not cabecalho:
+        raise ErroImportacao('Arquivo vazio.')
+    colunas = [str(c or '').strip().lower() for c in cabecalho]
+
+    for numero, valores in enumerate(leitor, start=2):
+        if not any(v not in (None, '') for v in valores):
+            continue
+        yield numero, {
+            coluna: str(valor).strip() if valor is not None else ''
+            for coluna, valor in zip(colunas, valores) if coluna
+        }
+
+
+def _validar_codificacao(arquivo):
+    """
+    Confere, em blocos, se o CSV está em UTF-8 antes de importar qualquer linha.
+
+    Args:
+        arquivo: Arquivo binário aberto, que volta ao início ao final da leitura
+
+    Raises:
+        ErroImportacao: Se o arquivo tiver bytes inválidos em UTF-8
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        for bloco in iter(lambda: arquivo.read(65536), b''):
+            decodificador.decode(bloco)
+        decodificador.decode(b'', final=True)
+    except UnicodeDecodeError as e:
+        raise ErroImportacao(
+            'O arquivo CSV não está em UTF-8. Salve-o com a codificação UTF-8 e envie novamente.'
+        ) from e
+    arquivo.seek(0)
+
+
+def validar_linha(tipo, linha):
+    """
+    Valida e normaliza uma linha do arquivo.
+
+    Args:
+        tipo (str): Tipo de cadastro (chave de COLUNAS_IMPORTACAO)
+        linha (dict): Valores lidos do arquivo
+
+    Returns:
+        tuple: Dados normalizados e lista de mensagens de erro
+    """
+    dados, erros = {}, []
+    for coluna, (obrigatoria, tamanho) in COLUNAS_IMPORTACAO[tipo].items():
+        valor = linha.get(coluna, '')
+        if not valor:
+            if obrigatoria:
+                erros.append(f'Campo obrigatório ausente: {coluna}')
+            dados[coluna] = None
+            continue
+        if tamanho and len(valor) > tamanho:
+            erros.append(f'{coluna} excede {tamanho} caracteres')
+        dados[coluna] = valor
+
+    if dados.get('email'):
+        try:
+            dados['email'] = validate_email(dados['email'], check_deliverability=False).normalized.lower()
+        except EmailNotValidError:
+            erros.append(f"Email inválido: {dados['email']}")
+
+    if tipo == 'condominios' and dados.get('estado'):
+        dados['estado'] = dados['estado'].upper()
+
+    if tipo == 'fornecedores' and dados.get('cnpj_cpf'):
+        dados['cnpj_cpf'] = normalizar_documento(dados['cnpj_cpf'])
+
+    if tipo == 'usuarios' and dados.get('senha') and len(dados['senha']) < 8:
+        erros.append('A senha deve ter pelo menos 8 caracteres')
+
+    return dados, erros
+
+
+def normalizar_documento(documento):
+    """Mantém apenas os dígitos de um CNPJ ou CPF."""
+    return ''.join(c for c in documento if c.isdigit())
+
+
+class Importador:
+    """
+    Importação de um arquivo de cadastros.
+    Carrega uma única vez as chaves já existentes no banco (nomes, documentos, emails)
+    em conjuntos e dicionários, e insere os registros válidos em lotes.
+    """
+
+    def __init__(self, tipo, administradora_id=None, lote=None):
+        if tipo not in TIPOS_IMPORTACAO:
+            raise ErroImportacao(f'Tipo de importação inválido: {tipo}')
+        if tipo in ('condominios', 'areas') and not administradora_id:
+            raise ErroImportacao('Selecione a administradora dos condomínios.')
+
+        self.tipo = tipo
+        self.administradora_id = administradora_id
+        self.lote = lote or current_app.config.get('IMPORT_BATCH_SIZE', 500)
+        self.pendentes = []
+        self.resultado = {'importados': 0, 'ignorados': 0, 'nao_importados': 0, 'erros': []}
+        self._carregar_existentes()
+
+    def _carregar_existentes(self):
+        """Carrega as chaves usadas na deduplicação e na resolução de condomínios."""
+        condominios = db.session.execute(
+            select(Condominio.id, Condominio.nome, Condominio.administradora_id)
+        ).all()
+        # Nomes de condomínio são resolvidos dentro da administradora, quando informada;
+        # nomes repetidos (ex.: o mesmo nome em duas administradoras) são recusados como ambíguos
+        self.condominios, self.ambiguos = {}, set()
+        for c in condominios:
+            if self.administradora_id and c.administradora_id != self.administradora_id:
+                continue
+            nome = c.nome.lower()
+            if nome in self.condominios:
+                self.ambiguos.add(nome)
+            self.condominios[nome] = c.id
+
+        if self.tipo == 'condominios':
+            self.existentes = set(self.condominios)
+        elif self.tipo == 'areas':
+            self.existentes = {
+                (condominio_id, nome.lower())
+                for condominio_id, nome in db.session.execute(select(Area.condominio_id, Area.nome))
+            }
+        elif self.tipo == 'fornecedores':
+            self.existentes = {
+                normalizar_documento(d) for d in db.session.scalars(
+                    select(Fornecedor.cnpj_cpf).where(Fornecedor.cnpj_cpf.isnot(None))
+                )
+            }
+        else:
+            self.existentes = set(db.session.scalars(select(func.lower(User.email))))
+
+    def _chave(self, dados):
+        """Chave de deduplicação da linha, ou None quando não há como deduplicar."""
+        if self.tipo == 'condominios':
+            return dados['nome'].lower()
+        if self.tipo == 'areas':
+            return (dados['condominio_id'], dados['nome'].lower())
+        if self.tipo == 'fornecedores':
+            return dados['cnpj_cpf'] or None
+        return dados['email']
+
+    def processar(self, linhas):
+        """
+        Processa as linhas lidas do arquivo.
+
+        Args:
+            linhas: Iterável de (número da linha, dicionário de valores)
+
+        Returns:
+            dict: Quantidade de registros importados, ignorados e não importados, e os erros por linha
+        """
+        for numero, linha in linhas:
+            self._processar_linha(numero, linha)
+
+        if self.pendentes:
+            self._inserir_lote()
+
+        logger.info(
+            f"Importação de {self.tipo}: {self.resultado['importados']} importado(s), "
+            f"{self.resultado['ignorados']} ignorado(s), {len(self.resultado['erros'])} erro(s)"
+        )
+        return self.resultado
+
+    def _resolver_condominios(self, nomes):
+        """
+        Converte nomes de condomínio em IDs.
+
+        Args:
+            nomes (list): Nomes informados na linha
+
+        Returns:
+            tuple: IDs encontrados e lista de mensagens de erro
+        """
+        desconhecidos = [n for n in nomes if n.lower() not in self.condominios]
+        ambiguos = [n for n in nomes if n.lower() in self.ambiguos]
+        erros = []
+        if desconhecidos:
+            erros.append(f"Condomínio não encontrado: {', '.join(desconhecidos)}")
+        if ambiguos:
+            erros.append(
+                f"Mais de um condomínio com o nome: {', '.join(ambiguos)}. "
+                f"Selecione a administradora para importar."
+            )
+        if erros:
+            return [], erros
+        return [self.condominios[n.lower()] for n in nomes], erros
+
+    def _processar_linha(self, numero, linha):
+        """Valida uma linha e a acumula no lote pendente."""
+        dados, erros = validar_linha(self.tipo, linha)
+
+        if not erros and self.tipo == 'areas':
+            ids, erros = self._resolver_condominios([dados.pop('condominio')])
+            dados['condominio_id'] = ids[0] if ids else None
+
+        if not erros and self.tipo == 'usuarios' and dados['condominios']:
+            nomes = [n.strip() for n in dados['condominios'].split(';') if n.strip()]
+            dados['condominios'], erros = self._resolver_condominios(nomes)
+
+        if erros:
+            self.resultado['erros'].append({'linha': numero, 'erros': erros})
+            return
+
+        chave = self._chave(dados)
+        if chave is not None:
+            if chave in self.existentes:
+                self.resultado['ignorados'] += 1
+                return
+            # Também descarta repetições dentro do próprio arquivo
+            self.existentes.add(chave)
+
+        self.pendentes.append((numero, dados))
+        if len(self.pendentes) >= self.lote:
+            self._inserir_lote()
+
+    def _inserir_lote(self):
+        """
+        Insere os registros pendentes em uma única instrução e faz o commit do lote.
+        Um lote recusado pelo banco (ex.: registro criado por outro usuário durante a
+        importação) é desfeito por inteiro e entra no relatório de erros; os lotes
+        anteriores permanecem importados.
+        """
+        pendentes, self.pendentes = self.pendentes, []
+        lote = [dados for _, dados in pendentes]
+
+        try:
+            self._inserir(lote)
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            logger.warning(f"Lote de {self.tipo} recusado pelo banco na importação: {str(e.orig)}")
+            self.resultado['nao_importados'] += len(lote)
+            self.resultado['erros'].append({
+                'linha': f'{pendentes[0][0]}-{pendentes[-1][0]}' if len(pendentes) > 1 else pendentes[0][0],
+                'erros': [
+                    f'Lote de {len(lote)} registro(s) não importado: conflito com um cadastro '
+                    f'existente no banco. Corrija ou remova as linhas e importe-as novamente.'
+                ]
+            })
+            return
+        self.resultado['importados'] += len(lote)
+
+    def _inserir(self, lote):
+        """Executa as inserções de um lote, sem fazer o commit."""
+        agora = datetime.now(FORTALEZA_TZ)
+
+        if self.tipo == 'condominios':
+            for dados in lote:
+                dados.update(administradora_id=self.administradora_id, ativo=True)
+            db.session.execute(insert(Condominio), lote)
+        elif self.tipo == 'areas':
+            db.session.execute(insert(Area), lote)
+        elif self.tipo == 'fornecedores':
+            for dados in lote:
+                dados['ativo'] = True
+            db.session.execute(insert(Fornecedor), lote)
+        else:
+            self._inserir_usuarios(lote, agora)
+
+    def _inserir_usuarios(self, lote, agora):
+        """Insere usuários com os hashes de senha gerados no pool de processos e associa os condomínios."""
+        senhas = [dados['senha'] or secrets.token_urlsafe(16) for dados in lote]
+        hashes = gerar_hashes_senhas(senhas)
+
+        db.session.execute(insert(User), [
+            {
+                'name': dados['nome'],
+                'email': dados['email'],
+                'password': hash_senha,
+                'is_admin': False,
+                'is_pending': False,
+                'is_active': True,
+            }
+            for dados, hash_senha in zip(lote, hashes)
+        ])
+
+        # IDs recuperados pelo email, de forma portável (sem RETURNING em lote)
+        ids = dict(db.session.execute(
+            select(User.email, User.id).where(User.email.in_([d['email'] for d in lote]))
+        ).all())
+        associacoes = [
+            {'user_id': ids[dados['email']], 'condominio_id': condominio_id, 'created_at': agora}
+            for dados in lote for condominio_id in (dados['condominios'] or [])
+        ]
+        if associacoes:
+            db.session.execute(insert(UserCondominio), associacoes)
+
+
+def importar_arquivo(arquivo, nome_arquivo, tipo, administradora_id=None):
+    """
+    Importa um arquivo de cadastros.
+
+    Args:
+        arquivo: Arquivo binário aberto
+        nome_arquivo (str): Nome original do arquivo
+        tipo (str): Tipo de cadastro (chave de TIPOS_IMPORTACAO)
+        administradora_id (int, optional): Administradora de condomínios e áreas
+
+    Returns:
+        dict: Resultado da importação com o relatório de erros; linhas com erro não impedem a
+        importação das demais, e um lote recusado pelo banco conta em nao_importados
+
+    Raises:
+        ErroImportacao: Se o arquivo ou os parâmetros forem inválidos
+    """
+    importador = Importador(tipo, administradora_id)
+    return importador.processar(ler_linhas(arquivo, nome_arquivo))
+
+
+def relatorio_erros_csv(resultado):
+    """
+    Gera o relatório de erros da importação em CSV.
+
+    Args:
+        resultado (dict): Retorno de importar_arquivo
+
+    Returns:
+        str: Conteúdo CSV com linha e mensagens de erro
+    """
+    saida = io.StringIO()
+    escritor = csv.writer(saida, delimiter=';')
+    escritor.writerow(['linha', 'erros'])
+    for erro in resultado['erros']:
+        escritor.writerow([erro['linha'], ' | '.join(erro['erros'])])
+    return saida.getvalue()
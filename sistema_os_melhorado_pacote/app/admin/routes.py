@@ -2,16 +2,20 @@
 Rotas de administração.
 Este módulo implementa as rotas relacionadas à administração do sistema.
 """
-from flask import render_template, redirect, url_for, flash, request, current_app
-from flask_login import current_user, login_required
+from flask import render_template, redirect, url_for, flash, request, current_app, jsonify
+from flask_login import current_user, login_required, login_user
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from app.admin import admin_bp
 from app.admin.forms import (
     AdministradoraForm, CondominioForm, UserForm, RoleForm, 
-    AreaForm, FornecedorForm, ApproveUserForm
+    AreaForm, FornecedorForm, ApproveUserForm, ImportacaoForm
 )
+from app.admin.importacao import (
+    TIPOS_IMPORTACAO, ErroImportacao, importar_arquivo, normalizar_documento, relatorio_erros_csv
+)
+from app.utils.usuario_cache import invalidar_usuario, invalidar_usuarios_papel
 from app.models import (
     User, Role, Condominio, Administradora, Area, Fornecedor, 
     UserCondominio, UserRole, ActivityLog, OrdemServico
@@ -19,6 +23,8 @@ from app.models import (
 from app.extensions import db
 from app.utils.decorators import admin_required, log_activity
 from app.utils.email import send_notification_email, send_welcome_email
+from app.utils.opcoes import opcoes
+from app.utils.sessoes import encerrar_sessoes_usuario
 
 # Timezone para datas
 FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
@@ -78,8 +84,8 @@ def create_user():
     form = UserForm()
     
     # Carregar opções para os campos de seleção
-    form.condominios.choices = [(c.id, c.nome) for c in Condominio.query.all()]
-    form.roles.choices = [(r.id, r.name) for r in Role.query.all()]
+    form.condominios.choices = opcoes('condominios')
+    form.roles.choices = opcoes('roles')
     
     if form.validate_on_submit():
         user = User(
@@ -139,8 +145,8 @@ def edit_user(id):
     form = UserForm(obj=user)
     
     # Carregar opções para os campos de seleção
-    form.condominios.choices = [(c.id, c.nome) for c in Condominio.query.all()]
-    form.roles.choices = [(r.id, r.name) for r in Role.query.all()]
+    form.condominios.choices = opcoes('condominios')
+    form.roles.choices = opcoes('roles')
     
     # Pré-selecionar valores atuais
     if request.method == 'GET':
@@ -156,6 +162,10 @@ def edit_user(id):
         if form.password.data:
             user.set_password(form.password.data)
         
+        # Desconecta o usuário em todos os workers ao desativar a conta ou trocar a senha
+        if not user.is_active or form.password.data:
+            encerrar_sessoes_usuario(user.id, manter_atual=user.id == current_user.id)
+        
         # Atualizar associações de condomínios
         UserCondominio.query.filter_by(user_id=user.id).delete()
         for condominio_id in form.condominios.data:
@@ -174,7 +184,11 @@ def edit_user(id):
             )
             db.session.add(user_role)
         
+        invalidar_usuario(user.id)
         db.session.commit()
+        if form.password.data and user.id == current_user.id:
+            # A nova versão da credencial invalidaria a própria sessão do administrador
+            login_user(user)
         flash(f'Usuário {user.name} atualizado com sucesso!', 'success')
         return redirect(url_for('admin.users'))
     
@@ -194,8 +208,10 @@ def delete_user(id):
         return redirect(url_for('admin.users'))
     
     name = user.name
+    invalidar_usuario(user.id)
     db.session.delete(user)
     db.session.commit()
+    encerrar_sessoes_usuario(id)
     
     flash(f'Usuário {name} excluído com sucesso!', 'success')
     return redirect(url_for('admin.users'))
@@ -216,7 +232,7 @@ def approve_user(id):
     form = ApproveUserForm()
     
     # Carregar opções para os campos de seleção
-    form.roles.choices = [(r.id, r.name) for r in Role.query.all()]
+    form.roles.choices = opcoes('roles')
     
     # Pré-selecionar papel padrão
     if request.method == 'GET':
@@ -235,6 +251,7 @@ def approve_user(id):
             )
             db.session.add(user_role)
         
+        invalidar_usuario(user.id)
         db.session.commit()
         
         # Enviar email de aprovação
@@ -307,6 +324,7 @@ def edit_role(id):
         role.description = form.description.data
         role.permissions = ','.join(form.permissions.data)
         
+        invalidar_usuarios_papel(role.id)
         db.session.commit()
         flash(f'Papel {role.name} atualizado com sucesso!', 'success')
         return redirect(url_for('admin.roles'))
@@ -458,9 +476,7 @@ def create_condominio():
     form = CondominioForm()
     
     # Carregar administradoras para o select
-    form.administradora_id.choices = [
-        (a.id, a.nome) for a in Administradora.query.filter_by(ativa=True).all()
-    ]
+    form.administradora_id.choices = opcoes('administradoras_ativas')
     
     if form.validate_on_submit():
         condominio = Condominio(
@@ -494,9 +510,7 @@ def edit_condominio(id):
     form = CondominioForm(obj=condominio)
     
     # Carregar administradoras para o select
-    form.administradora_id.choices = [
-        (a.id, a.nome) for a in Administradora.query.filter_by(ativa=True).all()
-    ]
+    form.administradora_id.choices = opcoes('administradoras_ativas')
     
     if form.validate_on_submit():
         condominio.nome = form.nome.data
@@ -572,9 +586,7 @@ def create_area():
     form = AreaForm()
     
     # Carregar condomínios para o select
-    form.condominio_id.choices = [
-        (c.id, c.nome) for c in Condominio.query.filter_by(ativo=True).all()
-    ]
+    form.condominio_id.choices = opcoes('condominios_ativos')
     
     if form.validate_on_submit():
         area = Area(
@@ -602,9 +614,7 @@ def edit_area(id):
     form = AreaForm(obj=area)
     
     # Carregar condomínios para o select
-    form.condominio_id.choices = [
-        (c.id, c.nome) for c in Condominio.query.filter_by(ativo=True).all()
-    ]
+    form.condominio_id.choices = opcoes('condominios_ativos')
     
     if form.validate_on_submit():
         area.nome = form.nome.data
@@ -663,7 +673,7 @@ def create_fornecedor():
     if form.validate_on_submit():
         fornecedor = Fornecedor(
             nome=form.nome.data,
-            cnpj_cpf=form.cnpj_cpf.data,
+            cnpj_cpf=normalizar_documento(form.cnpj_cpf.data or '') or None,
             email=form.email.data,
             telefone=form.telefone.data,
             endereco=form.endereco.data,
@@ -692,7 +702,7 @@ def edit_fornecedor(id):
     
     if form.validate_on_submit():
         fornecedor.nome = form.nome.data
-        fornecedor.cnpj_cpf = form.cnpj_cpf.data
+        fornecedor.cnpj_cpf = normalizar_documento(form.cnpj_cpf.data or '') or None
         fornecedor.email = form.email.data
         fornecedor.telefone = form.telefone.data
         fornecedor.endereco = form.endereco.data
@@ -758,3 +768,107 @@ def activity_logs():
     )
     
     return render_template('admin/logs.html', title='Logs de Atividade', logs=logs)
+
+
+@admin_bp.route('/consultas-lentas')
+@login_required
+@admin_required
+def slow_queries():
+    """Rota para visualizar o registro de consultas lentas."""
+    query_log = current_app.extensions.get('slow_query_log')
+    entradas = query_log.entradas() if query_log else []
+    
+    # Filtrar por rota, se especificado
+    rota = request.args.get('rota')
+    if rota:
+        entradas = [e for e in entradas if e['rota'] and rota in e['rota']]
+    
+    return render_template(
+        'admin/slow_queries.html',
+        title='Consultas Lentas',
+        entradas=entradas,
+        rota=rota,
+        habilitado=query_log is not None,
+        limite_ms=current_app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    )
+
+
+@admin_bp.route('/consultas-lentas/limpar', methods=['POST'])
+@login_required
+@admin_required
+@log_activity('clear_slow_queries')
+def clear_slow_queries():
+    """Rota para limpar o registro de consultas lentas."""
+    query_log = current_app.extensions.get('slow_query_log')
+    if query_log:
+        query_log.limpar()
+    
+    flash('Registro de consultas lentas limpo com sucesso!', 'success')
+    return redirect(url_for('admin.slow_queries'))
+
+
+@admin_bp.route('/metricas/pool')
+@login_required
+@admin_required
+def pool_metrics():
+    """Rota com as métricas dos pools de conexões em JSON."""
+    pools = current_app.extensions.get('pool_stats', {})
+    return jsonify({nome: estatisticas.metricas() for nome, estatisticas in pools.items()})
+
+
+@admin_bp.route('/importar', methods=['GET', 'POST'])
+@login_required
+@admin_required
+@log_activity('bulk_import')
+def importar():
+    """Rota para importação em lote de condomínios, áreas, fornecedores e usuários."""
+    form = ImportacaoForm()
+    form.tipo.choices = list(TIPOS_IMPORTACAO.items())
+    form.administradora_id.choices = opcoes('administradoras', vazio='Selecione...')
+    
+    resultado = None
+    relatorio = None
+    if form.validate_on_submit():
+        arquivo = form.arquivo.data
+        try:
+            resultado = importar_arquivo(
+                arquivo.stream,
+                arquivo.filename,
+                form.tipo.data,
+                form.administradora_id.data or None
+            )
+        except ErroImportacao as e:
+            flash(str(e), 'danger')
+        else:
+            relatorio = relatorio_erros_csv(resultado) if resultado['erros'] else None
+            mensagem = (
+                f"{resultado['importados']} registro(s) importado(s), "
+                f"{resultado['ignorados']} já existente(s), {len(resultado['erros'])} erro(s)."
+            )
+            if resultado['nao_importados']:
+                mensagem += f" {resultado['nao_importados']} registro(s) recusado(s) pelo banco."
+            if resultado['erros']:
+                # Os registros válidos já foram gravados; só as linhas do relatório ficaram de fora
+                mensagem = 'Importação parcial: ' + mensagem + ' Corrija as linhas do relatório e importe-as novamente.'
+            flash(mensagem, 'success' if not resultado['erros'] else 'warning')
+    
+    return render_template(
+        'admin/importar.html',
+        title='Importar Cadastros',
+        form=form,
+        resultado=resultado,
+        relatorio=relatorio
+    )
+
+
+@admin_bp.route('/metricas/senhas')
+@login_required
+@admin_required
+def password_hash_metrics():
+    """Rota com as métricas de hash e verificação de senhas do worker atual em JSON."""
+    from app.utils.senhas import metricas
+    return jsonify({
+        'custo': current_app.config.get('BCRYPT_LOG_ROUNDS'),
+        'processos': current_app.config.get('PASSWORD_HASH_WORKERS'),
+        'operacoes': metricas()
+    })
@@ -0,0 +1,299 @@
+"""
+Consultas da API de leitura.
+Este módulo monta as instruções SQL das rotas de leitura da API (ordens, condomínios, áreas,
+fornecedores, estatísticas e o bootstrap do aplicativo) a partir do usuário autenticado, aplicando as mesmas regras de escopo nas rotas
+síncronas (app.api.routes) e na API assíncrona (app.api_async), que só diferem na execução.
+"""
+import hashlib
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import orjson
+
+from sqlalchemy import case, func, select
+
+from app.api.serializacao import ORDEM_LISTA, ORDEM_DETALHE, COMENTARIO, STATUS_LOG, ARQUIVO
+from app.models import OrdemServico, OrdemComentario, OrdemStatusLog, OrdemArquivo
+from app.models import Administradora, Area, Condominio, Fornecedor
+from app.models.ordem import STATUS_PENDENTES
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Coleções que podem ser incluídas nos detalhes de uma ordem
+COLECOES_ORDEM = {
+    'comentarios': (COMENTARIO, OrdemComentario.ordem_id, OrdemComentario.data_criacao.desc()),
+    'logs': (STATUS_LOG, OrdemStatusLog.ordem_id, OrdemStatusLog.data_mudanca.desc()),
+    'arquivos': (ARQUIVO, OrdemArquivo.ordem_id, OrdemArquivo.id),
+}
+
+# Campos das ordens abertas no bootstrap: os da listagem e o condomínio, para agrupar no cliente
+CAMPOS_BOOTSTRAP_ORDENS = ORDEM_LISTA.padrao + ('condominio_id',)
+
+# Contagens das estatísticas: chave da resposta -> (coluna, valor)
+CONTAGENS_ESTATISTICAS = {
+    'por_status': {
+        'abertas': (OrdemServico.status, 'Aberta'),
+        'andamento': (OrdemServico.status, 'Em Andamento'),
+        'concluidas': (OrdemServico.status, 'Concluída'),
+    },
+    'por_prioridade': {
+        'alta': (OrdemServico.prioridade, 'Alta'),
+        'normal': (OrdemServico.prioridade, 'Normal'),
+        'baixa': (OrdemServico.prioridade, 'Baixa'),
+    },
+}
+
+
+def filtros_ordens(usuario, condominio_id=None, status=None, prioridade=None, data_inicial=None, data_final=None):
+    """
+    Monta os filtros da listagem de ordens, restritos aos condomínios do usuário.
+
+    Args:
+        usuario: Usuário autenticado (is_admin e condominio_ids)
+        condominio_id (int, optional): Condomínio
+        status (str, optional): Status
+        prioridade (str, optional): Prioridade
+        data_inicial (str, optional): Data de criação mínima (AAAA-MM-DD)
+        data_final (str, optional): Data de criação máxima (AAAA-MM-DD)
+
+    Returns:
+        list: Condições para o where da consulta
+
+    Raises:
+        ValueError: Se alguma data não estiver no formato AAAA-MM-DD
+    """
+    filtros = []
+
+    if not usuario.is_admin:
+        filtros.append(OrdemServico.condominio_id.in_(usuario.condominio_ids))
+
+    if condominio_id:
+        filtros.append(OrdemServico.condominio_id == condominio_id)
+
+    if status:
+        filtros.append(OrdemServico.status == status)
+
+    if prioridade:
+        filtros.append(OrdemServico.prioridade == prioridade)
+
+    if data_inicial:
+        data_inicial_obj = datetime.strptime(data_inicial, '%Y-%m-%d').replace(tzinfo=FORTALEZA_TZ)
+        filtros.append(OrdemServico.data_criacao >= data_inicial_obj)
+
+    if data_final:
+        data_final_obj = datetime.strptime(data_final, '%Y-%m-%d').replace(
+            hour=23, minute=59, second=59, tzinfo=FORTALEZA_TZ)
+        filtros.append(OrdemServico.data_criacao <= data_final_obj)
+
+    return filtros
+
+
+def consulta_pagina_ordens(campos, filtros, page, per_page):
+    """
+    Monta a consulta de uma página da listagem de ordens, da mais recente para a mais antiga.
+
+    Args:
+        campos (tuple): Campos de ORDEM_LISTA
+        filtros (list): Resultado de filtros_ordens
+        page (int): Página, a partir de 1
+        per_page (int): Ordens por página
+
+    Returns:
+        tuple: Consulta da página e consulta do total de ordens
+    """
+    consulta = ORDEM_LISTA.consulta(campos).where(*filtros).order_by(
+        OrdemServico.data_criacao.desc()
+    ).limit(per_page).offset((page - 1) * per_page)
+    return consulta, select(func.count(OrdemServico.id)).where(*filtros)
+
+
+def consulta_ordem(id, colunas):
+    """
+    Monta a consulta dos detalhes de uma ordem, precedidos do condomínio para o controle de acesso.
+
+    Args:
+        id (int): ID da ordem
+        colunas (tuple): Campos de ORDEM_DETALHE (sem as coleções)
+
+    Returns:
+        Select: Linha (condominio_id, *campos)
+    """
+    if colunas:
+        consulta = ORDEM_DETALHE.consulta(colunas, OrdemServico.condominio_id)
+    else:
+        consulta = select(OrdemServico.condominio_id)
+    return consulta.where(OrdemServico.id == id)
+
+
+def consulta_colecao(nome, id):
+    """
+    Monta a consulta de uma coleção dos detalhes de uma ordem.
+
+    Args:
+        nome (str): Chave de COLECOES_ORDEM
+        id (int): ID da ordem
+
+    Returns:
+        tuple: Recurso da coleção e consulta com os campos padrão do recurso
+    """
+    recurso, chave, ordem = COLECOES_ORDEM[nome]
+    return recurso, recurso.consulta(recurso.padrao).where(chave == id).order_by(ordem)
+
+
+def consulta_condominios(usuario):
+    """
+    Monta a consulta dos condomínios visíveis ao usuário: todos os ativos para administradores,
+    os vinculados ao usuário para os demais.
+
+    Args:
+        usuario: Usuário autenticado (is_admin e condominio_ids)
+
+    Returns:
+        Select: Linhas (id, nome, administradora)
+    """
+    consulta = select(Condominio.id, Condominio.nome, Administradora.nome.label('administradora')).outerjoin(
+        Administradora, Administradora.id == Condominio.administradora_id
+    )
+    if usuario.is_admin:
+        consulta = consulta.where(Condominio.ativo == True)
+    else:
+        consulta = consulta.where(Condominio.id.in_(usuario.condominio_ids))
+    return consulta.order_by(Condominio.nome)
+
+
+def consulta_areas(condominio_ids):
+    """
+    Monta a consulta das áreas de um conjunto de condomínios, em uma única instrução (IN).
+
+    Args:
+        condominio_ids (iterable): IDs dos condomínios
+
+    Returns:
+        Select: Linhas (condominio_id, id, nome, descricao), por condomínio e nome
+    """
+    return select(Area.condominio_id, Area.id, Area.nome, Area.descricao).where(
+        Area.condominio_id.in_(list(condominio_ids))
+    ).order_by(Area.condominio_id, Area.nome)
+
+
+def consulta_fornecedores():
+    """
+    Monta a consulta dos fornecedores ativos.
+
+    Returns:
+        Select: Linhas (id, nome, tipo_servico), por nome
+    """
+    return select(Fornecedor.id, Fornecedor.nome, Fornecedor.tipo_servico).where(
+        Fornecedor.ativo == True
+    ).order_by(Fornecedor.nome)
+
+
+def consulta_ordens_abertas(condominio_ids, limite):
+    """
+    Monta a consulta das ordens não concluídas nem canceladas de um conjunto de condomínios.
+
+    Args:
+        condominio_ids (iterable): IDs dos condomínios
+        limite (int): Máximo de ordens, das mais recentes para as mais antigas
+
+    Returns:
+        Select: Linhas com CAMPOS_BOOTSTRAP_ORDENS
+    """
+    return ORDEM_LISTA.consulta(CAMPOS_BOOTSTRAP_ORDENS).where(
+        OrdemServico.condominio_id.in_(list(condominio_ids)),
+        OrdemServico.status.in_(STATUS_PENDENTES),
+    ).order_by(OrdemServico.data_criacao.desc()).limit(limite)
+
+
+def serializar_condominios(linhas):
+    """Converte as linhas de consulta_condominios na resposta da API."""
+    return [
+        {'id': linha.id, 'nome': linha.nome, 'administradora': linha.administradora}
+        for linha in linhas
+    ]
+
+
+def serializar_areas(linhas):
+    """Converte as linhas de consulta_areas na resposta da API (sem o condomínio)."""
+    return [{'id': linha.id, 'nome': linha.nome, 'descricao': linha.descricao} for linha in linhas]
+
+
+def serializar_fornecedores(linhas):
+    """Converte as linhas de consulta_fornecedores na resposta da API."""
+    return [{'id': linha.id, 'nome': linha.nome, 'tipo_servico': linha.tipo_servico} for linha in linhas]
+
+
+def montar_bootstrap(condominios, areas, fornecedores, ordens, limite):
+    """
+    Monta o payload de /api/bootstrap e a sua versão.
+    A versão é um hash do conteúdo: é igual em todos os workers para os mesmos dados e serve de
+    ETag, para que o cliente revalide o payload em cache com If-None-Match.
+
+    Args:
+        condominios (list): Linhas de consulta_condominios
+        areas (list): Linhas de consulta_areas
+        fornecedores (list): Linhas de consulta_fornecedores
+        ordens (list): Linhas de consulta_ordens_abertas, com até limite + 1 ordens
+        limite (int): Máximo de ordens no payload
+
+    Returns:
+        tuple: Payload e versão
+    """
+    areas_por_condominio = {linha.id: [] for linha in condominios}
+    for linha in areas:
+        areas_por_condominio[linha.condominio_id].append(linha)
+
+    dados = {
+        'condominios': serializar_condominios(condominios),
+        'areas': {id: serializar_areas(linhas) for id, linhas in areas_por_condominio.items()},
+        'fornecedores': serializar_fornecedores(fornecedores),
+        'ordens_abertas': ORDEM_LISTA.serializar(ordens[:limite], CAMPOS_BOOTSTRAP_ORDENS),
+        'ordens_completas': len(ordens) <= limite,
+    }
+    versao = hashlib.blake2b(
+        orjson.dumps(dados, option=orjson.OPT_NON_STR_KEYS), digest_size=8
+    ).hexdigest()
+    return {'versao': versao, **dados}, versao
+
+
+def consulta_estatisticas(usuario, condominio_id=None):
+    """
+    Monta a consulta das estatísticas gerais: o total e as contagens por status e prioridade
+    em uma única passagem pelas ordens.
+
+    Args:
+        usuario: Usuário autenticado (is_admin e condominio_ids)
+        condominio_id (int, optional): Condomínio
+
+    Returns:
+        Select: Uma linha com o total seguido das contagens de CONTAGENS_ESTATISTICAS
+    """
+    contagens = [
+        func.coalesce(func.sum(case((coluna == valor, 1), else_=0)), 0)
+        for grupo in CONTAGENS_ESTATISTICAS.values()
+        for coluna, valor in grupo.values()
+    ]
+    consulta = select(func.count(OrdemServico.id), *contagens)
+    if not usuario.is_admin:
+        consulta = consulta.where(OrdemServico.condominio_id.in_(usuario.condominio_ids))
+    if condominio_id:
+        consulta = consulta.where(OrdemServico.condominio_id == condominio_id)
+    return consulta
+
+
+def montar_estatisticas(linha):
+    """
+    Converte a linha de consulta_estatisticas na resposta da API.
+
+    Args:
+        linha (Row): Resultado de consulta_estatisticas
+
+    Returns:
+        dict: total_ordens, por_status e por_prioridade
+    """
+    valores = iter(linha[1:])
+    resultado = {'total_ordens': linha[0]}
+    for grupo, contagens in CONTAGENS_ESTATISTICAS.items():
+        resultado[grupo] = {chave: int(next(valores)) for chave in contagens}
+    return resultado
@@ -2,15 +2,27 @@
 Rotas da API.
 Este módulo implementa as rotas da API REST para acesso programático ao sistema.
 """
-from flask import jsonify, request, current_app
+from flask import jsonify, request, current_app, abort
 from flask_login import current_user, login_required
 from datetime import datetime
+from math import ceil
 from zoneinfo import ZoneInfo
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.api import api_bp
-from app.models import OrdemServico, Condominio, User, Area, Fornecedor
+from app.api.consultas import (
+    COLECOES_ORDEM, consulta_areas, consulta_colecao, consulta_condominios, consulta_estatisticas,
+    consulta_fornecedores, consulta_ordem, consulta_ordens_abertas, consulta_pagina_ordens, filtros_ordens,
+    montar_bootstrap, montar_estatisticas, serializar_areas, serializar_condominios, serializar_fornecedores
+)
+from app.api.serializacao import CampoInvalido, resposta_json, ORDEM_LISTA, ORDEM_DETALHE
+from app.api.sincronizacao import (
+    SincronizacaoInvalida, aplicar_operacoes, interpretar_token, puxar_alteracoes, validar_operacoes
+)
+from app.models import OrdemServico
 from app.extensions import db
-from app.utils.decorators import permission_required
+from app.utils.decorators import permission_required, use_replica
 
 # Timezone para datas
 FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
@@ -18,39 +30,29 @@ FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
 
 @api_bp.route('/ordens', methods=['GET'])
 @login_required
+@use_replica
 def get_ordens():
-    """Endpoint para obter ordens de serviço."""
-    # Obter parâmetros de filtro
-    condominio_id = request.args.get('condominio_id', type=int)
-    status = request.args.get('status')
-    prioridade = request.args.get('prioridade')
-    data_inicial = request.args.get('data_inicial')
-    data_final = request.args.get('data_final')
-    
-    # Construir query base
-    query = OrdemServico.query
-    
-    # Filtrar por condomínios do usuário
-    if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
-    
-    # Aplicar filtros
-    if condominio_id:
-        query = query.filter_by(condominio_id=condominio_id)
-    
-    if status:
-        query = query.filter_by(status=status)
-    
-    if prioridade:
-        query = query.filter_by(prioridade=prioridade)
-    
-    if data_inicial:
-        data_inicial_obj = datetime.strptime(data_inicial, '%Y-%m-%d').replace(tzinfo=FORTALEZA_TZ)
-        query = query.filter(OrdemServico.data_criacao >= data_inicial_obj)
-    
-    if data_final:
-        data_final_obj = datetime.strptime(data_final, '%Y-%m-%d').replace(hour=23, minute=59, second=59, tzinfo=FORTALEZA_TZ)
-        query = query.filter(OrdemServico.data_criacao <= data_final_obj)
+    """
+    Endpoint para obter ordens de serviço.
+    Aceita ?fields=id,numero,status para retornar apenas os campos informados.
+    """
+    try:
+        campos = ORDEM_LISTA.campos_solicitados()
+    except CampoInvalido as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Filtros, restritos aos condomínios do usuário
+    try:
+        filtros = filtros_ordens(
+            current_user,
+            condominio_id=request.args.get('condominio_id', type=int),
+            status=request.args.get('status'),
+            prioridade=request.args.get('prioridade'),
+            data_inicial=request.args.get('data_inicial'),
+            data_final=request.args.get('data_final'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Paginação
     page = request.args.get('page', 1, type=int)
@@ -60,29 +62,22 @@ def get_ordens():
     if per_page > 100:
         per_page = 100
     
-    # Executar query com paginação
-    ordens_paginadas = query.order_by(OrdemServico.data_criacao.desc()).paginate(page=page, per_page=per_page)
-    
-    # Formatar resultados
-    ordens = []
-    for ordem in ordens_paginadas.items:
-        ordens.append({
-            'id': ordem.id,
-            'numero': ordem.numero,
-            'titulo': ordem.titulo,
-            'descricao': ordem.descricao,
-            'status': ordem.status,
-            'prioridade': ordem.prioridade,
-            'tipo': ordem.tipo,
-            'condominio': ordem.condominio.nome,
-            'data_criacao': ordem.data_criacao.isoformat() if ordem.data_criacao else None,
-            'data_conclusao': ordem.data_conclusao.isoformat() if ordem.data_conclusao else None
-        })
+    if page < 1 or per_page < 1:
+        abort(404)
     
-    return jsonify({
-        'ordens': ordens,
-        'total': ordens_paginadas.total,
-        'pages': ordens_paginadas.pages,
+    # Selecionar apenas as colunas dos campos pedidos
+    consulta, contagem = consulta_pagina_ordens(campos, filtros, page, per_page)
+    linhas = db.session.execute(consulta).all()
+    
+    if page > 1 and not linhas:
+        abort(404)
+    
+    total = db.session.execute(contagem).scalar()
+    
+    return resposta_json({
+        'ordens': ORDEM_LISTA.serializar(linhas, campos),
+        'total': total,
+        'pages': ceil(total / per_page) if total else 0,
         'page': page,
         'per_page': per_page
     })
@@ -91,109 +86,42 @@ def get_ordens():
 @api_bp.route('/ordens/<int:id>', methods=['GET'])
 @login_required
 def get_ordem(id):
-    """Endpoint para obter detalhes de uma ordem de serviço."""
-    ordem = OrdemServico.query.get_or_404(id)
+    """
+    Endpoint para obter detalhes de uma ordem de serviço.
+    Aceita ?fields= com os campos da ordem e as coleções comentarios, logs e arquivos.
+    """
+    try:
+        campos = ORDEM_DETALHE.campos_solicitados(adicionais=tuple(COLECOES_ORDEM))
+    except CampoInvalido as e:
+        return jsonify({'error': str(e)}), 400
+
+    colunas = tuple(c for c in campos if c not in COLECOES_ORDEM)
+    linha = db.session.execute(consulta_ordem(id, colunas)).first()
+    
+    if linha is None:
+        abort(404)
     
     # Verificar se o usuário tem acesso ao condomínio da ordem
-    if not current_user.is_admin and ordem.condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and linha[0] not in current_user.condominio_ids:
         return jsonify({'error': 'Acesso negado'}), 403
     
-    # Formatar comentários
-    comentarios = []
-    for comentario in ordem.comentarios:
-        comentarios.append({
-            'id': comentario.id,
-            'texto': comentario.texto,
-            'usuario': comentario.usuario.name,
-            'data': comentario.data_criacao.isoformat()
-        })
-    
-    # Formatar logs de status
-    logs = []
-    for log in ordem.status_logs:
-        logs.append({
-            'id': log.id,
-            'status_anterior': log.status_anterior,
-            'status_novo': log.status_novo,
-            'usuario': log.usuario.name,
-            'data': log.data_mudanca.isoformat(),
-            'observacao': log.observacao
-        })
-    
-    # Formatar arquivos
-    arquivos = []
-    for arquivo in ordem.arquivos:
-        arquivos.append({
-            'id': arquivo.id,
-            'nome': arquivo.nome,
-            'tipo': arquivo.tipo,
-            'data_upload': arquivo.data_upload.isoformat()
-        })
-    
-    # Formatar resultado
-    result = {
-        'id': ordem.id,
-        'numero': ordem.numero,
-        'titulo': ordem.titulo,
-        'descricao': ordem.descricao,
-        'status': ordem.status,
-        'prioridade': ordem.prioridade,
-        'tipo': ordem.tipo,
-        'observacoes': ordem.observacoes,
-        'valor_estimado': float(ordem.valor_estimado) if ordem.valor_estimado else None,
-        'valor_final': float(ordem.valor_final) if ordem.valor_final else None,
-        'condominio': {
-            'id': ordem.condominio.id,
-            'nome': ordem.condominio.nome
-        },
-        'area': {
-            'id': ordem.area.id,
-            'nome': ordem.area.nome
-        } if ordem.area else None,
-        'fornecedor': {
-            'id': ordem.fornecedor.id,
-            'nome': ordem.fornecedor.nome
-        } if ordem.fornecedor else None,
-        'responsavel': {
-            'id': ordem.user.id,
-            'nome': ordem.user.name
-        } if ordem.user else None,
-        'criador': {
-            'id': ordem.criador.id,
-            'nome': ordem.criador.name
-        },
-        'data_criacao': ordem.data_criacao.isoformat() if ordem.data_criacao else None,
-        'data_inicio': ordem.data_inicio.isoformat() if ordem.data_inicio else None,
-        'data_previsao': ordem.data_previsao.isoformat() if ordem.data_previsao else None,
-        'data_conclusao': ordem.data_conclusao.isoformat() if ordem.data_conclusao else None,
-        'comentarios': comentarios,
-        'logs': logs,
-        'arquivos': arquivos
-    }
-    
-    return jsonify(result)
+    result = ORDEM_DETALHE.serializar([linha], colunas, deslocamento=1)[0] if colunas else {}
+    
+    # Comentários, logs de status e arquivos, uma consulta por coleção pedida
+    for nome in campos:
+        if nome not in COLECOES_ORDEM:
+            continue
+        recurso, consulta = consulta_colecao(nome, id)
+        result[nome] = recurso.serializar(db.session.execute(consulta).all(), recurso.padrao)
+    
+    return resposta_json(result)
 
 
 @api_bp.route('/condominios', methods=['GET'])
 @login_required
 def get_condominios():
     """Endpoint para obter condomínios."""
-    # Construir query base
-    if current_user.is_admin:
-        condominios = Condominio.query.filter_by(ativo=True).all()
-    else:
-        condominios = current_user.condominios
-    
-    # Formatar resultados
-    result = []
-    for condominio in condominios:
-        result.append({
-            'id': condominio.id,
-            'nome': condominio.nome,
-            'administradora': condominio.administradora.nome
-        })
-    
-    return jsonify(result)
+    return jsonify(serializar_condominios(db.session.execute(consulta_condominios(current_user)).all()))
 
 
 @api_bp.route('/areas/<int:condominio_id>', methods=['GET'])
@@ -201,85 +129,55 @@ def get_condominios():
 def get_areas(condominio_id):
     """Endpoint para obter áreas de um condomínio."""
     # Verificar se o usuário tem acesso ao condomínio
-    if not current_user.is_admin and condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and condominio_id not in current_user.condominio_ids:
         return jsonify({'error': 'Acesso negado'}), 403
     
-    # Obter áreas
-    areas = Area.query.filter_by(condominio_id=condominio_id).all()
-    
-    # Formatar resultados
-    result = []
-    for area in areas:
-        result.append({
-            'id': area.id,
-            'nome': area.nome,
-            'descricao': area.descricao
-        })
-    
-    return jsonify(result)
+    return jsonify(serializar_areas(db.session.execute(consulta_areas([condominio_id])).all()))
 
 
 @api_bp.route('/fornecedores', methods=['GET'])
 @login_required
 def get_fornecedores():
     """Endpoint para obter fornecedores."""
-    # Obter fornecedores
-    fornecedores = Fornecedor.query.filter_by(ativo=True).all()
-    
-    # Formatar resultados
-    result = []
-    for fornecedor in fornecedores:
-        result.append({
-            'id': fornecedor.id,
-            'nome': fornecedor.nome,
-            'tipo_servico': fornecedor.tipo_servico
-        })
-    
-    return jsonify(result)
+    return jsonify(serializar_fornecedores(db.session.execute(consulta_fornecedores()).all()))
+
+
+@api_bp.route('/bootstrap', methods=['GET'])
+@login_required
+@use_replica
+def get_bootstrap():
+    """
+    Endpoint com os dados iniciais do aplicativo em uma única resposta: condomínios do usuário,
+    áreas de cada condomínio, fornecedores ativos e ordens abertas, com uma consulta por tipo.
+    A versão do payload é o ETag: com If-None-Match da versão atual, responde 304 sem corpo.
+    """
+    limite = current_app.config.get('API_BOOTSTRAP_MAX_ORDENS', 500)
+    condominios = db.session.execute(consulta_condominios(current_user)).all()
+    ids = [linha.id for linha in condominios]
+    
+    areas, ordens = [], []
+    if ids:
+        areas = db.session.execute(consulta_areas(ids)).all()
+        # Uma ordem além do limite indica que a lista foi truncada
+        ordens = db.session.execute(consulta_ordens_abertas(ids, limite + 1)).all()
+    fornecedores = db.session.execute(consulta_fornecedores()).all()
+    
+    dados, versao = montar_bootstrap(condominios, areas, fornecedores, ordens, limite)
+    resposta = resposta_json(dados)
+    resposta.set_etag(versao)
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    return resposta.make_conditional(request)
 
 
 @api_bp.route('/estatisticas', methods=['GET'])
 @login_required
+@use_replica
 def get_estatisticas():
     """Endpoint para obter estatísticas gerais."""
-    # Obter parâmetros de filtro
     condominio_id = request.args.get('condominio_id', type=int)
-    
-    # Construir query base
-    query = OrdemServico.query
-    
-    # Filtrar por condomínios do usuário
-    if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
-    
-    # Aplicar filtro de condomínio se especificado
-    if condominio_id:
-        query = query.filter_by(condominio_id=condominio_id)
-    
-    # Calcular estatísticas
-    total_ordens = query.count()
-    ordens_abertas = query.filter_by(status='Aberta').count()
-    ordens_andamento = query.filter_by(status='Em Andamento').count()
-    ordens_concluidas = query.filter_by(status='Concluída').count()
-    
-    # Estatísticas por prioridade
-    alta_prioridade = query.filter_by(prioridade='Alta').count()
-    normal_prioridade = query.filter_by(prioridade='Normal').count()
-    baixa_prioridade = query.filter_by(prioridade='Baixa').count()
-    
-    return jsonify({
-        'total_ordens': total_ordens,
-        'por_status': {
-            'abertas': ordens_abertas,
-            'andamento': ordens_andamento,
-            'concluidas': ordens_concluidas
-        },
-        'por_prioridade': {
-            'alta': alta_prioridade,
-            'normal': normal_prioridade,
-            'baixa': baixa_prioridade
-        }
-    })
+    linha = db.session.execute(consulta_estatisticas(current_user, condominio_id)).one()
+    return jsonify(montar_estatisticas(linha))
 
 
 @api_bp.route('/ordens', methods=['POST'])
@@ -301,7 +199,7 @@ def create_ordem():
     
     # Verificar se o usuário tem acesso ao condomínio
     condominio_id = data['condominio_id']
-    if not current_user.is_admin and condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and condominio_id not in current_user.condominio_ids:
         return jsonify({'error': 'Acesso negado ao condomínio especificado'}), 403
     
     # Criar nova ordem
@@ -329,8 +227,9 @@ def create_ordem():
     if 'data_previsao' in data and data['data_previsao']:
         ordem.data_previsao = datetime.fromisoformat(data['data_previsao'])
     
-    # Salvar ordem
+    # Salvar ordem (o flush gera o ID usado no log)
     db.session.add(ordem)
+    db.session.flush()
     
     # Registrar log de status inicial
     from app.models import OrdemStatusLog
@@ -361,7 +260,7 @@ def update_ordem_status(id):
     ordem = OrdemServico.query.get_or_404(id)
     
     # Verificar se o usuário tem acesso ao condomínio da ordem
-    if not current_user.is_admin and ordem.condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and ordem.condominio_id not in current_user.condominio_ids:
         return jsonify({'error': 'Acesso negado'}), 403
     
     # Obter dados do request
@@ -377,23 +276,43 @@ def update_ordem_status(id):
     if novo_status not in status_validos:
         return jsonify({'error': 'Status inválido'}), 400
     
-    # Atualizar status
+    # Versão que o cliente leu (opcional): a ordem não pode ter mudado desde então
+    if 'versao' in data and data['versao'] != ordem.versao:
+        return _conflito(ordem, {'status': novo_status})
+    
+    # Atualizar status com UPDATE condicionado ao status lido
     if novo_status != ordem.status:
         observacao = data.get('observacao', '')
-        ordem.atualizar_status(novo_status, current_user.id, observacao)
-        
-        # Se o status for "Concluída", registrar data de conclusão
-        if novo_status == 'Concluída' and not ordem.data_conclusao:
-            ordem.data_conclusao = datetime.now(FORTALEZA_TZ)
+        if not ordem.atualizar_status_condicional(novo_status, current_user.id, observacao):
+            return _conflito(ordem, {'status': novo_status})
         
         db.session.commit()
     
     return jsonify({
         'message': 'Status atualizado com sucesso',
-        'status': novo_status
+        'status': novo_status,
+        'versao': ordem.versao
     })
 
 
+def _conflito(ordem, valores):
+    """
+    Resposta 409 (Conflict) para uma alteração feita sobre uma versão antiga da ordem.
+
+    Args:
+        ordem (OrdemServico): Ordem com os valores atuais
+        valores (dict): Campos com os valores enviados pelo cliente
+
+    Returns:
+        tuple: Resposta JSON com a versão atual e as diferenças campo a campo, e o código HTTP
+    """
+    return jsonify({
+        'error': 'A ordem foi alterada por outro usuário',
+        'versao': ordem.versao,
+        'diferencas': ordem.diferencas(valores)
+    }), 409
+
+
 @api_bp.route('/ordens/<int:id>/comentarios', methods=['POST'])
 @login_required
 def add_comentario(id):
@@ -402,7 +321,7 @@ def add_comentario(id):
     ordem = OrdemServico.query.get_or_404(id)
     
     # Verificar se o usuário tem acesso ao condomínio da ordem
-    if not current_user.is_admin and ordem.condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and ordem.condominio_id not in current_user.condominio_ids:
         return jsonify({'error': 'Acesso negado'}), 403
     
     # Obter dados do request
@@ -426,3 +345,37 @@ def add_comentario(id):
         'message': 'Comentário adicionado com sucesso',
         'id': comentario.id
     }), 201
+
+
+@api_bp.route('/sync', methods=['GET'])
+@login_required
+def sync_pull():
+    """Endpoint de sincronização do aplicativo: ordens do técnico alteradas desde o token informado."""
+    try:
+        token = interpretar_token(request.args.get('token'))
+    except SincronizacaoInvalida as e:
+        return jsonify({'error': str(e)}), 400
+
+    return resposta_json(puxar_alteracoes(current_user.id, token))
+
+
+@api_bp.route('/sync', methods=['POST'])
+@login_required
+def sync_push():
+    """Endpoint que aplica o lote de operações feitas pelo aplicativo sem conexão."""
+    data = request.get_json(silent=True)
+    operacoes = data.get('operacoes') if isinstance(data, dict) else None
+    try:
+        validar_operacoes(operacoes)
+    except SincronizacaoInvalida as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        resultados = aplicar_operacoes(current_user, operacoes)
+    except (StaleDataError, IntegrityError):
+        # Outra transação alterou uma das ordens (ou aplicou as mesmas operações, num reenvio
+        # simultâneo) durante o lote: nada foi gravado
+        db.session.rollback()
+        return jsonify({'error': 'Ordens alteradas durante a sincronização; reenvie o lote'}), 409
+
+    return resposta_json({'resultados': resultados})
@@ -0,0 +1,264 @@
+"""
+Serialização leve para a API.
+Este módulo descreve os campos de cada recurso da API, seleciona apenas as colunas
+necessárias como tuplas e codifica as respostas com orjson, sem carregar entidades do ORM.
+"""
+from collections import OrderedDict
+
+import orjson
+from flask import current_app, request
+from sqlalchemy import Float, cast, select
+from sqlalchemy.orm import aliased
+
+from app.models import OrdemServico, OrdemComentario, OrdemStatusLog, OrdemArquivo
+from app.models import Condominio, Area, Fornecedor, User
+
+# Planos de consulta mantidos por recurso (os menos usados recentemente são descartados)
+MAX_PLANOS = 128
+
+
+class CampoInvalido(ValueError):
+    """Erro para campos desconhecidos em ?fields=."""
+
+
+class Campo:
+    """
+    Campo de um recurso da API.
+    Um campo simples corresponde a uma coluna; um campo com chaves é um objeto
+    aninhado montado a partir de várias colunas (nulo quando a primeira é nula).
+    """
+
+    def __init__(self, *colunas, chaves=None, juncoes=()):
+        self.colunas = colunas
+        self.chaves = chaves
+        self.juncoes = juncoes
+
+    def montar(self, valores):
+        """Monta o valor do campo a partir das colunas selecionadas."""
+        if self.chaves is None:
+            return valores[0]
+        if valores[0] is None:
+            return None
+        return dict(zip(self.chaves, valores))
+
+
+class Recurso:
+    """
+    Especificação de um recurso da API.
+    Os planos de consulta de cada conjunto de campos são montados uma única vez e
+    reaproveitados nas requisições seguintes. O plano segue a ordem dos campos da
+    especificação, então ?fields=a,b e ?fields=b,a usam o mesmo plano; a ordem pedida
+    só é aplicada nas chaves de cada dicionário serializado.
+    """
+
+    def __init__(self, modelo, campos, padrao=None):
+        self.modelo = modelo
+        self.campos = campos
+        self.padrao = tuple(padrao or campos)
+        self._planos = OrderedDict()
+
+    def campos_solicitados(self, adicionais=()):
+        """
+        Lê os campos pedidos em ?fields= da requisição atual.
+
+        Args:
+            adicionais (tuple): Nomes aceitos além dos campos do recurso
+
+        Returns:
+            tuple: Nomes dos campos solicitados, ou os campos padrão
+
+        Raises:
+            CampoInvalido: Se algum campo não existir no recurso
+        """
+        return self.interpretar_campos(request.args.get('fields'), adicionais)
+
+    def interpretar_campos(self, valor, adicionais=()):
+        """
+        Interpreta o valor de ?fields=, mantendo a ordem e sem repetições.
+
+        Args:
+            valor (str): Nomes separados por vírgula, ou None
+            adicionais (tuple): Nomes aceitos além dos campos do recurso
+
+        Returns:
+            tuple: Nomes dos campos solicitados, ou os campos padrão
+
+        Raises:
+            CampoInvalido: Se algum campo não existir no recurso
+        """
+        if not valor:
+            return self.padrao + tuple(adicionais)
+
+        nomes = tuple(dict.fromkeys(n.strip() for n in valor.split(',') if n.strip()))
+        invalidos = [n for n in nomes if n not in self.campos and n not in adicionais]
+        if invalidos or not nomes:
+            raise CampoInvalido(f"Campos inválidos: {', '.join(invalidos) or valor}")
+        return nomes
+
+    def _plano(self, nomes):
+        """
+        Obtém (ou monta) as colunas, junções e posições para os campos informados.
+
+        Returns:
+            tuple: Colunas e junções na ordem da especificação, posição (início, fim, campo)
+            de cada nome e se todos os campos são simples
+        """
+        chave = frozenset(nomes)
+        plano = self._planos.get(chave)
+        if plano is not None:
+            self._planos.move_to_end(chave)
+            return plano
+
+        colunas, juncoes, posicoes = [], [], {}
+        simples = True
+        for nome, campo in self.campos.items():
+            if nome not in chave:
+                continue
+            inicio = len(colunas)
+            colunas.extend(c.label(f'{nome}_{i}') for i, c in enumerate(campo.colunas))
+            for juncao in campo.juncoes:
+                if all(juncao[0] is not j[0] for j in juncoes):
+                    juncoes.append(juncao)
+            posicoes[nome] = (inicio, len(colunas), campo)
+            simples = simples and campo.chaves is None
+
+        plano = (colunas, juncoes, posicoes, simples)
+        self._planos[chave] = plano
+        if len(self._planos) > MAX_PLANOS:
+            self._planos.popitem(last=False)
+        return plano
+
+    def consulta(self, nomes, *extras):
+        """
+        Monta o select com as colunas dos campos informados.
+
+        Args:
+            nomes (tuple): Campos a serem selecionados
+            *extras: Colunas adicionais, selecionadas antes dos campos
+
+        Returns:
+            Select: Consulta pronta para receber filtros e ordenação
+        """
+        colunas, juncoes, _, _ = self._plano(nomes)
+        consulta = select(*extras, *colunas).select_from(self.modelo)
+        for alvo, condicao, externa in juncoes:
+            consulta = consulta.join(alvo, condicao, isouter=externa)
+        return consulta
+
+    def serializar(self, linhas, nomes, deslocamento=0):
+        """
+        Converte as linhas retornadas por consulta() em dicionários.
+
+        Args:
+            linhas (list): Linhas (tuplas) do resultado
+            nomes (tuple): Campos usados na consulta
+            deslocamento (int): Quantidade de colunas extras no início de cada linha
+
+        Returns:
+            list: Um dicionário por linha
+        """
+        _, _, posicoes, simples = self._plano(nomes)
+        if simples:
+            indices = [deslocamento + posicoes[nome][0] for nome in nomes]
+            if indices == list(range(deslocamento, deslocamento + len(nomes))):
+                return [dict(zip(nomes, linha[deslocamento:])) for linha in linhas]
+            return [{nome: linha[i] for nome, i in zip(nomes, indices)} for linha in linhas]
+
+        montadores = [
+            (nome, deslocamento + posicoes[nome][0], deslocamento + posicoes[nome][1], posicoes[nome][2])
+            for nome in nomes
+        ]
+        return [
+            {nome: campo.montar(linha[inicio:fim]) for nome, inicio, fim, campo in montadores}
+            for linha in linhas
+        ]
+
+
+def resposta_json(dados, status=200):
+    """
+    Cria uma resposta JSON codificada com orjson.
+
+    Args:
+        dados: Conteúdo da resposta
+        status (int): Código HTTP
+
+    Returns:
+        Response: Resposta com o JSON codificado
+    """
+    return current_app.response_class(
+        orjson.dumps(dados, option=orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype='application/json'
+    )
+
+
+# Aliases para os dois relacionamentos de OrdemServico com usuários
+_Responsavel = aliased(User, name='responsavel')
+_Criador = aliased(User, name='criador')
+
+_JUNCAO_CONDOMINIO = (Condominio, Condominio.id == OrdemServico.condominio_id, False)
+_JUNCAO_AREA = (Area, Area.id == OrdemServico.area_id, True)
+_JUNCAO_FORNECEDOR = (Fornecedor, Fornecedor.id == OrdemServico.fornecedor_id, True)
+_JUNCAO_RESPONSAVEL = (_Responsavel, _Responsavel.id == OrdemServico.user_id, True)
+_JUNCAO_CRIADOR = (_Criador, _Criador.id == OrdemServico.criador_id, False)
+
+# Campos comuns às listagens e aos detalhes de ordens
+_CAMPOS_ORDEM = {
+    'id': Campo(OrdemServico.id),
+    'numero': Campo(OrdemServico.numero),
+    'titulo': Campo(OrdemServico.titulo),
+    'descricao': Campo(OrdemServico.descricao),
+    'status': Campo(OrdemServico.status),
+    'prioridade': Campo(OrdemServico.prioridade),
+    'tipo': Campo(OrdemServico.tipo),
+    'observacoes': Campo(OrdemServico.observacoes),
+    # Valores monetários saem como float direto do banco, sem passar por Decimal
+    'valor_estimado': Campo(cast(OrdemServico.valor_estimado, Float)),
+    'valor_final': Campo(cast(OrdemServico.valor_final, Float)),
+    'data_criacao': Campo(OrdemServico.data_criacao),
+    'data_inicio': Campo(OrdemServico.data_inicio),
+    'data_previsao': Campo(OrdemServico.data_previsao),
+    'data_conclusao': Campo(OrdemServico.data_conclusao),
+    'versao': Campo(OrdemServico.versao),
+}
+
+ORDEM_LISTA = Recurso(OrdemServico, {
+    **_CAMPOS_ORDEM,
+    'condominio_id': Campo(OrdemServico.condominio_id),
+    'condominio': Campo(Condominio.nome, juncoes=(_JUNCAO_CONDOMINIO,)),
+}, padrao=(
+    'id', 'numero', 'titulo', 'descricao', 'status', 'prioridade', 'tipo',
+    'condominio', 'data_criacao', 'data_conclusao'
+))
+
+ORDEM_DETALHE = Recurso(OrdemServico, {
+    **_CAMPOS_ORDEM,
+    'condominio': Campo(Condominio.id, Condominio.nome, chaves=('id', 'nome'), juncoes=(_JUNCAO_CONDOMINIO,)),
+    'area': Campo(Area.id, Area.nome, chaves=('id', 'nome'), juncoes=(_JUNCAO_AREA,)),
+    'fornecedor': Campo(Fornecedor.id, Fornecedor.nome, chaves=('id', 'nome'), juncoes=(_JUNCAO_FORNECEDOR,)),
+    'responsavel': Campo(_Responsavel.id, _Responsavel.name, chaves=('id', 'nome'), juncoes=(_JUNCAO_RESPONSAVEL,)),
+    'criador': Campo(_Criador.id, _Criador.name, chaves=('id', 'nome'), juncoes=(_JUNCAO_CRIADOR,)),
+})
+
+COMENTARIO = Recurso(OrdemComentario, {
+    'id': Campo(OrdemComentario.id),
+    'texto': Campo(OrdemComentario.texto),
+    'usuario': Campo(User.name, juncoes=((User, User.id == OrdemComentario.usuario_id, False),)),
+    'data': Campo(OrdemComentario.data_criacao),
+})
+
+STATUS_LOG = Recurso(OrdemStatusLog, {
+    'id': Campo(OrdemStatusLog.id),
+    'status_anterior': Campo(OrdemStatusLog.status_anterior),
+    'status_novo': Campo(OrdemStatusLog.status_novo),
+    'usuario': Campo(User.name, juncoes=((User, User.id == OrdemStatusLog.usuario_id, False),)),
+    'data': Campo(OrdemStatusLog.data_mudanca),
+    'observacao': Campo(OrdemStatusLog.observacao),
+})
+
+ARQUIVO = Recurso(OrdemArquivo, {
+    'id': Campo(OrdemArquivo.id),
+    'nome': Campo(OrdemArquivo.nome),
+    'tipo': Campo(OrdemArquivo.tipo),
+    'data_upload': Campo(OrdemArquivo.data_upload),
+})
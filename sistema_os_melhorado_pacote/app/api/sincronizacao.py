@@ -0,0 +1,294 @@
+"""
+Sincronização do aplicativo dos técnicos.
+Este módulo implementa o protocolo offline do aplicativo: o técnico mantém uma cópia local das
+ordens atribuídas a ele (OrdemServico.user_id), recebe apenas as alterações posteriores ao último
+token (IDs de ordem_alteracoes) e envia em lote as mudanças de status e os comentários feitos sem
+conexão, com detecção de conflito pela versão de cada ordem.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.api.serializacao import COMENTARIO, ORDEM_DETALHE
+from app.extensions import db
+from app.models import OrdemServico, OrdemComentario, OrdemAlteracao, OperacaoSincronizada
+from app.models.ordem import STATUS_ORDEM, STATUS_PENDENTES
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Campos de cada ordem na cópia local do aplicativo
+CAMPOS_SINCRONIZACAO = (
+    'id', 'numero', 'titulo', 'descricao', 'status', 'prioridade', 'tipo', 'observacoes',
+    'condominio', 'area', 'data_criacao', 'data_inicio', 'data_previsao', 'data_conclusao', 'versao'
+)
+
+# Tipos de operação aceitos no envio
+TIPOS_OPERACAO = ('status', 'comentario')
+
+
+class SincronizacaoInvalida(ValueError):
+    """Erro para tokens ou lotes de operações malformados."""
+
+
+def interpretar_token(valor):
+    """
+    Interpreta o token informado pelo aplicativo.
+
+    Args:
+        valor (str): Token recebido na última sincronização, ou None na primeira
+
+    Returns:
+        int: ID da última alteração recebida, ou None para uma cópia completa
+
+    Raises:
+        SincronizacaoInvalida: Se o token não for um inteiro não negativo
+    """
+    if not valor:
+        return None
+    if not valor.isdigit():
+        raise SincronizacaoInvalida('Token de sincronização inválido')
+    return int(valor)
+
+
+def _limite_seguro():
+    """Data até a qual as alterações já gravadas são definitivas (fora da margem de transações abertas)."""
+    margem = timedelta(seconds=current_app.config.get('SYNC_MARGEM_SEGUNDOS', 30))
+    return (datetime.now(FORTALEZA_TZ) - margem).replace(tzinfo=None)
+
+
+def ordens_sincronizadas(ordem_ids):
+    """
+    Lê as ordens informadas com os seus comentários, em uma consulta para cada.
+
+    Args:
+        ordem_ids (iterable): IDs das ordens
+
+    Returns:
+        dict: ID da ordem -> (ID do responsável, dados da ordem)
+    """
+    ordem_ids = sorted(set(ordem_ids))
+    if not ordem_ids:
+        return {}
+
+    linhas = db.session.execute(
+        ORDEM_DETALHE.consulta(CAMPOS_SINCRONIZACAO, OrdemServico.user_id)
+        .where(OrdemServico.id.in_(ordem_ids))
+    ).all()
+    comentarios = db.session.execute(
+        COMENTARIO.consulta(COMENTARIO.padrao, OrdemComentario.ordem_id)
+        .where(OrdemComentario.ordem_id.in_(ordem_ids))
+        .order_by(OrdemComentario.data_criacao, OrdemComentario.id)
+    ).all()
+
+    por_ordem = defaultdict(list)
+    for linha, comentario in zip(comentarios, COMENTARIO.serializar(comentarios, COMENTARIO.padrao, deslocamento=1)):
+        por_ordem[linha[0]].append(comentario)
+
+    result = {}
+    for linha, ordem in zip(linhas, ORDEM_DETALHE.serializar(linhas, CAMPOS_SINCRONIZACAO, deslocamento=1)):
+        ordem['comentarios'] = por_ordem[ordem['id']]
+        result[ordem['id']] = (linha[0], ordem)
+    return result
+
+
+def puxar_alteracoes(usuario_id, token=None):
+    """
+    Monta a resposta de uma sincronização do aplicativo.
+    Sem token, envia a cópia completa das ordens pendentes atribuídas ao técnico; com token, só as
+    ordens alteradas depois dele e as que deixaram de ser do técnico (removidas). Um token anterior
+    às alterações excluídas por limpar_alteracoes também recebe a cópia completa. O novo token não
+    avança sobre alterações dentro da margem SYNC_MARGEM_SEGUNDOS, que são reenviadas na próxima
+    sincronização: uma transação ainda aberta pode gravar depois um ID menor que os já visíveis.
+
+    Args:
+        usuario_id (int): ID do técnico
+        token (int, optional): ID da última alteração recebida pelo aplicativo
+
+    Returns:
+        dict: token, copia_completa, ordens, removidas e mais (há alterações em outra página)
+    """
+    seguro = _limite_seguro()
+
+    if token is not None:
+        # Alterações posteriores ao token podem ter sido excluídas pela retenção
+        primeira = db.session.scalar(select(func.min(OrdemAlteracao.id)))
+        if primeira is not None and token < primeira - 1:
+            token = None
+
+    if token is None:
+        # O token é lido antes da cópia: o que mudar durante a leitura é reenviado depois
+        novo_token = db.session.scalar(
+            select(func.max(OrdemAlteracao.id)).where(OrdemAlteracao.data <= seguro)
+        ) or 0
+        ordem_ids = db.session.scalars(
+            select(OrdemServico.id).where(
+                OrdemServico.user_id == usuario_id,
+                OrdemServico.status.in_(STATUS_PENDENTES)
+            )
+        ).all()
+        return {
+            'token': str(novo_token),
+            'copia_completa': True,
+            'ordens': [ordem for _, ordem in ordens_sincronizadas(ordem_ids).values()],
+            'removidas': [],
+            'mais': False,
+        }
+
+    limite = current_app.config.get('SYNC_MAX_ALTERACOES', 500)
+    alteracoes = db.session.execute(
+        select(OrdemAlteracao.id, OrdemAlteracao.ordem_id, OrdemAlteracao.data)
+        .where(OrdemAlteracao.responsavel_id == usuario_id, OrdemAlteracao.id > token)
+        .order_by(OrdemAlteracao.id)
+        .limit(limite + 1)
+    ).all()
+    mais = len(alteracoes) > limite
+    alteracoes = alteracoes[:limite]
+
+    novo_token = token
+    for alteracao_id, _, data in alteracoes:
+        if data > seguro:
+            break
+        novo_token = alteracao_id
+
+    ordens, removidas = [], []
+    if alteracoes:
+        atuais = ordens_sincronizadas(a.ordem_id for a in alteracoes)
+        for ordem_id in sorted({a.ordem_id for a in alteracoes}):
+            responsavel_id, ordem = atuais.get(ordem_id, (None, None))
+            if responsavel_id == usuario_id:
+                ordens.append(ordem)
+            else:
+                removidas.append(ordem_id)
+
+    return {
+        'token': str(novo_token),
+        'copia_completa': False,
+        'ordens': ordens,
+        'removidas': removidas,
+        # Uma página inteira dentro da margem não avança o token: o aplicativo espera a próxima
+        'mais': mais and novo_token > token,
+    }
+
+
+def validar_operacoes(operacoes):
+    """
+    Valida o formato de um lote de operações enviado pelo aplicativo.
+
+    Args:
+        operacoes: Conteúdo de "operacoes" no corpo da requisição
+
+    Raises:
+        SincronizacaoInvalida: Se o lote ou alguma operação for malformado
+    """
+    if not isinstance(operacoes, list) or not operacoes:
+        raise SincronizacaoInvalida('Lote de operações vazio ou inválido')
+    maximo = current_app.config.get('SYNC_MAX_OPERACOES', 200)
+    if len(operacoes) > maximo:
+        raise SincronizacaoInvalida(f'O lote deve ter no máximo {maximo} operações')
+
+    for posicao, operacao in enumerate(operacoes):
+        if not isinstance(operacao, dict):
+            raise SincronizacaoInvalida(f'Operação {posicao} inválida')
+        chave = operacao.get('id')
+        if not isinstance(chave, str) or not 0 < len(chave) <= 64:
+            raise SincronizacaoInvalida(f'Operação {posicao}: id deve ter de 1 a 64 caracteres')
+        if operacao.get('tipo') not in TIPOS_OPERACAO:
+            raise SincronizacaoInvalida(f'Operação {posicao}: tipo deve ser um de {", ".join(TIPOS_OPERACAO)}')
+        if not isinstance(operacao.get('ordem_id'), int):
+            raise SincronizacaoInvalida(f'Operação {posicao}: ordem_id inválido')
+        if operacao['tipo'] == 'status':
+            if not isinstance(operacao.get('versao'), int):
+                raise SincronizacaoInvalida(f'Operação {posicao}: versao inválida')
+            if operacao.get('status') not in STATUS_ORDEM:
+                raise SincronizacaoInvalida(f'Operação {posicao}: status inválido')
+        elif not isinstance(operacao.get('texto'), str) or not operacao['texto'].strip():
+            raise SincronizacaoInvalida(f'Operação {posicao}: texto do comentário não especificado')
+
+
+def _pode_alterar(usuario, ordem, tipo):
+    """Verifica se o usuário pode aplicar a operação: ordem atribuída a ele ou acesso pelo condomínio."""
+    if ordem.user_id == usuario.id:
+        return True
+    if not usuario.has_condominio_access(ordem.condominio_id):
+        return False
+    return tipo == 'comentario' or usuario.has_permission('edit_order')
+
+
+def aplicar_operacoes(usuario, operacoes):
+    """
+    Aplica, em uma única transação, um lote de operações feitas sem conexão.
+    As operações já aplicadas (mesmo id) são ignoradas, então o aplicativo pode reenviar o lote
+    inteiro após uma falha. Uma mudança de status só é aplicada se a versão informada for a atual;
+    as operações seguintes do lote sobre a mesma ordem podem informar a mesma versão base.
+
+    Args:
+        usuario: Usuário autenticado
+        operacoes (list): Operações já validadas por validar_operacoes
+
+    Returns:
+        list: Resultado de cada operação (aplicada, duplicada, conflito ou rejeitada)
+
+    Raises:
+        StaleDataError: Se outra transação alterou uma das ordens durante o lote
+    """
+    aplicadas = set(db.session.scalars(
+        select(OperacaoSincronizada.chave).where(
+            OperacaoSincronizada.user_id == usuario.id,
+            OperacaoSincronizada.chave.in_({op['id'] for op in operacoes})
+        )
+    ))
+    ordens = {
+        ordem.id: ordem for ordem in db.session.scalars(
+            select(OrdemServico).where(OrdemServico.id.in_({op['ordem_id'] for op in operacoes}))
+        )
+    }
+
+    # Versão base informada pelo aplicativo para cada ordem já alterada neste lote
+    bases = {}
+    resultados, alteradas, conflitos = [], [], []
+    for operacao in operacoes:
+        resultado = {'id': operacao['id']}
+        resultados.append(resultado)
+        ordem = ordens.get(operacao['ordem_id'])
+
+        if operacao['id'] in aplicadas:
+            resultado['resultado'] = 'duplicada'
+        elif ordem is None:
+            resultado.update(resultado='rejeitada', erro='Ordem não encontrada')
+        elif not _pode_alterar(usuario, ordem, operacao['tipo']):
+            resultado.update(resultado='rejeitada', erro='Acesso negado')
+        elif operacao['tipo'] == 'status':
+            versao = operacao['versao']
+            if versao != ordem.versao and bases.get(ordem.id) != versao:
+                resultado['resultado'] = 'conflito'
+                conflitos.append((resultado, ordem.id))
+                continue
+            bases.setdefault(ordem.id, versao)
+            ordem.atualizar_status(operacao['status'], usuario.id, operacao.get('observacao'))
+            db.session.flush()
+            resultado['resultado'] = 'aplicada'
+        else:
+            ordem.adicionar_comentario(usuario.id, operacao['texto'])
+            resultado['resultado'] = 'aplicada'
+
+        if resultado['resultado'] == 'aplicada':
+            aplicadas.add(operacao['id'])
+            alteradas.append((resultado, ordem))
+            db.session.add(OperacaoSincronizada(user_id=usuario.id, chave=operacao['id']))
+
+    db.session.flush()
+    for resultado, ordem in alteradas:
+        resultado['versao'] = ordem.versao
+
+    # Nos conflitos, o aplicativo recebe a ordem atual para decidir o que refazer
+    if conflitos:
+        atuais = ordens_sincronizadas(ordem_id for _, ordem_id in conflitos)
+        for resultado, ordem_id in conflitos:
+            resultado['ordem'] = atuais[ordem_id][1]
+
+    db.session.commit()
+    return resultados
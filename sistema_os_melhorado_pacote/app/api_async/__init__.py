@@ -0,0 +1,63 @@
+"""
+API de leitura assíncrona.
+Este pacote serve as rotas de leitura da API (ordens, condomínios, estatísticas e bootstrap)
+como uma aplicação ASGI sobre o engine assíncrono do SQLAlchemy. Uma requisição só ocupa uma
+conexão do banco durante as consultas, então poucos processos mantêm milhares de conexões de clientes
+ociosas (keep-alive, polling). As consultas e as regras de escopo são as de app.api.consultas e a
+autenticação usa a sessão da aplicação Flask.
+"""
+from sqlalchemy.engine import make_url
+
+from app.api_async.aplicacao import AplicacaoASGI
+
+# Driver assíncrono de cada banco suportado
+DRIVERS_ASSINCRONOS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'mysql': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def url_assincrona(uri):
+    """
+    Converte a URI de um banco para o driver assíncrono equivalente.
+
+    Args:
+        uri (str): URI do SQLAlchemy (ex.: mysql+pymysql://...)
+
+    Returns:
+        URL: URI com o driver assíncrono (ex.: mysql+aiomysql://...)
+
+    Raises:
+        ValueError: Se o banco não tiver driver assíncrono conhecido
+    """
+    url = make_url(uri)
+    driver = DRIVERS_ASSINCRONOS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f'Banco sem driver assíncrono conhecido: {url.get_backend_name()}')
+    return url.set(drivername=driver)
+
+
+def create_asgi_app(config_name=None):
+    """
+    Cria a aplicação ASGI da API de leitura.
+    A aplicação Flask da mesma configuração é criada para ler as configurações e abrir as sessões
+    dos usuários; os engines assíncronos são criados no início do ciclo de vida (lifespan).
+
+    Args:
+        config_name (str): Nome da configuração a ser usada (development, production, testing)
+
+    Returns:
+        AplicacaoASGI: Aplicação ASGI
+    """
+    from app import create_app
+
+    app = create_app(config_name)
+    config = app.config
+
+    url = config.get('ASYNC_DATABASE_URL') or url_assincrona(config['SQLALCHEMY_DATABASE_URI'])
+    url_replica = config.get('ASYNC_REPLICA_DATABASE_URL')
+    if not url_replica and config.get('SQLALCHEMY_BINDS', {}).get('replica'):
+        url_replica = url_assincrona(config['SQLALCHEMY_BINDS']['replica'])
+
+    return AplicacaoASGI(app, url, url_replica)
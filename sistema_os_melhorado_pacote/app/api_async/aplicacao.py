@@ -0,0 +1,215 @@
+"""
+Aplicação ASGI da API de leitura.
+Este módulo implementa diretamente o protocolo ASGI (HTTP e lifespan): roteamento das rotas de
+app.api_async.rotas, autenticação pela sessão do Flask, conexões dos engines assíncronos e
+respostas JSON codificadas com orjson.
+"""
+import asyncio
+import logging
+import time
+from urllib.parse import parse_qsl
+
+import orjson
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from werkzeug.http import parse_cookie, parse_etags
+
+from app.utils.replica import CHAVE_PRIMARIO_ATE
+from app.utils.usuario_cache import UsuarioSessao, ler_identificador, obter_retrato_async, usuario_valido
+
+logger = logging.getLogger(__name__)
+
+# Respostas de erro comuns
+NAO_AUTENTICADO = {'error': 'Autenticação necessária'}
+NAO_ENCONTRADO = {'error': 'Recurso não encontrado'}
+METODO_NAO_PERMITIDO = {'error': 'Método não permitido'}
+ERRO_INTERNO = {'error': 'Erro interno do servidor'}
+
+
+class Requisicao:
+    """
+    Requisição HTTP recebida pela aplicação ASGI.
+    Os parâmetros seguem request.args do Flask: vale o primeiro valor de cada nome.
+    """
+
+    def __init__(self, scope):
+        self.metodo = scope['method']
+        self.caminho = scope['path']
+        self.args = {}
+        for nome, valor in parse_qsl(scope.get('query_string', b'').decode('latin-1')):
+            self.args.setdefault(nome, valor)
+        cabecalhos = scope.get('headers', ())
+        self.cookies = parse_cookie(b'; '.join(
+            valor for nome, valor in cabecalhos if nome == b'cookie'
+        ).decode('latin-1'))
+        self.etags = parse_etags(b', '.join(
+            valor for nome, valor in cabecalhos if nome == b'if-none-match'
+        ).decode('latin-1') or None)
+        self.usuario = None
+        self.primario_ate = 0
+
+    def inteiro(self, nome, padrao=None):
+        """Lê um parâmetro inteiro, retornando o padrão se ausente ou inválido (como type=int)."""
+        try:
+            return int(self.args[nome])
+        except (KeyError, ValueError):
+            return padrao
+
+    @property
+    def leitura_na_replica(self):
+        """Indica se o usuário não fez commit recente (read-your-writes), como em app.utils.replica."""
+        return self.primario_ate <= time.time()
+
+
+class AplicacaoASGI:
+    """
+    Aplicação ASGI com as rotas de leitura da API.
+
+    Args:
+        app (Flask): Aplicação Flask da mesma configuração (configurações e sessões)
+        url (str): URL do banco primário com driver assíncrono
+        url_replica (str, optional): URL da réplica de leitura com driver assíncrono
+    """
+
+    def __init__(self, app, url, url_replica=None):
+        self.app = app
+        self.url = url
+        self.url_replica = url_replica
+        self.engine = None
+        self.engine_replica = None
+
+    def _criar_engine(self, url):
+        """Cria um engine assíncrono com o pool dimensionado por ASYNC_DB_POOL_SIZE."""
+        url = make_url(url)
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            return create_async_engine(url)
+        config = self.app.config
+        return create_async_engine(
+            url,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=config.get('ASYNC_DB_POOL_SIZE', 10),
+            max_overflow=config.get('DB_MAX_OVERFLOW', 5),
+            pool_timeout=config.get('DB_POOL_TIMEOUT', 20),
+            pool_recycle=config.get('DB_POOL_RECYCLE', 300),
+            pool_pre_ping=True,
+        )
+
+    async def iniciar(self):
+        """Cria os engines assíncronos (início do lifespan, ou na primeira requisição)."""
+        if self.engine is None:
+            self.engine = self._criar_engine(self.url)
+            if self.url_replica:
+                self.engine_replica = self._criar_engine(self.url_replica)
+
+    async def encerrar(self):
+        """Fecha as conexões dos engines (fim do lifespan)."""
+        for engine in (self.engine, self.engine_replica):
+            if engine is not None:
+                await engine.dispose()
+        self.engine = self.engine_replica = None
+
+    def conectar(self, replica=False):
+        """
+        Abre uma conexão do engine primário ou, se configurada e permitida, da réplica.
+
+        Args:
+            replica (bool): Se a leitura pode ser feita na réplica
+
+        Returns:
+            AsyncConnection: Conexão, para uso com async with
+        """
+        if replica and self.engine_replica is not None:
+            return self.engine_replica.connect()
+        return self.engine.connect()
+
+    def _ler_sessao(self, requisicao):
+        """Lê o usuário e a fixação no primário da sessão do Flask (E/S síncrona, fora do loop)."""
+        sessao = self.app.session_interface.open_session(self.app, requisicao)
+        if sessao is None:
+            return None, 0
+        return sessao.get('_user_id'), sessao.get(CHAVE_PRIMARIO_ATE, 0)
+
+    async def autenticar(self, requisicao):
+        """
+        Identifica o usuário da requisição pelo cookie de sessão do Flask.
+
+        Returns:
+            UsuarioSessao: Usuário ativo da sessão, ou None
+        """
+        identificador, requisicao.primario_ate = await asyncio.to_thread(self._ler_sessao, requisicao)
+        user_id, versao_credencial = ler_identificador(identificador)
+        if user_id is None:
+            return None
+
+        async with self.engine.connect() as conexao:
+            retrato = await obter_retrato_async(conexao, user_id, self.app.config.get('USER_CACHE_TTL', 30))
+        if not usuario_valido(retrato, versao_credencial):
+            return None
+        return UsuarioSessao(retrato)
+
+    async def despachar(self, requisicao):
+        """
+        Encaminha a requisição para a rota correspondente.
+
+        Returns:
+            tuple: Código HTTP, conteúdo da resposta e, opcionalmente, cabeçalhos adicionais
+        """
+        from app.api_async.rotas import ROTAS
+
+        for padrao, funcao in ROTAS:
+            encontrado = padrao.fullmatch(requisicao.caminho)
+            if encontrado is None:
+                continue
+            if requisicao.metodo not in ('GET', 'HEAD'):
+                return 405, METODO_NAO_PERMITIDO
+
+            requisicao.usuario = await self.autenticar(requisicao)
+            if requisicao.usuario is None:
+                return 401, NAO_AUTENTICADO
+            return await funcao(self, requisicao, **{
+                chave: int(valor) for chave, valor in encontrado.groupdict().items()
+            })
+        return 404, NAO_ENCONTRADO
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        await self.iniciar()
+        requisicao = Requisicao(scope)
+        try:
+            status, dados, *adicionais = await self.despachar(requisicao)
+        except Exception:
+            logger.exception(f'Erro na API assíncrona: {requisicao.metodo} {requisicao.caminho}')
+            status, dados, adicionais = 500, ERRO_INTERNO, ()
+
+        # 304 (Not Modified) não tem corpo
+        corpo = b'' if status == 304 else orjson.dumps(dados, option=orjson.OPT_NON_STR_KEYS)
+        cabecalhos = [(b'content-type', b'application/json'), (b'vary', b'Cookie')]
+        if status != 304:
+            cabecalhos.append((b'content-length', str(len(corpo)).encode()))
+        for nome, valor in (adicionais[0].items() if adicionais else ()):
+            cabecalhos.append((nome.lower().encode('latin-1'), valor.encode('latin-1')))
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': cabecalhos})
+        await send({'type': 'http.response.body', 'body': b'' if requisicao.metodo == 'HEAD' else corpo})
+
+    async def _lifespan(self, receive, send):
+        """Cria os engines no início e fecha as conexões no fim do processo."""
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                try:
+                    await self.iniciar()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await self.encerrar()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
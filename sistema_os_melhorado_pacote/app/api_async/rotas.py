@@ -0,0 +1,128 @@
+"""
+Rotas da API de leitura assíncrona.
+Este módulo implementa as mesmas rotas de leitura de app.api.routes (mesmos parâmetros, campos,
+escopo por condomínio e respostas), executando as consultas de app.api.consultas no engine
+assíncrono. Cada rota recebe a aplicação e a requisição autenticada e retorna o código HTTP e
+o conteúdo da resposta (e, opcionalmente, cabeçalhos adicionais).
+"""
+import re
+from math import ceil
+
+from app.api.consultas import (
+    COLECOES_ORDEM, consulta_areas, consulta_colecao, consulta_condominios, consulta_estatisticas,
+    consulta_fornecedores, consulta_ordem, consulta_ordens_abertas, consulta_pagina_ordens, filtros_ordens,
+    montar_bootstrap, montar_estatisticas, serializar_condominios
+)
+from app.api.serializacao import CampoInvalido, ORDEM_LISTA, ORDEM_DETALHE
+from app.api_async.aplicacao import NAO_ENCONTRADO
+
+
+async def get_ordens(api, requisicao):
+    """Listagem paginada de ordens, como GET /api/ordens da API síncrona."""
+    try:
+        campos = ORDEM_LISTA.interpretar_campos(requisicao.args.get('fields'))
+    except CampoInvalido as e:
+        return 400, {'error': str(e)}
+
+    usuario = requisicao.usuario
+    try:
+        filtros = filtros_ordens(
+            usuario,
+            condominio_id=requisicao.inteiro('condominio_id'),
+            status=requisicao.args.get('status'),
+            prioridade=requisicao.args.get('prioridade'),
+            data_inicial=requisicao.args.get('data_inicial'),
+            data_final=requisicao.args.get('data_final'),
+        )
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+    page = requisicao.inteiro('page', 1)
+    per_page = min(requisicao.inteiro('per_page', 10), 100)
+    if page < 1 or per_page < 1:
+        return 404, NAO_ENCONTRADO
+
+    consulta, contagem = consulta_pagina_ordens(campos, filtros, page, per_page)
+    async with api.conectar(replica=requisicao.leitura_na_replica) as conexao:
+        linhas = (await conexao.execute(consulta)).all()
+        if page > 1 and not linhas:
+            return 404, NAO_ENCONTRADO
+        total = await conexao.scalar(contagem)
+
+    return 200, {
+        'ordens': ORDEM_LISTA.serializar(linhas, campos),
+        'total': total,
+        'pages': ceil(total / per_page) if total else 0,
+        'page': page,
+        'per_page': per_page
+    }
+
+
+async def get_ordem(api, requisicao, id):
+    """Detalhes de uma ordem, como GET /api/ordens/<id> da API síncrona."""
+    try:
+        campos = ORDEM_DETALHE.interpretar_campos(requisicao.args.get('fields'), adicionais=tuple(COLECOES_ORDEM))
+    except CampoInvalido as e:
+        return 400, {'error': str(e)}
+
+    usuario = requisicao.usuario
+    colunas = tuple(c for c in campos if c not in COLECOES_ORDEM)
+    async with api.conectar() as conexao:
+        linha = (await conexao.execute(consulta_ordem(id, colunas))).first()
+        if linha is None:
+            return 404, NAO_ENCONTRADO
+        if not usuario.is_admin and linha[0] not in usuario.condominio_ids:
+            return 403, {'error': 'Acesso negado'}
+
+        result = ORDEM_DETALHE.serializar([linha], colunas, deslocamento=1)[0] if colunas else {}
+        for nome in campos:
+            if nome not in COLECOES_ORDEM:
+                continue
+            recurso, consulta = consulta_colecao(nome, id)
+            result[nome] = recurso.serializar((await conexao.execute(consulta)).all(), recurso.padrao)
+
+    return 200, result
+
+
+async def get_condominios(api, requisicao):
+    """Condomínios visíveis ao usuário, como GET /api/condominios da API síncrona."""
+    async with api.conectar() as conexao:
+        linhas = (await conexao.execute(consulta_condominios(requisicao.usuario))).all()
+    return 200, serializar_condominios(linhas)
+
+
+async def get_bootstrap(api, requisicao):
+    """Dados iniciais do aplicativo, como GET /api/bootstrap da API síncrona."""
+    limite = api.app.config.get('API_BOOTSTRAP_MAX_ORDENS', 500)
+    async with api.conectar(replica=requisicao.leitura_na_replica) as conexao:
+        condominios = (await conexao.execute(consulta_condominios(requisicao.usuario))).all()
+        ids = [linha.id for linha in condominios]
+        areas, ordens = [], []
+        if ids:
+            areas = (await conexao.execute(consulta_areas(ids))).all()
+            ordens = (await conexao.execute(consulta_ordens_abertas(ids, limite + 1))).all()
+        fornecedores = (await conexao.execute(consulta_fornecedores())).all()
+
+    dados, versao = montar_bootstrap(condominios, areas, fornecedores, ordens, limite)
+    cabecalhos = {'ETag': f'"{versao}"', 'Cache-Control': 'private, no-cache'}
+    if requisicao.etags.contains_weak(versao):
+        return 304, None, cabecalhos
+    return 200, dados, cabecalhos
+
+
+async def get_estatisticas(api, requisicao):
+    """Estatísticas gerais, como GET /api/estatisticas da API síncrona."""
+    consulta = consulta_estatisticas(requisicao.usuario, requisicao.inteiro('condominio_id'))
+    async with api.conectar() as conexao:
+        linha = (await conexao.execute(consulta)).one()
+    return 200, montar_estatisticas(linha)
+
+
+# Rotas: padrão do caminho (grupos nomeados são inteiros) -> função
+ROTAS = (
+    (re.compile(r'/api/ordens'), get_ordens),
+    (re.compile(r'/api/ordens/(?P<id>\d+)'), get_ordem),
+    (re.compile(r'/api/condominios'), get_condominios),
+    (re.compile(r'/api/estatisticas'), get_estatisticas),
+    (re.compile(r'/api/bootstrap'), get_bootstrap),
+)
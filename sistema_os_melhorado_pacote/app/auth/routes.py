@@ -11,10 +11,13 @@ import uuid
 
 from app.auth import auth_bp
 from app.auth.forms import LoginForm, RegisterForm, PasswordResetRequestForm, PasswordResetForm
-from app.models import User, Condominio, UserCondominio, Role, PasswordReset
+from app.models import User, UserCondominio, Role, PasswordReset
 from app.extensions import db
-from app.utils.email import send_welcome_email, send_password_reset_email
-from app.utils.decorators import log_activity
+from app.utils.email import send_new_user_notification_email, send_password_reset_email
+from app.utils.decorators import log_activity, rate_limit
+from app.utils.opcoes import opcoes
+from app.utils.sessoes import encerrar_sessoes_usuario
+from app.utils.usuario_cache import invalidar_usuario
 
 # Timezone para datas
 FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
@@ -22,6 +25,7 @@ FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 @log_activity('login_attempt')
+@rate_limit(limit=10, per=60)
 def login():
     """Rota para login de usuários."""
     if current_user.is_authenticated:
@@ -78,6 +82,7 @@ def logout():
 
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
+@rate_limit(limit=5, per=300)
 def register():
     """Rota para registro de novos usuários."""
     if current_user.is_authenticated:
@@ -86,7 +91,7 @@ def register():
     form = RegisterForm()
     
     # Carregar condominios para o select
-    form.condominio_id.choices = [(c.id, c.nome) for c in Condominio.query.filter_by(ativo=True).all()]
+    form.condominio_id.choices = opcoes('condominios_ativos')
     
     if form.validate_on_submit():
         # Verificar se o email já existe
@@ -125,10 +130,8 @@ def register():
         # Enviar email para administrador sobre novo registro
         admin_emails = [u.email for u in User.query.filter_by(is_admin=True).all()]
         for email in admin_emails:
-            send_welcome_email(
-                user_name=user.name,
-                user_email=email,
-                is_admin_notification=True,
+            send_new_user_notification_email(
+                admin_email=email,
                 new_user_name=user.name,
                 new_user_email=user.email
             )
@@ -140,6 +143,7 @@ def register():
 
 
 @auth_bp.route('/reset-password', methods=['GET', 'POST'])
+@rate_limit(limit=5, per=300)
 def reset_password_request():
     """Rota para solicitar redefinição de senha."""
     if current_user.is_authenticated:
@@ -199,7 +203,9 @@ def reset_password(token):
         if user:
             user.set_password(form.password.data)
             reset.used = True
+            invalidar_usuario(user.id)
             db.session.commit()
+            encerrar_sessoes_usuario(user.id)
             
             flash('Sua senha foi redefinida com sucesso!', 'success')
             return redirect(url_for('auth.login'))
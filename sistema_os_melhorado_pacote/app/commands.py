@@ -0,0 +1,231 @@
+"""
+Comandos de linha de comando da aplicação.
+Este módulo registra comandos `flask` para tarefas de manutenção do banco de dados.
+"""
+import time
+
+import click
+
+from app.extensions import db
+
+
+def register_commands(app):
+    """
+    Registra os comandos CLI na aplicação.
+
+    Args:
+        app (Flask): Aplicação Flask
+    """
+    @app.cli.command('preencher-periodos')
+    @click.option('--lote', default=1000, show_default=True, help='Quantidade de ordens por commit.')
+    def preencher_periodos(lote):
+        """Recalcula os agrupamentos de período das ordens existentes."""
+        from sqlalchemy import bindparam, update
+        from app.models import OrdemServico
+        from app.utils.periodos import calcular_periodos
+
+        # UPDATE no nível da tabela: colunas derivadas não incrementam a versão da ordem
+        tabela = OrdemServico.__table__
+        instrucao = update(tabela).where(tabela.c.id == bindparam('b_id'))
+
+        total = 0
+        ultimo_id = 0
+        while True:
+            linhas = db.session.query(OrdemServico.id, OrdemServico.data_criacao).filter(
+                OrdemServico.id > ultimo_id,
+                OrdemServico.data_criacao.isnot(None)
+            ).order_by(OrdemServico.id).limit(lote).all()
+
+            if not linhas:
+                break
+
+            valores = []
+            for id_, data_criacao in linhas:
+                periodos = calcular_periodos(data_criacao)
+                valores.append({
+                    'b_id': id_,
+                    'periodo_dia': periodos['dia'],
+                    'periodo_semana': periodos['semana'],
+                    'periodo_mes': periodos['mes'],
+                    'periodo_ano': periodos['ano']
+                })
+
+            # Atualização em lote por chave primária
+            db.session.execute(instrucao, valores)
+            db.session.commit()
+            total += len(linhas)
+            ultimo_id = linhas[-1].id
+
+        click.echo(f'{total} ordens atualizadas.')
+
+    @app.cli.command('preencher-duracoes')
+    @click.option('--lote', default=500, show_default=True, help='Quantidade de ordens por commit.')
+    def preencher_duracoes(lote):
+        """Recalcula as durações do ciclo de vida a partir do histórico de status."""
+        from sqlalchemy.orm import load_only
+        from app.models import OrdemServico, OrdemStatusLog
+        from app.models.ordem import STATUS_AGUARDANDO, gravar_colunas_derivadas
+
+        # data_inicio só é preenchida pelo histórico quando estiver vazia
+        colunas = (
+            'data_inicio', 'data_status', 'tempo_ate_inicio', 'tempo_execucao', 'tempo_total',
+            *STATUS_AGUARDANDO.values()
+        )
+
+        total = 0
+        ultimo_id = 0
+        while True:
+            ordens = OrdemServico.query.options(load_only(
+                OrdemServico.id, OrdemServico.data_criacao, OrdemServico.data_inicio,
+                OrdemServico.data_status, OrdemServico.tempo_ate_inicio, OrdemServico.tempo_execucao,
+                OrdemServico.tempo_total, OrdemServico.tempo_aguardando_aprovacao,
+                OrdemServico.tempo_aguardando_material
+            )).filter(OrdemServico.id > ultimo_id).order_by(OrdemServico.id).limit(lote).all()
+
+            if not ordens:
+                break
+
+            # Carregar o histórico do lote inteiro em uma única consulta
+            logs_por_ordem = {}
+            logs = OrdemStatusLog.query.options(load_only(
+                OrdemStatusLog.ordem_id, OrdemStatusLog.status_anterior,
+                OrdemStatusLog.status_novo, OrdemStatusLog.data_mudanca
+            )).filter(
+                OrdemStatusLog.ordem_id.in_([o.id for o in ordens])
+            ).order_by(OrdemStatusLog.ordem_id, OrdemStatusLog.data_mudanca, OrdemStatusLog.id)
+            for log in logs:
+                logs_por_ordem.setdefault(log.ordem_id, []).append(log)
+
+            for ordem in ordens:
+                ordem.recalcular_duracoes(logs_por_ordem.get(ordem.id, []))
+
+            # UPDATE no nível da tabela: colunas derivadas não incrementam a versão da ordem
+            gravar_colunas_derivadas(ordens, colunas)
+            db.session.commit()
+            total += len(ordens)
+            ultimo_id = ordens[-1].id
+
+        click.echo(f'{total} ordens atualizadas.')
+
+    @app.cli.command('verificar-sla')
+    @click.option('--intervalo', default=0, show_default=True,
+                  help='Segundos entre verificações. Com 0, executa uma única vez.')
+    def verificar_sla_command(intervalo):
+        """Verifica ordens vencidas ou prestes a vencer e notifica os responsáveis."""
+        from app.ordens.sla import verificar_sla
+
+        while True:
+            resultado = verificar_sla()
+            click.echo(
+                f"{len(resultado['alertas'])} alerta(s), {len(resultado['violadas'])} violação(ões)."
+            )
+
+            if not intervalo:
+                break
+            db.session.remove()
+            time.sleep(intervalo)
+
+    @app.cli.command('limpar-alteracoes')
+    @click.option('--dias', type=int, default=None, help='Dias mantidos. Usa SYNC_RETENCAO_DIAS se omitido.')
+    @click.option('--lote', default=5000, show_default=True, help='Quantidade de alterações excluídas por commit.')
+    def limpar_alteracoes_command(dias, lote):
+        """Exclui as alterações de ordens antigas usadas na sincronização do aplicativo."""
+        from app.utils.alteracoes import limpar_alteracoes
+
+        click.echo(f'{limpar_alteracoes(dias, lote)} alterações excluídas.')
+
+    @app.cli.command('gerar-snapshot')
+    @click.option('--caminho', default=None, help='Arquivo de destino. Usa ANALYTICS_SNAPSHOT_PATH se omitido.')
+    def gerar_snapshot_command(caminho):
+        """Exporta ordens, históricos e custos para o snapshot analítico."""
+        from app.dashboard.snapshot import gerar_snapshot
+
+        totais = gerar_snapshot(caminho)
+        for tabela, total in totais.items():
+            click.echo(f'{tabela}: {total} linhas')
+
+    @app.cli.command('importar')
+    @click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--tipo', required=True, type=click.Choice(['condominios', 'areas', 'fornecedores', 'usuarios']))
+    @click.option('--administradora', 'administradora_id', type=int, default=None,
+                  help='ID da administradora (obrigatório para condomínios e áreas).')
+    @click.option('--relatorio', default=None, help='Arquivo CSV onde gravar as linhas com erro.')
+    def importar_command(arquivo, tipo, administradora_id, relatorio):
+        """Importa condomínios, áreas, fornecedores ou usuários de um arquivo CSV ou XLSX."""
+        import os
+        from app.admin.importacao import ErroImportacao, importar_arquivo, relatorio_erros_csv
+
+        try:
+            with open(arquivo, 'rb') as entrada:
+                resultado = importar_arquivo(entrada, os.path.basename(arquivo), tipo, administradora_id)
+        except ErroImportacao as e:
+            raise click.ClickException(str(e))
+
+        click.echo(
+            f"{resultado['importados']} importado(s), {resultado['ignorados']} já existente(s), "
+            f"{len(resultado['erros'])} linha(s) com erro."
+        )
+        if resultado['erros'] and relatorio:
+            with open(relatorio, 'w', encoding='utf-8') as saida:
+                saida.write(relatorio_erros_csv(resultado))
+            click.echo(f'Relatório de erros gravado em {relatorio}')
+
+    @app.cli.command('gerar-dados')
+    @click.option('--ordens', default=10000, show_default=True, help='Quantidade de ordens de serviço.')
+    @click.option('--condominios', default=50, show_default=True, help='Quantidade de condomínios.')
+    @click.option('--administradoras', default=3, show_default=True, help='Quantidade de administradoras.')
+    @click.option('--fornecedores', default=40, show_default=True, help='Quantidade de fornecedores.')
+    @click.option('--assimetria', default=1.1, show_default=True,
+                  help='Expoente de Zipf das ordens por condomínio (0 distribui igualmente).')
+    @click.option('--semente', default=42, show_default=True, help='Semente do gerador pseudoaleatório.')
+    @click.option('--lote', default=5000, show_default=True, help='Quantidade de ordens por commit.')
+    @click.option('--sem-anexos', is_flag=True, help='Não gera os metadados de anexos.')
+    @click.option('--sem-atividades', is_flag=True, help='Não gera o log de atividades.')
+    @click.option('--forcar', is_flag=True, help='Permite gerar dados fora dos ambientes de desenvolvimento e teste.')
+    def gerar_dados_command(ordens, condominios, administradoras, fornecedores, assimetria, semente, lote,
+                            sem_anexos, sem_atividades, forcar):
+        """Gera cadastros e ordens sintéticos para reproduzir problemas de escala."""
+        from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+
+        if not (app.debug or app.testing or forcar):
+            raise click.ClickException('Use --forcar para gerar dados sintéticos neste ambiente.')
+
+        inicio = time.perf_counter()
+
+        def progresso(gravadas):
+            decorrido = time.perf_counter() - inicio
+            click.echo(f'{gravadas}/{ordens} ordens ({gravadas / decorrido:.0f}/s)')
+
+        ids = gerar_dados(
+            administradoras, condominios, ordens, semente=semente, assimetria=assimetria, lote=lote,
+            progresso=progresso, anexos=not sem_anexos, atividades=not sem_atividades,
+            fornecedores=fornecedores
+        )
+        click.echo(
+            f"{len(ids['ordens'])} ordens em {len(ids['condominios'])} condomínios geradas em "
+            f'{time.perf_counter() - inicio:.1f} s. Senha dos usuários: {SENHA_PADRAO}'
+        )
+
+    @app.cli.command('perfil-inicializacao')
+    @click.option('--config', 'config_name', default='production', show_default=True,
+                  help='Configuração usada em create_app.')
+    @click.option('--blueprints', default=None, help='Blueprints habilitados (ex.: api). Usa BLUEPRINTS se omitido.')
+    @click.option('--limite', default=20, show_default=True, help='Quantidade de módulos e pacotes listados.')
+    def perfil_inicializacao_command(config_name, blueprints, limite):
+        """Mostra os módulos mais lentos de importar na inicialização (python -X importtime)."""
+        from app.utils.perfil_inicializacao import medir_inicializacao
+
+        try:
+            perfil = medir_inicializacao(config_name, blueprints)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"create_app('{config_name}'): {perfil['total_us'] / 1000:.0f} ms "
+                   f"({len(perfil['modulos'])} módulos importados)")
+        click.echo('\nPacotes (tempo próprio somado):')
+        for pacote, micros in perfil['pacotes'][:limite]:
+            click.echo(f'{micros / 1000:9.1f} ms  {pacote}')
+        click.echo('\nMódulos (tempo acumulado, incluindo dependências):')
+        modulos = sorted(perfil['modulos'], key=lambda modulo: modulo[2], reverse=True)
+        for nome, proprio, acumulado, _ in modulos[:limite]:
+            click.echo(f'{acumulado / 1000:9.1f} ms  {nome} (próprio {proprio / 1000:.1f} ms)')
@@ -13,15 +13,48 @@ class Config:
     APP_NAME = 'Sistema de Ordens de Serviço'
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL') or 'admin@exemplo.com'
     
+    # Blueprints registrados (BLUEPRINTS=api para workers só de API; os templates HTML
+    # ligam auth, ordens, dashboard e admin entre si, então habilite-os em conjunto)
+    BLUEPRINTS_HABILITADOS = tuple(
+        nome.strip() for nome in (os.environ.get('BLUEPRINTS') or 'auth,admin,ordens,dashboard,api').split(',')
+        if nome.strip()
+    )
+    
+    # Flask-Migrate: true/false; indefinido carrega a extensão só na linha de comando do Flask
+    MIGRATE_ENABLED = os.environ['MIGRATE_ENABLED'].lower() == 'true' if os.environ.get('MIGRATE_ENABLED') else None
+    
     # Configurações do SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-        'pool_timeout': 20,
-        'max_overflow': 5,
-        'pool_size': 10
-    }
+    
+    # Configurações do pool de conexões (SQLALCHEMY_ENGINE_OPTIONS é montado em app.utils.pool)
+    DB_POOL_SIZE = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 5)
+    DB_POOL_TIMEOUT = 20
+    DB_POOL_RECYCLE = 300
+    DB_PING_IDLE_SECONDS = int(os.environ.get('DB_PING_IDLE_SECONDS') or 30)
+    DB_MAX_CONNECTIONS = int(os.environ['DB_MAX_CONNECTIONS']) if os.environ.get('DB_MAX_CONNECTIONS') else None
+    
+    # Modelo de workers do gunicorn, usado no dimensionamento do pool
+    GUNICORN_WORKERS = int(os.environ.get('WEB_CONCURRENCY') or 1)
+    GUNICORN_WORKER_CLASS = os.environ.get('GUNICORN_WORKER_CLASS') or 'sync'
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS') or 1)
+    
+    # Réplica de leitura (opcional) para dashboard, listagens e exportações
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 10)
+    
+    # API de leitura assíncrona (asgi.py): URLs com driver assíncrono; vazias são derivadas de
+    # SQLALCHEMY_DATABASE_URI e da réplica (sqlite -> aiosqlite, mysql -> aiomysql)
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    ASYNC_REPLICA_DATABASE_URL = os.environ.get('ASYNC_REPLICA_DATABASE_URL')
+    # Conexões por processo: as requisições só ocupam uma conexão durante as consultas
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE') or 10)
+    
+    # Configurações do registro de consultas lentas (ativo por padrão só em desenvolvimento)
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'false').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 200)
+    SLOW_QUERY_LOG_SIZE = 200
+    SLOW_QUERY_EXPLAIN = True
     
     # Configurações de upload
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
@@ -29,7 +62,29 @@ class Config:
     
     # Configurações de sessão
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
-    SESSION_TYPE = 'filesystem'
+    # Dados da sessão no servidor (sqlite:///, redis:// ou memory://); vazio mantém a sessão no cookie assinado
+    SESSION_STORAGE_URI = os.environ.get('SESSION_STORAGE_URI', 'sqlite:///' + os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'data', 'sessions.db'))
+    SESSION_CLEANUP_INTERVAL = 600  # segundos
+    
+    # Máximo de ordens abertas no payload de /api/bootstrap (as mais recentes)
+    API_BOOTSTRAP_MAX_ORDENS = int(os.environ.get('API_BOOTSTRAP_MAX_ORDENS') or 500)
+    
+    # Sincronização do aplicativo dos técnicos (/api/sync): alterações por resposta, operações por
+    # lote e segundos em que alterações recentes continuam sendo reenviadas (transações ainda abertas
+    # podem gravar IDs menores que os já visíveis)
+    SYNC_MAX_ALTERACOES = int(os.environ.get('SYNC_MAX_ALTERACOES') or 500)
+    SYNC_MAX_OPERACOES = int(os.environ.get('SYNC_MAX_OPERACOES') or 200)
+    SYNC_MARGEM_SEGUNDOS = int(os.environ.get('SYNC_MARGEM_SEGUNDOS') or 30)
+    # Dias de ordem_alteracoes mantidos por `flask limpar-alteracoes`: um aplicativo sem sincronizar
+    # há mais tempo recebe a cópia completa
+    SYNC_RETENCAO_DIAS = int(os.environ.get('SYNC_RETENCAO_DIAS') or 30)
+    
+    # Cache do usuário da sessão: segundos até revalidar a versão no banco
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 30)
+    
+    # Cache das opções dos campos de seleção: segundos até recarregar (alterações no próprio worker invalidam na hora)
+    OPCOES_CACHE_TTL = int(os.environ.get('OPCOES_CACHE_TTL') or 60)
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
@@ -45,11 +100,33 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'noreply@exemplo.com'
+    MAIL_SUPPRESS_SEND = False  # True monta a mensagem mas não a envia
     
     # Configurações de logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
     LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'app.log')
     
+    # Configurações de SLA
+    SLA_ANTECEDENCIA_HORAS = int(os.environ.get('SLA_ANTECEDENCIA_HORAS') or 24)
+    SLA_LOTE = 500
+    
+    # Configurações do snapshot analítico
+    ANALYTICS_SNAPSHOT_ENABLED = os.environ.get('ANALYTICS_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    ANALYTICS_SNAPSHOT_PATH = os.environ.get('ANALYTICS_SNAPSHOT_PATH') or \
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'analytics_snapshot.db')
+    
+    # Configurações do hash de senhas (bcrypt em pool de processos; 0 processos executa no próprio worker)
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS') or 12)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_WARN_MS = 500
+    # Operações na fila do pool por worker e prazo (segundos) para obter uma vaga e o resultado;
+    # acima disso a requisição recebe 503
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or 16)
+    PASSWORD_HASH_TIMEOUT = 5
+    
+    # Configurações da importação em lote
+    IMPORT_BATCH_SIZE = 500
+    
     # Configurações de paginação
     ITEMS_PER_PAGE = 10
     
@@ -57,9 +134,10 @@ class Config:
     CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 300
     
-    # Configurações de rate limiting
-    RATELIMIT_DEFAULT = "100/hour"
-    RATELIMIT_STORAGE_URL = "memory://"
+    # Configurações de rate limiting (janela deslizante; memory:// não é compartilhado entre workers)
+    RATELIMIT_DEFAULT = os.environ.get('RATELIMIT_DEFAULT') or "100/hour"
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or \
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'rate_limit.db')
     
     # Configurações de compressão
     COMPRESS_MIMETYPES = [
@@ -92,6 +170,12 @@ class DevelopmentConfig(Config):
     # Desativar algumas configurações de segurança em desenvolvimento
     SESSION_COOKIE_SECURE = False
     
+    # Servidor de desenvolvimento atende poucas requisições simultâneas
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 2)
+    
+    # Registro de consultas lentas com EXPLAIN
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    
     # Configurações de logging para desenvolvimento
     @staticmethod
     def init_app(app):
@@ -117,13 +201,49 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
     WTF_CSRF_ENABLED = False
     
+    # Não enviar e-mails em testes
+    MAIL_SUPPRESS_SEND = True
+    
     # Desativar rate limiting em testes
     RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URI = 'memory://'
+    
+    # Sessões no servidor, em memória do processo de testes
+    SESSION_STORAGE_URI = 'memory://'
+    
+    # Hash de senhas rápido e sem pool de processos em testes
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
     
     # Configurações de sessão para testes
     SESSION_COOKIE_SECURE = False
 
 
+class BenchmarkConfig(Config):
+    """Configuração para a suíte de benchmarks (benchmarks/)."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL') or \
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'benchmark.db')
+    WTF_CSRF_ENABLED = False
+    
+    # Sem rate limiting, para medir só a aplicação
+    RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URI = 'memory://'
+    SESSION_COOKIE_SECURE = False
+    
+    # Sessões compartilhadas pelos workers do gunicorn no teste de carga
+    SESSION_STORAGE_URI = 'sqlite:///' + os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'data', 'benchmark_sessions.db')
+    
+    # Sem envio de e-mails (as notificações são montadas, mas não enviadas)
+    MAIL_SUPPRESS_SEND = True
+    
+    # Login rápido e sem EXPLAIN das consultas lentas durante as medições
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    SLOW_QUERY_LOG_ENABLED = False
+
+
 class ProductionConfig(Config):
     """Configuração para ambiente de produção."""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
@@ -132,6 +252,9 @@ class ProductionConfig(Config):
     # Configurações de segurança para produção
     WTF_CSRF_CHECK_DEFAULT = True
     
+    # Limite de conexões do servidor MySQL (max_connections)
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS') or 151)
+    
     # Configurações de logging para produção
     @staticmethod
     def init_app(app):
@@ -155,5 +278,6 @@ config = {
     'development': DevelopmentConfig,
     'testing': TestingConfig,
     'production': ProductionConfig,
+    'benchmark': BenchmarkConfig,
     'default': DevelopmentConfig
 }
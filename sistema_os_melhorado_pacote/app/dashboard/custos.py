@@ -0,0 +1,226 @@
+"""
+Análise de custos das ordens de serviço.
+Este módulo carrega os valores estimados e finais em uma única consulta e calcula,
+de forma vetorizada com NumPy, variações, totais por agrupamento e ordens fora do padrão.
+Os nomes de condomínios, áreas e fornecedores são lidos depois, só para as chaves encontradas.
+"""
+import numpy as np
+from sqlalchemy import Float, String, cast, func, literal, select, type_coerce, union_all
+
+from app.extensions import db
+from app.models import OrdemServico, Condominio, Area, Fornecedor
+
+# Colunas usadas como chave de agrupamento
+AGRUPAMENTOS_CUSTOS = ('mes', 'condominio', 'area', 'fornecedor')
+
+# Modelo de onde vem o nome de cada chave de agrupamento por ID
+MODELOS_AGRUPAMENTO = {'condominio': Condominio, 'area': Area, 'fornecedor': Fornecedor}
+
+# Multiplicador do intervalo interquartil para marcar variações fora do padrão
+FATOR_IQR = 1.5
+
+
+def carregar_custos(condominio_ids=None, data_inicial=None, data_final=None, sessao=None):
+    """
+    Carrega as colunas numéricas das ordens em arrays NumPy.
+
+    Args:
+        condominio_ids (list, optional): Restringe aos condomínios informados
+        data_inicial (datetime, optional): Data de criação mínima
+        data_final (datetime, optional): Data de criação máxima
+        sessao (Session, optional): Sessão de banco a ser usada
+
+    Returns:
+        dict: Arrays com id, chaves de agrupamento e valores (NaN quando ausentes)
+    """
+    # Os tipos são ajustados no SQL para evitar a conversão linha a linha para
+    # Decimal e date no Python; o NumPy converte as colunas inteiras depois
+    consulta = select(
+        OrdemServico.id,
+        type_coerce(OrdemServico.periodo_mes, String),
+        OrdemServico.condominio_id,
+        # Chaves ausentes (sem área ou fornecedor) viram 0
+        func.coalesce(OrdemServico.area_id, 0),
+        func.coalesce(OrdemServico.fornecedor_id, 0),
+        cast(OrdemServico.valor_estimado, Float),
+        cast(OrdemServico.valor_final, Float)
+    ).where(
+        (OrdemServico.valor_estimado.isnot(None)) | (OrdemServico.valor_final.isnot(None))
+    )
+
+    if condominio_ids is not None:
+        consulta = consulta.where(OrdemServico.condominio_id.in_(condominio_ids))
+
+    if data_inicial:
+        consulta = consulta.where(OrdemServico.data_criacao >= data_inicial)
+
+    if data_final:
+        consulta = consulta.where(OrdemServico.data_criacao <= data_final)
+
+    linhas = (sessao or db.session).execute(consulta).all()
+    if not linhas:
+        colunas = [()] * 7
+    else:
+        colunas = list(zip(*linhas))
+
+    return {
+        'id': np.array(colunas[0], dtype=np.int64),
+        'mes': np.array(colunas[1], dtype='datetime64[D]').astype('datetime64[M]'),
+        'condominio': np.array(colunas[2], dtype=np.int64),
+        'area': np.array(colunas[3], dtype=np.int64),
+        'fornecedor': np.array(colunas[4], dtype=np.int64),
+        'estimado': np.array(colunas[5], dtype=np.float64),
+        'final': np.array(colunas[6], dtype=np.float64),
+    }
+
+
+def carregar_nomes(custos, sessao=None):
+    """
+    Lê, em uma única consulta, os nomes das chaves de MODELOS_AGRUPAMENTO presentes nos custos.
+
+    Args:
+        custos (dict): Retorno de carregar_custos
+        sessao (Session, optional): Sessão de banco a ser usada
+
+    Returns:
+        dict: Agrupamento -> {ID: nome}
+    """
+    nomes = {agrupamento: {} for agrupamento in MODELOS_AGRUPAMENTO}
+    consultas = []
+    for agrupamento, modelo in MODELOS_AGRUPAMENTO.items():
+        # 0 representa ausência de área ou fornecedor
+        ids = [int(chave) for chave in np.unique(custos[agrupamento]) if chave]
+        if ids:
+            consultas.append(
+                select(literal(agrupamento), modelo.id, modelo.nome).where(modelo.id.in_(ids))
+            )
+    if consultas:
+        for agrupamento, chave, nome in (sessao or db.session).execute(union_all(*consultas)):
+            nomes[agrupamento][chave] = nome
+    return nomes
+
+
+def totais_por(custos, agrupamento, nomes=None):
+    """
+    Soma valores estimados e finais por chave de agrupamento.
+
+    Args:
+        custos (dict): Retorno de carregar_custos
+        agrupamento (str): Uma das chaves de AGRUPAMENTOS_CUSTOS
+        nomes (dict, optional): Nome de cada chave, incluído como 'nome' em cada item
+
+    Returns:
+        list: Um dicionário por chave, com quantidade, totais e variação
+    """
+    chaves, indices = np.unique(custos[agrupamento], return_inverse=True)
+    estimado = np.nan_to_num(custos['estimado'])
+    final = np.nan_to_num(custos['final'])
+    tamanho = len(chaves)
+
+    quantidade = np.bincount(indices, minlength=tamanho)
+    total_estimado = np.bincount(indices, weights=estimado, minlength=tamanho)
+    total_final = np.bincount(indices, weights=final, minlength=tamanho)
+
+    # A variação só considera ordens com os dois valores preenchidos
+    completas = ~np.isnan(custos['estimado']) & ~np.isnan(custos['final'])
+    estimado_comparavel = np.bincount(indices, weights=np.where(completas, estimado, 0), minlength=tamanho)
+    final_comparavel = np.bincount(indices, weights=np.where(completas, final, 0), minlength=tamanho)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacao = np.where(
+            estimado_comparavel > 0,
+            (final_comparavel - estimado_comparavel) / estimado_comparavel * 100,
+            np.nan
+        )
+
+    if agrupamento == 'mes':
+        chaves = chaves.astype(str)
+    else:
+        chaves = chaves.tolist()
+
+    totais = [
+        {
+            'chave': chave if chave != 0 else None,
+            'quantidade': int(qtd),
+            'total_estimado': round(float(te), 2),
+            'total_final': round(float(tf), 2),
+            'variacao_percentual': None if np.isnan(v) else round(float(v), 1)
+        }
+        for chave, qtd, te, tf, v in zip(chaves, quantidade, total_estimado, total_final, variacao)
+    ]
+    if nomes is not None:
+        for item in totais:
+            item['nome'] = nomes.get(item['chave'])
+    return totais
+
+
+def variacoes_fora_do_padrao(custos, limite=50):
+    """
+    Identifica ordens cuja variação entre valor final e estimado foge do padrão.
+    Usa o critério do intervalo interquartil sobre a variação percentual.
+
+    Args:
+        custos (dict): Retorno de carregar_custos
+        limite (int): Quantidade máxima de ordens retornadas
+
+    Returns:
+        dict: Limites calculados e as ordens fora deles, das maiores variações para as menores
+    """
+    completas = ~np.isnan(custos['estimado']) & ~np.isnan(custos['final']) & (custos['estimado'] > 0)
+    if not completas.any():
+        return {'limite_inferior': None, 'limite_superior': None, 'ordens': []}
+
+    ids = custos['id'][completas]
+    estimado = custos['estimado'][completas]
+    final = custos['final'][completas]
+    variacao = (final - estimado) / estimado * 100
+
+    q1, q3 = np.percentile(variacao, [25, 75])
+    iqr = q3 - q1
+    inferior, superior = q1 - FATOR_IQR * iqr, q3 + FATOR_IQR * iqr
+
+    fora = np.flatnonzero((variacao < inferior) | (variacao > superior))
+    fora = fora[np.argsort(-np.abs(variacao[fora]))][:limite]
+
+    return {
+        'limite_inferior': round(float(inferior), 1),
+        'limite_superior': round(float(superior), 1),
+        'ordens': [
+            {
+                'id': int(ids[i]),
+                'valor_estimado': round(float(estimado[i]), 2),
+                'valor_final': round(float(final[i]), 2),
+                'variacao_percentual': round(float(variacao[i]), 1)
+            }
+            for i in fora
+        ]
+    }
+
+
+def analisar_custos(condominio_ids=None, data_inicial=None, data_final=None, sessao=None):
+    """
+    Monta a análise completa de custos para o dashboard.
+
+    Returns:
+        dict: Resumo geral, totais por agrupamento e ordens fora do padrão
+    """
+    custos = carregar_custos(condominio_ids, data_inicial, data_final, sessao)
+
+    estimado = custos['estimado']
+    final = custos['final']
+    completas = ~np.isnan(estimado) & ~np.isnan(final)
+
+    nomes = carregar_nomes(custos, sessao)
+
+    return {
+        'resumo': {
+            'ordens': int(len(custos['id'])),
+            'total_estimado': round(float(np.nansum(estimado)), 2),
+            'total_final': round(float(np.nansum(final)), 2),
+            'variacao_total': round(float(np.sum(final[completas] - estimado[completas])), 2)
+        },
+        'totais': {
+            agrupamento: totais_por(custos, agrupamento, nomes.get(agrupamento))
+            for agrupamento in AGRUPAMENTOS_CUSTOS
+        },
+        'fora_do_padrao': variacoes_fora_do_padrao(custos)
+    }
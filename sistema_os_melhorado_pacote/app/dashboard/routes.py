@@ -6,12 +6,14 @@ from flask import render_template, jsonify, request
 from flask_login import current_user, login_required
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from sqlalchemy import func, and_, extract
+from sqlalchemy import func, and_
 
 from app.dashboard import dashboard_bp
-from app.models import OrdemServico, Condominio, User
+from app.models import OrdemServico, Condominio, User, Area, Fornecedor
 from app.extensions import db
-from app.utils.decorators import cache_control
+from app.utils.decorators import cache_control, use_replica
+from app.utils.periodos import FORMATOS_PERIODO, formatar_periodo
+from app.dashboard.snapshot import marcar_resposta, sessao_historico
 
 # Timezone para datas
 FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
@@ -19,6 +21,7 @@ FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
 
 @dashboard_bp.route('/')
 @login_required
+@use_replica
 @cache_control(max_age=300)  # Cache por 5 minutos
 def index():
     """Rota principal do dashboard."""
@@ -50,6 +53,7 @@ def index():
 
 @dashboard_bp.route('/data')
 @login_required
+@use_replica
 def dashboard_data():
     """Rota para obter dados do dashboard via AJAX."""
     # Obter parâmetros de filtro
@@ -85,16 +89,23 @@ def dashboard_data():
             data_inicial = hoje - timedelta(days=365)
             data_final = hoje
     
-    # Obter dados para gráficos
-    dados = {
-        'ordens_por_status': obter_ordens_por_status(condominio_id, data_inicial, data_final),
-        'ordens_por_prioridade': obter_ordens_por_prioridade(condominio_id, data_inicial, data_final),
-        'ordens_por_periodo': obter_ordens_por_periodo(condominio_id, data_inicial, data_final, periodo),
-        'tempo_medio_conclusao': obter_tempo_medio_conclusao(condominio_id, data_inicial, data_final),
-        'ordens_por_tipo': obter_ordens_por_tipo(condominio_id, data_inicial, data_final)
-    }
-    
-    return jsonify(dados)
+    # Intervalos já encerrados são consultados no snapshot analítico, se disponível
+    sessao = sessao_historico(data_final)
+    
+    # Obter dados para gráficos (o status atual das ordens vem sempre do banco)
+    try:
+        dados = {
+            'ordens_por_status': obter_ordens_por_status(condominio_id, data_inicial, data_final),
+            'ordens_por_prioridade': obter_ordens_por_prioridade(condominio_id, data_inicial, data_final, sessao),
+            'ordens_por_periodo': obter_ordens_por_periodo(condominio_id, data_inicial, data_final, periodo, sessao),
+            'tempo_medio_conclusao': obter_tempo_medio_conclusao(condominio_id, data_inicial, data_final, sessao),
+            'ordens_por_tipo': obter_ordens_por_tipo(condominio_id, data_inicial, data_final, sessao)
+        }
+    finally:
+        if sessao is not db.session:
+            sessao.close()
+    
+    return marcar_resposta(jsonify(dados), sessao)
 
 
 def obter_estatisticas_gerais(condominio_id=None):
@@ -104,7 +115,7 @@ def obter_estatisticas_gerais(condominio_id=None):
     
     # Filtrar por condomínios do usuário
     if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtro de condomínio se especificado
     if condominio_id:
@@ -150,17 +161,17 @@ def obter_estatisticas_gerais(condominio_id=None):
     }
 
 
-def obter_ordens_por_status(condominio_id=None, data_inicial=None, data_final=None):
+def obter_ordens_por_status(condominio_id=None, data_inicial=None, data_final=None, sessao=None):
     """Obtém contagem de ordens por status."""
     # Construir query base
-    query = db.session.query(
+    query = (sessao or db.session).query(
         OrdemServico.status,
         func.count(OrdemServico.id).label('total')
     ).group_by(OrdemServico.status)
     
     # Filtrar por condomínios do usuário
     if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtros adicionais
     if condominio_id:
@@ -181,17 +192,17 @@ def obter_ordens_por_status(condominio_id=None, data_inicial=None, data_final=No
     return dados
 
 
-def obter_ordens_por_prioridade(condominio_id=None, data_inicial=None, data_final=None):
+def obter_ordens_por_prioridade(condominio_id=None, data_inicial=None, data_final=None, sessao=None):
     """Obtém contagem de ordens por prioridade."""
     # Construir query base
-    query = db.session.query(
+    query = (sessao or db.session).query(
         OrdemServico.prioridade,
         func.count(OrdemServico.id).label('total')
     ).group_by(OrdemServico.prioridade)
     
     # Filtrar por condomínios do usuário
     if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtros adicionais
     if condominio_id:
@@ -212,28 +223,15 @@ def obter_ordens_por_prioridade(condominio_id=None, data_inicial=None, data_fina
     return dados
 
 
-def obter_ordens_por_periodo(condominio_id=None, data_inicial=None, data_final=None, periodo='mes'):
+def obter_ordens_por_periodo(condominio_id=None, data_inicial=None, data_final=None, periodo='mes', sessao=None):
     """Obtém contagem de ordens por período (dia, semana, mês, ano)."""
-    # Definir agrupamento com base no período
-    if periodo == 'dia':
-        # Agrupar por dia
-        data_label = func.date(OrdemServico.data_criacao).label('periodo')
-        format_str = '%Y-%m-%d'
-    elif periodo == 'semana':
-        # Agrupar por semana
-        data_label = func.date_trunc('week', OrdemServico.data_criacao).label('periodo')
-        format_str = '%Y-%m-%d'
-    elif periodo == 'mes':
-        # Agrupar por mês
-        data_label = func.date_trunc('month', OrdemServico.data_criacao).label('periodo')
-        format_str = '%Y-%m'
-    else:  # ano
-        # Agrupar por ano
-        data_label = extract('year', OrdemServico.data_criacao).label('periodo')
-        format_str = '%Y'
+    # Definir agrupamento com base no período (colunas pré-calculadas no fuso de Fortaleza)
+    if periodo not in FORMATOS_PERIODO:
+        periodo = 'ano'
+    data_label = getattr(OrdemServico, f'periodo_{periodo}').label('periodo')
     
     # Construir query base
-    query = db.session.query(
+    query = (sessao or db.session).query(
         data_label,
         OrdemServico.status,
         func.count(OrdemServico.id).label('total')
@@ -241,7 +239,7 @@ def obter_ordens_por_periodo(condominio_id=None, data_inicial=None, data_final=N
     
     # Filtrar por condomínios do usuário
     if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtros adicionais
     if condominio_id:
@@ -262,7 +260,7 @@ def obter_ordens_por_periodo(condominio_id=None, data_inicial=None, data_final=N
     status_unicos = []
     
     for r in resultados:
-        periodo_str = r.periodo.strftime(format_str) if hasattr(r.periodo, 'strftime') else str(r.periodo)
+        periodo_str = formatar_periodo(r.periodo, periodo)
         
         if periodo_str not in dados_por_periodo:
             dados_por_periodo[periodo_str] = {}
@@ -293,22 +291,20 @@ def obter_ordens_por_periodo(condominio_id=None, data_inicial=None, data_final=N
     }
 
 
-def obter_tempo_medio_conclusao(condominio_id=None, data_inicial=None, data_final=None):
+def obter_tempo_medio_conclusao(condominio_id=None, data_inicial=None, data_final=None, sessao=None):
     """Obtém tempo médio de conclusão das ordens por tipo."""
     # Construir query base
-    query = db.session.query(
+    query = (sessao or db.session).query(
         OrdemServico.tipo,
-        func.avg(
-            func.extract('epoch', OrdemServico.data_conclusao - OrdemServico.data_criacao) / 86400
-        ).label('dias')
+        (func.avg(OrdemServico.tempo_total) / 86400.0).label('dias')
     ).filter(
         OrdemServico.status == 'Concluída',
-        OrdemServico.data_conclusao.isnot(None)
+        OrdemServico.tempo_total.isnot(None)
     ).group_by(OrdemServico.tipo)
     
     # Filtrar por condomínios do usuário
     if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtros adicionais
     if condominio_id:
@@ -329,17 +325,17 @@ def obter_tempo_medio_conclusao(condominio_id=None, data_inicial=None, data_fina
     return dados
 
 
-def obter_ordens_por_tipo(condominio_id=None, data_inicial=None, data_final=None):
+def obter_ordens_por_tipo(condominio_id=None, data_inicial=None, data_final=None, sessao=None):
     """Obtém contagem de ordens por tipo."""
     # Construir query base
-    query = db.session.query(
+    query = (sessao or db.session).query(
         OrdemServico.tipo,
         func.count(OrdemServico.id).label('total')
     ).group_by(OrdemServico.tipo)
     
     # Filtrar por condomínios do usuário
     if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtros adicionais
     if condominio_id:
@@ -360,8 +356,167 @@ def obter_ordens_por_tipo(condominio_id=None, data_inicial=None, data_final=None
     return dados
 
 
+@dashboard_bp.route('/percentis')
+@login_required
+@use_replica
+def percentis():
+    """Rota para obter percentis de tempo de conclusão via AJAX."""
+    condominio_id = request.args.get('condominio_id', type=int)
+    agrupamento = request.args.get('agrupamento', 'tipo')  # tipo, area, fornecedor
+    data_inicial_str = request.args.get('data_inicial')
+    data_final_str = request.args.get('data_final')
+    
+    data_inicial = None
+    data_final = None
+    
+    if data_inicial_str:
+        data_inicial = datetime.strptime(data_inicial_str, '%Y-%m-%d').replace(tzinfo=FORTALEZA_TZ)
+    
+    if data_final_str:
+        data_final = datetime.strptime(data_final_str, '%Y-%m-%d').replace(hour=23, minute=59, second=59, tzinfo=FORTALEZA_TZ)
+    
+    if agrupamento not in AGRUPAMENTOS_PERCENTIS:
+        return jsonify({'error': 'Agrupamento inválido'}), 400
+    
+    sessao = sessao_historico(data_final)
+    try:
+        dados = obter_percentis_conclusao(agrupamento, condominio_id, data_inicial, data_final, sessao)
+    finally:
+        if sessao is not db.session:
+            sessao.close()
+    
+    return marcar_resposta(jsonify(dados), sessao)
+
+
+# Colunas usadas para agrupar os percentis de conclusão
+AGRUPAMENTOS_PERCENTIS = {
+    'tipo': OrdemServico.tipo,
+    'area': Area.nome,
+    'fornecedor': Fornecedor.nome
+}
+
+
+def percentil(valores, p):
+    """
+    Calcula o percentil de uma lista ordenada por interpolação linear.
+    
+    Args:
+        valores (list): Valores em ordem crescente
+        p (float): Percentil desejado, entre 0 e 100
+        
+    Returns:
+        float: Valor do percentil, ou None se a lista estiver vazia
+    """
+    if not valores:
+        return None
+    posicao = (len(valores) - 1) * p / 100.0
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores) - 1)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicao - inferior)
+
+
+def obter_percentis_conclusao(agrupamento='tipo', condominio_id=None, data_inicial=None, data_final=None, sessao=None):
+    """Obtém p50/p90 do tempo total e de execução das ordens concluídas, em dias."""
+    chave = AGRUPAMENTOS_PERCENTIS[agrupamento]
+    
+    # Construir query base sobre as durações pré-calculadas
+    query = (sessao or db.session).query(
+        chave.label('chave'),
+        OrdemServico.tempo_total,
+        OrdemServico.tempo_execucao
+    ).filter(
+        OrdemServico.status == 'Concluída',
+        OrdemServico.tempo_total.isnot(None)
+    )
+    
+    if agrupamento == 'area':
+        query = query.join(Area, OrdemServico.area_id == Area.id)
+    elif agrupamento == 'fornecedor':
+        query = query.join(Fornecedor, OrdemServico.fornecedor_id == Fornecedor.id)
+    
+    # Filtrar por condomínios do usuário
+    if not current_user.is_admin:
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
+    
+    # Aplicar filtros adicionais
+    if condominio_id:
+        query = query.filter(OrdemServico.condominio_id == condominio_id)
+    
+    if data_inicial:
+        query = query.filter(OrdemServico.data_conclusao >= data_inicial)
+    
+    if data_final:
+        query = query.filter(OrdemServico.data_conclusao <= data_final)
+    
+    # Agrupar as durações por chave
+    totais = {}
+    execucoes = {}
+    for r in query:
+        totais.setdefault(r.chave, []).append(r.tempo_total / 86400.0)
+        if r.tempo_execucao is not None:
+            execucoes.setdefault(r.chave, []).append(r.tempo_execucao / 86400.0)
+    
+    # Formatar resultados
+    dados = []
+    for nome, valores in totais.items():
+        valores.sort()
+        execucao = sorted(execucoes.get(nome, []))
+        dados.append({
+            agrupamento: nome,
+            'total': len(valores),
+            'p50_dias': round(percentil(valores, 50), 1),
+            'p90_dias': round(percentil(valores, 90), 1),
+            'p50_execucao_dias': round(percentil(execucao, 50), 1) if execucao else None,
+            'p90_execucao_dias': round(percentil(execucao, 90), 1) if execucao else None
+        })
+    
+    return dados
+
+
+@dashboard_bp.route('/custos')
+@login_required
+@use_replica
+def custos():
+    """Rota para obter a análise de custos via AJAX."""
+    condominio_id = request.args.get('condominio_id', type=int)
+    data_inicial_str = request.args.get('data_inicial')
+    data_final_str = request.args.get('data_final')
+    
+    data_inicial = None
+    data_final = None
+    
+    if data_inicial_str:
+        data_inicial = datetime.strptime(data_inicial_str, '%Y-%m-%d').replace(tzinfo=FORTALEZA_TZ)
+    
+    if data_final_str:
+        data_final = datetime.strptime(data_final_str, '%Y-%m-%d').replace(hour=23, minute=59, second=59, tzinfo=FORTALEZA_TZ)
+    
+    # Restringir aos condomínios do usuário
+    condominio_ids = None
+    if not current_user.is_admin:
+        condominio_ids = current_user.condominio_ids
+    
+    if condominio_id:
+        if condominio_ids is not None and condominio_id not in condominio_ids:
+            return jsonify({'error': 'Acesso negado'}), 403
+        condominio_ids = [condominio_id]
+    
+    # NumPy é importado só na primeira análise, fora da inicialização dos workers
+    from app.dashboard.custos import analisar_custos
+    
+    sessao = sessao_historico(data_final)
+    try:
+        dados = analisar_custos(condominio_ids, data_inicial, data_final, sessao)
+    finally:
+        if sessao is not db.session:
+            sessao.close()
+    
+    return marcar_resposta(jsonify(dados), sessao)
+
+
 @dashboard_bp.route('/relatorios')
 @login_required
+@use_replica
 def relatorios():
     """Rota para relatórios."""
     return render_template('dashboard/relatorios.html', title='Relatórios')
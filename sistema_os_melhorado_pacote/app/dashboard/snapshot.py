@@ -0,0 +1,240 @@
+"""
+Snapshot analítico do banco de dados.
+Este módulo exporta ordens, históricos de status e custos para um arquivo SQLite local,
+onde as consultas históricas de relatórios e do dashboard podem rodar sem carregar o banco transacional.
+"""
+import os
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import Column, Float, Index, MetaData, Numeric, Table, create_engine, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.utils.periodos import para_fortaleza
+
+logger = logging.getLogger(__name__)
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Tabelas e colunas exportadas (textos longos e caminhos de arquivos ficam de fora)
+COLUNAS_SNAPSHOT = {
+    'ordens_servico': [
+        'id', 'numero', 'condominio_id', 'area_id', 'user_id', 'criador_id', 'fornecedor_id',
+        'prioridade', 'status', 'tipo', 'valor_estimado', 'valor_final',
+        'data_criacao', 'data_inicio', 'data_previsao', 'data_conclusao',
+        'periodo_dia', 'periodo_semana', 'periodo_mes', 'periodo_ano',
+        'tempo_ate_inicio', 'tempo_execucao', 'tempo_total',
+        'tempo_aguardando_aprovacao', 'tempo_aguardando_material', 'sla_violada_em'
+    ],
+    'ordem_status_log': ['id', 'ordem_id', 'status_anterior', 'status_novo', 'usuario_id', 'data_mudanca'],
+    'condominios': ['id', 'nome', 'administradora_id', 'ativo'],
+    'areas': ['id', 'nome', 'condominio_id'],
+    'fornecedores': ['id', 'nome', 'tipo_servico', 'ativo'],
+}
+
+# Índices criados no snapshot após a carga
+INDICES_SNAPSHOT = {
+    'ordens_servico': [
+        ('condominio_id', 'periodo_mes'), ('condominio_id', 'data_criacao'),
+        ('status', 'data_conclusao'), ('area_id',), ('fornecedor_id',)
+    ],
+    'ordem_status_log': [('ordem_id', 'data_mudanca')],
+}
+
+# Engines de leitura e data de geração em cache, por caminho e data de modificação do arquivo
+_engines = {}
+
+# Cabeçalho das respostas calculadas a partir do snapshot
+CABECALHO_SNAPSHOT = 'X-Snapshot-Gerado-Em'
+
+
+def caminho_snapshot():
+    """Retorna o caminho configurado para o arquivo de snapshot."""
+    return current_app.config['ANALYTICS_SNAPSHOT_PATH']
+
+
+def _tabelas_snapshot():
+    """Monta as tabelas do snapshot a partir das colunas dos modelos."""
+    metadata = MetaData()
+    tabelas = {}
+    for nome, colunas in COLUNAS_SNAPSHOT.items():
+        origem = db.metadata.tables[nome]
+        definicoes = []
+        for coluna in colunas:
+            tipo = origem.c[coluna].type
+            # Valores monetários viram ponto flutuante, mais adequado para agregações
+            if isinstance(tipo, Numeric):
+                tipo = Float()
+            definicoes.append(Column(coluna, tipo, primary_key=(coluna == 'id')))
+        tabelas[nome] = Table(nome, metadata, *definicoes)
+
+    Table('snapshot_info', metadata, Column('gerado_em', db.DateTime))
+    return metadata, tabelas
+
+
+def gerar_snapshot(caminho=None, lote=5000):
+    """
+    Gera o snapshot analítico em um arquivo SQLite.
+    O arquivo é escrito em um caminho temporário e substituído de forma atômica,
+    para que leitores nunca vejam um snapshot incompleto.
+
+    Args:
+        caminho (str, optional): Caminho do arquivo. Usa ANALYTICS_SNAPSHOT_PATH se omitido.
+        lote (int): Quantidade de linhas lidas e gravadas por vez
+
+    Returns:
+        dict: Quantidade de linhas exportadas por tabela
+    """
+    caminho = caminho or caminho_snapshot()
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = caminho + '.tmp'
+    if os.path.exists(temporario):
+        os.remove(temporario)
+
+    metadata, tabelas = _tabelas_snapshot()
+    destino = create_engine(f'sqlite:///{temporario}')
+    totais = {}
+
+    try:
+        # Índices são criados depois da carga, que fica mais rápida sem eles
+        for tabela in tabelas.values():
+            tabela.create(destino)
+        metadata.tables['snapshot_info'].create(destino)
+
+        for nome, tabela in tabelas.items():
+            origem = db.metadata.tables[nome]
+            consulta = select(*[origem.c[c] for c in COLUNAS_SNAPSHOT[nome]]).order_by(origem.c.id)
+            resultado = db.session.execute(consulta.execution_options(yield_per=lote))
+
+            totais[nome] = 0
+            with destino.begin() as conexao:
+                for linhas in resultado.partitions():
+                    conexao.execute(tabela.insert(), [dict(linha._mapping) for linha in linhas])
+                    totais[nome] += len(linhas)
+
+        with destino.begin() as conexao:
+            for nome, indices in INDICES_SNAPSHOT.items():
+                tabela = tabelas[nome]
+                for i, colunas in enumerate(indices):
+                    Index(f'ix_snapshot_{nome}_{i}', *[tabela.c[c] for c in colunas]).create(conexao)
+            conexao.execute(metadata.tables['snapshot_info'].insert(), {
+                'gerado_em': para_fortaleza(datetime.now(FORTALEZA_TZ))
+            })
+    except Exception:
+        destino.dispose()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    finally:
+        destino.dispose()
+        db.session.remove()
+
+    os.replace(temporario, caminho)
+    logger.info(f"Snapshot analítico gerado em {caminho}: {totais}")
+    return totais
+
+
+def _abrir_snapshot(caminho):
+    """
+    Obtém um engine somente leitura e a data de geração do snapshot.
+    Ambos são recriados só quando o arquivo muda: nas demais requisições basta um stat.
+
+    Returns:
+        tuple: Engine e data de geração (None se o arquivo não tiver snapshot_info)
+    """
+    chave = (caminho, os.path.getmtime(caminho))
+    atual = _engines.get(caminho)
+    if atual is None or atual[0] != chave:
+        if atual is not None:
+            atual[1].dispose()
+        engine = create_engine(f'sqlite:///file:{caminho}?mode=ro&uri=true')
+        with engine.connect() as conexao:
+            linha = conexao.exec_driver_sql('SELECT gerado_em FROM snapshot_info').first()
+        gerado_em = linha[0] if linha else None
+        if isinstance(gerado_em, str):
+            gerado_em = datetime.fromisoformat(gerado_em)
+        _engines[caminho] = atual = (chave, engine, gerado_em)
+    return atual[1], atual[2]
+
+
+def descartar_engines(fechar=True):
+    """
+    Descarta os pools dos engines do snapshot.
+
+    Args:
+        fechar (bool): False após um fork, para abandonar sem fechar as conexões herdadas do processo pai
+    """
+    for _, engine, _ in _engines.values():
+        engine.dispose(close=fechar)
+
+
+def data_snapshot(caminho=None):
+    """
+    Retorna a data de geração do snapshot.
+
+    Returns:
+        datetime: Data de geração (horário de Fortaleza, sem fuso), ou None se não houver snapshot
+    """
+    caminho = caminho or caminho_snapshot()
+    if not os.path.exists(caminho):
+        return None
+    return _abrir_snapshot(caminho)[1]
+
+
+def sessao_historico(data_final):
+    """
+    Escolhe a sessão para uma consulta histórica.
+
+    Retorna uma sessão ligada ao snapshot quando ele está habilitado e já cobre todo
+    o intervalo pedido (data_final anterior à geração do snapshot). Caso contrário,
+    retorna a sessão do banco transacional.
+
+    O snapshot tem todas as ordens criadas no intervalo, mas com os valores da data de
+    geração: mudanças posteriores de status, valores ou prazos só aparecem no próximo
+    snapshot. Agregados que descrevem a situação atual (como a contagem por status)
+    devem usar db.session; as respostas calculadas no snapshot informam a data de
+    geração com marcar_resposta.
+
+    Args:
+        data_final (datetime): Fim do intervalo consultado
+
+    Returns:
+        Session: Sessão a ser usada nas consultas
+    """
+    if not current_app.config.get('ANALYTICS_SNAPSHOT_ENABLED') or data_final is None:
+        return db.session
+
+    caminho = caminho_snapshot()
+    if not os.path.exists(caminho):
+        return db.session
+    try:
+        engine, gerado_em = _abrir_snapshot(caminho)
+    except Exception as e:
+        logger.warning(f"Snapshot analítico indisponível: {str(e)}")
+        return db.session
+
+    if gerado_em is None or para_fortaleza(data_final) >= gerado_em:
+        return db.session
+
+    return Session(bind=engine, info={'snapshot_gerado_em': gerado_em})
+
+
+def marcar_resposta(resposta, sessao):
+    """
+    Informa no cabeçalho X-Snapshot-Gerado-Em a data dos dados de uma resposta calculada no snapshot.
+
+    Args:
+        resposta (Response): Resposta da rota
+        sessao (Session): Sessão retornada por sessao_historico
+
+    Returns:
+        Response: A mesma resposta
+    """
+    gerado_em = sessao.info.get('snapshot_gerado_em')
+    if gerado_em is not None:
+        resposta.headers[CABECALHO_SNAPSHOT] = gerado_em.isoformat()
+    return resposta
@@ -3,23 +3,22 @@ Extensões Flask utilizadas na aplicação.
 Este módulo inicializa e configura todas as extensões Flask utilizadas no sistema.
 """
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 from flask_mail import Mail
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_caching import Cache
 from flask_compress import Compress
 from flask_cors import CORS
 
+from app.utils.rate_limit import LimitadorTaxa
+from app.utils.replica import RoutingSession
+
 # Inicialização das extensões
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
 mail = Mail()
-limiter = Limiter(key_func=get_remote_address)
+limiter = LimitadorTaxa()
 cache = Cache()
 compress = Compress()
 cors = CORS()
@@ -33,7 +32,8 @@ def init_extensions(app):
     """
     # Configuração do SQLAlchemy
     db.init_app(app)
-    migrate.init_app(app, db)
+    from flask_migrate import Migrate
+    Migrate(app, db)
     
     # Configuração do Login Manager
     login_manager.init_app(app)
@@ -4,4 +4,5 @@ Este módulo importa todos os modelos para facilitar o acesso.
 """
 from app.models.user import User, Role, ActivityLog, PasswordReset, UserCondominio, UserRole
 from app.models.condominio import Condominio, Administradora, Area, Fornecedor
-from app.models.ordem import OrdemServico, OrdemStatusLog, OrdemComentario, OrdemArquivo
+from app.models.ordem import OrdemServico, OrdemStatusLog, OrdemComentario, OrdemArquivo, SlaCursor
+from app.models.ordem import OrdemAlteracao, OperacaoSincronizada
@@ -2,13 +2,46 @@
 Módulo de modelos para ordens de serviço.
 Este módulo define os modelos relacionados a ordens de serviço e seus status.
 """
-from datetime import datetime
+from datetime import date, datetime, time
 from zoneinfo import ZoneInfo
+from sqlalchemy import bindparam, event, inspect, update
+from sqlalchemy.orm.attributes import set_committed_value
 from app.extensions import db
+from app.utils.periodos import calcular_periodos, para_fortaleza
 
 # Timezone para datas
 FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
 
+# Status em que a ordem ainda não foi concluída nem cancelada
+STATUS_PENDENTES = ['Aberta', 'Em Andamento', 'Aguardando Aprovação', 'Aguardando Material']
+
+# Todos os status válidos
+STATUS_ORDEM = STATUS_PENDENTES + ['Concluída', 'Cancelada']
+
+# Status de espera e a coluna que acumula o tempo gasto em cada um
+STATUS_AGUARDANDO = {
+    'Aguardando Aprovação': 'tempo_aguardando_aprovacao',
+    'Aguardando Material': 'tempo_aguardando_material'
+}
+
+# Colunas calculadas a partir das demais (períodos, durações e controle de SLA). Gravadas sozinhas
+# por gravar_colunas_derivadas, não contam como alteração da ordem: a versão não muda e o
+# aplicativo dos técnicos não recebe a ordem de novo
+COLUNAS_DERIVADAS = frozenset({
+    'periodo_dia', 'periodo_semana', 'periodo_mes', 'periodo_ano',
+    'data_status', 'tempo_ate_inicio', 'tempo_execucao', 'tempo_total', *STATUS_AGUARDANDO.values(),
+    'sla_alerta_em', 'sla_violada_em', 'sla_reavaliar',
+})
+
+
+# Grupo de colunas adiadas de OrdemServico, carregadas só nas telas de detalhe e edição
+GRUPO_DETALHES = 'detalhes'
+
+
+def segundos_entre(inicio, fim):
+    """Calcula a diferença em segundos entre duas datas, com ou sem fuso."""
+    return int((para_fortaleza(fim) - para_fortaleza(inicio)).total_seconds())
+
 
 class OrdemServico(db.Model):
     """Modelo de ordem de serviço."""
@@ -23,25 +56,54 @@ class OrdemServico(db.Model):
     fornecedor_id = db.Column(db.Integer, db.ForeignKey('fornecedores.id'))
     
     titulo = db.Column(db.String(100), nullable=False)
-    descricao = db.Column(db.Text, nullable=False)
+    # Textos longos e caminhos de arquivos são carregados sob demanda (grupo GRUPO_DETALHES)
+    descricao = db.deferred(db.Column(db.Text, nullable=False), group=GRUPO_DETALHES)
     prioridade = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), nullable=False, default='Aberta', index=True)
     tipo = db.Column(db.String(50), default='Manutenção')
     
-    observacoes = db.Column(db.Text)
+    observacoes = db.deferred(db.Column(db.Text), group=GRUPO_DETALHES)
     valor_estimado = db.Column(db.Numeric(10, 2))
     valor_final = db.Column(db.Numeric(10, 2))
     
-    foto_inicial = db.Column(db.String(255))
-    foto_andamento = db.Column(db.String(255))
-    foto_final = db.Column(db.String(255))
-    cotacao = db.Column(db.String(255))
+    foto_inicial = db.deferred(db.Column(db.String(255)), group=GRUPO_DETALHES)
+    foto_andamento = db.deferred(db.Column(db.String(255)), group=GRUPO_DETALHES)
+    foto_final = db.deferred(db.Column(db.String(255)), group=GRUPO_DETALHES)
+    cotacao = db.deferred(db.Column(db.String(255)), group=GRUPO_DETALHES)
     
     data_criacao = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(FORTALEZA_TZ), index=True)
     data_inicio = db.Column(db.DateTime)
     data_previsao = db.Column(db.DateTime)
     data_conclusao = db.Column(db.DateTime, index=True)
     
+    # Agrupamentos de data_criacao no fuso de Fortaleza, para séries por período
+    periodo_dia = db.Column(db.Date, index=True)
+    periodo_semana = db.Column(db.Date, index=True)
+    periodo_mes = db.Column(db.Date, index=True)
+    periodo_ano = db.Column(db.Integer, index=True)
+    
+    # Durações do ciclo de vida (em segundos), mantidas a cada mudança de status
+    data_status = db.Column(db.DateTime)
+    tempo_ate_inicio = db.Column(db.Integer)
+    tempo_execucao = db.Column(db.Integer)
+    tempo_total = db.Column(db.Integer)
+    tempo_aguardando_aprovacao = db.Column(db.Integer, default=0)
+    tempo_aguardando_material = db.Column(db.Integer, default=0)
+    
+    # Controle de SLA sobre data_previsao
+    sla_alerta_em = db.Column(db.DateTime)
+    sla_violada_em = db.Column(db.DateTime)
+    sla_reavaliar = db.Column(db.Boolean, default=False, index=True)
+    
+    # Versão da linha: incrementada a cada UPDATE pelo ORM, que só grava se a versão lida não
+    # mudou (StaleDataError caso contrário); usada na detecção de conflitos da sincronização
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    __table_args__ = (
+        db.Index('ix_ordens_servico_status_previsao', 'status', 'data_previsao'),
+    )
+    __mapper_args__ = {'version_id_col': versao}
+    
     # Relacionamentos
     condominio = db.relationship('Condominio', back_populates='ordens')
     area = db.relationship('Area', back_populates='ordens')
@@ -71,6 +133,17 @@ class OrdemServico(db.Model):
             else:
                 self.numero = f'OS-{ano}-0001'
     
+    def atualizar_periodos(self):
+        """Recalcula os agrupamentos de período a partir da data de criação."""
+        if self.data_criacao is None:
+            self.data_criacao = datetime.now(FORTALEZA_TZ)
+        
+        periodos = calcular_periodos(self.data_criacao)
+        self.periodo_dia = periodos['dia']
+        self.periodo_semana = periodos['semana']
+        self.periodo_mes = periodos['mes']
+        self.periodo_ano = periodos['ano']
+    
     def atualizar_status(self, novo_status, usuario_id, observacao=None):
         """
         Atualiza o status da ordem e cria um registro de log.
@@ -79,6 +152,9 @@ class OrdemServico(db.Model):
             novo_status (str): Novo status da ordem
             usuario_id (int): ID do usuário que está alterando o status
             observacao (str, optional): Observação sobre a mudança de status
+        
+        Returns:
+            OrdemStatusLog: Log criado, ou None se o status não mudou
         """
         if self.status != novo_status:
             # Registrar log de mudança de status
@@ -100,6 +176,115 @@ class OrdemServico(db.Model):
                 self.data_inicio = now
             elif novo_status == 'Concluída' and not self.data_conclusao:
                 self.data_conclusao = now
+            
+            self.registrar_transicao(log.status_anterior, novo_status, now)
+            return log
+        return None
+    
+    def atualizar_status_condicional(self, novo_status, usuario_id, observacao=None):
+        """
+        Atualiza o status com um UPDATE condicionado ao status lido (WHERE status = anterior),
+        sem bloquear a linha na leitura. As colunas alteradas por atualizar_status são gravadas
+        direto, com a versão incrementada; o log é gravado no próximo flush.
+        
+        Args:
+            novo_status (str): Novo status da ordem
+            usuario_id (int): ID do usuário que está alterando o status
+            observacao (str, optional): Observação sobre a mudança de status
+        
+        Returns:
+            bool: False se outro usuário alterou o status depois da leitura (nada é gravado)
+        """
+        # Sem autoflush: colunas adiadas lidas pelo cálculo das durações gravariam a ordem pelo ORM
+        with db.session.no_autoflush:
+            status_anterior = self.status
+            log = self.atualizar_status(novo_status, usuario_id, observacao)
+            if log is None:
+                return True
+            
+            estado = inspect(self)
+            valores = {
+                atributo.key: getattr(self, atributo.key)
+                for atributo in estado.mapper.column_attrs
+                if estado.attrs[atributo.key].history.added
+            }
+            resultado = db.session.execute(
+                update(OrdemServico)
+                .where(OrdemServico.id == self.id, OrdemServico.status == status_anterior)
+                .values(versao=OrdemServico.versao + 1, **valores)
+                .execution_options(synchronize_session=False)
+            )
+        
+        if resultado.rowcount != 1:
+            db.session.expunge(log)
+            db.session.expire(self)
+            return False
+        
+        # Os valores já estão no banco: sem histórico, o flush não repete o UPDATE
+        for chave, valor in valores.items():
+            set_committed_value(self, chave, valor)
+        db.session.expire(self, ['versao'])
+        return True
+    
+    def diferencas(self, valores):
+        """
+        Compara, campo a campo, os valores enviados por um usuário com os atuais da ordem.
+        
+        Args:
+            valores (dict): Nome do campo -> valor enviado
+        
+        Returns:
+            list: Um dicionário (campo, enviado, atual) para cada campo com valor diferente
+        """
+        return [
+            {'campo': campo, 'enviado': valor, 'atual': getattr(self, campo)}
+            for campo, valor in valores.items()
+            if _comparavel(valor) != _comparavel(getattr(self, campo))
+        ]
+    
+    def registrar_transicao(self, status_anterior, status_novo, data):
+        """
+        Atualiza as durações do ciclo de vida com uma mudança de status.
+        
+        Args:
+            status_anterior (str): Status que a ordem deixou
+            status_novo (str): Status que a ordem assumiu
+            data (datetime): Momento da mudança
+        """
+        inicio_status = self.data_status or self.data_criacao
+        
+        # Acumular o tempo gasto no status de espera que está sendo deixado
+        campo = STATUS_AGUARDANDO.get(status_anterior)
+        if campo and inicio_status:
+            setattr(self, campo, (getattr(self, campo) or 0) + segundos_entre(inicio_status, data))
+        
+        if status_novo == 'Em Andamento' and self.tempo_ate_inicio is None and self.data_criacao:
+            self.tempo_ate_inicio = segundos_entre(self.data_criacao, data)
+        elif status_novo == 'Concluída' and self.tempo_total is None and self.data_criacao:
+            self.tempo_total = segundos_entre(self.data_criacao, data)
+            if self.data_inicio:
+                self.tempo_execucao = segundos_entre(self.data_inicio, data)
+        
+        self.data_status = data
+    
+    def recalcular_duracoes(self, logs):
+        """
+        Recalcula as durações do ciclo de vida a partir do histórico de status.
+        
+        Args:
+            logs (list): Registros de OrdemStatusLog da ordem, em ordem cronológica
+        """
+        self.data_status = None
+        self.tempo_ate_inicio = None
+        self.tempo_execucao = None
+        self.tempo_total = None
+        for campo in STATUS_AGUARDANDO.values():
+            setattr(self, campo, 0)
+        
+        for log in logs:
+            if log.status_novo == 'Em Andamento' and not self.data_inicio:
+                self.data_inicio = log.data_mudanca
+            self.registrar_transicao(log.status_anterior, log.status_novo, log.data_mudanca)
     
     def adicionar_comentario(self, usuario_id, texto):
         """
@@ -141,6 +326,61 @@ class OrdemServico(db.Model):
         return f'<OrdemServico {self.numero}>'
 
 
+def gravar_colunas_derivadas(ordens, colunas):
+    """
+    Grava as colunas informadas, já atribuídas às ordens, com um UPDATE na tabela por chave
+    primária. Fora do flush do ORM, a versão da ordem não é incrementada e nenhuma alteração é
+    registrada para a sincronização; os valores passam a constar como já gravados nos objetos.
+    
+    Args:
+        ordens (iterable): Ordens carregadas na sessão
+        colunas (iterable): Nomes das colunas a gravar
+    """
+    ordens, colunas = list(ordens), tuple(colunas)
+    if not ordens:
+        return
+    
+    tabela = OrdemServico.__table__
+    # Sem autoflush: a ordem não pode ser gravada pelo ORM antes do UPDATE
+    with db.session.no_autoflush:
+        db.session.execute(
+            update(tabela).where(tabela.c.id == bindparam('b_id')),
+            [{'b_id': ordem.id, **{coluna: getattr(ordem, coluna) for coluna in colunas}} for ordem in ordens]
+        )
+    for ordem in ordens:
+        for coluna in colunas:
+            set_committed_value(ordem, coluna, getattr(ordem, coluna))
+
+
+def _comparavel(valor):
+    """Normaliza um valor do formulário, da API ou do banco para comparação (datas sem fuso, texto vazio)."""
+    if isinstance(valor, datetime):
+        return valor.replace(tzinfo=None)
+    if isinstance(valor, date):
+        return datetime.combine(valor, time())
+    if valor == '':
+        return None
+    return valor
+
+
+@event.listens_for(OrdemServico, 'before_insert')
+@event.listens_for(OrdemServico, 'before_update')
+def _atualizar_periodos_ordem(mapper, connection, target):
+    """Mantém os agrupamentos de período sincronizados com data_criacao."""
+    if target.periodo_dia is None or inspect(target).attrs.data_criacao.history.has_changes():
+        target.atualizar_periodos()
+
+
+@event.listens_for(OrdemServico, 'before_insert')
+@event.listens_for(OrdemServico, 'before_update')
+def _reavaliar_sla_ordem(mapper, connection, target):
+    """Marca a ordem para nova verificação de SLA quando a data prevista muda."""
+    if inspect(target).attrs.data_previsao.history.has_changes():
+        target.sla_alerta_em = None
+        target.sla_violada_em = None
+        target.sla_reavaliar = target.data_previsao is not None
+
+
 class OrdemStatusLog(db.Model):
     """Modelo de log de mudanças de status de uma ordem de serviço."""
     __tablename__ = 'ordem_status_log'
@@ -199,3 +439,55 @@ class OrdemArquivo(db.Model):
     
     def __repr__(self):
         return f'<OrdemArquivo {self.nome}>'
+
+
+class SlaCursor(db.Model):
+    """Posição da última varredura de SLA, para que cada execução processe apenas o intervalo novo."""
+    __tablename__ = 'sla_cursores'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(50), nullable=False, unique=True)
+    posicao = db.Column(db.DateTime)
+    atualizado_em = db.Column(db.DateTime, default=lambda: datetime.now(FORTALEZA_TZ), 
+                              onupdate=lambda: datetime.now(FORTALEZA_TZ))
+    
+    def __repr__(self):
+        return f'<SlaCursor {self.nome}: {self.posicao}>'
+
+
+class OrdemAlteracao(db.Model):
+    """
+    Registro de alteração de uma ordem para o técnico responsável.
+    O ID, crescente, é o token da sincronização: o aplicativo pede as alterações posteriores ao
+    último ID recebido. Sem chave estrangeira, para continuar valendo após a exclusão da ordem.
+    """
+    __tablename__ = 'ordem_alteracoes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ordem_id = db.Column(db.Integer, nullable=False)
+    responsavel_id = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(FORTALEZA_TZ))
+    
+    __table_args__ = (
+        db.Index('ix_ordem_alteracoes_responsavel_id', 'responsavel_id', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<OrdemAlteracao {self.id}: ordem {self.ordem_id}>'
+
+
+class OperacaoSincronizada(db.Model):
+    """Operação enviada pelo aplicativo e já aplicada, para que reenvios do mesmo lote não a repitam."""
+    __tablename__ = 'operacoes_sincronizadas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    chave = db.Column(db.String(64), nullable=False)
+    data = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(FORTALEZA_TZ))
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'chave', name='uq_operacoes_sincronizadas_user_chave'),
+    )
+    
+    def __repr__(self):
+        return f'<OperacaoSincronizada {self.chave}>'
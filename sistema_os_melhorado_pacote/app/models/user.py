@@ -5,8 +5,8 @@ Este módulo define os modelos relacionados a usuários, permissões e autentica
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from app.extensions import db, bcrypt
+from app.extensions import db
+from app.utils.senhas import gerar_hash_senha, verificar_senha, precisa_rehash
 
 # Timezone para datas
 FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
@@ -40,6 +40,11 @@ class User(db.Model, UserMixin):
     is_pending = db.Column(db.Boolean, default=True)
     is_active = db.Column(db.Boolean, default=True)
     last_login = db.Column(db.DateTime)
+    # Versão da credencial, parte do identificador da sessão e do cookie "lembrar-me";
+    # avança a cada troca de senha, invalidando os identificadores emitidos antes dela
+    versao_credencial = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Versão do retrato em cache (app.utils.usuario_cache), avançada a cada invalidação
+    versao_retrato = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(FORTALEZA_TZ))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(FORTALEZA_TZ), 
                            onupdate=lambda: datetime.now(FORTALEZA_TZ))
@@ -62,16 +67,34 @@ class User(db.Model, UserMixin):
         Se a senha for fornecida em texto plano, converte para hash.
         """
         if 'password' in kwargs and kwargs['password']:
-            kwargs['password'] = bcrypt.generate_password_hash(kwargs['password']).decode('utf-8')
+            kwargs['password'] = gerar_hash_senha(kwargs['password'])
         super(User, self).__init__(**kwargs)
     
     def set_password(self, password):
-        """Define a senha do usuário, convertendo para hash."""
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Define a senha do usuário, convertendo para hash, e avança a versão da credencial."""
+        self.password = gerar_hash_senha(password)
+        self.versao_credencial = (self.versao_credencial or 0) + 1
+    
+    def get_id(self):
+        """Identificador do Flask-Login: ID do usuário e versão da credencial ('<id>:<versão>')."""
+        return f'{self.id}:{self.versao_credencial or 0}'
     
     def check_password(self, password):
-        """Verifica se a senha fornecida corresponde à senha do usuário."""
-        return bcrypt.check_password_hash(self.password, password)
+        """
+        Verifica se a senha fornecida corresponde à senha do usuário.
+        Se o hash usar um custo diferente do configurado (ou o formato antigo),
+        ele é refeito com a senha validada; o commit fica a cargo de quem chamou.
+        """
+        if not verificar_senha(password, self.password):
+            return False
+        if precisa_rehash(self.password):
+            self.password = gerar_hash_senha(password)
+        return True
+    
+    @property
+    def condominio_ids(self):
+        """IDs dos condomínios do usuário."""
+        return frozenset(c.id for c in self.condominios)
     
     def has_permission(self, permission):
         """Verifica se o usuário tem a permissão especificada."""
@@ -79,6 +102,10 @@ class User(db.Model, UserMixin):
             return True
         return any(role.has_permission(permission) for role in self.roles)
     
+    def has_condominio_access(self, condominio_id):
+        """Verifica se o usuário tem acesso ao condomínio."""
+        return self.is_admin or condominio_id in self.condominio_ids
+    
     def update_last_login(self):
         """Atualiza a data do último login."""
         self.last_login = datetime.now(FORTALEZA_TZ)
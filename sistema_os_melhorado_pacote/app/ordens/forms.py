@@ -85,6 +85,8 @@ class OrdemEditForm(FlaskForm):
     cotacao = FileField('Cotação', validators=[
         FileAllowed(['pdf', 'jpg', 'png', 'jpeg'], 'Apenas PDF ou imagens são permitidos!')
     ])
+    # Versão da ordem quando o formulário foi aberto, conferida ao salvar
+    versao = HiddenField()
     submit = SubmitField('Salvar')
 
 
@@ -7,31 +7,44 @@ from flask_login import current_user, login_required
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import os
+from sqlalchemy.orm import Load, joinedload, lazyload, load_only, selectinload, undefer_group
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.ordens import ordens_bp
 from app.ordens.forms import OrdemForm, OrdemEditForm, OrdemComentarioForm, OrdemFiltroForm
-from app.models import (
-    OrdemServico, OrdemStatusLog, OrdemComentario, OrdemArquivo,
-    Condominio, Area, Fornecedor, User
-)
+from app.models import OrdemServico, OrdemStatusLog, OrdemComentario, OrdemArquivo, Condominio, User
 from app.extensions import db
-from app.utils.decorators import permission_required, log_activity
+from app.models.ordem import GRUPO_DETALHES
+from app.utils.decorators import permission_required, log_activity, use_replica
 from app.utils.email import send_ordem_status_update_email
+from app.utils.opcoes import opcoes, opcoes_com_etag, opcoes_condominios_usuario
 from app.utils.security import save_file
 
 # Timezone para datas
 FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
 
 
+def _usuario_resumido(carregador):
+    """
+    Carrega apenas o nome do usuário relacionado, sem os condomínios e papéis
+    que User carrega por padrão (lazy='joined').
+
+    Args:
+        carregador: Opção de carregamento que termina no usuário (ex.: joinedload(OrdemServico.user))
+
+    Returns:
+        Opção de carregamento com as colunas e relacionamentos restringidos
+    """
+    return carregador.options(load_only(User.id, User.name), lazyload(User.condominios), lazyload(User.roles))
+
+
 @ordens_bp.route('/painel')
 @login_required
+@use_replica
 def painel():
     """Rota para painel principal de ordens de serviço."""
-    # Estatísticas para o usuário atual
-    condominios = current_user.condominios
-    
     # Filtrar ordens pelos condomínios do usuário
-    query = OrdemServico.query.filter(OrdemServico.condominio_id.in_([c.id for c in condominios]))
+    query = OrdemServico.query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     total_ordens = query.count()
     ordens_abertas = query.filter_by(status='Aberta').count()
@@ -54,14 +67,13 @@ def painel():
 
 @ordens_bp.route('/')
 @login_required
+@use_replica
 def listar():
     """Rota para listar ordens de serviço."""
     form = OrdemFiltroForm()
     
     # Preencher opções de condomínios
-    form.condominio_id.choices = [(0, 'Todos')] + [
-        (c.id, c.nome) for c in current_user.condominios
-    ]
+    form.condominio_id.choices = opcoes_condominios_usuario(current_user, vazio='Todos')
     
     # Obter parâmetros de filtro
     condominio_id = request.args.get('condominio_id', type=int)
@@ -79,7 +91,7 @@ def listar():
         pass
     else:
         # Usuários normais só veem ordens dos seus condomínios
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtros
     if condominio_id and condominio_id > 0:
@@ -103,6 +115,11 @@ def listar():
     page = request.args.get('page', 1, type=int)
     per_page = 10
     
+    # Condomínio e responsável de cada linha na mesma consulta da página
+    query = query.options(
+        joinedload(OrdemServico.condominio).load_only(Condominio.id, Condominio.nome),
+        _usuario_resumido(joinedload(OrdemServico.user))
+    )
     ordens = query.order_by(OrdemServico.data_criacao.desc()).paginate(page=page, per_page=per_page)
     
     return render_template(
@@ -120,14 +137,13 @@ def listar():
 
 @ordens_bp.route('/concluidas')
 @login_required
+@use_replica
 def concluidas():
     """Rota para listar ordens de serviço concluídas."""
     form = OrdemFiltroForm()
     
     # Preencher opções de condomínios
-    form.condominio_id.choices = [(0, 'Todos')] + [
-        (c.id, c.nome) for c in current_user.condominios
-    ]
+    form.condominio_id.choices = opcoes_condominios_usuario(current_user, vazio='Todos')
     
     # Obter parâmetros de filtro
     condominio_id = request.args.get('condominio_id', type=int)
@@ -139,7 +155,7 @@ def concluidas():
     
     # Filtrar por condomínios do usuário
     if not current_user.is_admin:
-        query = query.filter(OrdemServico.condominio_id.in_([c.id for c in current_user.condominios]))
+        query = query.filter(OrdemServico.condominio_id.in_(current_user.condominio_ids))
     
     # Aplicar filtros
     if condominio_id and condominio_id > 0:
@@ -179,21 +195,16 @@ def nova():
     form = OrdemForm()
     
     # Preencher opções de condomínios
-    form.condominio_id.choices = [
-        (c.id, c.nome) for c in current_user.condominios
-    ]
+    form.condominio_id.choices = opcoes_condominios_usuario(current_user)
     
     # Preencher opções de áreas (será atualizado via AJAX)
     if form.condominio_id.data:
-        areas = Area.query.filter_by(condominio_id=form.condominio_id.data).all()
-        form.area_id.choices = [(0, 'Selecione...')] + [(a.id, a.nome) for a in areas]
+        form.area_id.choices = opcoes('areas', form.condominio_id.data, vazio='Selecione...')
     else:
         form.area_id.choices = [(0, 'Selecione...')]
     
     # Preencher opções de fornecedores
-    form.fornecedor_id.choices = [(0, 'Selecione...')] + [
-        (f.id, f.nome) for f in Fornecedor.query.filter_by(ativo=True).all()
-    ]
+    form.fornecedor_id.choices = opcoes('fornecedores', vazio='Selecione...')
     
     if form.validate_on_submit():
         ordem = OrdemServico(
@@ -252,15 +263,13 @@ def nova():
         # Salvar ordem
         db.session.add(ordem)
         
-        # Registrar log de status inicial
-        log = OrdemStatusLog(
-            ordem_id=ordem.id,
+        # Registrar log de status inicial (o ID da ordem só existe após o flush)
+        ordem.status_logs.append(OrdemStatusLog(
             status_anterior='',
             status_novo='Aberta',
             usuario_id=current_user.id,
             observacao='Ordem criada'
-        )
-        db.session.add(log)
+        ))
         
         db.session.commit()
         
@@ -276,73 +285,57 @@ def nova():
 @log_activity('edit_ordem')
 def editar(id):
     """Rota para editar ordem de serviço."""
-    ordem = OrdemServico.query.get_or_404(id)
+    ordem = OrdemServico.query.options(undefer_group(GRUPO_DETALHES)).get_or_404(id)
     
     # Verificar se o usuário tem acesso ao condomínio da ordem
-    if not current_user.is_admin and ordem.condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and ordem.condominio_id not in current_user.condominio_ids:
         flash('Você não tem permissão para editar esta ordem de serviço.', 'danger')
         return redirect(url_for('ordens.listar'))
     
     form = OrdemEditForm(obj=ordem)
     
     # Preencher opções de condomínios
-    form.condominio_id.choices = [
-        (c.id, c.nome) for c in current_user.condominios
-    ]
+    form.condominio_id.choices = opcoes_condominios_usuario(current_user)
     
     # Preencher opções de áreas
-    areas = Area.query.filter_by(condominio_id=ordem.condominio_id).all()
-    form.area_id.choices = [(0, 'Selecione...')] + [(a.id, a.nome) for a in areas]
+    form.area_id.choices = opcoes('areas', ordem.condominio_id, vazio='Selecione...')
     
     # Preencher opções de fornecedores
-    form.fornecedor_id.choices = [(0, 'Selecione...')] + [
-        (f.id, f.nome) for f in Fornecedor.query.filter_by(ativo=True).all()
-    ]
+    form.fornecedor_id.choices = opcoes('fornecedores', vazio='Selecione...')
     
     # Preencher opções de usuários para atribuição
-    usuarios = User.query.join(UserCondominio).filter(
-        UserCondominio.condominio_id == ordem.condominio_id,
-        User.is_active == True,
-        User.is_pending == False
-    ).all()
-    form.user_id.choices = [(0, 'Selecione...')] + [(u.id, u.name) for u in usuarios]
+    form.user_id.choices = opcoes('responsaveis', ordem.condominio_id, vazio='Selecione...')
     
     if form.validate_on_submit():
-        # Verificar se houve mudança de status
-        status_anterior = ordem.status
-        
-        # Atualizar campos básicos
-        ordem.titulo = form.titulo.data
-        ordem.descricao = form.descricao.data
-        ordem.prioridade = form.prioridade.data
-        ordem.tipo = form.tipo.data
-        ordem.condominio_id = form.condominio_id.data
-        ordem.observacoes = form.observacoes.data
-        
-        # Campos opcionais
-        if form.area_id.data and form.area_id.data > 0:
-            ordem.area_id = form.area_id.data
-        else:
-            ordem.area_id = None
-        
-        if form.fornecedor_id.data and form.fornecedor_id.data > 0:
-            ordem.fornecedor_id = form.fornecedor_id.data
-        else:
-            ordem.fornecedor_id = None
-        
-        if form.user_id.data and form.user_id.data > 0:
-            ordem.user_id = form.user_id.data
-        else:
-            ordem.user_id = None
-        
+        # Campos editáveis com os valores do formulário
+        valores = {
+            'titulo': form.titulo.data,
+            'descricao': form.descricao.data,
+            'prioridade': form.prioridade.data,
+            'tipo': form.tipo.data,
+            'status': form.status.data,
+            'condominio_id': form.condominio_id.data,
+            'observacoes': form.observacoes.data,
+            'area_id': form.area_id.data if form.area_id.data and form.area_id.data > 0 else None,
+            'fornecedor_id': form.fornecedor_id.data if form.fornecedor_id.data and form.fornecedor_id.data > 0 else None,
+            'user_id': form.user_id.data if form.user_id.data and form.user_id.data > 0 else None,
+        }
         if form.valor_estimado.data:
-            ordem.valor_estimado = form.valor_estimado.data
-        
+            valores['valor_estimado'] = form.valor_estimado.data
         if form.valor_final.data:
-            ordem.valor_final = form.valor_final.data
-        
+            valores['valor_final'] = form.valor_final.data
         if form.data_previsao.data:
-            ordem.data_previsao = form.data_previsao.data.replace(tzinfo=FORTALEZA_TZ)
+            valores['data_previsao'] = form.data_previsao.data.replace(tzinfo=FORTALEZA_TZ)
+        
+        # Outro usuário salvou a ordem depois que o formulário foi aberto
+        if form.versao.data != str(ordem.versao) and ordem.diferencas(valores):
+            return _conflito_edicao(form, ordem, valores)
+        
+        # Verificar se houve mudança de status
+        status_anterior = ordem.status
+        novo_status = valores.pop('status')
+        for campo, valor in valores.items():
+            setattr(ordem, campo, valor)
         
         # Processar arquivos
         if form.foto_inicial.data:
@@ -398,18 +391,20 @@ def editar(id):
                 ))
         
         # Atualizar status
-        if form.status.data != status_anterior:
-            ordem.atualizar_status(form.status.data, current_user.id, form.observacoes.data)
-            
-            # Se o status for "Concluída", registrar data de conclusão
-            if form.status.data == 'Concluída' and not ordem.data_conclusao:
-                ordem.data_conclusao = datetime.now(FORTALEZA_TZ)
-            
-            # Enviar email de notificação
-            if ordem.user_id:
-                send_ordem_status_update_email(ordem, ordem.user.name, ordem.user.email)
+        if novo_status != status_anterior:
+            ordem.atualizar_status(novo_status, current_user.id, form.observacoes.data)
         
-        db.session.commit()
+        # O UPDATE só grava se a versão lida não mudou (version_id_col)
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            valores['status'] = novo_status
+            return _conflito_edicao(form, ordem, valores)
+        
+        # Enviar email de notificação
+        if novo_status != status_anterior and ordem.user_id:
+            send_ordem_status_update_email(ordem, ordem.user.name, ordem.user.email)
         
         flash(f'Ordem de serviço #{ordem.numero} atualizada com sucesso!', 'success')
         return redirect(url_for('ordens.detalhe', id=ordem.id))
@@ -417,14 +412,52 @@ def editar(id):
     return render_template('ordens/form_edit.html', title='Editar Ordem de Serviço', form=form, ordem=ordem)
 
 
+def _conflito_edicao(form, ordem, valores):
+    """
+    Reexibe o formulário de edição com as diferenças para a versão atual da ordem.
+    O formulário passa a levar a versão atual: salvar de novo sobrescreve os valores revisados.
+
+    Args:
+        form (OrdemEditForm): Formulário enviado
+        ordem (OrdemServico): Ordem com os valores atuais
+        valores (dict): Campos editáveis com os valores enviados
+
+    Returns:
+        tuple: Página do formulário e código HTTP 409 (Conflict)
+    """
+    conflitos = ordem.diferencas(valores)
+    for diferenca in conflitos:
+        campo = form[diferenca['campo']]
+        rotulos = dict(getattr(campo, 'choices', None) or ())
+        diferenca['campo'] = campo.label.text
+        for chave in ('enviado', 'atual'):
+            diferenca[chave] = rotulos.get(diferenca[chave], diferenca[chave])
+    
+    form.versao.data = ordem.versao
+    flash('Esta ordem foi alterada por outro usuário enquanto você editava. Revise as diferenças antes de salvar.', 'warning')
+    return render_template(
+        'ordens/form_edit.html', title='Editar Ordem de Serviço', form=form, ordem=ordem, conflitos=conflitos
+    ), 409
+
+
 @ordens_bp.route('/detalhe/<int:id>', methods=['GET', 'POST'])
 @login_required
 def detalhe(id):
     """Rota para visualizar detalhes de uma ordem de serviço."""
-    ordem = OrdemServico.query.get_or_404(id)
+    # Ordem, relacionamentos exibidos e históricos com os nomes dos usuários em três consultas.
+    # undefer_group via Load(): como opção solta, falha junto com selectinload no SQLAlchemy 2.0.9
+    ordem = OrdemServico.query.options(
+        Load(OrdemServico).undefer_group(GRUPO_DETALHES),
+        joinedload(OrdemServico.condominio),
+        joinedload(OrdemServico.area),
+        joinedload(OrdemServico.fornecedor),
+        _usuario_resumido(joinedload(OrdemServico.user)),
+        _usuario_resumido(selectinload(OrdemServico.status_logs).joinedload(OrdemStatusLog.usuario)),
+        _usuario_resumido(selectinload(OrdemServico.comentarios).joinedload(OrdemComentario.usuario))
+    ).get_or_404(id)
     
     # Verificar se o usuário tem acesso ao condomínio da ordem
-    if not current_user.is_admin and ordem.condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and ordem.condominio_id not in current_user.condominio_ids:
         flash('Você não tem permissão para visualizar esta ordem de serviço.', 'danger')
         return redirect(url_for('ordens.listar'))
     
@@ -461,7 +494,7 @@ def atualizar_status(id):
     ordem = OrdemServico.query.get_or_404(id)
     
     # Verificar se o usuário tem acesso ao condomínio da ordem
-    if not current_user.is_admin and ordem.condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and ordem.condominio_id not in current_user.condominio_ids:
         flash('Você não tem permissão para atualizar esta ordem de serviço.', 'danger')
         return redirect(url_for('ordens.listar'))
     
@@ -469,11 +502,10 @@ def atualizar_status(id):
     observacao = request.form.get('observacao', '')
     
     if novo_status and novo_status != ordem.status:
-        ordem.atualizar_status(novo_status, current_user.id, observacao)
-        
-        # Se o status for "Concluída", registrar data de conclusão
-        if novo_status == 'Concluída' and not ordem.data_conclusao:
-            ordem.data_conclusao = datetime.now(FORTALEZA_TZ)
+        # UPDATE condicionado ao status lido: outra mudança simultânea não é sobrescrita
+        if not ordem.atualizar_status_condicional(novo_status, current_user.id, observacao):
+            flash(f'O status da ordem #{ordem.numero} foi alterado por outro usuário para {ordem.status}.', 'warning')
+            return redirect(url_for('ordens.detalhe', id=ordem.id))
         
         db.session.commit()
         
@@ -495,7 +527,7 @@ def excluir(id):
     ordem = OrdemServico.query.get_or_404(id)
     
     # Verificar se o usuário tem acesso ao condomínio da ordem
-    if not current_user.is_admin and ordem.condominio_id not in [c.id for c in current_user.condominios]:
+    if not current_user.is_admin and ordem.condominio_id not in current_user.condominio_ids:
         flash('Você não tem permissão para excluir esta ordem de serviço.', 'danger')
         return redirect(url_for('ordens.listar'))
     
@@ -511,17 +543,30 @@ def excluir(id):
 @login_required
 def areas_por_condominio(condominio_id):
     """Rota para obter áreas de um condomínio (AJAX)."""
-    areas = Area.query.filter_by(condominio_id=condominio_id).all()
-    return jsonify([{'id': a.id, 'nome': a.nome} for a in areas])
+    return _resposta_opcoes('areas', condominio_id)
 
 
 @ordens_bp.route('/usuarios-por-condominio/<int:condominio_id>')
 @login_required
 def usuarios_por_condominio(condominio_id):
     """Rota para obter usuários de um condomínio (AJAX)."""
-    usuarios = User.query.join(UserCondominio).filter(
-        UserCondominio.condominio_id == condominio_id,
-        User.is_active == True,
-        User.is_pending == False
-    ).all()
-    return jsonify([{'id': u.id, 'nome': u.name} for u in usuarios])
+    return _resposta_opcoes('responsaveis', condominio_id)
+
+
+def _resposta_opcoes(lista, condominio_id):
+    """
+    Responde com as opções da lista em JSON, com ETag para requisições condicionais.
+
+    Args:
+        lista (str): Nome da lista em cache
+        condominio_id (int): ID do condomínio
+
+    Returns:
+        Response: Lista de {id, nome}, ou 304 se o cliente já tem a versão atual
+    """
+    itens, etag = opcoes_com_etag(lista, condominio_id)
+    resposta = jsonify([{'id': id, 'nome': nome} for id, nome in itens])
+    resposta.set_etag(etag)
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    return resposta.make_conditional(request)
@@ -0,0 +1,175 @@
+"""
+Verificação de SLA das ordens de serviço.
+Este módulo identifica ordens vencidas ou prestes a vencer a partir de data_previsao,
+marca as violações e notifica os responsáveis por email.
+"""
+import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+
+from app.extensions import db
+from app.models import OrdemServico, SlaCursor
+from app.models.ordem import STATUS_PENDENTES, gravar_colunas_derivadas
+from app.utils.email import send_notification_email
+from app.utils.periodos import para_fortaleza
+
+logger = logging.getLogger(__name__)
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+
+def _obter_cursor(nome):
+    """Obtém (ou cria) o cursor de varredura com o nome informado."""
+    cursor = SlaCursor.query.filter_by(nome=nome).first()
+    if cursor is None:
+        cursor = SlaCursor(nome=nome)
+        db.session.add(cursor)
+    return cursor
+
+
+def _base_query():
+    """Query de ordens pendentes com os destinatários já carregados."""
+    return OrdemServico.query.options(
+        selectinload(OrdemServico.user),
+        selectinload(OrdemServico.criador),
+        selectinload(OrdemServico.condominio)
+    ).filter(OrdemServico.status.in_(STATUS_PENDENTES))
+
+
+def _varrer(inicio, fim, lote):
+    """
+    Itera, em lotes, as ordens pendentes com data prevista no intervalo (inicio, fim].
+    Usa paginação por chave (data_previsao, id) sobre o índice (status, data_previsao).
+    """
+    ultima_data, ultimo_id = inicio, 0
+    while True:
+        query = _base_query().filter(OrdemServico.data_previsao <= fim)
+        if ultima_data is not None:
+            query = query.filter(or_(
+                OrdemServico.data_previsao > ultima_data,
+                and_(OrdemServico.data_previsao == ultima_data, OrdemServico.id > ultimo_id)
+            ))
+        else:
+            query = query.filter(OrdemServico.data_previsao.isnot(None))
+
+        ordens = query.order_by(OrdemServico.data_previsao, OrdemServico.id).limit(lote).all()
+        if not ordens:
+            break
+
+        yield ordens
+        ultima_data, ultimo_id = ordens[-1].data_previsao, ordens[-1].id
+
+
+def _classificar(ordens, agora, limite_alerta, resultado):
+    """Marca as ordens como violadas ou em alerta, conforme a data prevista, e grava as marcas."""
+    violadas, alertas = [], []
+    for ordem in ordens:
+        if ordem.data_previsao <= agora:
+            if ordem.sla_violada_em is None:
+                ordem.sla_violada_em = agora
+                violadas.append(ordem)
+        elif ordem.data_previsao <= limite_alerta:
+            if ordem.sla_alerta_em is None:
+                ordem.sla_alerta_em = agora
+                alertas.append(ordem)
+
+    # Marcas de controle gravadas direto na tabela: não alteram a versão da ordem, que o
+    # aplicativo dos técnicos trataria como conflito
+    gravar_colunas_derivadas(violadas, ('sla_violada_em',))
+    gravar_colunas_derivadas(alertas, ('sla_alerta_em',))
+    resultado['violadas'].extend(violadas)
+    resultado['alertas'].extend(alertas)
+
+
+def verificar_sla(agora=None, antecedencia=None, lote=None):
+    """
+    Executa uma varredura incremental de SLA.
+
+    Cada tipo de verificação (alerta e violação) mantém um cursor com o limite
+    da última execução, de modo que apenas o intervalo novo de datas previstas é
+    lido. Ordens cuja data prevista foi alterada são reavaliadas à parte.
+
+    Args:
+        agora (datetime, optional): Momento de referência da verificação
+        antecedencia (timedelta, optional): Janela de alerta antes do vencimento
+        lote (int, optional): Quantidade de ordens lidas por consulta
+
+    Returns:
+        dict: Ordens que entraram em alerta e ordens com SLA violado nesta execução
+    """
+    if agora is None:
+        agora = datetime.now(FORTALEZA_TZ)
+    if antecedencia is None:
+        antecedencia = timedelta(hours=current_app.config.get('SLA_ANTECEDENCIA_HORAS', 24))
+    if lote is None:
+        lote = current_app.config.get('SLA_LOTE', 500)
+
+    # As datas são gravadas no horário local de Fortaleza, sem fuso
+    agora = para_fortaleza(agora)
+    limite_alerta = agora + antecedencia
+    resultado = {'alertas': [], 'violadas': []}
+
+    # Ordens com data prevista alterada desde a última execução
+    reavaliar = _base_query().filter(OrdemServico.sla_reavaliar == True).limit(lote).all()
+    while reavaliar:
+        for ordem in reavaliar:
+            ordem.sla_reavaliar = False
+        gravar_colunas_derivadas(reavaliar, ('sla_reavaliar',))
+        _classificar(reavaliar, agora, limite_alerta, resultado)
+        reavaliar = _base_query().filter(OrdemServico.sla_reavaliar == True).limit(lote).all()
+
+    # Varreduras incrementais a partir dos cursores
+    for nome, limite in (('violacao', agora), ('alerta', limite_alerta)):
+        cursor = _obter_cursor(nome)
+        if cursor.posicao is not None and cursor.posicao >= limite:
+            continue
+
+        for ordens in _varrer(cursor.posicao, limite, lote):
+            _classificar(ordens, agora, limite_alerta, resultado)
+        cursor.posicao = limite
+
+    db.session.commit()
+
+    notificar_sla(resultado)
+    logger.info(
+        f"Verificação de SLA: {len(resultado['alertas'])} alerta(s), "
+        f"{len(resultado['violadas'])} violação(ões)"
+    )
+    return resultado
+
+
+def notificar_sla(resultado):
+    """
+    Envia um único email por destinatário com as ordens em alerta ou vencidas.
+
+    Args:
+        resultado (dict): Retorno de verificar_sla
+    """
+    por_destinatario = {}
+    for tipo in ('violadas', 'alertas'):
+        for ordem in resultado[tipo]:
+            destinatario = ordem.user or ordem.criador
+            if destinatario is None or not destinatario.email:
+                continue
+            itens = por_destinatario.setdefault(destinatario.email, (destinatario.name, []))[1]
+            itens.append((tipo, ordem))
+
+    for email, (nome, itens) in por_destinatario.items():
+        linhas = ''.join(
+            f"<li><strong>#{ordem.numero}</strong> - {ordem.titulo} ({ordem.condominio.nome}) - "
+            f"{'vencida em' if tipo == 'violadas' else 'vence em'} {ordem.data_previsao.strftime('%d/%m/%Y %H:%M')}</li>"
+            for tipo, ordem in itens
+        )
+        body = f"""
+        <p>Olá {nome},</p>
+        <p>As seguintes ordens de serviço estão vencidas ou próximas do prazo previsto:</p>
+        <ul>{linhas}</ul>
+        <p>Para mais detalhes, acesse o sistema.</p>
+        <p>Atenciosamente,<br>Equipe do Sistema OS</p>
+        """
+        send_notification_email('Ordens de serviço com prazo em risco', body, email)
@@ -0,0 +1,125 @@
+"""
+Registro de alterações das ordens para a sincronização dos técnicos.
+Este módulo grava, na mesma transação de cada flush, uma linha em ordem_alteracoes para cada
+ordem incluída, alterada ou excluída e para cada comentário, log de status ou arquivo novo,
+endereçada ao técnico responsável (OrdemServico.user_id). Numa troca de responsável, o anterior
+também recebe a alteração, para remover a ordem da sua cópia local. Alterações feitas com
+instruções em lote devem ser registradas com registrar_alteracoes. As antigas são excluídas
+por limpar_alteracoes.
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm.util import identity_key
+
+from app.extensions import db
+from app.models import OrdemServico, OrdemComentario, OrdemStatusLog, OrdemArquivo, OrdemAlteracao
+from app.models.ordem import COLUNAS_DERIVADAS
+from app.utils.replica import RoutingSession
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Registros filhos de uma ordem que também contam como alteração dela
+FILHOS_ORDEM = (OrdemComentario, OrdemStatusLog, OrdemArquivo)
+
+
+def registrar_alteracoes(conexao, pares):
+    """
+    Grava as alterações informadas.
+
+    Args:
+        conexao (Connection): Conexão da transação que alterou as ordens
+        pares (iterable): Pares (ordem_id, responsavel_id); responsáveis nulos são ignorados
+    """
+    agora = datetime.now(FORTALEZA_TZ)
+    linhas = [
+        {'ordem_id': ordem_id, 'responsavel_id': responsavel_id, 'data': agora}
+        for ordem_id, responsavel_id in sorted({par for par in pares if par[1]})
+    ]
+    if linhas:
+        conexao.execute(insert(OrdemAlteracao), linhas)
+
+
+def limpar_alteracoes(dias=None, lote=5000):
+    """
+    Exclui as alterações gravadas há mais de SYNC_RETENCAO_DIAS.
+    Só são excluídas as anteriores à primeira alteração mantida, de modo que um token menor que
+    ela indica alterações perdidas (veja app.api.sincronizacao.puxar_alteracoes). A alteração
+    mais recente é sempre mantida, para que o banco não volte a usar IDs já entregues como token.
+
+    Args:
+        dias (int, optional): Dias mantidos. Usa SYNC_RETENCAO_DIAS se omitido
+        lote (int): Quantidade de alterações excluídas por commit
+
+    Returns:
+        int: Quantidade de alterações excluídas
+    """
+    if dias is None:
+        dias = current_app.config.get('SYNC_RETENCAO_DIAS', 30)
+    limite = (datetime.now(FORTALEZA_TZ) - timedelta(days=dias)).replace(tzinfo=None)
+
+    corte = db.session.scalar(select(func.min(OrdemAlteracao.id)).where(OrdemAlteracao.data >= limite))
+    if corte is None:
+        corte = db.session.scalar(select(func.max(OrdemAlteracao.id)))
+    if corte is None:
+        return 0
+
+    total = 0
+    while True:
+        ids = db.session.scalars(
+            select(OrdemAlteracao.id).where(OrdemAlteracao.id < corte).order_by(OrdemAlteracao.id).limit(lote)
+        ).all()
+        if not ids:
+            return total
+        db.session.execute(delete(OrdemAlteracao).where(OrdemAlteracao.id.in_(ids)))
+        db.session.commit()
+        total += len(ids)
+
+
+def _so_derivadas(ordem):
+    """Indica se só colunas derivadas (períodos, durações, SLA) da ordem mudaram."""
+    estado = inspect(ordem)
+    alteradas = {
+        atributo.key for atributo in estado.mapper.column_attrs
+        if estado.attrs[atributo.key].history.has_changes()
+    }
+    return alteradas <= COLUNAS_DERIVADAS
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _registrar_flush(sessao, contexto):
+    """Registra as ordens incluídas, alteradas ou excluídas e as que ganharam registros filhos."""
+    pares = set()
+    sem_responsavel = set()
+    # Ordens incluídas neste flush ainda não estão no identity map
+    novas = {objeto.id: objeto for objeto in sessao.new if isinstance(objeto, OrdemServico)}
+
+    for objeto in (*sessao.new, *sessao.dirty, *sessao.deleted):
+        if isinstance(objeto, OrdemServico):
+            if objeto in sessao.dirty and (
+                not sessao.is_modified(objeto, include_collections=False) or _so_derivadas(objeto)
+            ):
+                continue
+            historico = inspect(objeto).attrs.user_id.history
+            for responsavel_id in (objeto.user_id, *historico.deleted):
+                pares.add((objeto.id, responsavel_id))
+        elif isinstance(objeto, FILHOS_ORDEM) and objeto in sessao.new and objeto.ordem_id is not None:
+            ordem = novas.get(objeto.ordem_id) or sessao.identity_map.get(
+                identity_key(OrdemServico, objeto.ordem_id)
+            )
+            if ordem is not None:
+                pares.add((ordem.id, ordem.user_id))
+            else:
+                sem_responsavel.add(objeto.ordem_id)
+
+    if not pares and not sem_responsavel:
+        return
+    conexao = sessao.connection()
+    if sem_responsavel:
+        pares.update(conexao.execute(
+            select(OrdemServico.id, OrdemServico.user_id).where(OrdemServico.id.in_(sem_responsavel))
+        ).all())
+    registrar_alteracoes(conexao, pares)
@@ -0,0 +1,97 @@
+"""
+Contagem de consultas SQL.
+Este módulo registra as instruções executadas e as linhas lidas do banco enquanto está ativo,
+para verificar o orçamento de consultas de cada rota (ex.: detectar N+1 ou um COUNT extra).
+"""
+import re
+from collections import Counter
+
+from sqlalchemy import event
+
+# Literais e listas de parâmetros, normalizados ao agrupar instruções repetidas
+_NUMEROS = re.compile(r'\b\d+\b')
+_LISTAS = re.compile(r'\((?:\s*\?\s*,?)+\)|\((?:\s*%\(\w+\)s\s*,?)+\)')
+
+
+class _CursorContado:
+    """Cursor DBAPI que soma as linhas lidas por fetchone/fetchmany/fetchall."""
+
+    def __init__(self, cursor, contador):
+        self._cursor = cursor
+        self._contador = contador
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        if linha is not None:
+            self._contador.linhas += 1
+        return linha
+
+    def fetchmany(self, *args, **kwargs):
+        linhas = self._cursor.fetchmany(*args, **kwargs)
+        self._contador.linhas += len(linhas)
+        return linhas
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        self._contador.linhas += len(linhas)
+        return linhas
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+class ContadorConsultas:
+    """
+    Context manager que conta as instruções e as linhas lidas nos engines informados.
+
+    Args:
+        *engines: Engines do SQLAlchemy a observar (ex.: db.engines.values())
+
+    Exemplo:
+        with ContadorConsultas(db.engine) as contador:
+            client.get('/ordens/')
+        assert contador.total <= 8
+    """
+
+    def __init__(self, *engines):
+        self.engines = engines
+        self.instrucoes = []
+        self.linhas = 0
+
+    def _depois_de_executar(self, conn, cursor, instrucao, parametros, contexto, executemany):
+        self.instrucoes.append(instrucao)
+        if contexto is not None and cursor.description is not None:
+            # O resultado é lido de contexto.cursor depois deste evento
+            contexto.cursor = _CursorContado(cursor, self)
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, 'after_cursor_execute', self._depois_de_executar)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, 'after_cursor_execute', self._depois_de_executar)
+        return False
+
+    @property
+    def total(self):
+        """Quantidade de instruções executadas."""
+        return len(self.instrucoes)
+
+    def repetidas(self, minimo=2):
+        """
+        Agrupa instruções que diferem só nos parâmetros, indício de N+1.
+
+        Args:
+            minimo (int): Repetições a partir das quais a instrução é listada
+
+        Returns:
+            list: Pares (instrução normalizada, repetições), da mais repetida para a menos
+        """
+        normalizadas = Counter(_LISTAS.sub('(?)', _NUMEROS.sub('N', ' '.join(i.split()))) for i in self.instrucoes)
+        return [(instrucao, vezes) for instrucao, vezes in normalizadas.most_common() if vezes >= minimo]
+
+    def relatorio(self):
+        """Lista numerada das instruções, para mensagens de falha."""
+        return '\n'.join(f'{i:3d}. {" ".join(instrucao.split())[:300]}' for i, instrucao in enumerate(self.instrucoes, 1))
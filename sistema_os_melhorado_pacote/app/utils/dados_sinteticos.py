@@ -0,0 +1,379 @@
+"""
+Geração de dados sintéticos.
+Este módulo popula o banco com administradoras, condomínios, áreas, fornecedores, usuários e
+ordens de serviço com histórico de status, comentários, anexos e log de atividades, para testes
+de desempenho. As ordens podem se concentrar em poucos condomínios (distribuição de Zipf), como
+em clientes grandes. Os registros são inseridos em lote (executemany, sem o ORM) com IDs e
+números de ordem pré-alocados.
+"""
+import random
+from itertools import accumulate
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, insert, select
+
+from app.extensions import db
+from app.models import (
+    Administradora, Condominio, Area, Fornecedor, User, UserCondominio, Role, UserRole, ActivityLog,
+    OrdemServico, OrdemStatusLog, OrdemComentario, OrdemArquivo
+)
+from app.utils.periodos import calcular_periodos
+from app.utils.senhas import gerar_hash_senha
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Senha de todos os usuários gerados
+SENHA_PADRAO = 'Senha@123'
+
+# Caminhos possíveis do ciclo de vida, a partir de 'Aberta', e o peso de cada um
+FLUXOS_STATUS = (
+    ((), 15),
+    (('Em Andamento',), 15),
+    (('Em Andamento', 'Concluída'), 40),
+    (('Aguardando Aprovação', 'Em Andamento', 'Concluída'), 12),
+    (('Em Andamento', 'Aguardando Material', 'Em Andamento', 'Concluída'), 8),
+    (('Aguardando Aprovação',), 4),
+    (('Cancelada',), 6),
+)
+FLUXOS = tuple(fluxo for fluxo, _ in FLUXOS_STATUS)
+PESOS_FLUXOS = tuple(accumulate(peso for _, peso in FLUXOS_STATUS))
+
+# Papel atribuído aos usuários gerados
+PAPEL_USUARIOS = 'Síndico (dados sintéticos)'
+PERMISSOES_USUARIOS = 'view_order,create_order,edit_order,complete_order'
+
+PRIORIDADES = ('Baixa', 'Normal', 'Alta', 'Urgente')
+TIPOS = ('Manutenção', 'Reparo', 'Instalação', 'Limpeza', 'Outro')
+# Anexos: tipo, probabilidade, extensão e MIME (foto_final só em ordens concluídas)
+ANEXOS = (
+    ('foto_inicial', 0.7, 'jpg', 'image/jpeg'),
+    ('cotacao', 0.4, 'pdf', 'application/pdf'),
+    ('foto_final', 0.6, 'jpg', 'image/jpeg'),
+)
+NOMES_AREAS = ('Piscina', 'Salão de Festas', 'Academia', 'Portaria', 'Garagem', 'Playground', 'Jardim', 'Elevadores')
+
+
+class GeradorDados:
+    """
+    Gera um conjunto de dados reprodutível (mesma semente, mesmos dados).
+
+    Args:
+        semente (int): Semente do gerador pseudoaleatório
+        lote (int): Quantidade de ordens por commit (e de linhas por instrução INSERT)
+        dias (int): Intervalo, em dias até hoje, das datas de criação das ordens
+        assimetria (float): Expoente da distribuição de Zipf das ordens entre os condomínios
+            (0 distribui igualmente; 1.1 concentra cerca de um quarto das ordens no maior de 100)
+        progresso (callable, optional): Chamada com o total de ordens gravadas após cada lote
+    """
+
+    def __init__(self, semente=42, lote=2000, dias=365, assimetria=0.0, progresso=None):
+        self.aleatorio = random.Random(semente)
+        self.lote = lote
+        self.dias = dias
+        self.assimetria = assimetria
+        self.progresso = progresso
+        self.agora = datetime.now(FORTALEZA_TZ).replace(tzinfo=None, microsecond=0)
+
+    def _proximo_id(self, modelo):
+        """Primeiro ID livre da tabela, para pré-alocar os IDs dos registros."""
+        return (db.session.scalar(select(func.max(modelo.id))) or 0) + 1
+
+    def _inserir(self, modelo, linhas):
+        """Insere as linhas na tabela do modelo em lotes de executemany."""
+        for inicio in range(0, len(linhas), self.lote):
+            db.session.execute(insert(modelo.__table__), linhas[inicio:inicio + self.lote])
+
+    def _pesos_condominios(self, condominios):
+        """Pesos acumulados de cada condomínio, pela distribuição de Zipf."""
+        acumulado, pesos = 0.0, []
+        for posicao in range(len(condominios)):
+            acumulado += 1 / (posicao + 1) ** self.assimetria
+            pesos.append(acumulado)
+        return pesos
+
+    def gerar_cadastros(self, administradoras=2, condominios=10, areas_por_condominio=4,
+                        usuarios_por_condominio=3, fornecedores=20):
+        """
+        Gera os cadastros básicos e um administrador (admin@exemplo.com). Os demais usuários
+        recebem o papel PAPEL_USUARIOS, com permissão para criar e editar ordens.
+
+        Returns:
+            dict: IDs gerados por tipo ('administradoras', 'condominios', 'areas', 'usuarios',
+            'fornecedores'), o ID do administrador ('admin') e o do papel dos usuários ('papel')
+        """
+        ids = {}
+        hash_senha = gerar_hash_senha(SENHA_PADRAO)
+
+        primeiro = self._proximo_id(Administradora)
+        ids['administradoras'] = list(range(primeiro, primeiro + administradoras))
+        self._inserir(Administradora, [
+            {'id': id, 'nome': f'Administradora {id}', 'ativa': True} for id in ids['administradoras']
+        ])
+
+        primeiro = self._proximo_id(Condominio)
+        ids['condominios'] = list(range(primeiro, primeiro + condominios))
+        self._inserir(Condominio, [
+            {
+                'id': id, 'nome': f'Condomínio {id}', 'cidade': 'Fortaleza', 'estado': 'CE', 'ativo': True,
+                'administradora_id': ids['administradoras'][i % administradoras],
+            }
+            for i, id in enumerate(ids['condominios'])
+        ])
+
+        primeiro = self._proximo_id(Area)
+        areas = [
+            {'id': primeiro + i * areas_por_condominio + j, 'condominio_id': condominio_id,
+             'nome': NOMES_AREAS[j % len(NOMES_AREAS)]}
+            for i, condominio_id in enumerate(ids['condominios'])
+            for j in range(areas_por_condominio)
+        ]
+        self._inserir(Area, areas)
+        ids['areas'] = {}
+        for area in areas:
+            ids['areas'].setdefault(area['condominio_id'], []).append(area['id'])
+
+        primeiro = self._proximo_id(Fornecedor)
+        ids['fornecedores'] = list(range(primeiro, primeiro + fornecedores))
+        self._inserir(Fornecedor, [
+            {'id': id, 'nome': f'Fornecedor {id}', 'tipo_servico': self.aleatorio.choice(TIPOS), 'ativo': True}
+            for id in ids['fornecedores']
+        ])
+
+        primeiro = self._proximo_id(User)
+        ids['admin'] = primeiro
+        usuarios = [{
+            'id': primeiro, 'name': 'Administrador', 'email': 'admin@exemplo.com' if primeiro == 1
+            else f'admin{primeiro}@exemplo.com',
+            'password': hash_senha, 'is_admin': True, 'is_pending': False, 'is_active': True,
+        }]
+        ids['papel'] = db.session.scalar(select(Role.id).where(Role.name == PAPEL_USUARIOS))
+        if ids['papel'] is None:
+            ids['papel'] = self._proximo_id(Role)
+            self._inserir(Role, [{'id': ids['papel'], 'name': PAPEL_USUARIOS, 'permissions': PERMISSOES_USUARIOS}])
+
+        ids['usuarios'] = {}
+        associacoes, papeis = [], []
+        for condominio_id in ids['condominios']:
+            for _ in range(usuarios_por_condominio):
+                id = primeiro + len(usuarios)
+                usuarios.append({
+                    'id': id, 'name': f'Usuário {id}', 'email': f'usuario{id}@exemplo.com',
+                    'password': hash_senha, 'is_admin': False, 'is_pending': False, 'is_active': True,
+                })
+                associacoes.append({'user_id': id, 'condominio_id': condominio_id})
+                papeis.append({'user_id': id, 'role_id': ids['papel']})
+                ids['usuarios'].setdefault(condominio_id, []).append(id)
+        self._inserir(User, usuarios)
+        self._inserir(UserCondominio, associacoes)
+        self._inserir(UserRole, papeis)
+
+        db.session.commit()
+        return ids
+
+    def _ciclo_de_vida(self, ordem, criador_id):
+        """
+        Simula as mudanças de status da ordem como OrdemServico.atualizar_status faria.
+
+        Returns:
+            list: Registros de OrdemStatusLog da ordem
+        """
+        fluxo = self.aleatorio.choices(FLUXOS, cum_weights=PESOS_FLUXOS)[0]
+
+        estado = SimpleNamespace(
+            data_criacao=ordem['data_criacao'], data_inicio=None, data_status=None,
+            tempo_ate_inicio=None, tempo_execucao=None, tempo_total=None,
+            tempo_aguardando_aprovacao=0, tempo_aguardando_material=0,
+        )
+        # Log de criação, como na rota ordens.nova
+        logs = [{
+            'ordem_id': ordem['id'], 'status_anterior': '', 'status_novo': 'Aberta',
+            'usuario_id': criador_id, 'observacao': 'Ordem criada', 'data_mudanca': ordem['data_criacao'],
+        }]
+        status, data = 'Aberta', ordem['data_criacao']
+        for novo_status in fluxo:
+            data = min(data + timedelta(hours=self.aleatorio.expovariate(1 / 30)), self.agora)
+            if novo_status == 'Em Andamento' and estado.data_inicio is None:
+                estado.data_inicio = data
+            OrdemServico.registrar_transicao(estado, status, novo_status, data)
+            logs.append({
+                'ordem_id': ordem['id'], 'status_anterior': status, 'status_novo': novo_status,
+                'usuario_id': criador_id, 'observacao': None, 'data_mudanca': data,
+            })
+            status = novo_status
+
+        ordem.update(
+            status=status,
+            data_inicio=estado.data_inicio,
+            data_conclusao=data if status == 'Concluída' else None,
+            data_status=estado.data_status,
+            tempo_ate_inicio=estado.tempo_ate_inicio,
+            tempo_execucao=estado.tempo_execucao,
+            tempo_total=estado.tempo_total,
+            tempo_aguardando_aprovacao=estado.tempo_aguardando_aprovacao,
+            tempo_aguardando_material=estado.tempo_aguardando_material,
+        )
+        if status == 'Concluída' and ordem['valor_estimado'] is not None:
+            ordem['valor_final'] = (ordem['valor_estimado'] * Decimal(self.aleatorio.uniform(0.8, 1.3))).quantize(Decimal('0.01'))
+        return logs
+
+    def gerar_ordens(self, ids, quantidade=1000, comentarios_por_ordem=2, anexos=True, atividades=True):
+        """
+        Gera ordens de serviço com histórico de status, comentários, anexos e log de atividades.
+
+        Args:
+            ids (dict): Retorno de gerar_cadastros
+            quantidade (int): Quantidade de ordens
+            comentarios_por_ordem (int): Média de comentários por ordem
+            anexos (bool): Gera os metadados dos anexos (OrdemArquivo), sem os arquivos
+            atividades (bool): Gera o log de atividades da criação e das mudanças de status
+
+        Returns:
+            range: IDs das ordens geradas
+        """
+        primeiro = self._proximo_id(OrdemServico)
+        sequencias = self._sequencias_por_ano()
+        condominios = ids['condominios']
+        pesos = self._pesos_condominios(condominios)
+
+        gravadas = 0
+        while gravadas < quantidade:
+            tamanho = min(self.lote, quantidade - gravadas)
+            escolhidos = self.aleatorio.choices(condominios, cum_weights=pesos, k=tamanho)
+            linhas = {'ordens': [], 'logs': [], 'comentarios': [], 'anexos': [], 'atividades': []}
+
+            for i, condominio_id in enumerate(escolhidos):
+                ordem = self._nova_ordem(ids, primeiro + gravadas + i, condominio_id, sequencias)
+                usuarios = ids['usuarios'].get(condominio_id) or [ids['admin']]
+                logs = self._ciclo_de_vida(ordem, ordem['criador_id'])
+                linhas['ordens'].append(ordem)
+                linhas['logs'].extend(logs)
+
+                for _ in range(self.aleatorio.randint(0, comentarios_por_ordem * 2)):
+                    linhas['comentarios'].append({
+                        'ordem_id': ordem['id'], 'usuario_id': self.aleatorio.choice(usuarios),
+                        'texto': 'Comentário gerado para testes de desempenho.',
+                        'data_criacao': ordem['data_criacao'] + timedelta(hours=self.aleatorio.randint(1, 72)),
+                    })
+                if anexos:
+                    linhas['anexos'].extend(self._anexos(ordem))
+                if atividades:
+                    linhas['atividades'].extend(self._atividades(ordem, logs))
+
+            self._inserir(OrdemServico, linhas['ordens'])
+            self._inserir(OrdemStatusLog, linhas['logs'])
+            self._inserir(OrdemComentario, linhas['comentarios'])
+            self._inserir(OrdemArquivo, linhas['anexos'])
+            self._inserir(ActivityLog, linhas['atividades'])
+            db.session.commit()
+
+            gravadas += tamanho
+            if self.progresso:
+                self.progresso(gravadas)
+
+        return range(primeiro, primeiro + quantidade)
+
+    def _nova_ordem(self, ids, id, condominio_id, sequencias):
+        """Monta a linha de uma ordem ainda com status 'Aberta', com número pré-alocado."""
+        usuarios = ids['usuarios'].get(condominio_id) or [ids['admin']]
+        data_criacao = self.agora - timedelta(seconds=self.aleatorio.randrange(self.dias * 86400))
+        sequencias[data_criacao.year] = sequencias.get(data_criacao.year, 0) + 1
+        periodos = calcular_periodos(data_criacao)
+        areas = ids['areas'].get(condominio_id)
+
+        return {
+            'id': id,
+            'numero': f'OS-{data_criacao.year}-{sequencias[data_criacao.year]:04d}',
+            'condominio_id': condominio_id,
+            'area_id': self.aleatorio.choice(areas) if areas else None,
+            'user_id': self.aleatorio.choice(usuarios),
+            'criador_id': self.aleatorio.choice(usuarios),
+            'fornecedor_id': self.aleatorio.choice(ids['fornecedores']) if ids['fornecedores'] else None,
+            'titulo': f'{self.aleatorio.choice(TIPOS)} {self.aleatorio.choice(NOMES_AREAS).lower()}',
+            'descricao': 'Ordem gerada para testes de desempenho.',
+            'prioridade': self.aleatorio.choice(PRIORIDADES),
+            'tipo': self.aleatorio.choice(TIPOS),
+            'valor_estimado': Decimal(self.aleatorio.randrange(5000, 500000)) / 100,
+            'valor_final': None,
+            'foto_inicial': None,
+            'foto_final': None,
+            'cotacao': None,
+            'data_criacao': data_criacao,
+            'data_previsao': data_criacao + timedelta(days=self.aleatorio.randint(1, 30)),
+            'periodo_dia': periodos['dia'],
+            'periodo_semana': periodos['semana'],
+            'periodo_mes': periodos['mes'],
+            'periodo_ano': periodos['ano'],
+            'sla_reavaliar': True,
+        }
+
+    def _anexos(self, ordem):
+        """Metadados dos anexos da ordem; preenche também as colunas de arquivo da ordem."""
+        anexos = []
+        for tipo, probabilidade, extensao, mime in ANEXOS:
+            if tipo == 'foto_final' and ordem['status'] != 'Concluída':
+                continue
+            if self.aleatorio.random() >= probabilidade:
+                continue
+            caminho = f"{tipo}_{ordem['id']:08x}.{extensao}"
+            ordem[tipo] = caminho
+            anexos.append({
+                'ordem_id': ordem['id'], 'nome': f'{tipo}.{extensao}', 'caminho': caminho, 'tipo': tipo,
+                'tamanho': self.aleatorio.randint(50_000, 4_000_000), 'mime_type': mime,
+                'usuario_id': ordem['criador_id'],
+                'data_upload': ordem['data_conclusao'] if tipo == 'foto_final' else ordem['data_criacao'],
+            })
+        return anexos
+
+    def _atividades(self, ordem, logs):
+        """Registros de ActivityLog equivalentes aos do decorador log_activity nas rotas de ordens."""
+        ip = f"10.{ordem['condominio_id'] % 256}.{self.aleatorio.randrange(256)}.{self.aleatorio.randrange(1, 255)}"
+        atividades = [{
+            'user_id': ordem['criador_id'], 'activity_type': 'create_ordem',
+            'details': 'create_ordem - POST /ordens/nova', 'ip_address': ip,
+            'user_agent': 'dados-sinteticos', 'created_at': ordem['data_criacao'],
+        }]
+        for log in logs[1:]:
+            atividades.append({
+                'user_id': log['usuario_id'], 'activity_type': 'update_status_ordem',
+                'details': f"update_status_ordem - POST /ordens/atualizar-status/{ordem['id']} - Parâmetros: {{'id': {ordem['id']}}}",
+                'ip_address': ip, 'user_agent': 'dados-sinteticos', 'created_at': log['data_mudanca'],
+            })
+        return atividades
+
+    def _sequencias_por_ano(self):
+        """Último sequencial de número de ordem já usado em cada ano."""
+        sequencias = {}
+        for numero in db.session.scalars(select(OrdemServico.numero).where(OrdemServico.numero.like('OS-%-%'))):
+            _, ano, sequencial = numero.split('-')
+            sequencias[int(ano)] = max(sequencias.get(int(ano), 0), int(sequencial))
+        return sequencias
+
+
+def gerar_dados(administradoras=2, condominios=10, ordens=1000, semente=42, assimetria=0.0,
+                lote=2000, progresso=None, anexos=True, atividades=True, **kwargs):
+    """
+    Gera cadastros e ordens de serviço sintéticos.
+
+    Args:
+        administradoras (int): Quantidade de administradoras
+        condominios (int): Quantidade de condomínios
+        ordens (int): Quantidade de ordens de serviço
+        semente (int): Semente do gerador pseudoaleatório
+        assimetria (float): Expoente de Zipf da distribuição das ordens entre os condomínios
+        lote (int): Ordens por commit
+        progresso (callable, optional): Chamada com o total de ordens gravadas após cada lote
+        anexos (bool): Gera os metadados dos anexos
+        atividades (bool): Gera o log de atividades
+        **kwargs: Demais parâmetros de GeradorDados.gerar_cadastros
+
+    Returns:
+        dict: IDs gerados, incluindo 'ordens'
+    """
+    gerador = GeradorDados(semente, lote=lote, assimetria=assimetria, progresso=progresso)
+    ids = gerador.gerar_cadastros(administradoras, condominios, **kwargs)
+    ids['ordens'] = gerador.gerar_ordens(ids, ordens, anexos=anexos, atividades=atividades)
+    return ids
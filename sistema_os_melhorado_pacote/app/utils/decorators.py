@@ -7,7 +7,7 @@ from flask import redirect, url_for, flash, request, abort, current_app
 from flask_login import current_user
 import time
 import logging
-from app.models.activity_log import ActivityLog
+from app.models import ActivityLog
 from app.extensions import db
 
 logger = logging.getLogger(__name__)
@@ -153,17 +153,19 @@ def log_activity(action):
                 details = f"{action} - {request.method} {request.path}"
                 if kwargs:
                     details += f" - Parâmetros: {kwargs}"
+                details += f" - Tempo: {execution_time:.4f}s"
                 
-                # Registra no banco de dados
-                log = ActivityLog(
-                    user_id=user_id,
-                    action=action,
-                    details=details,
-                    ip_address=request.remote_addr,
-                    execution_time=execution_time
-                )
-                db.session.add(log)
-                db.session.commit()
+                # Registra no banco de dados (o log exige um usuário)
+                if user_id is not None:
+                    log = ActivityLog(
+                        user_id=user_id,
+                        activity_type=action,
+                        details=details,
+                        ip_address=request.remote_addr,
+                        user_agent=request.user_agent.string[:255]
+                    )
+                    db.session.add(log)
+                    db.session.commit()
                 
                 # Registra no log do sistema
                 logger.info(
@@ -222,35 +224,57 @@ def cache_control(max_age=0, private=True, no_store=False, must_revalidate=True)
     
     return decorator
 
-def rate_limit(limit=100, per=60, scope_func=None):
+def use_replica(func):
+    """
+    Decorador que permite que as leituras da rota sejam feitas na réplica de leitura.
+    Sem réplica configurada, ou após um commit recente do usuário, as leituras
+    continuam no banco primário.
+    
+    Args:
+        func: Função a ser decorada
+        
+    Returns:
+        function: Função decorada com leituras roteadas para a réplica
+    """
+    @wraps(func)
+    def decorated_view(*args, **kwargs):
+        from flask import g
+        g.usar_replica = True
+        return func(*args, **kwargs)
+    
+    return decorated_view
+
+def rate_limit(limit=100, per=60, scope_func=None, scope='ip'):
     """
-    Decorador para limitar a taxa de requisições.
+    Decorador para limitar a taxa de requisições com contadores de janela deslizante
+    compartilhados entre os workers (ver app.utils.rate_limit).
     
     Args:
         limit (int): Número máximo de requisições
         per (int): Período em segundos
         scope_func (callable, optional): Função para determinar o escopo do limite
+        scope (str): 'ip' ou 'user' (usuário autenticado, ou IP se anônimo)
         
     Returns:
         function: Decorador que limita a taxa de requisições
     """
     def decorator(func):
+        rota = f"{func.__module__}.{func.__name__}"
+        
         @wraps(func)
         def decorated_view(*args, **kwargs):
             from app.extensions import limiter
+            from app.utils.rate_limit import chave_escopo
             
             if scope_func:
                 key = scope_func()
             else:
-                key = request.remote_addr
+                key = chave_escopo(scope)
                 
-            # Verifica se o limite foi excedido
-            if limiter.is_rate_limited(key, limit, per):
-                logger.warning(f"Taxa de requisições excedida para {key}")
+            # Conta a requisição e verifica se o limite foi excedido
+            if not limiter.verificar(f"{rota}:{key}", limit, per):
+                logger.warning(f"Taxa de requisições excedida para {key} em {rota}")
                 abort(429, description="Muitas requisições. Por favor, tente novamente mais tarde.")
-                
-            # Incrementa o contador
-            limiter.increment(key)
             
             return func(*args, **kwargs)
         
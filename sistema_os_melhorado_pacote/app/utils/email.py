@@ -23,11 +23,11 @@ def send_email(subject, body, to_email=None, html=False):
         bool: True se o email foi enviado com sucesso, False caso contrário.
     """
     if to_email is None:
-        to_email = current_app.config['EMAIL_DESTINATARIO']
+        to_email = current_app.config['ADMIN_EMAIL']
     
     msg = MIMEMultipart()
     msg['Subject'] = subject
-    msg['From'] = current_app.config['EMAIL_USER']
+    msg['From'] = current_app.config['MAIL_DEFAULT_SENDER']
     msg['To'] = to_email
     
     if html:
@@ -35,11 +35,17 @@ def send_email(subject, body, to_email=None, html=False):
     else:
         msg.attach(MIMEText(body, 'plain'))
     
+    if current_app.config.get('MAIL_SUPPRESS_SEND'):
+        current_app.logger.debug(f'Envio de e-mail suprimido: {subject} -> {to_email}')
+        return True
+    
     try:
-        with smtplib.SMTP(current_app.config['EMAIL_HOST'], current_app.config['EMAIL_PORT']) as server:
-            server.starttls()
-            server.login(current_app.config['EMAIL_USER'], current_app.config['EMAIL_PASSWORD'])
-            server.sendmail(current_app.config['EMAIL_USER'], to_email, msg.as_string())
+        with smtplib.SMTP(current_app.config['MAIL_SERVER'], current_app.config['MAIL_PORT']) as server:
+            if current_app.config.get('MAIL_USE_TLS'):
+                server.starttls()
+            if current_app.config.get('MAIL_USERNAME'):
+                server.login(current_app.config['MAIL_USERNAME'], current_app.config['MAIL_PASSWORD'])
+            server.sendmail(current_app.config['MAIL_DEFAULT_SENDER'], to_email, msg.as_string())
         return True
     except Exception as e:
         current_app.logger.error(f'Erro ao enviar e-mail: {str(e)}')
@@ -110,6 +116,27 @@ def send_welcome_email(user_name, user_email):
     return send_notification_email(subject, body, user_email)
 
 
+def send_new_user_notification_email(admin_email, new_user_name, new_user_email):
+    """
+    Avisa um administrador sobre um novo registro aguardando aprovação.
+    
+    Args:
+        admin_email (str): Email do administrador
+        new_user_name (str): Nome do usuário registrado
+        new_user_email (str): Email do usuário registrado
+    
+    Returns:
+        bool: True se o email foi enviado com sucesso, False caso contrário.
+    """
+    subject = "Novo registro aguardando aprovação"
+    body = f"""
+    <p>Um novo usuário se registrou no Sistema de Ordens de Serviço e aguarda aprovação:</p>
+    <p><strong>{new_user_name}</strong> ({new_user_email})</p>
+    <p>Atenciosamente,<br>Equipe do Sistema OS</p>
+    """
+    return send_notification_email(subject, body, admin_email)
+
+
 def send_password_reset_email(user_name, user_email, reset_link):
     """
     Envia um email com link para redefinição de senha.
@@ -0,0 +1,163 @@
+"""
+Cache das opções dos campos de seleção.
+Este módulo mantém, por processo, as listas (id, nome) usadas nos formulários (fornecedores,
+áreas e responsáveis por condomínio, condomínios, papéis, administradoras). Cada lista tem uma
+versão que avança quando uma transação confirmada altera as tabelas de origem, inclusive por
+instruções em lote; entre workers, a defasagem é limitada por OPCOES_CACHE_TTL.
+"""
+import hashlib
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+
+from app.models import Administradora, Area, Condominio, Fornecedor, Role, User, UserCondominio
+from app.utils.replica import RoutingSession
+
+# Consulta de cada lista; listas por condomínio recebem o ID do condomínio
+CONSULTAS = {
+    'fornecedores': lambda _: select(Fornecedor.id, Fornecedor.nome)
+        .where(Fornecedor.ativo == True).order_by(Fornecedor.nome),
+    'areas': lambda condominio_id: select(Area.id, Area.nome)
+        .where(Area.condominio_id == condominio_id).order_by(Area.nome),
+    'responsaveis': lambda condominio_id: select(User.id, User.name)
+        .join(UserCondominio, UserCondominio.user_id == User.id)
+        .where(UserCondominio.condominio_id == condominio_id, User.is_active == True, User.is_pending == False)
+        .order_by(User.name),
+    'condominios': lambda _: select(Condominio.id, Condominio.nome).order_by(Condominio.nome),
+    'condominios_ativos': lambda _: select(Condominio.id, Condominio.nome)
+        .where(Condominio.ativo == True).order_by(Condominio.nome),
+    'roles': lambda _: select(Role.id, Role.name).order_by(Role.name),
+    'administradoras': lambda _: select(Administradora.id, Administradora.nome).order_by(Administradora.nome),
+    'administradoras_ativas': lambda _: select(Administradora.id, Administradora.nome)
+        .where(Administradora.ativa == True).order_by(Administradora.nome),
+}
+
+# Listas afetadas por alterações em cada tabela
+DEPENDENCIAS = {
+    'fornecedores': ('fornecedores',),
+    'areas': ('areas',),
+    'users': ('responsaveis',),
+    'user_condominio': ('responsaveis',),
+    'condominios': ('condominios', 'condominios_ativos'),
+    'roles': ('roles',),
+    'administradoras': ('administradoras', 'administradoras_ativas'),
+}
+
+# Versão atual de cada lista no processo
+_versoes = dict.fromkeys(CONSULTAS, 0)
+
+# Cache: (lista, parâmetro) -> (versão, validade, opções, etag)
+_cache = {}
+_lock = threading.Lock()
+
+
+def opcoes_com_etag(lista, parametro=None):
+    """
+    Obtém as opções de uma lista e o ETag correspondente ao seu conteúdo.
+
+    Args:
+        lista (str): Nome da lista (chave de CONSULTAS)
+        parametro (int, optional): ID do condomínio, nas listas por condomínio
+
+    Returns:
+        tuple: Tupla de pares (id, nome) e ETag (igual em todos os workers para o mesmo conteúdo)
+    """
+    from app.extensions import db
+
+    chave = (lista, parametro)
+    agora = time.monotonic()
+    versao = _versoes[lista]
+    entrada = _cache.get(chave)
+    if entrada is not None and entrada[0] == versao and agora < entrada[1]:
+        return entrada[2], entrada[3]
+
+    opcoes = tuple(tuple(linha) for linha in db.session.execute(CONSULTAS[lista](parametro)))
+    etag = hashlib.blake2b(repr((lista, parametro, opcoes)).encode('utf-8'), digest_size=8).hexdigest()
+    ttl = current_app.config.get('OPCOES_CACHE_TTL', 60) if has_app_context() else 60
+    with _lock:
+        # Uma invalidação durante a consulta mantém a entrada como desatualizada
+        _cache[chave] = (versao, agora + ttl, opcoes, etag)
+    return opcoes, etag
+
+
+def opcoes(lista, parametro=None, vazio=None):
+    """
+    Obtém as opções de uma lista para um campo de seleção.
+
+    Args:
+        lista (str): Nome da lista (chave de CONSULTAS)
+        parametro (int, optional): ID do condomínio, nas listas por condomínio
+        vazio (str, optional): Rótulo da opção inicial com valor 0 (ex.: 'Selecione...')
+
+    Returns:
+        list: Pares (id, nome)
+    """
+    itens = list(opcoes_com_etag(lista, parametro)[0])
+    return [(0, vazio)] + itens if vazio else itens
+
+
+def opcoes_condominios_usuario(usuario, vazio=None):
+    """
+    Obtém os condomínios associados ao usuário, a partir da lista em cache.
+
+    Args:
+        usuario: Usuário com o atributo condominio_ids
+        vazio (str, optional): Rótulo da opção inicial com valor 0
+
+    Returns:
+        list: Pares (id, nome)
+    """
+    ids = usuario.condominio_ids
+    itens = [(id, nome) for id, nome in opcoes_com_etag('condominios')[0] if id in ids]
+    return [(0, vazio)] + itens if vazio else itens
+
+
+def invalidar_opcoes(*listas):
+    """
+    Avança a versão das listas informadas (ou de todas) no processo atual.
+
+    Args:
+        *listas (str): Nomes das listas
+    """
+    with _lock:
+        for lista in listas or tuple(_versoes):
+            _versoes[lista] += 1
+
+
+def _registrar_tabelas(sessao, tabelas):
+    """Acumula, na transação, as tabelas alteradas que alimentam alguma lista."""
+    alteradas = {t for t in tabelas if t in DEPENDENCIAS}
+    if alteradas:
+        sessao.info.setdefault('opcoes_alteradas', set()).update(alteradas)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _registrar_flush(sessao, contexto):
+    """Registra as tabelas dos objetos incluídos, alterados ou excluídos no flush."""
+    _registrar_tabelas(sessao, {
+        getattr(objeto, '__tablename__', None)
+        for objeto in (*sessao.new, *sessao.dirty, *sessao.deleted)
+    })
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _registrar_instrucao(estado):
+    """Registra as tabelas alteradas por INSERT, UPDATE ou DELETE em lote."""
+    if (estado.is_insert or estado.is_update or estado.is_delete) and estado.bind_mapper is not None:
+        _registrar_tabelas(estado.session, {estado.bind_mapper.persist_selectable.name})
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidar_alteradas(sessao):
+    """Após o commit, invalida as listas que dependem das tabelas alteradas."""
+    alteradas = sessao.info.pop('opcoes_alteradas', None)
+    if alteradas:
+        invalidar_opcoes(*{lista for tabela in alteradas for lista in DEPENDENCIAS[tabela]})
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _descartar_alteradas(sessao):
+    """Descarta as alterações registradas em uma transação desfeita."""
+    sessao.info.pop('opcoes_alteradas', None)
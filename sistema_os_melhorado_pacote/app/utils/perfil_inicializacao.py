@@ -0,0 +1,91 @@
+"""
+Perfil de inicialização da aplicação.
+Este módulo executa create_app em um processo novo com `python -X importtime` e resume o tempo
+de importação por módulo, para identificar dependências pesadas carregadas na partida dos workers.
+"""
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Script executado no processo filho; imprime o tempo total de create_app em microssegundos
+_SCRIPT = (
+    'import time\n'
+    'inicio = time.perf_counter()\n'
+    'from app import create_app\n'
+    'create_app({config!r})\n'
+    'print(int((time.perf_counter() - inicio) * 1e6))\n'
+)
+
+
+def interpretar_importtime(texto):
+    """
+    Interpreta a saída de `-X importtime`.
+
+    Args:
+        texto (str): Saída de erro do processo executado com -X importtime
+
+    Returns:
+        list: Tuplas (módulo, próprio_us, acumulado_us, profundidade), na ordem de importação
+    """
+    modulos = []
+    for linha in texto.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        proprio, acumulado, nome = linha[len('import time:'):].split('|', 2)
+        if not proprio.strip().isdigit():
+            continue  # Cabeçalho
+        profundidade = (len(nome) - len(nome.lstrip())) // 2
+        modulos.append((nome.strip(), int(proprio), int(acumulado), profundidade))
+    return modulos
+
+
+def agrupar_por_pacote(modulos):
+    """
+    Soma o tempo próprio dos módulos por pacote de primeiro nível (ex.: sqlalchemy, app).
+
+    Args:
+        modulos (list): Resultado de interpretar_importtime
+
+    Returns:
+        list: Pares (pacote, microssegundos), do mais lento para o mais rápido
+    """
+    pacotes = defaultdict(int)
+    for nome, proprio, _, _ in modulos:
+        pacotes[nome.split('.')[0]] += proprio
+    return sorted(pacotes.items(), key=lambda item: item[1], reverse=True)
+
+
+def medir_inicializacao(config_name='production', blueprints=None):
+    """
+    Mede a importação e a criação da aplicação em um processo Python novo.
+
+    Args:
+        config_name (str): Configuração passada a create_app
+        blueprints (str, optional): Valor de BLUEPRINTS para o processo filho (ex.: 'api')
+
+    Returns:
+        dict: total_us (create_app completo), modulos (interpretar_importtime) e pacotes (agrupar_por_pacote)
+
+    Raises:
+        RuntimeError: Se o processo filho falhar
+    """
+    ambiente = dict(os.environ)
+    if blueprints is not None:
+        ambiente['BLUEPRINTS'] = blueprints
+    raiz = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _SCRIPT.format(config=config_name)],
+        capture_output=True, text=True, cwd=raiz, env=ambiente,
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else
+                           f'Processo terminou com código {processo.returncode}')
+
+    modulos = interpretar_importtime(processo.stderr)
+    return {
+        'total_us': int(processo.stdout.strip().splitlines()[-1]),
+        'modulos': modulos,
+        'pacotes': agrupar_por_pacote(modulos),
+    }
@@ -0,0 +1,71 @@
+"""
+Utilitários de períodos e datas.
+Este módulo calcula os agrupamentos de tempo (dia, semana, mês, ano) no fuso de Fortaleza.
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Formato de exibição de cada período
+FORMATOS_PERIODO = {
+    'dia': '%Y-%m-%d',
+    'semana': '%Y-%m-%d',
+    'mes': '%Y-%m',
+    'ano': '%Y'
+}
+
+
+def para_fortaleza(data):
+    """
+    Converte uma data para o horário local de Fortaleza.
+    Datas sem fuso são consideradas já no horário local, como são gravadas no banco.
+
+    Args:
+        data (datetime): Data a ser convertida
+
+    Returns:
+        datetime: Data no fuso de Fortaleza, sem informação de fuso
+    """
+    if data.tzinfo is not None:
+        data = data.astimezone(FORTALEZA_TZ)
+    return data.replace(tzinfo=None)
+
+
+def calcular_periodos(data):
+    """
+    Calcula os agrupamentos de tempo de uma data.
+
+    Args:
+        data (datetime): Data de referência
+
+    Returns:
+        dict: Início do dia, da semana (segunda-feira) e do mês, e o ano
+    """
+    dia = para_fortaleza(data).date()
+    return {
+        'dia': dia,
+        'semana': dia - timedelta(days=dia.weekday()),
+        'mes': dia.replace(day=1),
+        'ano': dia.year
+    }
+
+
+def formatar_periodo(valor, periodo):
+    """
+    Formata o valor de um agrupamento para exibição em gráficos.
+
+    Args:
+        valor: Valor retornado pelo banco (date, datetime, string ou inteiro)
+        periodo (str): Tipo de período (dia, semana, mes, ano)
+
+    Returns:
+        str: Valor formatado
+    """
+    if isinstance(valor, str) and periodo != 'ano':
+        valor = datetime.strptime(valor[:10], '%Y-%m-%d')
+    if hasattr(valor, 'strftime'):
+        return valor.strftime(FORMATOS_PERIODO[periodo])
+    return str(valor)
+
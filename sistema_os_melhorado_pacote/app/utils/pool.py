@@ -0,0 +1,232 @@
+"""
+Pool de conexões do banco de dados.
+Este módulo calcula o dimensionamento do pool conforme o ambiente e o modelo de workers
+do gunicorn, coleta métricas de uso (espera no checkout, conexões em uso, overflow e
+falhas de verificação) e substitui o pool_pre_ping por uma verificação só de conexões ociosas.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Tamanho padrão do pool por modelo de worker do gunicorn
+# (sync atende uma requisição por vez; gevent/eventlet atendem muitas simultâneas)
+POOL_POR_WORKER = {
+    'sync': 2,
+    'gevent': 20,
+    'eventlet': 20,
+}
+
+
+class EstatisticasPool:
+    """Contadores de uso de um pool de conexões, seguros para múltiplas threads."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.pool = None
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        """Zera os contadores acumulados."""
+        with self._lock:
+            self.checkouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self.timeouts = 0
+            self.verificacoes = 0
+            self.falhas_verificacao = 0
+
+    def registrar_espera(self, segundos, timeout=False):
+        """Registra o tempo de espera de um checkout."""
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.espera_total += segundos
+            if segundos > self.espera_maxima:
+                self.espera_maxima = segundos
+
+    def registrar_verificacao(self, falhou):
+        """Registra uma verificação de conexão ociosa."""
+        with self._lock:
+            self.verificacoes += 1
+            if falhou:
+                self.falhas_verificacao += 1
+
+    def metricas(self):
+        """
+        Retorna um retrato das métricas do pool.
+
+        Returns:
+            dict: Contadores acumulados e estado atual do pool
+        """
+        with self._lock:
+            dados = {
+                'nome': self.nome,
+                'checkouts': self.checkouts,
+                'espera_media_ms': round(self.espera_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                'espera_maxima_ms': round(self.espera_maxima * 1000, 2),
+                'timeouts': self.timeouts,
+                'verificacoes': self.verificacoes,
+                'falhas_verificacao': self.falhas_verificacao,
+            }
+
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            dados.update({
+                'tamanho': pool.size(),
+                'em_uso': pool.checkedout(),
+                'disponiveis': pool.checkedin(),
+                # overflow() é negativo enquanto o pool ainda não atingiu o tamanho base
+                'overflow': max(pool.overflow(), 0),
+            })
+        return dados
+
+
+class PoolMonitorado(QueuePool):
+    """QueuePool que mede o tempo de espera para obter uma conexão."""
+
+    estatisticas = None
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except Exception:
+            if self.estatisticas is not None:
+                self.estatisticas.registrar_espera(time.perf_counter() - inicio, timeout=True)
+            raise
+        if self.estatisticas is not None:
+            self.estatisticas.registrar_espera(time.perf_counter() - inicio)
+        return conexao
+
+    def recreate(self):
+        novo = super().recreate()
+        novo.estatisticas = self.estatisticas
+        return novo
+
+
+def _banco_em_memoria(uri):
+    """Indica se a URI aponta para um SQLite em memória, que não usa pool de fila."""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def tamanho_pool(config):
+    """
+    Calcula o tamanho base do pool por processo.
+
+    Args:
+        config (dict): Configuração da aplicação
+
+    Returns:
+        int: DB_POOL_SIZE, se definido, ou o padrão do modelo de worker
+    """
+    if config.get('DB_POOL_SIZE'):
+        return config['DB_POOL_SIZE']
+
+    worker = config.get('GUNICORN_WORKER_CLASS', 'sync')
+    threads = config.get('GUNICORN_THREADS', 1)
+    if worker == 'gthread' or (worker == 'sync' and threads > 1):
+        # Uma conexão por thread, mais uma para tarefas fora das requisições
+        return threads + 1
+    return POOL_POR_WORKER.get(worker, POOL_POR_WORKER['sync'])
+
+
+def configurar_pool(app):
+    """
+    Monta SQLALCHEMY_ENGINE_OPTIONS a partir das configurações DB_POOL_* e dos workers.
+    Opções definidas explicitamente em SQLALCHEMY_ENGINE_OPTIONS têm precedência.
+    Deve ser chamada antes de db.init_app.
+
+    Args:
+        app (Flask): Aplicação Flask
+    """
+    config = app.config
+    explicitas = config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if _banco_em_memoria(config['SQLALCHEMY_DATABASE_URI']):
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(explicitas)
+        return
+
+    opcoes = {
+        'poolclass': PoolMonitorado,
+        'pool_size': tamanho_pool(config),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 5),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 20),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 300),
+    }
+    opcoes.update(explicitas)
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes
+
+    # Conexões possíveis: workers x (pool + overflow) em cada banco configurado
+    workers = config.get('GUNICORN_WORKERS', 1)
+    por_worker = opcoes['pool_size'] + opcoes['max_overflow']
+    limite = config.get('DB_MAX_CONNECTIONS')
+    if limite and workers * por_worker > limite:
+        logger.warning(
+            f"Pool de conexões pode exceder o limite do banco: {workers} worker(s) x "
+            f"{por_worker} conexões = {workers * por_worker} (limite {limite})"
+        )
+
+
+def init_pool_metrics(app, engine, nome):
+    """
+    Registra a coleta de métricas e a verificação de conexões ociosas em um engine.
+
+    Em vez de testar a conexão a cada checkout (pool_pre_ping), apenas conexões paradas
+    há mais de DB_PING_IDLE_SECONDS são verificadas; sob alto volume de requisições as
+    conexões raramente ficam ociosas e o custo da verificação desaparece.
+
+    Args:
+        app (Flask): Aplicação Flask
+        engine: Engine SQLAlchemy a ser monitorado
+        nome (str): Nome do engine nas métricas (ex.: primario, replica)
+
+    Returns:
+        EstatisticasPool: Contadores do pool
+    """
+    estatisticas = EstatisticasPool(nome)
+    estatisticas.pool = engine.pool
+    if isinstance(engine.pool, PoolMonitorado):
+        engine.pool.estatisticas = estatisticas
+
+    ocioso = app.config.get('DB_PING_IDLE_SECONDS', 30)
+
+    @event.listens_for(engine, 'connect')
+    def _nova_conexao(dbapi_connection, connection_record):
+        connection_record.info['ultimo_uso'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkin')
+    def _devolver(dbapi_connection, connection_record):
+        if connection_record is not None:
+            connection_record.info['ultimo_uso'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkout')
+    def _verificar_ociosa(dbapi_connection, connection_record, connection_proxy):
+        # Mantém a referência ao pool atual, que muda após engine.dispose()
+        estatisticas.pool = engine.pool
+        ultimo_uso = connection_record.info.get('ultimo_uso')
+        if ocioso is None or ultimo_uso is None or time.monotonic() - ultimo_uso < ocioso:
+            return
+
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception as e:
+            estatisticas.registrar_verificacao(falhou=True)
+            logger.warning(f"Conexão ociosa inválida descartada ({nome}): {str(e)}")
+            # O pool descarta a conexão e tenta outra
+            raise DisconnectionError() from e
+        estatisticas.registrar_verificacao(falhou=False)
+
+    app.extensions.setdefault('pool_stats', {})[nome] = estatisticas
+    return estatisticas
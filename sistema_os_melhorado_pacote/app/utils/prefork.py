@@ -0,0 +1,105 @@
+"""
+Preparação da aplicação para workers criados por fork.
+Este módulo é usado pelos hooks do gunicorn.conf.py com preload_app: o processo mestre importa
+e aquece o que é comum a todos os workers (mapeamentos, templates compilados, módulos carregados
+sob demanda) e congela os objetos no coletor de lixo, para que as páginas de memória continuem
+compartilhadas (copy-on-write) depois do fork. Cada worker descarta as conexões herdadas.
+"""
+import gc
+import logging
+import sys
+from importlib import import_module
+
+from jinja2 import TemplateError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Módulos importados só na primeira requisição que os usa, carregados antes do fork por blueprint
+MODULOS_SOB_DEMANDA = {
+    'dashboard': ('app.dashboard.custos',),
+    'admin': ('openpyxl',),
+}
+
+
+def compilar_templates(app):
+    """
+    Compila os templates da aplicação para o cache do ambiente Jinja.
+
+    Args:
+        app (Flask): Aplicação Flask
+
+    Returns:
+        int: Quantidade de templates compilados
+    """
+    compilados = 0
+    for nome in app.jinja_env.list_templates(extensions=('html',)):
+        try:
+            app.jinja_env.get_template(nome)
+            compilados += 1
+        except TemplateError as e:
+            logger.warning(f"Template {nome} não compilado antes do fork: {str(e)}")
+    return compilados
+
+
+def preparar_prefork(app):
+    """
+    Aquece e congela o estado da aplicação no processo mestre, antes do fork dos workers.
+
+    Args:
+        app (Flask): Aplicação Flask já criada (preload_app)
+    """
+    configure_mappers()
+
+    for blueprint, modulos in MODULOS_SOB_DEMANDA.items():
+        if blueprint not in app.config['BLUEPRINTS_HABILITADOS']:
+            continue
+        for modulo in modulos:
+            try:
+                import_module(modulo)
+            except ImportError:
+                pass  # Dependência opcional ausente; a rota trata o erro
+
+    compilados = compilar_templates(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            # A primeira conexão inicializa o dialeto (versão do servidor etc.) uma vez para todos os workers
+            try:
+                with engine.connect():
+                    pass
+            except SQLAlchemyError as e:
+                logger.warning(f"Banco indisponível ao preparar o fork: {str(e)}")
+            # Nenhuma conexão do mestre pode ser herdada pelos workers
+            engine.dispose()
+
+    # Objetos criados até aqui não são mais percorridos pelo coletor, que de outra forma
+    # escreveria nos cabeçalhos deles e copiaria as páginas em cada worker
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Aplicação preparada para fork: {compilados} templates, {gc.get_freeze_count()} objetos congelados")
+
+
+def apos_fork(app):
+    """
+    Descarta, no worker recém-criado, os pools de conexões e as métricas herdados do processo mestre.
+
+    Args:
+        app (Flask): Aplicação Flask herdada do mestre
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: as conexões do mestre não devem ser fechadas a partir do filho
+            engine.dispose(close=False)
+    for estatisticas in app.extensions.get('pool_stats', {}).values():
+        estatisticas.limpar()
+
+    snapshot = sys.modules.get('app.dashboard.snapshot')
+    if snapshot is not None:
+        snapshot.descartar_engines(fechar=False)
+
+    # O gunicorn.conf.py desativa o coletor no mestre durante o preload
+    gc.enable()
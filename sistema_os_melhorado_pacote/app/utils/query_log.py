@@ -0,0 +1,165 @@
+"""
+Registro de consultas lentas.
+Este módulo captura consultas SQL que ultrapassam um limite de tempo, com o texto da
+instrução, o formato dos parâmetros, a rota de origem e o plano de execução (EXPLAIN).
+"""
+import time
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Timezone para datas
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+# Prefixo do EXPLAIN por dialeto
+EXPLAIN_PREFIXOS = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'mysql': 'EXPLAIN ',
+    'mariadb': 'EXPLAIN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+
+class SlowQueryLog:
+    """
+    Buffer circular de consultas lentas.
+
+    Mantém apenas as últimas `maxlen` entradas, descartando as mais antigas,
+    para que o consumo de memória seja limitado independentemente do tráfego.
+    """
+
+    def __init__(self, maxlen=200):
+        self._entradas = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def registrar(self, entrada):
+        """Adiciona uma entrada ao buffer."""
+        with self._lock:
+            self._entradas.append(entrada)
+
+    def entradas(self):
+        """Retorna as entradas, da mais recente para a mais antiga."""
+        with self._lock:
+            return list(reversed(self._entradas))
+
+    def limpar(self):
+        """Remove todas as entradas do buffer."""
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+def formato_parametros(parametros):
+    """
+    Descreve o formato dos parâmetros sem expor os valores.
+
+    Args:
+        parametros: Parâmetros passados ao cursor (tupla, lista, dict ou lista de execução múltipla)
+
+    Returns:
+        Estrutura equivalente com os nomes dos tipos no lugar dos valores
+    """
+    if parametros is None:
+        return None
+    if isinstance(parametros, dict):
+        return {chave: type(valor).__name__ for chave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        if parametros and isinstance(parametros[0], (list, tuple, dict)):
+            # executemany: descreve apenas o primeiro conjunto e a quantidade
+            return {'linhas': len(parametros), 'formato': formato_parametros(parametros[0])}
+        return [type(valor).__name__ for valor in parametros]
+    return type(parametros).__name__
+
+
+def _capturar_plano(conn, cursor, statement, parameters):
+    """Executa EXPLAIN para a instrução usando um cursor DBAPI separado."""
+    prefixo = EXPLAIN_PREFIXOS.get(conn.dialect.name)
+    if not prefixo or not statement.lstrip().upper().startswith('SELECT'):
+        return None
+
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefixo + statement, parameters or ())
+            return [tuple(linha) for linha in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        logger.debug(f"Não foi possível obter o plano da consulta: {str(e)}")
+        return None
+
+
+def _criar_entrada(duracao, statement, parameters, plano):
+    """Monta a entrada do registro com a rota da requisição atual, se houver."""
+    rota = None
+    if has_request_context():
+        rota = f"{request.method} {request.endpoint or request.path}"
+
+    return {
+        'data': datetime.now(FORTALEZA_TZ),
+        'duracao_ms': round(duracao * 1000, 2),
+        'sql': statement,
+        'parametros': formato_parametros(parameters),
+        'rota': rota,
+        'plano': plano,
+        'erro': None
+    }
+
+
+def init_query_log(app, engine):
+    """
+    Registra os listeners de consultas lentas no engine da aplicação.
+
+    Args:
+        app (Flask): Aplicação Flask
+        engine: Engine SQLAlchemy a ser monitorado
+
+    Returns:
+        SlowQueryLog: Buffer onde as consultas lentas são armazenadas
+    """
+    limite = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000.0
+    capturar_plano = app.config.get('SLOW_QUERY_EXPLAIN', True)
+    # Primário e réplica compartilham o mesmo buffer
+    query_log = app.extensions.get('slow_query_log')
+    if query_log is None:
+        query_log = SlowQueryLog(maxlen=app.config.get('SLOW_QUERY_LOG_SIZE', 200))
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _antes_execucao(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _apos_execucao(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info['query_start_time'].pop()
+        if duracao < limite:
+            return
+
+        plano = None
+        if capturar_plano and not executemany:
+            plano = _capturar_plano(conn, cursor, statement, parameters)
+
+        query_log.registrar(_criar_entrada(duracao, statement, parameters, plano))
+        logger.warning(f"Consulta lenta ({duracao * 1000:.1f} ms): {statement[:200]}")
+
+    @event.listens_for(engine, 'handle_error')
+    def _erro_execucao(contexto):
+        # Consultas com erro (ex.: funções inexistentes no dialeto) são sempre registradas
+        inicios = contexto.connection.info.get('query_start_time') if contexto.connection else None
+        if not inicios or contexto.statement is None:
+            return
+        duracao = time.perf_counter() - inicios.pop()
+        entrada = _criar_entrada(duracao, contexto.statement, contexto.parameters, None)
+        entrada['erro'] = str(contexto.original_exception)
+        query_log.registrar(entrada)
+
+    app.extensions['slow_query_log'] = query_log
+    return query_log
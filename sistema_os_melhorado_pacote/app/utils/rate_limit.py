@@ -0,0 +1,302 @@
+"""
+Limitação de taxa de requisições.
+Este módulo implementa contadores de janela deslizante compartilhados entre os workers,
+com armazenamento em memória (um único processo), em arquivo SQLite local ou em um
+servidor compatível com Redis.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Duração de cada unidade aceita nas expressões de limite, em segundos
+UNIDADES = {
+    'second': 1, 'seconds': 1, 'segundo': 1, 'segundos': 1,
+    'minute': 60, 'minutes': 60, 'minuto': 60, 'minutos': 60,
+    'hour': 3600, 'hours': 3600, 'hora': 3600, 'horas': 3600,
+    'day': 86400, 'days': 86400, 'dia': 86400, 'dias': 86400,
+}
+
+# Quantidade de verificações entre limpezas de contadores expirados no SQLite
+INTERVALO_LIMPEZA = 1000
+
+
+@lru_cache(maxsize=128)
+def interpretar_limite(expressao):
+    """
+    Interpreta uma expressão de limite como "100/hour" ou "10 per minute".
+
+    Args:
+        expressao (str): Expressão do limite
+
+    Returns:
+        tuple: Quantidade máxima e período em segundos
+
+    Raises:
+        ValueError: Se a expressão for inválida
+    """
+    texto = expressao.replace(' per ', '/').replace(' por ', '/')
+    quantidade, _, unidade = texto.partition('/')
+    unidade = unidade.strip().lower()
+    multiplicador = 1
+    partes = unidade.split()
+    if len(partes) == 2 and partes[0].isdigit():
+        multiplicador, unidade = int(partes[0]), partes[1]
+    if unidade not in UNIDADES or not quantidade.strip().isdigit():
+        raise ValueError(f'Limite inválido: {expressao}')
+    return int(quantidade), UNIDADES[unidade] * multiplicador
+
+
+def janela_deslizante(estado, agora, limite, periodo):
+    """
+    Aplica o algoritmo de contador de janela deslizante.
+
+    A contagem estimada é a contagem da janela atual somada à da janela anterior,
+    ponderada pela fração da janela anterior que ainda está dentro do período.
+
+    Args:
+        estado (tuple): (janela, contagem atual, contagem anterior) ou None
+        agora (float): Instante da requisição (epoch)
+        limite (int): Quantidade máxima no período
+        periodo (int): Período em segundos
+
+    Returns:
+        tuple: (permitido, novo estado, contagem estimada)
+    """
+    janela = int(agora // periodo)
+    atual = anterior = 0
+    if estado is not None:
+        janela_salva, atual_salvo, anterior_salvo = estado
+        if janela_salva == janela:
+            atual, anterior = atual_salvo, anterior_salvo
+        elif janela_salva == janela - 1:
+            anterior = atual_salvo
+
+    peso = 1.0 - (agora - janela * periodo) / periodo
+    estimado = anterior * peso + atual
+    if estimado >= limite:
+        return False, (janela, atual, anterior), estimado
+    return True, (janela, atual + 1, anterior), estimado + 1
+
+
+class ArmazenamentoMemoria:
+    """Contadores em memória. Válidos apenas dentro de um único processo."""
+
+    def __init__(self):
+        self._estados = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, chave, limite, periodo, agora):
+        with self._lock:
+            permitido, estado, estimado = janela_deslizante(self._estados.get(chave), agora, limite, periodo)
+            self._estados[chave] = estado
+        return permitido, estimado
+
+    def limpar(self):
+        with self._lock:
+            self._estados.clear()
+
+
+class ArmazenamentoSQLite:
+    """
+    Contadores em um arquivo SQLite compartilhado pelos workers da mesma máquina.
+    Cada verificação é uma transação curta (BEGIN IMMEDIATE) sobre uma linha por chave.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        self._local = threading.local()
+        self._verificacoes = 0
+        conexao = self._conexao()
+        conexao.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit ('
+            'chave TEXT PRIMARY KEY, janela INTEGER, atual INTEGER, anterior INTEGER, expira REAL)'
+        )
+
+    def _conexao(self):
+        """Obtém a conexão da thread atual, abrindo-a na primeira vez e após um fork."""
+        conexao = getattr(self._local, 'conexao', None)
+        # A conexão aberta no processo mestre (preload do gunicorn) não pode ser usada pelos workers
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=OFF')
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def registrar(self, chave, limite, periodo, agora):
+        conexao = self._conexao()
+        conexao.execute('BEGIN IMMEDIATE')
+        try:
+            estado = conexao.execute(
+                'SELECT janela, atual, anterior FROM rate_limit WHERE chave = ?', (chave,)
+            ).fetchone()
+            permitido, novo, estimado = janela_deslizante(estado, agora, limite, periodo)
+            if permitido:
+                conexao.execute(
+                    'INSERT INTO rate_limit (chave, janela, atual, anterior, expira) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(chave) DO UPDATE SET janela = excluded.janela, atual = excluded.atual, '
+                    'anterior = excluded.anterior, expira = excluded.expira',
+                    (chave, novo[0], novo[1], novo[2], (novo[0] + 2) * periodo)
+                )
+            conexao.execute('COMMIT')
+        except Exception:
+            conexao.execute('ROLLBACK')
+            raise
+
+        self._verificacoes += 1
+        if self._verificacoes % INTERVALO_LIMPEZA == 0:
+            conexao.execute('DELETE FROM rate_limit WHERE expira < ?', (agora,))
+        return permitido, estimado
+
+    def limpar(self):
+        self._conexao().execute('DELETE FROM rate_limit')
+
+
+# Script Lua executado atomicamente no servidor: KEYS = janela atual e anterior;
+# ARGV = peso da janela anterior, limite e tempo de expiração
+_SCRIPT_REDIS = """
+local atual = tonumber(redis.call('GET', KEYS[1]) or '0')
+local anterior = tonumber(redis.call('GET', KEYS[2]) or '0')
+local estimado = anterior * tonumber(ARGV[1]) + atual
+if estimado >= tonumber(ARGV[2]) then
+    return {0, tostring(estimado)}
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1, tostring(estimado + 1)}
+"""
+
+
+class ArmazenamentoRedis:
+    """Contadores em um servidor compatível com Redis, compartilhados entre máquinas."""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('O pacote redis é necessário para RATELIMIT_STORAGE_URI redis://') from e
+        self.cliente = redis.Redis.from_url(url)
+        self._script = self.cliente.register_script(_SCRIPT_REDIS)
+
+    def registrar(self, chave, limite, periodo, agora):
+        janela = int(agora // periodo)
+        peso = 1.0 - (agora - janela * periodo) / periodo
+        permitido, estimado = self._script(
+            keys=[f'rl:{chave}:{janela}', f'rl:{chave}:{janela - 1}'],
+            args=[peso, limite, periodo * 2]
+        )
+        return bool(permitido), float(estimado)
+
+    def limpar(self):
+        for chave in self.cliente.scan_iter('rl:*'):
+            self.cliente.delete(chave)
+
+
+def criar_armazenamento(uri):
+    """
+    Cria o armazenamento de contadores a partir de uma URI.
+
+    Args:
+        uri (str): memory://, sqlite:///caminho/arquivo.db ou redis://host:porta/db
+
+    Returns:
+        Armazenamento correspondente
+    """
+    esquema = urlparse(uri).scheme
+    if esquema == 'memory':
+        return ArmazenamentoMemoria()
+    if esquema == 'sqlite':
+        return ArmazenamentoSQLite(uri[len('sqlite:///'):])
+    if esquema in ('redis', 'rediss', 'unix'):
+        return ArmazenamentoRedis(uri)
+    raise ValueError(f'Armazenamento de limitação de taxa não suportado: {uri}')
+
+
+class LimitadorTaxa:
+    """
+    Verifica limites de taxa por escopo (usuário, IP ou rota) em um armazenamento compartilhado.
+    Também aplica o limite padrão (RATELIMIT_DEFAULT) a todas as rotas, por usuário
+    autenticado ou, para anônimos, por IP.
+    """
+
+    def __init__(self, app=None):
+        self.armazenamento = None
+        self.habilitado = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Configura o armazenamento a partir de RATELIMIT_STORAGE_URI e registra o limite padrão.
+
+        Args:
+            app (Flask): Aplicação Flask
+        """
+        from flask import abort, request
+
+        self.armazenamento = criar_armazenamento(app.config.get('RATELIMIT_STORAGE_URI', 'memory://'))
+        self.habilitado = app.config.get('RATELIMIT_ENABLED', True)
+        app.extensions['rate_limiter'] = self
+
+        padrao = app.config.get('RATELIMIT_DEFAULT')
+        if not padrao or not self.habilitado:
+            return
+        limite, periodo = interpretar_limite(padrao)
+
+        @app.before_request
+        def _limite_padrao():
+            if request.endpoint in (None, 'static'):
+                return
+            cliente = chave_escopo('user')
+            if not self.verificar(f'padrao:{cliente}', limite, periodo):
+                logger.warning(f"Limite padrão de requisições excedido: {cliente}")
+                abort(429)
+
+    def verificar(self, chave, limite, periodo):
+        """
+        Conta uma requisição para a chave e indica se ela está dentro do limite.
+        Requisições recusadas não são contadas.
+
+        Args:
+            chave (str): Identificação do escopo (ex.: "rota:user:42")
+            limite (int): Quantidade máxima no período
+            periodo (int): Período em segundos
+
+        Returns:
+            bool: True se a requisição é permitida
+        """
+        if not self.habilitado or self.armazenamento is None:
+            return True
+        try:
+            permitido, _ = self.armazenamento.registrar(chave, limite, periodo, time.time())
+        except Exception as e:
+            # Falhas no armazenamento não devem derrubar a aplicação
+            logger.error(f"Erro ao verificar limite de taxa: {str(e)}")
+            return True
+        return permitido
+
+
+def chave_escopo(escopo):
+    """
+    Identifica o cliente da requisição atual conforme o escopo.
+
+    Args:
+        escopo (str): 'user' (usuário autenticado, ou IP se anônimo) ou 'ip'
+
+    Returns:
+        str: Identificador do cliente
+    """
+    from flask import request
+    from flask_login import current_user
+
+    if escopo == 'user' and current_user.is_authenticated:
+        return f'user:{current_user.id}'
+    return f'ip:{request.remote_addr}'
@@ -0,0 +1,67 @@
+"""
+Roteamento de sessões entre banco primário e réplica de leitura.
+Este módulo define a sessão do SQLAlchemy que envia leituras de rotas marcadas para a
+réplica configurada em SQLALCHEMY_BINDS, mantendo escritas e leituras do próprio
+usuário logo após um commit no banco primário.
+"""
+import time
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Chave da réplica em SQLALCHEMY_BINDS
+BIND_REPLICA = 'replica'
+
+# Chave, na sessão do usuário, do instante até o qual as leituras ficam no primário
+CHAVE_PRIMARIO_ATE = '_primario_ate'
+
+
+def leitura_na_replica():
+    """
+    Indica se as leituras da requisição atual podem ir para a réplica.
+
+    Returns:
+        bool: True se a rota foi marcada para réplica e o usuário não fez
+        commit recente (read-your-writes)
+    """
+    if not has_request_context() or not g.get('usar_replica'):
+        return False
+    if g.get('primario_fixado'):
+        return False
+    return session.get(CHAVE_PRIMARIO_ATE, 0) <= time.time()
+
+
+class RoutingSession(Session):
+    """
+    Sessão que escolhe entre o banco primário e a réplica.
+    Flushes, transações com escritas pendentes e rotas não marcadas usam o primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('escrita'):
+            replica = self._db.engines.get(BIND_REPLICA)
+            if replica is not None and leitura_na_replica():
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _marcar_escrita(sessao, contexto):
+    """Registra que a transação atual alterou dados."""
+    sessao.info['escrita'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _fixar_primario(sessao):
+    """Após um commit com escritas, mantém as leituras do usuário no primário por um tempo."""
+    if not sessao.info.pop('escrita', False) or not has_request_context():
+        return
+    g.primario_fixado = True
+    session[CHAVE_PRIMARIO_ATE] = time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 10)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _descartar_escrita(sessao):
+    """Descarta a marca de escrita de uma transação desfeita."""
+    sessao.info.pop('escrita', None)
@@ -9,7 +9,6 @@ import hashlib
 from functools import wraps
 from flask import request, abort, current_app, session
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
 
 # Lista de extensões de arquivo permitidas para upload
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -97,6 +96,33 @@ def secure_upload_filename(filename):
     
     return f"{name}_{random_hex}{ext}"
 
+def save_file(file, directory=None, allowed_extensions=None):
+    """
+    Salva um arquivo enviado no diretório de uploads com nome seguro.
+    
+    Args:
+        file (FileStorage): Arquivo enviado pelo formulário
+        directory (str, optional): Diretório de destino. Se None, usa UPLOAD_FOLDER.
+        allowed_extensions (set, optional): Extensões permitidas. Se None, aceita imagens e documentos.
+        
+    Returns:
+        str: Nome do arquivo salvo, ou None se o arquivo for inválido
+    """
+    if not file or not file.filename:
+        return None
+    
+    if allowed_extensions is None:
+        allowed_extensions = ALLOWED_IMAGE_EXTENSIONS | ALLOWED_DOCUMENT_EXTENSIONS
+    if not allowed_file(file.filename, allowed_extensions):
+        return None
+    
+    directory = directory or current_app.config['UPLOAD_FOLDER']
+    os.makedirs(directory, exist_ok=True)
+    
+    filename = secure_upload_filename(file.filename)
+    file.save(os.path.join(directory, filename))
+    return filename
+
 def sanitize_input(text):
     """
     Sanitiza entrada de texto para prevenir XSS.
@@ -122,31 +148,6 @@ def sanitize_input(text):
     
     return text
 
-def hash_password(password):
-    """
-    Gera um hash seguro para senha.
-    
-    Args:
-        password (str): Senha em texto plano
-        
-    Returns:
-        str: Hash da senha
-    """
-    return generate_password_hash(password, method='pbkdf2:sha256:150000')
-
-def verify_password(password_hash, password):
-    """
-    Verifica se uma senha corresponde ao hash armazenado.
-    
-    Args:
-        password_hash (str): Hash da senha armazenada
-        password (str): Senha em texto plano a ser verificada
-        
-    Returns:
-        bool: True se a senha for válida, False caso contrário
-    """
-    return check_password_hash(password_hash, password)
-
 def set_secure_headers(response):
     """
     Define cabeçalhos de segurança para respostas HTTP.
@@ -0,0 +1,251 @@
+"""
+Hash de senhas.
+Este módulo gera e verifica hashes bcrypt em um pool de processos limitado, para que rajadas
+de login não ocupem a CPU dos workers que atendem as demais requisições. A fila do pool é
+limitada: quando está cheia, ou a operação passa do tempo limite, a requisição falha logo com
+HTTP 503 em vez de acumular threads esperando. Também mede o tempo de cada operação e identifica
+hashes que precisam ser refeitos (custo diferente do configurado ou formato PBKDF2 antigo).
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturoTimeoutError
+
+import bcrypt
+from flask import current_app, has_app_context
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Prefixos dos hashes bcrypt
+PREFIXOS_BCRYPT = ('$2a$', '$2b$', '$2y$')
+
+# Pool de processos do worker atual (recriado após fork)
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+# Vagas na fila do pool: operações em execução ou aguardando um processo
+_vagas = None
+
+# Métricas acumuladas por operação: quantidade, tempo total, tempo máximo (segundos) e recusadas
+_metricas = {'hash': [0, 0.0, 0.0, 0], 'verificacao': [0, 0.0, 0.0, 0]}
+_metricas_lock = threading.Lock()
+
+
+class SenhasIndisponivel(ServiceUnavailable):
+    """Fila do pool de senhas cheia ou operação acima do tempo limite (HTTP 503)."""
+
+    description = 'O serviço de autenticação está sobrecarregado. Tente novamente em alguns segundos.'
+
+
+def _config(chave, padrao):
+    """Lê uma configuração da aplicação, com valor padrão fora do contexto da aplicação."""
+    if has_app_context():
+        return current_app.config.get(chave, padrao)
+    return padrao
+
+
+def _gerar_hash(senha, rounds):
+    """Gera o hash bcrypt. Executada nos processos do pool."""
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verificar_hash(senha, hash_senha):
+    """Verifica uma senha contra um hash bcrypt. Executada nos processos do pool."""
+    return bcrypt.checkpw(senha.encode('utf-8'), hash_senha.encode('utf-8'))
+
+
+def _obter_executor():
+    """
+    Obtém o pool de processos do worker atual, ou None quando o pool está desativado.
+    O pool é criado sob demanda e recriado se o processo foi bifurcado (ex.: gunicorn --preload).
+    """
+    global _executor, _executor_pid, _vagas
+
+    workers = _config('PASSWORD_HASH_WORKERS', 2)
+    if not workers:
+        return None
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_pid = os.getpid()
+            _vagas = threading.BoundedSemaphore(_config('PASSWORD_HASH_MAX_PENDING', workers * 8))
+        return _executor
+
+
+def encerrar_executor():
+    """Encerra o pool de processos do worker atual; um novo é criado no próximo uso."""
+    global _executor, _executor_pid, _vagas
+
+    with _executor_lock:
+        executor, _executor, _executor_pid, _vagas = _executor, None, None, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _executar(operacao, funcao, *args):
+    """
+    Executa a função no pool (ou no próprio processo) e registra o tempo gasto.
+
+    Raises:
+        SenhasIndisponivel: Se não houver vaga na fila ou o resultado não chegar em
+        PASSWORD_HASH_TIMEOUT segundos
+    """
+    inicio = time.perf_counter()
+    executor = _obter_executor()
+    if executor is None:
+        resultado = funcao(*args)
+    else:
+        resultado = _executar_no_pool(operacao, executor, _vagas, funcao, args)
+    _registrar(operacao, time.perf_counter() - inicio)
+    return resultado
+
+
+def _executar_no_pool(operacao, executor, vagas, funcao, args):
+    """Envia a função ao pool ocupando uma vaga da fila, com um único prazo para a vaga e o resultado."""
+    timeout = _config('PASSWORD_HASH_TIMEOUT', 5)
+    prazo = time.monotonic() + timeout
+    if not vagas.acquire(timeout=timeout):
+        _recusar(operacao, 'fila cheia')
+
+    try:
+        futuro = executor.submit(funcao, *args)
+    except BaseException:
+        vagas.release()
+        raise
+    # A vaga só é liberada quando o processo termina, mesmo que a requisição desista antes
+    futuro.add_done_callback(lambda _: vagas.release())
+
+    try:
+        return futuro.result(timeout=max(prazo - time.monotonic(), 0))
+    except FuturoTimeoutError:
+        futuro.cancel()
+        _recusar(operacao, f'sem resposta em {timeout}s')
+
+
+def _recusar(operacao, motivo):
+    """Contabiliza e recusa uma operação que não pôde ser atendida pelo pool."""
+    with _metricas_lock:
+        _metricas[operacao][3] += 1
+    logger.warning(f"Operação de senha recusada ({operacao}): {motivo}")
+    raise SenhasIndisponivel(retry_after=1)
+
+
+def _registrar(operacao, duracao, quantidade=1):
+    """Acumula a duração média de uma ou mais operações e avisa quando ela passa do limite."""
+    with _metricas_lock:
+        metrica = _metricas[operacao]
+        metrica[0] += quantidade
+        metrica[1] += duracao * quantidade
+        metrica[2] = max(metrica[2], duracao)
+
+    limite = _config('PASSWORD_HASH_WARN_MS', 500)
+    if limite and duracao * 1000 > limite:
+        logger.warning(f"Operação de senha lenta ({operacao}): {duracao * 1000:.0f} ms")
+
+
+def custo_bcrypt(hash_senha):
+    """
+    Obtém o custo (log rounds) de um hash bcrypt.
+
+    Returns:
+        int: Custo do hash, ou None se não for um hash bcrypt
+    """
+    if not hash_senha or not hash_senha.startswith(PREFIXOS_BCRYPT):
+        return None
+    try:
+        return int(hash_senha[4:6])
+    except ValueError:
+        return None
+
+
+def gerar_hash_senha(senha):
+    """
+    Gera o hash bcrypt de uma senha com o custo configurado em BCRYPT_LOG_ROUNDS.
+
+    Args:
+        senha (str): Senha em texto plano
+
+    Returns:
+        str: Hash da senha
+    """
+    return _executar('hash', _gerar_hash, senha, _config('BCRYPT_LOG_ROUNDS', 12))
+
+
+def gerar_hashes_senhas(senhas):
+    """
+    Gera os hashes de várias senhas, distribuindo o trabalho entre os processos do pool.
+
+    Args:
+        senhas (list): Senhas em texto plano
+
+    Returns:
+        list: Hashes, na mesma ordem das senhas
+    """
+    rounds = _config('BCRYPT_LOG_ROUNDS', 12)
+    inicio = time.perf_counter()
+    executor = _obter_executor()
+    if executor is None:
+        hashes = [_gerar_hash(senha, rounds) for senha in senhas]
+    else:
+        hashes = list(executor.map(_gerar_hash, senhas, [rounds] * len(senhas), chunksize=16))
+    if senhas:
+        _registrar('hash', (time.perf_counter() - inicio) / len(senhas), len(senhas))
+    return hashes
+
+
+def verificar_senha(senha, hash_senha):
+    """
+    Verifica uma senha contra o hash armazenado.
+    Aceita hashes bcrypt e, para contas antigas, hashes PBKDF2 do Werkzeug.
+
+    Args:
+        senha (str): Senha em texto plano
+        hash_senha (str): Hash armazenado
+
+    Returns:
+        bool: True se a senha for válida
+    """
+    if not senha or not hash_senha:
+        return False
+    if hash_senha.startswith(PREFIXOS_BCRYPT):
+        return _executar('verificacao', _verificar_hash, senha, hash_senha)
+    if hash_senha.startswith('pbkdf2:'):
+        return _executar('verificacao', check_password_hash, hash_senha, senha)
+    return False
+
+
+def precisa_rehash(hash_senha):
+    """
+    Indica se o hash deve ser refeito com o custo atual.
+
+    Args:
+        hash_senha (str): Hash armazenado
+
+    Returns:
+        bool: True para hashes PBKDF2 ou bcrypt com custo diferente de BCRYPT_LOG_ROUNDS
+    """
+    return custo_bcrypt(hash_senha) != _config('BCRYPT_LOG_ROUNDS', 12)
+
+
+def metricas():
+    """
+    Retorna as métricas das operações de senha do processo atual.
+
+    Returns:
+        dict: Quantidade, tempo médio, tempo máximo (ms) e recusas por operação
+    """
+    with _metricas_lock:
+        return {
+            operacao: {
+                'quantidade': quantidade,
+                'media_ms': round(total / quantidade * 1000, 1) if quantidade else 0.0,
+                'maximo_ms': round(maximo * 1000, 1),
+                'recusadas': recusadas,
+            }
+            for operacao, (quantidade, total, maximo, recusadas) in _metricas.items()
+        }
@@ -0,0 +1,378 @@
+"""
+Sessões no servidor.
+Este módulo substitui a sessão em cookie assinado do Flask por um identificador compacto no
+cookie e os dados da sessão em um armazenamento compartilhado pelos workers (SQLite local ou
+servidor compatível com Redis). Os dados só são lidos quando a sessão é acessada, sessões
+expiradas são removidas em segundo plano e as sessões de um usuário podem ser encerradas de
+qualquer worker.
+"""
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from flask import current_app, session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo aceito para o identificador vindo do cookie
+TAMANHO_MAXIMO_ID = 64
+
+
+class SessaoServidor(SessionMixin):
+    """Sessão cujos dados são carregados do armazenamento apenas no primeiro acesso."""
+
+    def __init__(self, interface=None, sid=None):
+        self.sid = sid
+        self.expira = None
+        self.user_id_original = None
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+        self._interface = interface
+        self._dados = None if sid else {}
+
+    @property
+    def carregada(self):
+        """Indica se os dados já foram lidos (ou se a sessão é nova)."""
+        return self._dados is not None
+
+    @property
+    def dados(self):
+        if self._dados is None:
+            registro = self._interface.armazenamento.ler(self.sid, time.time())
+            if registro is None:
+                # Sessão expirada ou inexistente: um novo identificador será gerado ao salvar
+                self._dados, self.sid, self.new = {}, None, True
+            else:
+                payload, self.expira = registro
+                self._dados = self._interface.serializer.loads(payload)
+                self.user_id_original = self._dados.get('_user_id')
+        return self._dados
+
+    def __getitem__(self, chave):
+        self.accessed = True
+        return self.dados[chave]
+
+    def __setitem__(self, chave, valor):
+        self.accessed = self.modified = True
+        self.dados[chave] = valor
+
+    def __delitem__(self, chave):
+        self.accessed = self.modified = True
+        del self.dados[chave]
+
+    def __iter__(self):
+        self.accessed = True
+        return iter(self.dados)
+
+    def __len__(self):
+        return len(self.dados)
+
+    def __contains__(self, chave):
+        self.accessed = True
+        return chave in self.dados
+
+
+class ArmazenamentoMemoria:
+    """Sessões em memória. Válidas apenas dentro de um único processo (testes)."""
+
+    def __init__(self):
+        self._sessoes = {}
+        self._lock = threading.Lock()
+
+    def ler(self, sid, agora):
+        registro = self._sessoes.get(sid)
+        if registro is None or registro[2] < agora:
+            return None
+        return registro[0], registro[2]
+
+    def gravar(self, sid, payload, user_id, expira):
+        with self._lock:
+            self._sessoes[sid] = (payload, user_id, expira)
+
+    def renovar(self, sid, expira):
+        with self._lock:
+            if sid in self._sessoes:
+                payload, user_id, _ = self._sessoes[sid]
+                self._sessoes[sid] = (payload, user_id, expira)
+
+    def remover(self, sid):
+        with self._lock:
+            self._sessoes.pop(sid, None)
+
+    def remover_usuario(self, user_id, exceto=None):
+        with self._lock:
+            sids = [s for s, (_, u, _) in self._sessoes.items() if u == str(user_id) and s != exceto]
+            for sid in sids:
+                del self._sessoes[sid]
+        return len(sids)
+
+    def limpar_expiradas(self, agora):
+        with self._lock:
+            expiradas = [s for s, (_, _, expira) in self._sessoes.items() if expira < agora]
+            for sid in expiradas:
+                del self._sessoes[sid]
+        return len(expiradas)
+
+
+class ArmazenamentoSQLite:
+    """
+    Sessões em um arquivo SQLite compartilhado pelos workers da mesma máquina.
+    As sessões expiradas são removidas por uma thread em segundo plano em cada worker.
+    """
+
+    def __init__(self, caminho, intervalo_limpeza=600):
+        self.caminho = caminho
+        self.intervalo_limpeza = intervalo_limpeza
+        self._local = threading.local()
+        self._limpeza_pid = None
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        conexao = self._conexao()
+        conexao.execute(
+            'CREATE TABLE IF NOT EXISTS sessoes ('
+            'id TEXT PRIMARY KEY, dados BLOB NOT NULL, user_id TEXT, expira REAL NOT NULL)'
+        )
+        conexao.execute('CREATE INDEX IF NOT EXISTS ix_sessoes_user_id ON sessoes (user_id)')
+        conexao.execute('CREATE INDEX IF NOT EXISTS ix_sessoes_expira ON sessoes (expira)')
+
+    def _conexao(self):
+        """Obtém a conexão da thread atual, abrindo-a na primeira vez e após um fork."""
+        conexao = getattr(self._local, 'conexao', None)
+        # A conexão aberta no processo mestre (preload do gunicorn) não pode ser usada pelos workers
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def _iniciar_limpeza(self):
+        """Inicia a thread de limpeza no processo atual (uma por worker, inclusive após fork)."""
+        if not self.intervalo_limpeza or self._limpeza_pid == os.getpid():
+            return
+        self._limpeza_pid = os.getpid()
+
+        def executar():
+            while True:
+                time.sleep(self.intervalo_limpeza)
+                try:
+                    removidas = self.limpar_expiradas(time.time())
+                    if removidas:
+                        logger.info(f"{removidas} sessão(ões) expirada(s) removida(s)")
+                except sqlite3.Error as e:
+                    logger.error(f"Erro ao remover sessões expiradas: {str(e)}")
+
+        threading.Thread(target=executar, name='limpeza-sessoes', daemon=True).start()
+
+    def ler(self, sid, agora):
+        return self._conexao().execute(
+            'SELECT dados, expira FROM sessoes WHERE id = ? AND expira > ?', (sid, agora)
+        ).fetchone()
+
+    def gravar(self, sid, payload, user_id, expira):
+        self._iniciar_limpeza()
+        self._conexao().execute(
+            'INSERT INTO sessoes (id, dados, user_id, expira) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET dados = excluded.dados, user_id = excluded.user_id, '
+            'expira = excluded.expira',
+            (sid, payload, user_id, expira)
+        )
+
+    def renovar(self, sid, expira):
+        self._conexao().execute('UPDATE sessoes SET expira = ? WHERE id = ?', (expira, sid))
+
+    def remover(self, sid):
+        self._conexao().execute('DELETE FROM sessoes WHERE id = ?', (sid,))
+
+    def remover_usuario(self, user_id, exceto=None):
+        return self._conexao().execute(
+            'DELETE FROM sessoes WHERE user_id = ? AND id != ?', (str(user_id), exceto or '')
+        ).rowcount
+
+    def limpar_expiradas(self, agora):
+        return self._conexao().execute('DELETE FROM sessoes WHERE expira < ?', (agora,)).rowcount
+
+
+class ArmazenamentoRedis:
+    """Sessões em um servidor compatível com Redis, com expiração nativa das chaves."""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('O pacote redis é necessário para SESSION_STORAGE_URI redis://') from e
+        self.cliente = redis.Redis.from_url(url)
+
+    def ler(self, sid, agora):
+        pipe = self.cliente.pipeline()
+        pipe.get(f'sessao:{sid}')
+        pipe.pttl(f'sessao:{sid}')
+        payload, ttl = pipe.execute()
+        if payload is None:
+            return None
+        return payload, agora + ttl / 1000
+
+    def gravar(self, sid, payload, user_id, expira):
+        ttl = max(int(expira - time.time()), 1)
+        pipe = self.cliente.pipeline()
+        pipe.set(f'sessao:{sid}', payload, ex=ttl)
+        if user_id is not None:
+            pipe.sadd(f'sessoes_usuario:{user_id}', sid)
+            pipe.expire(f'sessoes_usuario:{user_id}', ttl)
+        pipe.execute()
+
+    def renovar(self, sid, expira):
+        self.cliente.expire(f'sessao:{sid}', max(int(expira - time.time()), 1))
+
+    def remover(self, sid):
+        self.cliente.delete(f'sessao:{sid}')
+
+    def remover_usuario(self, user_id, exceto=None):
+        chave = f'sessoes_usuario:{user_id}'
+        sids = [s.decode() for s in self.cliente.smembers(chave) if s.decode() != exceto]
+        if not sids:
+            return 0
+        pipe = self.cliente.pipeline()
+        pipe.delete(*[f'sessao:{sid}' for sid in sids])
+        pipe.srem(chave, *sids)
+        return pipe.execute()[0]
+
+    def limpar_expiradas(self, agora):
+        return 0
+
+
+def criar_armazenamento(uri, intervalo_limpeza=600):
+    """
+    Cria o armazenamento de sessões a partir de uma URI.
+
+    Args:
+        uri (str): memory://, sqlite:///caminho/arquivo.db ou redis://host:porta/db
+        intervalo_limpeza (int): Intervalo em segundos da remoção de sessões expiradas (SQLite)
+
+    Returns:
+        Armazenamento correspondente
+    """
+    esquema = urlparse(uri).scheme
+    if esquema == 'memory':
+        return ArmazenamentoMemoria()
+    if esquema == 'sqlite':
+        return ArmazenamentoSQLite(uri[len('sqlite:///'):], intervalo_limpeza)
+    if esquema in ('redis', 'rediss', 'unix'):
+        return ArmazenamentoRedis(uri)
+    raise ValueError(f'Armazenamento de sessões não suportado: {uri}')
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Interface de sessão do Flask com os dados no servidor.
+    O cookie leva apenas um identificador aleatório de 128 bits; o identificador é trocado
+    quando o usuário da sessão muda (login/logout), evitando fixação de sessão.
+    """
+
+    serializer = TaggedJSONSerializer()
+    session_class = SessaoServidor
+
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or len(sid) > TAMANHO_MAXIMO_ID:
+            return self.session_class(self)
+        return self.session_class(self, sid)
+
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+
+        # Sessão não acessada nesta requisição: nada a ler nem a gravar
+        if not session.carregada:
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.sid:
+                self.armazenamento.remover(session.sid)
+                response.delete_cookie(nome, domain=dominio, path=caminho,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        agora = time.time()
+        ttl = app.permanent_session_lifetime.total_seconds()
+        user_id = session.get('_user_id')
+        # O Flask-Login guarda '<id>:<versão da credencial>'; o índice por usuário usa só o ID
+        indice = str(user_id).split(':', 1)[0] if user_id is not None else None
+
+        if session.sid is None or user_id != session.user_id_original:
+            if session.sid:
+                self.armazenamento.remover(session.sid)
+            session.sid = secrets.token_urlsafe(16)
+            session.modified = True
+
+        if session.modified:
+            self.armazenamento.gravar(
+                session.sid, self.serializer.dumps(dict(session.dados)), indice, agora + ttl
+            )
+        elif session.expira is not None and session.expira - agora < ttl / 2:
+            # Renova a validade no servidor só depois de consumida metade dela
+            self.armazenamento.renovar(session.sid, agora + ttl)
+        elif not self.should_set_cookie(app, session):
+            return
+
+        response.set_cookie(
+            nome, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio,
+            path=caminho,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def encerrar_sessoes_usuario(user_id, manter_atual=False):
+    """
+    Encerra as sessões de um usuário em todos os workers (ex.: desativação ou troca de senha).
+
+    Args:
+        user_id (int): ID do usuário
+        manter_atual (bool): Mantém a sessão da requisição atual
+
+    Returns:
+        int: Quantidade de sessões encerradas
+    """
+    interface = current_app.session_interface
+    if not isinstance(interface, ServerSessionInterface):
+        return 0
+    exceto = getattr(session, 'sid', None) if manter_atual else None
+    try:
+        return interface.armazenamento.remover_usuario(user_id, exceto)
+    except Exception as e:
+        logger.error(f"Erro ao encerrar sessões do usuário {user_id}: {str(e)}")
+        return 0
+
+
+def init_sessoes(app):
+    """
+    Ativa as sessões no servidor quando SESSION_STORAGE_URI está configurada.
+
+    Args:
+        app (Flask): Aplicação Flask
+    """
+    uri = app.config.get('SESSION_STORAGE_URI')
+    if not uri:
+        return
+    app.session_interface = ServerSessionInterface(
+        criar_armazenamento(uri, app.config.get('SESSION_CLEANUP_INTERVAL', 600))
+    )
@@ -0,0 +1,305 @@
+"""
+Carregamento do usuário da sessão.
+Este módulo registra o user_loader do Flask-Login a partir de um retrato compacto do usuário
+(dados básicos, IDs de condomínios e permissões) mantido em cache no processo. O retrato é
+versionado por users.versao_retrato, um contador avançado a cada invalidação: vencido o TTL,
+apenas a versão é consultada e o retrato só é remontado se o usuário foi invalidado. O objeto User completo é carregado sob demanda.
+O identificador da sessão e do cookie "lembrar-me" leva a versão da credencial do usuário,
+de modo que uma troca de senha invalida os cookies emitidos antes dela.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.models import User, Role, UserRole, UserCondominio
+
+# Cache do processo: user_id -> (retrato, validade)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class UsuarioSessao:
+    """
+    Usuário autenticado da requisição, montado a partir do retrato em cache.
+    Atributos fora do retrato (ex.: condominios, roles, last_login) carregam o User completo.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, retrato):
+        self.id = retrato['id']
+        self.name = retrato['name']
+        self.email = retrato['email']
+        self.is_admin = retrato['is_admin']
+        self.is_active = retrato['is_active']
+        self.is_pending = retrato['is_pending']
+        self.condominio_ids = retrato['condominio_ids']
+        self.permissoes = retrato['permissoes']
+        self.versao_credencial = retrato['versao_credencial']
+        self._usuario = None
+
+    def get_id(self):
+        return f'{self.id}:{self.versao_credencial}'
+
+    @property
+    def usuario(self):
+        """User completo (ORM), carregado na primeira vez que for necessário."""
+        if self._usuario is None:
+            self._usuario = db.session.get(User, self.id)
+        return self._usuario
+
+    def has_permission(self, permission):
+        """Verifica se o usuário tem a permissão especificada."""
+        return self.is_admin or permission in self.permissoes
+
+    def has_condominio_access(self, condominio_id):
+        """Verifica se o usuário tem acesso ao condomínio."""
+        return self.is_admin or condominio_id in self.condominio_ids
+
+    def __getattr__(self, nome):
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        return getattr(self.usuario, nome)
+
+    def __eq__(self, outro):
+        return isinstance(outro, (UsuarioSessao, User)) and outro.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'<UsuarioSessao {self.name}>'
+
+
+def consultas_retrato(user_id):
+    """
+    Monta as consultas do retrato do usuário, compartilhadas com a API assíncrona.
+
+    Args:
+        user_id (int): ID do usuário
+
+    Returns:
+        tuple: Consultas dos dados básicos, dos IDs de condomínios e das permissões dos papéis
+    """
+    return (
+        select(
+            User.id, User.name, User.email, User.is_admin, User.is_active, User.is_pending,
+            User.versao_credencial, User.versao_retrato
+        ).where(User.id == user_id),
+        select(UserCondominio.condominio_id).where(UserCondominio.user_id == user_id),
+        select(Role.permissions).join(UserRole, UserRole.role_id == Role.id).where(UserRole.user_id == user_id),
+    )
+
+
+def consulta_versao(user_id):
+    """Monta a consulta da versão do retrato (users.versao_retrato)."""
+    return select(User.versao_retrato).where(User.id == user_id)
+
+
+def compor_retrato(linha, condominio_ids, permissoes_papeis):
+    """
+    Compõe o retrato a partir dos resultados de consultas_retrato.
+
+    Args:
+        linha (Row): Dados básicos do usuário, ou None se ele não existir
+        condominio_ids (iterable): IDs dos condomínios do usuário
+        permissoes_papeis (iterable): Permissões de cada papel, separadas por vírgula
+
+    Returns:
+        dict: Retrato do usuário, ou None se ele não existir
+    """
+    if linha is None:
+        return None
+    return {
+        'id': linha.id,
+        'name': linha.name,
+        'email': linha.email,
+        'is_admin': bool(linha.is_admin),
+        'is_active': bool(linha.is_active),
+        'is_pending': bool(linha.is_pending),
+        'condominio_ids': frozenset(condominio_ids),
+        'permissoes': frozenset(
+            permissao
+            for permissoes in permissoes_papeis
+            if permissoes
+            for permissao in permissoes.split(',')
+        ),
+        'versao_credencial': linha.versao_credencial,
+        'versao': linha.versao_retrato,
+    }
+
+
+def montar_retrato(user_id):
+    """
+    Monta o retrato do usuário com consultas simples, sem carregar os relacionamentos do User.
+
+    Args:
+        user_id (int): ID do usuário
+
+    Returns:
+        dict: Retrato do usuário, ou None se ele não existir
+    """
+    dados, condominios, papeis = consultas_retrato(user_id)
+    linha = db.session.execute(dados).first()
+    if linha is None:
+        return None
+    return compor_retrato(linha, db.session.scalars(condominios), db.session.scalars(papeis))
+
+
+def _guardar_retrato(user_id, retrato, validade):
+    """Grava o retrato no cache do processo (ou o descarta, se o usuário não existir)."""
+    with _cache_lock:
+        if retrato is None:
+            _cache.pop(user_id, None)
+        else:
+            _cache[user_id] = (retrato, validade)
+
+
+def obter_retrato(user_id):
+    """
+    Obtém o retrato do usuário do cache, revalidando a versão depois do TTL.
+
+    Args:
+        user_id (int): ID do usuário
+
+    Returns:
+        dict: Retrato do usuário, ou None se ele não existir
+    """
+    agora = time.monotonic()
+    ttl = current_app.config.get('USER_CACHE_TTL', 30)
+    entrada = _cache.get(user_id)
+
+    if entrada is not None:
+        retrato, validade = entrada
+        if agora < validade:
+            return retrato
+        versao = db.session.scalar(consulta_versao(user_id))
+        if versao is not None and versao == retrato['versao']:
+            _guardar_retrato(user_id, retrato, agora + ttl)
+            return retrato
+
+    retrato = montar_retrato(user_id)
+    _guardar_retrato(user_id, retrato, agora + ttl)
+    return retrato
+
+
+async def obter_retrato_async(conexao, user_id, ttl):
+    """
+    Equivalente de obter_retrato para a API assíncrona, compartilhando o cache do processo.
+
+    Args:
+        conexao (AsyncConnection): Conexão do engine assíncrono
+        user_id (int): ID do usuário
+        ttl (int): Segundos até revalidar a versão (USER_CACHE_TTL)
+
+    Returns:
+        dict: Retrato do usuário, ou None se ele não existir
+    """
+    agora = time.monotonic()
+    entrada = _cache.get(user_id)
+
+    if entrada is not None:
+        retrato, validade = entrada
+        if agora < validade:
+            return retrato
+        versao = await conexao.scalar(consulta_versao(user_id))
+        if versao is not None and versao == retrato['versao']:
+            _guardar_retrato(user_id, retrato, agora + ttl)
+            return retrato
+
+    dados, condominios, papeis = consultas_retrato(user_id)
+    linha = (await conexao.execute(dados)).first()
+    retrato = None
+    if linha is not None:
+        retrato = compor_retrato(linha, await conexao.scalars(condominios), await conexao.scalars(papeis))
+    _guardar_retrato(user_id, retrato, agora + ttl)
+    return retrato
+
+
+def ler_identificador(identificador):
+    """
+    Separa o identificador do Flask-Login ('<id>:<versão da credencial>', ver User.get_id).
+
+    Args:
+        identificador (str): Identificador guardado na sessão ou no cookie "lembrar-me"
+
+    Returns:
+        tuple: ID do usuário e versão da credencial, ou (None, None) se o identificador for
+        inválido ou do formato antigo, só com o ID
+    """
+    try:
+        user_id, versao = str(identificador).split(':')
+        return int(user_id), int(versao)
+    except (TypeError, ValueError):
+        return None, None
+
+
+def usuario_valido(retrato, versao_credencial):
+    """Indica se o retrato é de um usuário ativo com a credencial do identificador."""
+    return retrato is not None and retrato['is_active'] and retrato['versao_credencial'] == versao_credencial
+
+
+def carregar_usuario(identificador):
+    """
+    user_loader do Flask-Login.
+    Também recebe o identificador de um cookie "lembrar-me"; depois de uma troca de senha,
+    o cookie emitido antes dela tem outra versão da credencial e é recusado.
+
+    Args:
+        identificador (str): Identificador guardado na sessão ou no cookie
+
+    Returns:
+        UsuarioSessao: Usuário da requisição, ou None se não existir, estiver inativo ou
+        a credencial tiver mudado
+    """
+    user_id, versao_credencial = ler_identificador(identificador)
+    if user_id is None:
+        return None
+    retrato = obter_retrato(user_id)
+    if not usuario_valido(retrato, versao_credencial):
+        return None
+    return UsuarioSessao(retrato)
+
+
+def invalidar_usuario(user_id):
+    """
+    Descarta o retrato do usuário e avança sua versão (users.versao_retrato), para que os demais
+    workers remontem o retrato ao revalidar. Deve ser chamada antes do commit da alteração.
+
+    Args:
+        user_id (int): ID do usuário
+    """
+    with _cache_lock:
+        _cache.pop(user_id, None)
+    db.session.execute(
+        update(User).where(User.id == user_id).values(versao_retrato=User.versao_retrato + 1)
+    )
+
+
+def invalidar_usuarios_papel(role_id):
+    """
+    Invalida os retratos dos usuários de um papel (ex.: permissões alteradas).
+    Deve ser chamada antes do commit da alteração.
+
+    Args:
+        role_id (int): ID do papel
+    """
+    user_ids = list(db.session.scalars(select(UserRole.user_id).where(UserRole.role_id == role_id)))
+    if not user_ids:
+        return
+    with _cache_lock:
+        for user_id in user_ids:
+            _cache.pop(user_id, None)
+    db.session.execute(
+        update(User).where(User.id.in_(user_ids)).values(versao_retrato=User.versao_retrato + 1)
+    )
+
+
+def limpar_cache():
+    """Esvazia o cache de usuários do processo."""
+    with _cache_lock:
+        _cache.clear()
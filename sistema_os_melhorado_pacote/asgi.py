@@ -0,0 +1,14 @@
+"""
+Ponto de entrada ASGI da API de leitura.
+Este arquivo expõe as rotas de leitura da API (app.api_async) para servidores ASGI, em paralelo
+aos workers WSGI do gunicorn, que continuam atendendo as páginas e as escritas:
+
+    uvicorn asgi:app --workers 2 --timeout-keep-alive 75
+"""
+from dotenv import load_dotenv
+from app.api_async import create_asgi_app
+
+# Carregar variáveis de ambiente do arquivo .env
+load_dotenv()
+
+app = create_asgi_app()
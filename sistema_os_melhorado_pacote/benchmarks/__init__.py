@@ -0,0 +1,6 @@
+"""
+Suíte de benchmarks do fluxo de ordens de serviço.
+Este pacote gera uma base sintética, mede os cenários principais (listagem, detalhe, dados do
+dashboard, estatísticas da API, criação e mudança de status) e compara o resultado com uma
+linha de base gravada. Uso: python -m benchmarks.run --help
+"""
@@ -0,0 +1,215 @@
+"""
+Cenários medidos pela suíte de benchmarks.
+Este módulo define as requisições de cada cenário, executadas pelo cliente de testes do Flask
+(sem rede nem servidor), e calcula as estatísticas de tempo. Também recria o esquema da base
+de benchmark, recusando bancos que não pareçam descartáveis.
+"""
+import statistics
+import sys
+import time
+from itertools import count
+
+from sqlalchemy.engine import make_url
+
+from app.extensions import db
+from app.utils.dados_sinteticos import SENHA_PADRAO
+
+# Status alternados pelo cenário de atualização, para que toda requisição mude o status
+STATUS_ALTERNADOS = ('Em Andamento', 'Aguardando Material')
+
+
+def base_descartavel(uri):
+    """
+    Indica se a base pode ser apagada sem --forcar.
+
+    Args:
+        uri (str): URI do banco (BENCH_DATABASE_URL ou o SQLite padrão)
+
+    Returns:
+        bool: True para SQLite ou para bancos com 'bench' no nome
+    """
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' or 'bench' in (url.database or '').lower()
+
+
+def recriar_esquema(app, forcar=False):
+    """
+    Apaga e recria as tabelas da base de benchmark.
+
+    Args:
+        app (Flask): Aplicação configurada com a base de benchmark
+        forcar (bool): Permite apagar um banco que não é SQLite nem tem 'bench' no nome
+
+    Raises:
+        SystemExit: Se a base não parecer descartável e forcar não for usado
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not (forcar or base_descartavel(uri)):
+        sys.exit(
+            f'Recusado: {make_url(uri).render_as_string(hide_password=True)} não é SQLite nem tem '
+            f"'bench' no nome, e todas as tabelas seriam apagadas. Use --forcar para recriá-lo."
+        )
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+class Contexto:
+    """
+    Estado compartilhado pelos cenários: clientes autenticados e IDs da base gerada.
+
+    Args:
+        app (Flask): Aplicação configurada com a base de benchmark
+        ids (dict): IDs retornados por app.utils.dados_sinteticos.gerar_dados
+    """
+
+    def __init__(self, app, ids):
+        self.app = app
+        self.ids = ids
+        self.condominio_id = ids['condominios'][0]
+        self.ordens_condominio = self._ordens_do_condominio()
+        self.admin = self._login('admin@exemplo.com' if ids['admin'] == 1 else f"admin{ids['admin']}@exemplo.com")
+        self.usuario = self._login(f"usuario{ids['usuarios'][self.condominio_id][0]}@exemplo.com")
+        self._sequencia = count()
+
+    def _login(self, email):
+        """Cria um cliente de testes autenticado."""
+        cliente = self.app.test_client()
+        resposta = cliente.post('/login', data={'email': email, 'password': SENHA_PADRAO})
+        if resposta.status_code != 302:
+            raise RuntimeError(f'Falha no login de {email} (HTTP {resposta.status_code})')
+        return cliente
+
+    def _ordens_do_condominio(self):
+        """IDs das ordens do primeiro condomínio, usados nos cenários de detalhe e status."""
+        from sqlalchemy import select
+        from app.extensions import db
+        from app.models import OrdemServico
+
+        with self.app.app_context():
+            ids = list(db.session.scalars(
+                select(OrdemServico.id).where(OrdemServico.condominio_id == self.condominio_id)
+                .order_by(OrdemServico.id).limit(200)
+            ))
+        if not ids:
+            raise RuntimeError('A base gerada não tem ordens no primeiro condomínio')
+        return ids
+
+    def proximo(self):
+        """Número sequencial da repetição, para variar IDs e status entre requisições."""
+        return next(self._sequencia)
+
+
+def listagem(ctx):
+    """Segunda página da listagem de ordens, como usuário de condomínio."""
+    return ctx.usuario.get('/ordens/?page=2')
+
+
+def listagem_filtrada(ctx):
+    """Listagem filtrada por status e condomínio, como administrador."""
+    return ctx.admin.get(f'/ordens/?status=Aberta&condominio_id={ctx.condominio_id}')
+
+
+def detalhe(ctx):
+    """Detalhe de ordens do condomínio do usuário, em rodízio."""
+    ordens = ctx.ordens_condominio
+    return ctx.usuario.get(f'/ordens/detalhe/{ordens[ctx.proximo() % len(ordens)]}')
+
+
+def dashboard_dados(ctx):
+    """Dados do dashboard (AJAX) do último ano, como administrador."""
+    return ctx.admin.get('/dashboard/data?periodo=ano')
+
+
+def api_estatisticas(ctx):
+    """Estatísticas da API, como administrador."""
+    return ctx.admin.get('/api/estatisticas')
+
+
+def criar_ordem(ctx):
+    """Criação de ordem pelo formulário, sem arquivos."""
+    return ctx.usuario.post('/ordens/nova', data={
+        'titulo': 'Ordem de benchmark',
+        'descricao': 'Criada pela suíte de benchmarks.',
+        'prioridade': 'Normal',
+        'tipo': 'Manutenção',
+        'condominio_id': ctx.condominio_id,
+        'area_id': 0,
+        'fornecedor_id': 0,
+    })
+
+
+def atualizar_status(ctx):
+    """Mudança de status, alternando entre STATUS_ALTERNADOS a cada volta pelas ordens."""
+    n = ctx.proximo()
+    ordens = ctx.ordens_condominio
+    return ctx.usuario.post(f'/ordens/atualizar-status/{ordens[n % len(ordens)]}', data={
+        'status': STATUS_ALTERNADOS[(n // len(ordens)) % 2],
+        'observacao': 'Benchmark',
+    })
+
+
+# Nome do cenário -> (função, status HTTP esperado)
+CENARIOS = {
+    'listagem': (listagem, 200),
+    'listagem_filtrada': (listagem_filtrada, 200),
+    'detalhe': (detalhe, 200),
+    'dashboard_dados': (dashboard_dados, 200),
+    'api_estatisticas': (api_estatisticas, 200),
+    'criar_ordem': (criar_ordem, 302),
+    'atualizar_status': (atualizar_status, 302),
+}
+
+
+def percentil(valores, p):
+    """
+    Percentil por interpolação linear.
+
+    Args:
+        valores (list): Valores ordenados
+        p (float): Percentil entre 0 e 100
+
+    Returns:
+        float: Valor do percentil
+    """
+    if len(valores) == 1:
+        return valores[0]
+    posicao = (len(valores) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores) - 1)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicao - inferior)
+
+
+def medir(ctx, nome, repeticoes=50, aquecimento=5):
+    """
+    Executa um cenário e mede o tempo de cada requisição.
+
+    Args:
+        ctx (Contexto): Contexto dos cenários
+        nome (str): Nome do cenário (chave de CENARIOS)
+        repeticoes (int): Quantidade de requisições medidas
+        aquecimento (int): Requisições descartadas antes da medição
+
+    Returns:
+        dict: Estatísticas em milissegundos (mediana, p95, média, mínimo, máximo) e repetições
+    """
+    funcao, esperado = CENARIOS[nome]
+    tempos = []
+    for i in range(aquecimento + repeticoes):
+        inicio = time.perf_counter()
+        resposta = funcao(ctx)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        if resposta.status_code != esperado:
+            raise RuntimeError(f'{nome}: HTTP {resposta.status_code} (esperado {esperado})')
+        if i >= aquecimento:
+            tempos.append(decorrido)
+
+    tempos.sort()
+    return {
+        'p50_ms': round(percentil(tempos, 50), 3),
+        'p95_ms': round(percentil(tempos, 95), 3),
+        'media_ms': round(statistics.fmean(tempos), 3),
+        'min_ms': round(tempos[0], 3),
+        'max_ms': round(tempos[-1], 3),
+        'repeticoes': repeticoes,
+    }
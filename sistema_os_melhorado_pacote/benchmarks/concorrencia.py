@@ -0,0 +1,241 @@
+"""
+Benchmark de concorrência da API de leitura: WSGI síncrono x ASGI assíncrono.
+Este módulo gera a base de benchmark, sobe o gunicorn (run:app, workers sync) e o uvicorn
+(asgi:app) com o mesmo número de processos e mede, com um cliente HTTP mínimo em asyncio:
+
+- carga: clientes simultâneos fazendo requisições seguidas à rota (vazão e latência);
+- ociosas: milhares de conexões abertas sem enviar requisição (clientes lentos, keep-alive)
+  e, com elas abertas, o tempo de requisições novas.
+
+Exemplo:
+    python -m benchmarks.concorrencia --workers 2 --ociosas 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.cenarios import percentil, recriar_esquema
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def preparar_base(ordens, forcar=False):
+    """
+    Recria a base de benchmark e autentica um usuário comum.
+
+    Args:
+        ordens (int): Quantidade de ordens geradas
+        forcar (bool): Permite recriar uma base que não é SQLite nem tem 'bench' no nome
+
+    Returns:
+        str: Cabeçalho Cookie da sessão, aceito pelos dois servidores (sessões em SQLite)
+    """
+    from app import create_app
+    from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+
+    app = create_app('benchmark')
+    recriar_esquema(app, forcar)
+    with app.app_context():
+        ids = gerar_dados(2, 10, ordens)
+
+    condominio = ids['condominios'][0]
+    cliente = app.test_client()
+    resposta = cliente.post('/login', data={
+        'email': f"usuario{ids['usuarios'][condominio][0]}@exemplo.com", 'password': SENHA_PADRAO,
+    })
+    if resposta.status_code != 302:
+        raise RuntimeError(f'Falha no login (HTTP {resposta.status_code})')
+    return '; '.join(f'{c.name}={c.value}' for c in cliente.cookie_jar)
+
+
+def comando_servidor(tipo, porta, workers):
+    """Linha de comando do servidor: 'wsgi' (gunicorn, workers sync) ou 'asgi' (uvicorn)."""
+    if tipo == 'wsgi':
+        return [sys.executable, '-m', 'gunicorn', 'run:app', '--bind', f'127.0.0.1:{porta}',
+                '--workers', str(workers), '--worker-class', 'sync', '--log-level', 'warning']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(porta), '--workers', str(workers),
+            '--log-level', 'warning', '--timeout-keep-alive', '75', '--backlog', '4096']
+
+
+async def requisitar(porta, caminho, cookie, conexao=None, timeout=10):
+    """
+    Envia um GET em HTTP/1.1 e lê a resposta completa.
+
+    Args:
+        conexao (tuple, optional): (reader, writer) de uma conexão mantida aberta
+
+    Returns:
+        tuple: Código HTTP e a conexão, se o servidor a manteve aberta (ou None)
+    """
+    if conexao is None:
+        conexao = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', porta), timeout)
+    leitor, escritor = conexao
+    escritor.write(
+        f'GET {caminho} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n\r\n'.encode('latin-1')
+    )
+    await escritor.drain()
+
+    cabecalho = await asyncio.wait_for(leitor.readuntil(b'\r\n\r\n'), timeout)
+    linhas = cabecalho.decode('latin-1').split('\r\n')
+    status = int(linhas[0].split()[1])
+    campos = {}
+    for linha in linhas[1:]:
+        if ':' in linha:
+            nome, valor = linha.split(':', 1)
+            campos[nome.strip().lower()] = valor.strip().lower()
+    await asyncio.wait_for(leitor.readexactly(int(campos.get('content-length', 0))), timeout)
+
+    if campos.get('connection') == 'close':
+        escritor.close()
+        return status, None
+    return status, conexao
+
+
+async def medir_carga(porta, caminho, cookie, clientes, requisicoes):
+    """
+    Clientes simultâneos, cada um com requisições seguidas (reaproveitando a conexão quando possível).
+
+    Returns:
+        dict: Vazão, latências e erros
+    """
+    latencias, erros = [], 0
+
+    async def cliente():
+        nonlocal erros
+        conexao = None
+        for _ in range(requisicoes):
+            inicio = time.perf_counter()
+            try:
+                status, conexao = await requisitar(porta, caminho, cookie, conexao)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                erros += 1
+                conexao = None
+                continue
+            if status != 200:
+                erros += 1
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        if conexao is not None:
+            conexao[1].close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(clientes)))
+    duracao = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        'requisicoes_s': round(len(latencias) / duracao, 1),
+        'p50_ms': round(percentil(latencias, 50), 2) if latencias else None,
+        'p95_ms': round(percentil(latencias, 95), 2) if latencias else None,
+        'erros': erros,
+    }
+
+
+async def medir_ociosas(porta, caminho, cookie, ociosas, amostras, timeout):
+    """
+    Abre conexões ociosas e mede requisições novas enquanto elas continuam abertas.
+
+    Returns:
+        dict: Conexões ociosas abertas, latências das requisições novas e falhas (timeout)
+    """
+    abertas = []
+    for _ in range(ociosas):
+        try:
+            abertas.append(await asyncio.wait_for(asyncio.open_connection('127.0.0.1', porta), timeout))
+        except (OSError, asyncio.TimeoutError):
+            break
+
+    latencias, falhas = [], 0
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        try:
+            status, conexao = await requisitar(porta, caminho, cookie, timeout=timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            falhas += 1
+            continue
+        if conexao is not None:
+            conexao[1].close()
+        if status != 200:
+            falhas += 1
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    for _, escritor in abertas:
+        escritor.close()
+    latencias.sort()
+    return {
+        'abertas': len(abertas),
+        'p50_ms': round(percentil(latencias, 50), 2) if latencias else None,
+        'max_ms': round(max(latencias), 2) if latencias else None,
+        'falhas': falhas,
+    }
+
+
+def aguardar_servidor(porta, processo, limite=30):
+    """Aguarda o servidor aceitar conexões."""
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if processo.poll() is not None:
+            raise RuntimeError(f'Servidor terminou com código {processo.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Servidor não respondeu na porta {porta}')
+
+
+def medir_servidor(tipo, porta, cookie, args):
+    """Sobe um servidor, executa as duas medições e o encerra."""
+    ambiente = {**os.environ, 'FLASK_ENV': 'benchmark'}
+    processo = subprocess.Popen(comando_servidor(tipo, porta, args.workers), cwd=RAIZ, env=ambiente)
+    try:
+        aguardar_servidor(porta, processo)
+        # Aquecimento: caches do usuário e planos de consulta em cada worker
+        asyncio.run(medir_carga(porta, args.rota, cookie, args.workers * 2, 5))
+        return {
+            'carga': asyncio.run(medir_carga(porta, args.rota, cookie, args.clientes, args.requisicoes)),
+            'ociosas': asyncio.run(medir_ociosas(porta, args.rota, cookie, args.ociosas, args.amostras, args.timeout)),
+        }
+    finally:
+        processo.terminate()
+        processo.wait(timeout=30)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concorrência da API de leitura: gunicorn sync x uvicorn')
+    parser.add_argument('--workers', type=int, default=2, help='Processos de cada servidor')
+    parser.add_argument('--ordens', type=int, default=2000)
+    parser.add_argument('--rota', default='/api/ordens')
+    parser.add_argument('--clientes', type=int, default=50, help='Clientes simultâneos na medição de carga')
+    parser.add_argument('--requisicoes', type=int, default=20, help='Requisições de cada cliente')
+    parser.add_argument('--ociosas', type=int, default=1000, help='Conexões ociosas abertas')
+    parser.add_argument('--amostras', type=int, default=10, help='Requisições novas com as ociosas abertas')
+    parser.add_argument('--timeout', type=float, default=5.0, help='Segundos até considerar uma requisição falha')
+    parser.add_argument('--porta', type=int, default=8100)
+    parser.add_argument('--forcar', action='store_true',
+                        help="Permite recriar uma BENCH_DATABASE_URL que não é SQLite nem tem 'bench' no nome")
+    args = parser.parse_args(argv)
+
+    # Cada conexão ociosa usa um descritor no cliente e outro no servidor
+    _, maximo = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (maximo, maximo))
+
+    cookie = preparar_base(args.ordens, args.forcar)
+    resultado = {'workers': args.workers, 'rota': args.rota}
+    for deslocamento, tipo in enumerate(('wsgi', 'asgi')):
+        resultado[tipo] = medir_servidor(tipo, args.porta + deslocamento, cookie, args)
+        carga, ociosas = resultado[tipo]['carga'], resultado[tipo]['ociosas']
+        print(f"{tipo}  {carga['requisicoes_s']:>8.1f} req/s   p50 {carga['p50_ms']} ms   p95 {carga['p95_ms']} ms   "
+              f"erros {carga['erros']}   |  {ociosas['abertas']} ociosas: p50 {ociosas['p50_ms']} ms, "
+              f"falhas {ociosas['falhas']}/{args.amostras}", file=sys.stderr)
+
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Perfil de carga para o Locust (pip install locust).
+Este módulo simula síndicos navegando e atualizando ordens contra um servidor em execução com a
+base gerada por `python -m benchmarks.run --somente-dados`. Exemplo:
+
+    FLASK_ENV=benchmark WEB_CONCURRENCY=4 gunicorn run:app
+    locust -f benchmarks/locustfile.py --host http://127.0.0.1:8000 -u 50 -r 5 -t 2m --headless
+
+O BenchmarkConfig desativa o CSRF, então os formulários são enviados sem token.
+"""
+import os
+import random
+
+from locust import HttpUser, between, task
+
+from app.utils.dados_sinteticos import SENHA_PADRAO
+
+# Usuários gerados: usuario{id}@exemplo.com, com IDs a partir de 2 (o 1 é o administrador)
+USUARIOS = int(os.environ.get('BENCH_USUARIOS') or 30)
+ORDENS = int(os.environ.get('BENCH_ORDENS') or 2000)
+
+
+class Sindico(HttpUser):
+    """Usuário de condomínio: lista, consulta e atualiza ordens."""
+
+    wait_time = between(1, 3)
+    weight = 5
+
+    def on_start(self):
+        self.client.post('/login', data={
+            'email': f'usuario{random.randint(2, USUARIOS + 1)}@exemplo.com',
+            'password': SENHA_PADRAO,
+        })
+
+    @task(6)
+    def listagem(self):
+        self.client.get(f'/ordens/?page={random.randint(1, 5)}', name='/ordens/')
+
+    @task(4)
+    def detalhe(self):
+        # Ordens de outros condomínios redirecionam para a listagem
+        self.client.get(f'/ordens/detalhe/{random.randint(1, ORDENS)}', name='/ordens/detalhe/[id]')
+
+    @task(2)
+    def painel(self):
+        self.client.get('/ordens/painel')
+
+    @task(1)
+    def atualizar_status(self):
+        self.client.post(
+            f'/ordens/atualizar-status/{random.randint(1, ORDENS)}',
+            data={'status': random.choice(('Em Andamento', 'Aguardando Material')), 'observacao': 'Carga'},
+            name='/ordens/atualizar-status/[id]',
+        )
+
+
+class Administrador(HttpUser):
+    """Administrador acompanhando o dashboard e a API de estatísticas."""
+
+    wait_time = between(2, 5)
+    weight = 1
+
+    def on_start(self):
+        self.client.post('/login', data={'email': 'admin@exemplo.com', 'password': SENHA_PADRAO})
+
+    @task(3)
+    def dashboard_dados(self):
+        self.client.get('/dashboard/data?periodo=mes', name='/dashboard/data')
+
+    @task(1)
+    def api_estatisticas(self):
+        self.client.get('/api/estatisticas')
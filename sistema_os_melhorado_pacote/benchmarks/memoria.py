@@ -0,0 +1,201 @@
+"""
+Benchmark de memória por worker.
+Este módulo simula os workers do gunicorn com os.fork (Linux), cada modo em um interpretador
+novo que faz o papel do mestre: sem preload, o mestre não importa a aplicação e cada filho cria
+a sua; com preload, o mestre cria a aplicação e executa preparar_prefork, e os filhos só executam
+apos_fork. Depois de atender algumas requisições, cada filho lê /proc/self/smaps_rollup e informa
+a memória privada (USS) e a proporcional (PSS). A memória adicional de cada worker é a USS.
+
+Exemplo:
+    python -m benchmarks.memoria --workers 4
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cenários executados por cada worker antes da medição (sem escrita, para não variar a base)
+CENARIOS_MEMORIA = ('listagem', 'detalhe', 'dashboard_dados', 'api_estatisticas')
+
+
+def memoria_processo():
+    """
+    Lê a memória do processo atual em /proc/self/smaps_rollup.
+
+    Returns:
+        dict: uss_kb (páginas privadas), pss_kb e rss_kb
+    """
+    campos = {}
+    with open('/proc/self/smaps_rollup', encoding='ascii') as arquivo:
+        for linha in arquivo:
+            partes = linha.split()
+            if len(partes) == 3 and partes[2] == 'kB':
+                campos[partes[0].rstrip(':')] = int(partes[1])
+    return {
+        'uss_kb': campos['Private_Clean'] + campos['Private_Dirty'],
+        'pss_kb': campos['Pss'],
+        'rss_kb': campos['Rss'],
+    }
+
+
+def executar_worker(app, ids, requisicoes):
+    """Atende as requisições dos cenários e retorna a memória do processo."""
+    from benchmarks.cenarios import CENARIOS, Contexto
+
+    ctx = Contexto(app, ids)
+    for _ in range(requisicoes):
+        for nome in CENARIOS_MEMORIA:
+            funcao, esperado = CENARIOS[nome]
+            resposta = funcao(ctx)
+            if resposta.status_code != esperado:
+                raise RuntimeError(f'{nome}: HTTP {resposta.status_code} (esperado {esperado})')
+    # Uma coleta completa, como as que um worker de longa duração acaba executando
+    gc.collect()
+    return memoria_processo()
+
+
+def medir_workers(workers, preload, ids, requisicoes):
+    """
+    Cria os workers por fork e coleta a memória de cada um enquanto todos estão vivos.
+
+    Returns:
+        list: Memória informada por cada worker
+    """
+    app = None
+    if preload:
+        from app import create_app
+        from app.utils.prefork import preparar_prefork
+        gc.disable()
+        app = create_app('benchmark')
+        preparar_prefork(app)
+
+    filhos = []
+    for _ in range(workers):
+        leitura, escrita = os.pipe()
+        liberar_leitura, liberar_escrita = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                os.close(leitura)
+                os.close(liberar_escrita)
+                if preload:
+                    from app.utils.prefork import apos_fork
+                    apos_fork(app)
+                    worker_app = app
+                else:
+                    # Sem preload, o mestre não importa a aplicação
+                    from app import create_app
+                    worker_app = create_app('benchmark')
+                resultado = executar_worker(worker_app, ids, requisicoes)
+                os.write(escrita, json.dumps(resultado).encode())
+                os.close(escrita)
+                # Aguarda o pai ler todos os workers, para que as páginas compartilhadas sejam contadas
+                os.read(liberar_leitura, 1)
+            except BaseException:
+                codigo = 1
+                import traceback
+                traceback.print_exc()
+            finally:
+                os._exit(codigo)
+        os.close(escrita)
+        os.close(liberar_leitura)
+        filhos.append((pid, leitura, liberar_escrita))
+
+    resultados = []
+    for pid, leitura, _ in filhos:
+        with os.fdopen(leitura, 'rb') as arquivo:
+            dados = arquivo.read()
+        if not dados:
+            raise RuntimeError(f'Worker {pid} terminou sem informar a memória')
+        resultados.append(json.loads(dados))
+    # Os irmãos herdam as pontas de escrita uns dos outros: a liberação é um byte, não o EOF
+    for pid, _, liberar_escrita in filhos:
+        os.write(liberar_escrita, b'1')
+        os.close(liberar_escrita)
+        os.waitpid(pid, 0)
+
+    return resultados
+
+
+def resumir(resultados):
+    """Mediana de cada métrica de memória dos workers, em MB."""
+    return {
+        chave.replace('_kb', '_mb'): round(statistics.median(r[chave] for r in resultados) / 1024, 1)
+        for chave in resultados[0]
+    }
+
+
+def gerar_base(ordens, forcar=False):
+    """Recria a base de benchmark e retorna os IDs gerados, em formato JSON."""
+    from app import create_app
+    from app.utils.dados_sinteticos import gerar_dados
+    from benchmarks.cenarios import recriar_esquema
+
+    app = create_app('benchmark')
+    recriar_esquema(app, forcar)
+    with app.app_context():
+        ids = gerar_dados(2, 10, ordens)
+    return {**ids, 'ordens': [ids['ordens'][0], ids['ordens'][-1]]}
+
+
+def executar_interno(args):
+    """Executa uma etapa no interpretador atual e escreve o resultado em JSON na saída padrão."""
+    if args.interno == 'dados':
+        print(json.dumps(gerar_base(args.ordens, args.forcar)))
+        return
+
+    ids = json.loads(args.ids)
+    ids['usuarios'] = {int(chave): valor for chave, valor in ids['usuarios'].items()}
+    ids['ordens'] = range(ids['ordens'][0], ids['ordens'][1] + 1)
+    print(json.dumps(medir_workers(args.workers, args.interno == 'preload', ids, args.requisicoes)))
+
+
+def _subprocesso(*argumentos):
+    """Executa este módulo em um interpretador novo e retorna o JSON produzido."""
+    processo = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.memoria', *map(str, argumentos)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip())
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memória por worker com e sem preload da aplicação')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--ordens', type=int, default=2000)
+    parser.add_argument('--requisicoes', type=int, default=5, help='Repetições dos cenários em cada worker')
+    parser.add_argument('--interno', choices=('dados', 'sem_preload', 'preload'), help=argparse.SUPPRESS)
+    parser.add_argument('--ids', help=argparse.SUPPRESS)
+    parser.add_argument('--forcar', action='store_true',
+                        help="Permite recriar uma BENCH_DATABASE_URL que não é SQLite nem tem 'bench' no nome")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print('O benchmark de memória requer Linux (/proc/self/smaps_rollup)', file=sys.stderr)
+        return 1
+    if args.interno:
+        executar_interno(args)
+        return 0
+
+    ids = _subprocesso('--interno', 'dados', '--ordens', args.ordens, *(['--forcar'] if args.forcar else []))
+    resultado = {'workers': args.workers}
+    for nome in ('sem_preload', 'preload'):
+        resultado[nome] = resumir(_subprocesso(
+            '--interno', nome, '--workers', args.workers, '--requisicoes', args.requisicoes, '--ids', json.dumps(ids)
+        ))
+        print(f"{nome:<12} USS {resultado[nome]['uss_mb']:>6.1f} MB   PSS {resultado[nome]['pss_mb']:>6.1f} MB   "
+              f"RSS {resultado[nome]['rss_mb']:>6.1f} MB (mediana por worker)", file=sys.stderr)
+
+    resultado['economia_uss_mb'] = round(resultado['sem_preload']['uss_mb'] - resultado['preload']['uss_mb'], 1)
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Execução da suíte de benchmarks.
+Este módulo gera a base sintética (SQLite local por padrão, ou BENCH_DATABASE_URL, ex.: MySQL),
+mede os cenários, grava o resultado em JSON e o compara com a linha de base. Sai com código 1
+se algum cenário ficar mais lento que a linha de base além da tolerância.
+
+Exemplo:
+    python -m benchmarks.run --ordens 5000 --saida data/benchmark.json
+    python -m benchmarks.run --salvar-baseline
+    python -m benchmarks.run --somente-dados --ordens 100000   # base para o locustfile.py
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from app import create_app
+from app.utils.dados_sinteticos import gerar_dados
+from benchmarks.cenarios import CENARIOS, Contexto, medir, recriar_esquema
+
+# Linha de base versionada junto com a suíte
+BASELINE_PADRAO = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def preparar_base(app, args):
+    """
+    Recria o esquema e gera os dados sintéticos.
+
+    Returns:
+        tuple: IDs gerados e segundos gastos na geração
+    """
+    recriar_esquema(app, args.forcar)
+    with app.app_context():
+        inicio = time.perf_counter()
+        ids = gerar_dados(args.administradoras, args.condominios, args.ordens, semente=args.semente)
+        return ids, time.perf_counter() - inicio
+
+
+def comparar(resultado, baseline, tolerancia):
+    """
+    Compara a mediana e o p95 de cada cenário com a linha de base.
+
+    Args:
+        resultado (dict): Resultado da execução atual
+        baseline (dict): Resultado gravado como linha de base
+        tolerancia (float): Aumento relativo aceito (0.25 = 25%)
+
+    Returns:
+        list: Descrições das regressões encontradas
+    """
+    regressoes = []
+    if baseline.get('escala') != resultado['escala']:
+        print('Aviso: a linha de base foi gerada com outra escala de dados', file=sys.stderr)
+
+    for nome, atual in resultado['cenarios'].items():
+        anterior = baseline.get('cenarios', {}).get(nome)
+        if anterior is None:
+            continue
+        for metrica in ('p50_ms', 'p95_ms'):
+            limite = anterior[metrica] * (1 + tolerancia)
+            if atual[metrica] > limite:
+                regressoes.append(
+                    f'{nome}.{metrica}: {atual[metrica]:.3f} ms > {limite:.3f} ms '
+                    f'(linha de base {anterior[metrica]:.3f} ms)'
+                )
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do fluxo de ordens de serviço')
+    parser.add_argument('--administradoras', type=int, default=2)
+    parser.add_argument('--condominios', type=int, default=10)
+    parser.add_argument('--ordens', type=int, default=2000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--aquecimento', type=int, default=5)
+    parser.add_argument('--cenario', action='append', choices=sorted(CENARIOS),
+                        help='Cenário a medir (pode repetir); padrão: todos')
+    parser.add_argument('--saida', help='Arquivo JSON do resultado (padrão: saída padrão)')
+    parser.add_argument('--baseline', default=BASELINE_PADRAO, help='Linha de base para comparação')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Aumento relativo aceito sobre a linha de base (padrão: 0.25)')
+    parser.add_argument('--salvar-baseline', action='store_true',
+                        help='Grava o resultado como nova linha de base em vez de comparar')
+    parser.add_argument('--somente-dados', action='store_true',
+                        help='Apenas gera a base (ex.: para o teste de carga com benchmarks/locustfile.py)')
+    parser.add_argument('--forcar', action='store_true',
+                        help="Permite recriar uma BENCH_DATABASE_URL que não é SQLite nem tem 'bench' no nome")
+    args = parser.parse_args(argv)
+
+    app = create_app('benchmark')
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):]) or '.', exist_ok=True)
+
+    ids, segundos_geracao = preparar_base(app, args)
+    if args.somente_dados:
+        print(f"{len(ids['ordens'])} ordens geradas em {segundos_geracao:.1f} s "
+              f"({app.config['SQLALCHEMY_DATABASE_URI']})", file=sys.stderr)
+        return 0
+    ctx = Contexto(app, ids)
+
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'banco': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        },
+        'escala': {
+            'administradoras': args.administradoras,
+            'condominios': args.condominios,
+            'ordens': args.ordens,
+            'semente': args.semente,
+        },
+        'geracao_s': round(segundos_geracao, 3),
+        'cenarios': {},
+    }
+    for nome in args.cenario or CENARIOS:
+        resultado['cenarios'][nome] = medir(ctx, nome, args.repeticoes, args.aquecimento)
+        print(f"{nome:<20} p50 {resultado['cenarios'][nome]['p50_ms']:>9.3f} ms   "
+              f"p95 {resultado['cenarios'][nome]['p95_ms']:>9.3f} ms", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto + '\n')
+        print(f'Linha de base gravada em {args.baseline}', file=sys.stderr)
+        return 0
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto + '\n')
+    else:
+        print(texto)
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as arquivo:
+        regressoes = comparar(resultado, json.load(arquivo), args.tolerancia)
+    for regressao in regressoes:
+        print(f'REGRESSÃO {regressao}', file=sys.stderr)
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Configuração do gunicorn.
+Este arquivo é lido automaticamente por `gunicorn run:app` executado neste diretório. Com
+preload_app (padrão), a aplicação é criada uma única vez no processo mestre e os workers são
+criados por fork, compartilhando as páginas de memória do código e dos caches aquecidos:
+
+    gunicorn run:app
+    GUNICORN_PRELOAD=false gunicorn run:app   # cada worker cria a própria aplicação
+
+O preload impede a recarga do código com SIGHUP: para atualizar a aplicação, reinicie o mestre.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:8000'
+workers = int(os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS') or 'sync'
+threads = int(os.environ.get('GUNICORN_THREADS') or 1)
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# O dimensionamento do pool de conexões (app.utils.pool) lê as mesmas variáveis
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_WORKER_CLASS'] = worker_class
+os.environ['GUNICORN_THREADS'] = str(threads)
+
+if preload_app:
+    # Sem coletas durante o preload: os objetos ficam contíguos e são congelados antes do fork
+    gc.disable()
+
+
+def when_ready(server):
+    """Executado no mestre depois do preload e antes do primeiro fork."""
+    if not server.cfg.preload_app:
+        return
+    from app.utils.prefork import preparar_prefork
+    preparar_prefork(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    """Executado em cada worker logo após o fork."""
+    if not server.cfg.preload_app:
+        return
+    from app.utils.prefork import apos_fork
+    apos_fork(worker.app.wsgi())
@@ -1,6 +1,9 @@
 """
 Script principal para execução da aplicação.
-Este arquivo é o ponto de entrada para iniciar o servidor Flask.
+Este arquivo é o ponto de entrada para iniciar o servidor Flask. Em produção, use
+`gunicorn run:app`: o gunicorn.conf.py deste diretório cria a aplicação uma vez no processo
+mestre (preload_app) e os hooks when_ready/post_fork preparam o fork dos workers
+(app.utils.prefork).
 """
 import os
 from app import create_app
@@ -0,0 +1,142 @@
+"""
+Testes unitários para a API de leitura assíncrona.
+Este arquivo contém testes para a autenticação pela sessão do Flask, o escopo por condomínio, o
+bootstrap versionado e a equivalência das respostas com as rotas síncronas.
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import orjson
+
+from app import db
+from app.api_async import create_asgi_app, url_assincrona
+from app.config import TestingConfig
+from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+
+
+class ApiAsyncTestCase(unittest.TestCase):
+    """Testes para app.api_async."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        # Banco em arquivo: as conexões síncronas e assíncronas precisam ver os mesmos dados
+        self.diretorio = tempfile.TemporaryDirectory()
+        uri = 'sqlite:///' + os.path.join(self.diretorio.name, 'teste.db')
+        with patch.object(TestingConfig, 'SQLALCHEMY_DATABASE_URI', uri):
+            self.asgi = create_asgi_app('testing')
+        self.app = self.asgi.app
+        with self.app.app_context():
+            db.create_all()
+            self.ids = gerar_dados(1, 3, 30)
+
+        self.condominio = self.ids['condominios'][0]
+        self.clientes = {
+            'admin': self._login('admin@exemplo.com'),
+            'usuario': self._login(f"usuario{self.ids['usuarios'][self.condominio][0]}@exemplo.com"),
+        }
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        asyncio.run(self.asgi.encerrar())
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.diretorio.cleanup()
+
+    def _login(self, email):
+        cliente = self.app.test_client()
+        resposta = cliente.post('/login', data={'email': email, 'password': SENHA_PADRAO})
+        self.assertEqual(resposta.status_code, 302)
+        return cliente
+
+    def _requisitar(self, usuario, caminho, query='', cabecalhos=None):
+        """Chama a aplicação ASGI diretamente e retorna o código HTTP e o JSON da resposta."""
+        cabecalhos = list(cabecalhos or ())
+        if usuario:
+            cookies = '; '.join(f'{c.name}={c.value}' for c in self.clientes[usuario].cookie_jar)
+            cabecalhos.append((b'cookie', cookies.encode()))
+        scope = {'type': 'http', 'method': 'GET', 'path': caminho,
+                 'query_string': query.encode(), 'headers': cabecalhos}
+        mensagens = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(mensagem):
+            mensagens.append(mensagem)
+
+        asyncio.run(self.asgi(scope, receive, send))
+        corpo = mensagens[1]['body']
+        return mensagens[0]['status'], orjson.loads(corpo) if corpo else None
+
+    def test_url_assincrona(self):
+        """Testa a troca do driver síncrono pelo assíncrono."""
+        self.assertEqual(url_assincrona('mysql+pymysql://u:s@h/os').drivername, 'mysql+aiomysql')
+        self.assertEqual(url_assincrona('sqlite:///data/app.db').drivername, 'sqlite+aiosqlite')
+        with self.assertRaises(ValueError):
+            url_assincrona('oracle://u:s@h/os')
+
+    def test_autenticacao_e_escopo(self):
+        """Testa o 401 sem sessão e a restrição das ordens aos condomínios do usuário."""
+        self.assertEqual(self._requisitar(None, '/api/ordens')[0], 401)
+        self.assertEqual(self._requisitar('usuario', '/api/inexistente')[0], 404)
+
+        status, dados = self._requisitar('usuario', '/api/ordens', 'fields=id,condominio_id&per_page=100')
+        self.assertEqual(status, 200)
+        self.assertTrue(dados['ordens'])
+        self.assertEqual({o['condominio_id'] for o in dados['ordens']}, {self.condominio})
+
+        status, dados = self._requisitar('admin', '/api/ordens', 'fields=id,condominio_id&per_page=100')
+        alheia = next(o['id'] for o in dados['ordens'] if o['condominio_id'] != self.condominio)
+        self.assertEqual(self._requisitar('usuario', f'/api/ordens/{alheia}')[0], 403)
+
+    def test_bootstrap_versionado(self):
+        """Testa o escopo do bootstrap e o 304 quando o cliente já tem a versão atual."""
+        resposta = self.clientes['usuario'].get('/api/bootstrap')
+        dados = resposta.get_json()
+        self.assertEqual([c['id'] for c in dados['condominios']], [self.condominio])
+        self.assertEqual(set(dados['areas']), {str(self.condominio)})
+        self.assertTrue(dados['ordens_abertas'])
+        self.assertEqual({o['condominio_id'] for o in dados['ordens_abertas']}, {self.condominio})
+        self.assertEqual(resposta.headers['ETag'], f'"{dados["versao"]}"')
+
+        cabecalho = {'If-None-Match': resposta.headers['ETag']}
+        self.assertEqual(self.clientes['usuario'].get('/api/bootstrap', headers=cabecalho).status_code, 304)
+        status, _ = self._requisitar('usuario', '/api/bootstrap', cabecalhos=[
+            (b'if-none-match', resposta.headers['ETag'].encode())
+        ])
+        self.assertEqual(status, 304)
+
+    def test_respostas_iguais_as_sincronas(self):
+        """Testa que as rotas assíncronas retornam o mesmo conteúdo das rotas síncronas."""
+        ordem = self.ids['ordens'][0]
+        for usuario in ('admin', 'usuario'):
+            for caminho, query in (
+                ('/api/ordens', 'page=1&per_page=5'),
+                (f'/api/ordens/{ordem}', 'fields=id,status,comentarios,logs'),
+                ('/api/condominios', ''),
+                ('/api/estatisticas', ''),
+                ('/api/bootstrap', ''),
+            ):
+                with self.subTest(usuario=usuario, caminho=caminho):
+                    sincrona = self.clientes[usuario].get(f'{caminho}?{query}')
+                    status, dados = self._requisitar(usuario, caminho, query)
+                    self.assertEqual(status, sincrona.status_code)
+                    self.assertEqual(dados, sincrona.get_json())
+
+    def test_parametros_invalidos(self):
+        """Testa o 400, igual nas duas APIs, para datas fora do formato AAAA-MM-DD e campos inexistentes."""
+        for query in ('data_inicial=2025-13-01', 'data_final=31/01/2025', 'fields=id,inexistente'):
+            with self.subTest(query=query):
+                sincrona = self.clientes['usuario'].get(f'/api/ordens?{query}')
+                status, dados = self._requisitar('usuario', '/api/ordens', query)
+                self.assertEqual((status, sincrona.status_code), (400, 400))
+                self.assertEqual(dados, sincrona.get_json())
+                self.assertTrue(dados['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Testes unitários para as colunas adiadas de OrdemServico.
+Este arquivo verifica que as listagens não carregam textos longos e caminhos de arquivos,
+e que a tela de detalhe os carrega em uma única consulta.
+"""
+import unittest
+from sqlalchemy import event
+from sqlalchemy.orm import undefer_group
+from app import create_app, db
+from app.models.user import User
+from app.models.condominio import Condominio, Administradora
+from app.models.ordem import OrdemServico, GRUPO_DETALHES
+
+COLUNAS_ADIADAS = ['descricao', 'observacoes', 'foto_inicial', 'foto_andamento', 'foto_final', 'cotacao']
+
+
+class ColunasAdiadasTestCase(unittest.TestCase):
+    """Testes para o carregamento sob demanda das colunas grandes."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        administradora = Administradora(nome='Administradora Teste')
+        condominio = Condominio(nome='Condomínio Teste', endereco='Rua Teste, 123', administradora=administradora)
+        user = User(name='Usuário Teste', email='teste@exemplo.com', password='Senha@123')
+        db.session.add_all([administradora, condominio, user])
+        db.session.commit()
+
+        ordem = OrdemServico(
+            titulo='Vazamento',
+            descricao='Vazamento na garagem',
+            observacoes='Verificar registro',
+            foto_inicial='foto.jpg',
+            prioridade='Alta',
+            condominio_id=condominio.id,
+            criador_id=user.id
+        )
+        db.session.add(ordem)
+        db.session.commit()
+        self.ordem_id = ordem.id
+        db.session.expunge_all()
+
+        self.consultas = []
+        event.listen(db.engine, 'before_cursor_execute', self._registrar)
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        event.remove(db.engine, 'before_cursor_execute', self._registrar)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        """Guarda o SQL das consultas executadas."""
+        self.consultas.append(statement)
+
+    def test_listagem_nao_carrega_colunas_adiadas(self):
+        """Testa que a consulta de listagem não seleciona as colunas grandes."""
+        ordens = OrdemServico.query.order_by(OrdemServico.data_criacao.desc()).all()
+
+        self.assertEqual(len(ordens), 1)
+        self.assertEqual(len(self.consultas), 1)
+        for coluna in COLUNAS_ADIADAS:
+            self.assertNotIn(f'ordens_servico.{coluna}', self.consultas[0])
+
+    def test_detalhe_carrega_colunas_adiadas(self):
+        """Testa que o detalhe carrega as colunas grandes na mesma consulta."""
+        ordem = OrdemServico.query.options(undefer_group(GRUPO_DETALHES)).get_or_404(self.ordem_id)
+
+        self.assertEqual(ordem.descricao, 'Vazamento na garagem')
+        self.assertEqual(ordem.foto_inicial, 'foto.jpg')
+        self.assertEqual(len(self.consultas), 1)
+        for coluna in COLUNAS_ADIADAS:
+            self.assertIn(f'ordens_servico.{coluna}', self.consultas[0])
+
+    def test_acesso_carrega_grupo_inteiro(self):
+        """Testa que acessar uma coluna adiada carrega todo o grupo de uma vez."""
+        ordem = db.session.get(OrdemServico, self.ordem_id)
+        self.consultas.clear()
+
+        self.assertEqual(ordem.observacoes, 'Verificar registro')
+        self.assertEqual(ordem.descricao, 'Vazamento na garagem')
+        self.assertEqual(len(self.consultas), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
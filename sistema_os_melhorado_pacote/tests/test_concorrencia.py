@@ -0,0 +1,173 @@
+"""
+Testes unitários para o controle de concorrência das ordens.
+Este arquivo contém testes para o conflito de versão na edição e na API e para a mudança de
+status com UPDATE condicional.
+"""
+import unittest
+from unittest.mock import patch
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app import create_app, db
+from app.models import OrdemServico, OrdemStatusLog
+from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+
+
+class ConcorrenciaTestCase(unittest.TestCase):
+    """Testes para a versão de OrdemServico."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        with self.app.app_context():
+            db.create_all()
+            ids = gerar_dados(1, 2, 10)
+            condominio = ids['condominios'][0]
+            ordem = OrdemServico.query.filter_by(condominio_id=condominio).first()
+            ordem.status = 'Aberta'
+            ordem.prioridade = 'Normal'
+            db.session.commit()
+            self.ordem = ordem.id
+
+        self.cliente = self.app.test_client()
+        resposta = self.cliente.post('/login', data={
+            'email': f"usuario{ids['usuarios'][condominio][0]}@exemplo.com", 'password': SENHA_PADRAO
+        })
+        self.assertEqual(resposta.status_code, 302)
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _alterar_em_paralelo(self, **valores):
+        """Simula a gravação de outro usuário, com a versão incrementada."""
+        with self.app.app_context():
+            ordem = db.session.get(OrdemServico, self.ordem)
+            for campo, valor in valores.items():
+                setattr(ordem, campo, valor)
+            db.session.commit()
+
+    def _antes_de(self, metodo, **valores):
+        """
+        Simula a gravação de outro usuário entre a leitura da ordem pela rota e o seu commit:
+        a alteração é confirmada em outra sessão logo antes do método chamado pela rota.
+        """
+        original = getattr(OrdemServico, metodo)
+
+        def interceptado(ordem, *args, **kwargs):
+            with Session(db.engine) as sessao:
+                outra = sessao.get(OrdemServico, ordem.id)
+                for campo, valor in valores.items():
+                    setattr(outra, campo, valor)
+                sessao.commit()
+            return original(ordem, *args, **kwargs)
+
+        return patch.object(OrdemServico, metodo, interceptado)
+
+    def test_status_condicional(self):
+        """Testa que a mudança de status não sobrescreve outra mudança feita depois da leitura."""
+        with self.app.app_context():
+            ordem = db.session.get(OrdemServico, self.ordem)
+            versao = ordem.versao
+            logs = OrdemStatusLog.query.filter_by(ordem_id=self.ordem).count()
+            # Mudança de outra transação: a ordem já carregada continua com o status lido
+            db.session.execute(
+                update(OrdemServico).where(OrdemServico.id == self.ordem).values(status='Cancelada')
+                .execution_options(synchronize_session=False)
+            )
+
+            self.assertFalse(ordem.atualizar_status_condicional('Em Andamento', 1))
+            self.assertEqual(ordem.status, 'Cancelada')
+            db.session.commit()
+            self.assertEqual(OrdemStatusLog.query.filter_by(ordem_id=self.ordem).count(), logs)
+
+            self.assertTrue(ordem.atualizar_status_condicional('Em Andamento', 1))
+            db.session.commit()
+            db.session.expire_all()
+            ordem = db.session.get(OrdemServico, self.ordem)
+            self.assertEqual((ordem.status, ordem.versao), ('Em Andamento', versao + 1))
+            self.assertEqual(OrdemStatusLog.query.filter_by(ordem_id=self.ordem).count(), logs + 1)
+
+    def test_edicao_com_versao_antiga(self):
+        """Testa o 409 com as diferenças na edição e o salvamento após a revisão."""
+        with self.app.app_context():
+            ordem = db.session.get(OrdemServico, self.ordem)
+            dados = {
+                'titulo': 'Título revisado', 'descricao': ordem.descricao, 'prioridade': 'Normal',
+                'tipo': ordem.tipo, 'status': 'Aberta', 'condominio_id': ordem.condominio_id,
+                'area_id': 0, 'fornecedor_id': 0, 'user_id': 0, 'observacoes': '', 'versao': ordem.versao,
+            }
+        self._alterar_em_paralelo(prioridade='Alta')
+
+        resposta = self.cliente.post(f'/ordens/editar/{self.ordem}', data=dados)
+        self.assertEqual(resposta.status_code, 409)
+        pagina = resposta.get_data(as_text=True)
+        self.assertIn('Campos alterados por outro usuário', pagina)
+        self.assertRegex(pagina, r'<td>Prioridade</td>\s*<td>Normal</td>\s*<td>Alta</td>')
+        with self.app.app_context():
+            self.assertNotEqual(db.session.get(OrdemServico, self.ordem).titulo, 'Título revisado')
+
+        dados['versao'] += 1
+        self.assertEqual(self.cliente.post(f'/ordens/editar/{self.ordem}', data=dados).status_code, 302)
+
+    def test_edicao_alterada_antes_do_commit(self):
+        """Testa o 409 quando a versão muda depois da verificação do formulário (StaleDataError no UPDATE)."""
+        with self.app.app_context():
+            ordem = db.session.get(OrdemServico, self.ordem)
+            versao = ordem.versao
+            dados = {
+                'titulo': 'Título revisado', 'descricao': ordem.descricao, 'prioridade': 'Normal',
+                'tipo': ordem.tipo, 'status': 'Em Andamento', 'condominio_id': ordem.condominio_id,
+                'area_id': 0, 'fornecedor_id': 0, 'user_id': 0, 'observacoes': '', 'versao': versao,
+            }
+            logs = OrdemStatusLog.query.filter_by(ordem_id=self.ordem).count()
+
+        # A versão enviada é a atual: a outra gravação acontece já dentro da rota
+        with self._antes_de('atualizar_status', prioridade='Alta'):
+            resposta = self.cliente.post(f'/ordens/editar/{self.ordem}', data=dados)
+        self.assertEqual(resposta.status_code, 409)
+        pagina = resposta.get_data(as_text=True)
+        self.assertRegex(pagina, r'<td>Prioridade</td>\s*<td>Normal</td>\s*<td>Alta</td>')
+        self.assertRegex(pagina, r'<td>Status</td>\s*<td>Em Andamento</td>\s*<td>Aberta</td>')
+        self.assertIn(f'name="versao" type="hidden" value="{versao + 1}"', pagina)
+        with self.app.app_context():
+            ordem = db.session.get(OrdemServico, self.ordem)
+            self.assertEqual((ordem.titulo != 'Título revisado', ordem.prioridade, ordem.versao), (True, 'Alta', versao + 1))
+            self.assertEqual(OrdemStatusLog.query.filter_by(ordem_id=self.ordem).count(), logs)
+
+    def test_rota_status_alterado_em_paralelo(self):
+        """Testa que a rota de status rejeita a mudança quando outro usuário alterou o status antes."""
+        with self.app.app_context():
+            versao = db.session.get(OrdemServico, self.ordem).versao
+            logs = OrdemStatusLog.query.filter_by(ordem_id=self.ordem).count()
+
+        with self._antes_de('atualizar_status_condicional', status='Cancelada'):
+            resposta = self.cliente.post(
+                f'/ordens/atualizar-status/{self.ordem}', data={'status': 'Concluída'}, follow_redirects=True
+            )
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('foi alterado por outro usuário para Cancelada', resposta.get_data(as_text=True))
+        with self.app.app_context():
+            ordem = db.session.get(OrdemServico, self.ordem)
+            self.assertEqual((ordem.status, ordem.versao), ('Cancelada', versao + 1))
+            self.assertEqual(OrdemStatusLog.query.filter_by(ordem_id=self.ordem).count(), logs)
+
+    def test_api_status_com_versao_antiga(self):
+        """Testa o 409 da API com a diferença campo a campo."""
+        with self.app.app_context():
+            versao = db.session.get(OrdemServico, self.ordem).versao
+        self._alterar_em_paralelo(status='Aguardando Material')
+
+        resposta = self.cliente.put(f'/api/ordens/{self.ordem}/status', json={'status': 'Concluída', 'versao': versao})
+        self.assertEqual(resposta.status_code, 409)
+        self.assertEqual(resposta.get_json()['diferencas'], [
+            {'campo': 'status', 'enviado': 'Concluída', 'atual': 'Aguardando Material'}
+        ])
+
+        resposta = self.cliente.put(f'/api/ordens/{self.ordem}/status', json={'status': 'Concluída', 'versao': versao + 1})
+        self.assertEqual((resposta.status_code, resposta.get_json()['versao']), (200, versao + 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
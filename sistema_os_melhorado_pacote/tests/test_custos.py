@@ -0,0 +1,147 @@
+"""
+Testes unitários para a análise de custos do dashboard.
+Este arquivo compara os totais calculados com NumPy aos de um GROUP BY no banco e testa
+os nomes dos agrupamentos e as ordens com variação fora do padrão.
+"""
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import case, func, select
+from app import create_app, db
+from app.models.user import User
+from app.models.condominio import Condominio, Administradora, Area, Fornecedor
+from app.models.ordem import OrdemServico
+from app.dashboard.custos import analisar_custos, carregar_custos, totais_por
+
+
+class CustosTestCase(unittest.TestCase):
+    """Testes para app.dashboard.custos."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        administradora = Administradora(nome='Administradora Teste')
+        self.sol = Condominio(nome='Residencial Sol', administradora=administradora)
+        self.mar = Condominio(nome='Residencial Mar', administradora=administradora)
+        self.piscina = Area(nome='Piscina', condominio=self.sol)
+        self.portaria = Area(nome='Portaria', condominio=self.mar)
+        self.eletrica = Fornecedor(nome='Elétrica Silva')
+        self.hidraulica = Fornecedor(nome='Hidráulica Souza')
+        self.user = User(name='Usuário Teste', email='teste@exemplo.com', password='Senha@123')
+        db.session.add_all([
+            administradora, self.sol, self.mar, self.piscina, self.portaria,
+            self.eletrica, self.hidraulica, self.user
+        ])
+        db.session.commit()
+
+        # (condomínio, área, fornecedor, mês, estimado, final)
+        ordens = [
+            (self.sol, self.piscina, self.eletrica, 1, '100.00', '110.00'),
+            (self.sol, self.piscina, self.hidraulica, 1, '200.00', '180.00'),
+            (self.sol, None, self.eletrica, 2, '150.50', None),
+            (self.sol, None, None, 2, None, '75.25'),
+            (self.mar, self.portaria, self.hidraulica, 2, '300.00', '310.00'),
+            (self.mar, self.portaria, None, 3, '80.00', '400.00'),
+            (self.mar, None, self.eletrica, 3, '120.00', '119.90'),
+            (self.mar, self.portaria, self.eletrica, 3, None, None),
+        ]
+        for condominio, area, fornecedor, mes, estimado, final in ordens:
+            db.session.add(OrdemServico(
+                titulo='Manutenção', descricao='Ordem de teste', prioridade='Normal',
+                condominio_id=condominio.id, area_id=area and area.id,
+                fornecedor_id=fornecedor and fornecedor.id, criador_id=self.user.id,
+                data_criacao=datetime(2025, mes, 10, 9, 0),
+                valor_estimado=estimado and Decimal(estimado), valor_final=final and Decimal(final)
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _totais_sql(self, coluna):
+        """Os mesmos totais de totais_por, calculados com GROUP BY."""
+        completas = OrdemServico.valor_estimado.isnot(None) & OrdemServico.valor_final.isnot(None)
+        linhas = db.session.execute(
+            select(
+                coluna,
+                func.count(OrdemServico.id),
+                func.coalesce(func.sum(OrdemServico.valor_estimado), 0),
+                func.coalesce(func.sum(OrdemServico.valor_final), 0),
+                func.sum(case((completas, OrdemServico.valor_estimado), else_=0)),
+                func.sum(case((completas, OrdemServico.valor_final), else_=0)),
+            ).where(
+                OrdemServico.valor_estimado.isnot(None) | OrdemServico.valor_final.isnot(None)
+            ).group_by(coluna).order_by(coluna)
+        ).all()
+        return [
+            {
+                'chave': chave,
+                'quantidade': quantidade,
+                'total_estimado': round(float(estimado), 2),
+                'total_final': round(float(final), 2),
+                'variacao_percentual': round(float((final_c - estimado_c) / estimado_c * 100), 1) if estimado_c else None
+            }
+            for chave, quantidade, estimado, final, estimado_c, final_c in linhas
+        ]
+
+    def test_totais_iguais_ao_group_by(self):
+        """Testa os totais por condomínio, área, fornecedor e mês contra a agregação no banco."""
+        custos = carregar_custos()
+        self.assertEqual(len(custos['id']), 7)
+
+        for agrupamento, coluna in (
+            ('condominio', OrdemServico.condominio_id),
+            ('area', OrdemServico.area_id),
+            ('fornecedor', OrdemServico.fornecedor_id),
+        ):
+            with self.subTest(agrupamento=agrupamento):
+                # Sem área ou fornecedor: chave None, que o banco ordena primeiro
+                self.assertEqual(totais_por(custos, agrupamento), self._totais_sql(coluna))
+
+        meses = self._totais_sql(OrdemServico.periodo_mes)
+        for item in meses:
+            item['chave'] = item['chave'].strftime('%Y-%m')
+        self.assertEqual(totais_por(custos, 'mes'), meses)
+
+    def test_nomes_dos_agrupamentos(self):
+        """Testa que condomínios, áreas e fornecedores vêm com o nome, e as chaves ausentes sem nome."""
+        totais = analisar_custos()['totais']
+
+        nomes = {agrupamento: [item['nome'] for item in itens] for agrupamento, itens in totais.items()
+                 if agrupamento != 'mes'}
+        self.assertEqual(nomes, {
+            'condominio': ['Residencial Sol', 'Residencial Mar'],
+            'area': [None, 'Piscina', 'Portaria'],
+            'fornecedor': [None, 'Elétrica Silva', 'Hidráulica Souza'],
+        })
+        self.assertNotIn('nome', totais['mes'][0])
+
+    def test_resumo_e_fora_do_padrao(self):
+        """Testa o resumo geral e a ordem com variação muito acima das demais."""
+        analise = analisar_custos(condominio_ids=[self.mar.id])
+
+        self.assertEqual(analise['resumo'], {
+            'ordens': 3, 'total_estimado': 500.0, 'total_final': 829.9, 'variacao_total': 329.9
+        })
+        fora = analisar_custos()['fora_do_padrao']['ordens']
+        self.assertEqual([(o['valor_estimado'], o['valor_final']) for o in fora], [(80.0, 400.0)])
+        self.assertEqual(fora[0]['variacao_percentual'], 400.0)
+
+    def test_sem_ordens(self):
+        """Testa a análise de um intervalo sem ordens."""
+        analise = analisar_custos(data_inicial=datetime(2030, 1, 1))
+
+        self.assertEqual(analise['resumo']['ordens'], 0)
+        self.assertEqual(analise['totais']['area'], [])
+        self.assertEqual(analise['fora_do_padrao']['ordens'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
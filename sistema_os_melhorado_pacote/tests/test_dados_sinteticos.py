@@ -0,0 +1,61 @@
+"""
+Testes unitários para o gerador de dados sintéticos.
+Este arquivo contém testes para a consistência das ordens geradas e a distribuição entre condomínios.
+"""
+import unittest
+from collections import Counter
+from sqlalchemy import select
+from app import create_app, db
+from app.models import OrdemServico, OrdemStatusLog, OrdemArquivo, ActivityLog
+from app.utils.dados_sinteticos import gerar_dados
+
+
+class DadosSinteticosTestCase(unittest.TestCase):
+    """Testes para app.utils.dados_sinteticos."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_ordens_consistentes_com_historico(self):
+        """Testa que as durações gravadas coincidem com as recalculadas a partir do histórico."""
+        ids = gerar_dados(1, 3, 200, lote=64)
+        ordens = OrdemServico.query.order_by(OrdemServico.id).all()
+
+        self.assertEqual([o.id for o in ordens], list(ids['ordens']))
+        self.assertEqual(len({o.numero for o in ordens}), 200)
+        for ordem in ordens:
+            logs = sorted(ordem.status_logs, key=lambda log: (log.data_mudanca, log.id))
+            self.assertEqual(logs[-1].status_novo, ordem.status)
+            duracoes = (ordem.tempo_ate_inicio, ordem.tempo_execucao, ordem.tempo_total)
+            ordem.recalcular_duracoes(logs)
+            self.assertEqual(duracoes, (ordem.tempo_ate_inicio, ordem.tempo_execucao, ordem.tempo_total))
+
+        mudancas = db.session.scalar(
+            select(db.func.count()).select_from(OrdemStatusLog).where(OrdemStatusLog.status_anterior != '')
+        )
+        atividades = Counter(db.session.scalars(select(ActivityLog.activity_type)))
+        self.assertEqual(atividades['create_ordem'], 200)
+        self.assertEqual(atividades['update_status_ordem'], mudancas)
+        self.assertGreater(OrdemArquivo.query.count(), 0)
+
+    def test_assimetria(self):
+        """Testa que a assimetria concentra as ordens nos primeiros condomínios."""
+        ids = gerar_dados(1, 10, 1000, assimetria=1.5, anexos=False, atividades=False)
+        por_condominio = Counter(db.session.scalars(select(OrdemServico.condominio_id)))
+
+        self.assertGreater(por_condominio[ids['condominios'][0]], 400)
+        self.assertLess(por_condominio[ids['condominios'][-1]], 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+"""
+Testes unitários para as durações do ciclo de vida das ordens.
+Este arquivo contém testes para o cálculo de durações a partir das mudanças de status, para o
+comando preencher-duracoes e para as consultas do dashboard sobre as durações gravadas.
+"""
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy import update
+from app import create_app, db
+from app.models.user import User
+from app.models.condominio import Condominio, Administradora
+from app.models.ordem import FORTALEZA_TZ, OrdemAlteracao, OrdemServico, OrdemStatusLog
+
+
+class DuracoesTestCase(unittest.TestCase):
+    """Testes para as durações pré-calculadas de OrdemServico."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.inicio = datetime(2025, 1, 6, 8, 0)
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        self.app_context.pop()
+
+    def _log(self, anterior, novo, horas):
+        """Cria um registro de mudança de status simplificado."""
+        return SimpleNamespace(
+            status_anterior=anterior,
+            status_novo=novo,
+            data_mudanca=self.inicio + timedelta(hours=horas)
+        )
+
+    def test_recalcular_duracoes(self):
+        """Testa o cálculo das durações a partir do histórico completo."""
+        ordem = OrdemServico(numero='OS-2025-0001', data_criacao=self.inicio, status='Concluída')
+        ordem.recalcular_duracoes([
+            self._log('', 'Aberta', 0),
+            self._log('Aberta', 'Aguardando Aprovação', 2),
+            self._log('Aguardando Aprovação', 'Em Andamento', 5),
+            self._log('Em Andamento', 'Aguardando Material', 24),
+            self._log('Aguardando Material', 'Em Andamento', 48),
+            self._log('Em Andamento', 'Concluída', 72)
+        ])
+
+        self.assertEqual(ordem.tempo_ate_inicio, 5 * 3600)
+        self.assertEqual(ordem.tempo_execucao, 67 * 3600)
+        self.assertEqual(ordem.tempo_total, 72 * 3600)
+        self.assertEqual(ordem.tempo_aguardando_aprovacao, 3 * 3600)
+        self.assertEqual(ordem.tempo_aguardando_material, 24 * 3600)
+
+    def test_ordem_em_aberto(self):
+        """Testa que ordens não concluídas não têm tempo total."""
+        ordem = OrdemServico(numero='OS-2025-0002', data_criacao=self.inicio, status='Aguardando Material')
+        ordem.recalcular_duracoes([
+            self._log('', 'Aberta', 0),
+            self._log('Aberta', 'Aguardando Material', 1)
+        ])
+
+        self.assertIsNone(ordem.tempo_total)
+        self.assertIsNone(ordem.tempo_ate_inicio)
+        self.assertEqual(ordem.tempo_aguardando_material, 0)
+
+
+class Relogio(datetime):
+    """datetime com o instante de datetime.now controlado pelo teste."""
+    agora = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.agora
+
+
+class DuracoesBancoTestCase(unittest.TestCase):
+    """Testes para as durações gravadas no banco e as consultas que as usam."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.inicio = datetime(2025, 1, 6, 8, 0, tzinfo=FORTALEZA_TZ)
+        # Sem contexto de aplicação ativo durante as requisições: o Flask-Login guarda o
+        # usuário em g, que seria compartilhado entre elas
+        with self.app.app_context():
+            db.create_all()
+            administradora = Administradora(nome='Administradora Teste')
+            condominio = Condominio(nome='Condomínio Teste', administradora=administradora)
+            admin = User(
+                name='Admin Teste', email='admin@exemplo.com', password='Admin@123',
+                is_active=True, is_pending=False, is_admin=True
+            )
+            tecnico = User(name='Técnico Teste', email='tecnico@exemplo.com', password='Senha@123')
+            db.session.add_all([administradora, condominio, admin, tecnico])
+            db.session.commit()
+            self.condominio_id, self.admin_id, self.tecnico_id = condominio.id, admin.id, tecnico.id
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _criar_ordem(self, tipo='Reparo', status='Aberta', **valores):
+        """Cria uma ordem do técnico de teste e retorna o ID."""
+        ordem = OrdemServico(
+            titulo='Manutenção', descricao='Ordem de teste', prioridade='Normal', tipo=tipo, status=status,
+            condominio_id=self.condominio_id, criador_id=self.admin_id, user_id=self.tecnico_id,
+            data_criacao=self.inicio, **valores
+        )
+        db.session.add(ordem)
+        db.session.commit()
+        return ordem.id
+
+    def _criar_concluidas(self):
+        """Ordens concluídas com durações conhecidas (em dias) e uma ordem em aberto."""
+        agora = datetime.now(FORTALEZA_TZ)
+        with self.app.app_context():
+            for tipo, total, execucao in [
+                ('Reparo', 1, 1), ('Reparo', 4, 5), ('Reparo', 2, 2), ('Reparo', 3, 3), ('Preventiva', 10, None)
+            ]:
+                self._criar_ordem(
+                    tipo, 'Concluída', data_conclusao=agora - timedelta(days=1), tempo_total=total * 86400,
+                    tempo_execucao=execucao and execucao * 86400
+                )
+            self._criar_ordem('Reparo', 'Em Andamento', tempo_ate_inicio=3600)
+
+    def _login_admin(self):
+        """Faz login com o usuário administrador."""
+        resposta = self.client.post('/login', data={'email': 'admin@exemplo.com', 'password': 'Admin@123'})
+        self.assertEqual(resposta.status_code, 302)
+
+    def test_atualizar_status(self):
+        """Testa as durações mantidas por atualizar_status, incluindo os status de espera."""
+        Relogio.agora = self.inicio
+        with self.app.app_context(), patch('app.models.ordem.datetime', Relogio):
+            ordem_id = self._criar_ordem()
+            for status, horas in [
+                ('Aguardando Aprovação', 2), ('Em Andamento', 5), ('Aguardando Material', 24),
+                ('Em Andamento', 48), ('Concluída', 72)
+            ]:
+                Relogio.agora = self.inicio + timedelta(hours=horas)
+                db.session.get(OrdemServico, ordem_id).atualizar_status(status, self.admin_id)
+                db.session.commit()
+                db.session.expire_all()
+
+            ordem = db.session.get(OrdemServico, ordem_id)
+            self.assertEqual(ordem.tempo_ate_inicio, 5 * 3600)
+            self.assertEqual(ordem.tempo_execucao, 67 * 3600)
+            self.assertEqual(ordem.tempo_total, 72 * 3600)
+            self.assertEqual(ordem.tempo_aguardando_aprovacao, 3 * 3600)
+            self.assertEqual(ordem.tempo_aguardando_material, 24 * 3600)
+
+    def test_preencher_duracoes(self):
+        """Testa o comando preencher-duracoes, que não altera a versão nem o log de alterações."""
+        with self.app.app_context():
+            ordem_id = self._criar_ordem(status='Concluída')
+            for anterior, novo, horas in [
+                ('', 'Aberta', 0), ('Aberta', 'Em Andamento', 5), ('Em Andamento', 'Aguardando Material', 24),
+                ('Aguardando Material', 'Em Andamento', 48), ('Em Andamento', 'Concluída', 72)
+            ]:
+                db.session.add(OrdemStatusLog(
+                    ordem_id=ordem_id, status_anterior=anterior, status_novo=novo, usuario_id=self.admin_id,
+                    data_mudanca=self.inicio + timedelta(hours=horas)
+                ))
+            db.session.commit()
+            versao = db.session.get(OrdemServico, ordem_id).versao
+            alteracoes = OrdemAlteracao.query.count()
+
+            resultado = self.app.test_cli_runner().invoke(args=['preencher-duracoes', '--lote', '1'])
+            self.assertEqual(resultado.exit_code, 0, resultado.output)
+
+            db.session.expire_all()
+            ordem = db.session.get(OrdemServico, ordem_id)
+            self.assertEqual(ordem.tempo_ate_inicio, 5 * 3600)
+            self.assertEqual(ordem.tempo_execucao, 67 * 3600)
+            self.assertEqual(ordem.tempo_total, 72 * 3600)
+            self.assertEqual(ordem.tempo_aguardando_material, 24 * 3600)
+            self.assertEqual(ordem.versao, versao)
+            self.assertEqual(OrdemAlteracao.query.count(), alteracoes)
+
+            # Rodar de novo sobre durações já preenchidas não muda nada
+            db.session.execute(update(OrdemServico).values(tempo_total=None))
+            db.session.commit()
+            self.assertEqual(self.app.test_cli_runner().invoke(args=['preencher-duracoes']).exit_code, 0)
+            db.session.expire_all()
+            ordem = db.session.get(OrdemServico, ordem_id)
+            self.assertEqual((ordem.tempo_total, ordem.versao), (72 * 3600, versao))
+
+    def test_percentis(self):
+        """Testa os percentis de conclusão calculados sobre as durações gravadas."""
+        self._criar_concluidas()
+        self._login_admin()
+
+        resposta = self.client.get('/dashboard/percentis?agrupamento=tipo')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(sorted(resposta.get_json(), key=lambda d: d['tipo']), [
+            {'tipo': 'Preventiva', 'total': 1, 'p50_dias': 10.0, 'p90_dias': 10.0,
+             'p50_execucao_dias': None, 'p90_execucao_dias': None},
+            {'tipo': 'Reparo', 'total': 4, 'p50_dias': 2.5, 'p90_dias': 3.7,
+             'p50_execucao_dias': 2.5, 'p90_execucao_dias': 4.4},
+        ])
+        self.assertEqual(self.client.get('/dashboard/percentis?agrupamento=cor').status_code, 400)
+
+    def test_tempo_medio_conclusao(self):
+        """Testa o tempo médio de conclusão do dashboard, calculado a partir de tempo_total."""
+        self._criar_concluidas()
+        self._login_admin()
+
+        resposta = self.client.get('/dashboard/data')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(sorted(resposta.get_json()['tempo_medio_conclusao'], key=lambda d: d['tipo']), [
+            {'tipo': 'Preventiva', 'dias': 10.0},
+            {'tipo': 'Reparo', 'dias': 2.5},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+Testes unitários para a importação em lote de cadastros.
+Este arquivo contém testes para a validação, deduplicação e inserção em lote, a
+importação de usuários e a normalização de documentos no cadastro de fornecedores.
+"""
+import io
+import unittest
+from sqlalchemy import select
+from app import create_app, db
+from app.models.user import User, UserCondominio
+from app.models.condominio import Administradora, Condominio, Area, Fornecedor
+from app.admin.importacao import ErroImportacao, Importador, importar_arquivo, relatorio_erros_csv
+
+
+class ImportacaoTestCase(unittest.TestCase):
+    """Testes para app.admin.importacao."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.administradora = Administradora(nome='Administradora Teste')
+        db.session.add(self.administradora)
+        db.session.add(Condominio(nome='Condomínio Existente', administradora=self.administradora))
+        db.session.add(Fornecedor(nome='Fornecedor Existente', cnpj_cpf='12.345.678/0001-90'))
+        db.session.commit()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _importar(self, conteudo, tipo, nome='dados.csv', **kwargs):
+        """Importa um CSV em memória."""
+        return importar_arquivo(io.BytesIO(conteudo.encode('utf-8')), nome, tipo, **kwargs)
+
+    def test_importar_condominios_e_areas(self):
+        """Testa a importação de condomínios e a resolução dos nomes nas áreas."""
+        resultado = self._importar(
+            'nome;cidade;estado\n'
+            'Residencial Sol;Fortaleza;ce\n'
+            'Condomínio Existente;Fortaleza;CE\n'
+            'Residencial Sol;Fortaleza;CE\n'
+            ';Fortaleza;CE\n',
+            'condominios', administradora_id=self.administradora.id
+        )
+
+        self.assertEqual(resultado['importados'], 1)
+        self.assertEqual(resultado['ignorados'], 2)
+        self.assertEqual([e['linha'] for e in resultado['erros']], [5])
+        self.assertEqual(Condominio.query.filter_by(nome='Residencial Sol').one().estado, 'CE')
+
+        resultado = self._importar(
+            'condominio,nome\nresidencial sol,Piscina\nInexistente,Salão\n',
+            'areas', administradora_id=self.administradora.id
+        )
+
+        self.assertEqual(resultado['importados'], 1)
+        self.assertEqual(Area.query.one().condominio.nome, 'Residencial Sol')
+        self.assertIn('Inexistente', relatorio_erros_csv(resultado))
+
+    def test_deduplicar_fornecedores_por_documento(self):
+        """Testa que o CNPJ é comparado apenas pelos dígitos."""
+        resultado = self._importar(
+            'nome,cnpj_cpf\nFornecedor A,12345678000190\nFornecedor B,11.111.111/0001-11\n',
+            'fornecedores'
+        )
+
+        self.assertEqual(resultado['importados'], 1)
+        self.assertEqual(resultado['ignorados'], 1)
+        self.assertEqual(Fornecedor.query.count(), 2)
+
+    def test_importar_usuarios(self):
+        """Testa hashes de senha, senhas aleatórias e a associação aos condomínios entre lotes."""
+        self.app.config['IMPORT_BATCH_SIZE'] = 2
+        outra = Administradora(nome='Outra Administradora')
+        db.session.add_all([
+            Condominio(nome='Residencial Sol', administradora=self.administradora),
+            Condominio(nome='Residencial Mar', administradora=self.administradora),
+            Condominio(nome='Residencial Mar', administradora=outra),
+        ])
+        db.session.commit()
+        condominios = {(c.nome, c.administradora_id): c.id for c in Condominio.query}
+
+        conteudo = (
+            'nome,email,senha,condominios\n'
+            'Ana,ANA@exemplo.com,Senha@123,Condomínio Existente;residencial sol\n'
+            'Bruno,bruno@exemplo.com,,Residencial Sol\n'
+            'Carla,carla@exemplo.com,curta,\n'
+            'Davi,davi@exemplo.com,,Residencial Mar\n'
+            'Ana Repetida,ana@exemplo.com,,\n'
+            'Eva,eva@exemplo.com,,\n'
+        )
+        resultado = self._importar(conteudo, 'usuarios')
+
+        self.assertEqual((resultado['importados'], resultado['ignorados']), (3, 1))
+        self.assertEqual([e['linha'] for e in resultado['erros']], [4, 5])
+        # Mesmo nome em duas administradoras: sem a administradora, a linha é recusada
+        self.assertIn('Mais de um condomínio com o nome: Residencial Mar', resultado['erros'][1]['erros'][0])
+
+        usuarios = {u.email: u for u in User.query}
+        self.assertEqual(sorted(usuarios), ['ana@exemplo.com', 'bruno@exemplo.com', 'eva@exemplo.com'])
+        self.assertTrue(usuarios['ana@exemplo.com'].check_password('Senha@123'))
+        # Sem senha no arquivo: hash de uma senha aleatória, diferente para cada usuário
+        self.assertNotEqual(usuarios['bruno@exemplo.com'].password, usuarios['eva@exemplo.com'].password)
+        self.assertFalse(usuarios['bruno@exemplo.com'].check_password(''))
+        self.assertTrue(all(u.is_active and not u.is_pending and not u.is_admin for u in usuarios.values()))
+
+        vinculos = set(db.session.execute(select(UserCondominio.user_id, UserCondominio.condominio_id)))
+        sol = condominios[('Residencial Sol', self.administradora.id)]
+        existente = condominios[('Condomínio Existente', self.administradora.id)]
+        self.assertEqual(vinculos, {
+            (usuarios['ana@exemplo.com'].id, existente),
+            (usuarios['ana@exemplo.com'].id, sol),
+            (usuarios['bruno@exemplo.com'].id, sol),
+        })
+
+        # Com a administradora selecionada, o nome é resolvido dentro dela
+        resultado = self._importar(
+            'nome,email,condominios\nDavi,davi@exemplo.com,Residencial Mar\n', 'usuarios', administradora_id=outra.id
+        )
+        self.assertEqual(resultado['importados'], 1)
+        davi = User.query.filter_by(email='davi@exemplo.com').one()
+        self.assertEqual(davi.condominio_ids, {condominios[('Residencial Mar', outra.id)]})
+
+    def test_codificacao_invalida(self):
+        """Testa que um CSV fora de UTF-8 é recusado antes de importar qualquer linha."""
+        conteudo = 'nome;cidade\nResidencial Sol;Fortaleza\nResidencial São José;Fortaleza\n'.encode('latin-1')
+
+        with self.assertRaises(ErroImportacao):
+            importar_arquivo(io.BytesIO(conteudo), 'dados.csv', 'condominios', self.administradora.id)
+        self.assertEqual(Condominio.query.count(), 1)
+
+    def test_lote_recusado_pelo_banco(self):
+        """Testa que um lote com conflito no banco vai para o relatório sem desfazer os demais."""
+        importador = Importador('fornecedores', lote=2)
+        # Cadastrado por outro usuário depois da carga dos documentos existentes
+        db.session.add(Fornecedor(nome='Concorrente', cnpj_cpf='33333333000133'))
+        db.session.commit()
+
+        linhas = [
+            (numero, {'nome': f'Fornecedor {numero}', 'cnpj_cpf': documento})
+            for numero, documento in enumerate(
+                ['11111111000111', '22222222000122', '33333333000133', '44444444000144', '55555555000155'],
+                start=2
+            )
+        ]
+        resultado = importador.processar(linhas)
+
+        self.assertEqual((resultado['importados'], resultado['nao_importados']), (3, 2))
+        self.assertEqual([e['linha'] for e in resultado['erros']], ['4-5'])
+        self.assertEqual(
+            sorted(db.session.scalars(select(Fornecedor.nome))),
+            ['Concorrente', 'Fornecedor 2', 'Fornecedor 3', 'Fornecedor 6', 'Fornecedor Existente']
+        )
+
+
+class FornecedorDocumentoTestCase(unittest.TestCase):
+    """Testes para o CNPJ/CPF gravado pelo formulário de fornecedores."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(
+                name='Admin', email='admin@exemplo.com', password='Senha@123', is_admin=True, is_pending=False
+            ))
+            db.session.commit()
+
+        self.cliente = self.app.test_client()
+        self.cliente.post('/login', data={'email': 'admin@exemplo.com', 'password': 'Senha@123'})
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_documento_normalizado_como_na_importacao(self):
+        """Testa que o formulário grava só os dígitos, e a importação reconhece o documento."""
+        resposta = self.cliente.post('/admin/fornecedores/new', data={
+            'nome': 'Elétrica Silva', 'cnpj_cpf': '11.222.333/0001-44'
+        })
+        self.assertEqual(resposta.status_code, 302)
+        self.cliente.post('/admin/fornecedores/new', data={'nome': 'Sem Documento'})
+
+        with self.app.app_context():
+            documentos = dict(db.session.execute(select(Fornecedor.nome, Fornecedor.cnpj_cpf)).all())
+            self.assertEqual(documentos, {'Elétrica Silva': '11222333000144', 'Sem Documento': None})
+
+            resultado = importar_arquivo(
+                io.BytesIO('nome,cnpj_cpf\nSilva,11222333000144\n'.encode('utf-8')), 'dados.csv', 'fornecedores'
+            )
+            self.assertEqual((resultado['importados'], resultado['ignorados']), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Testes unitários para a inicialização da aplicação.
+Este arquivo contém testes para a seleção de blueprints e as importações adiadas de create_app.
+"""
+import unittest
+from flask import Flask
+from app import register_blueprints
+from app.utils.perfil_inicializacao import interpretar_importtime, medir_inicializacao
+
+
+class InicializacaoTestCase(unittest.TestCase):
+    """Testes para create_app e app.utils.perfil_inicializacao."""
+
+    def test_blueprints_habilitados(self):
+        """Testa que só os blueprints configurados são registrados."""
+        app = Flask('teste')
+        app.config['BLUEPRINTS_HABILITADOS'] = ('api',)
+        register_blueprints(app)
+        self.assertEqual(set(app.blueprints), {'api'})
+
+        app = Flask('teste')
+        app.config['BLUEPRINTS_HABILITADOS'] = ('api', 'relatorios')
+        with self.assertRaises(ValueError):
+            register_blueprints(app)
+
+    def test_interpretar_importtime(self):
+        """Testa a leitura da saída de -X importtime."""
+        texto = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   app.config\n'
+            'import time:       300 |        420 | app\n'
+        )
+        self.assertEqual(interpretar_importtime(texto), [('app.config', 120, 120, 1), ('app', 300, 420, 0)])
+
+    def test_importacoes_adiadas(self):
+        """Testa que um worker só de API não importa NumPy, Alembic nem os blueprints HTML."""
+        perfil = medir_inicializacao('testing', blueprints='api')
+        modulos = {nome for nome, _, _, _ in perfil['modulos']}
+
+        self.assertIn('app.api.routes', modulos)
+        for modulo in ('numpy', 'flask_migrate', 'alembic', 'app.auth', 'app.admin', 'app.dashboard', 'app.ordens'):
+            self.assertNotIn(modulo, modulos)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Testes unitários para o cache das opções dos campos de seleção.
+Este arquivo contém testes para a invalidação por commit e o ETag das rotas AJAX.
+"""
+import unittest
+from sqlalchemy import insert
+from app import create_app, db
+from app.models import User, UserCondominio
+from app.models.condominio import Administradora, Condominio, Area, Fornecedor
+from app.utils.opcoes import opcoes, opcoes_com_etag
+
+
+class OpcoesTestCase(unittest.TestCase):
+    """Testes para app.utils.opcoes."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.condominio = Condominio(nome='Condomínio Teste', administradora=Administradora(nome='Adm'))
+        self.user = User(name='Usuário Teste', email='usuario@teste.com', password='senha12345',
+                         is_pending=False)
+        db.session.add_all([self.condominio, self.user, Area(nome='Piscina', condominio=self.condominio)])
+        db.session.flush()
+        db.session.add(UserCondominio(user_id=self.user.id, condominio_id=self.condominio.id))
+        db.session.commit()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_invalidacao_apos_commit(self):
+        """Testa que a lista só muda após o commit, inclusive para inserções em lote."""
+        self.assertEqual(opcoes('fornecedores', vazio='Selecione...'), [(0, 'Selecione...')])
+
+        db.session.add(Fornecedor(nome='Fornecedor A'))
+        db.session.flush()
+        self.assertEqual(opcoes('fornecedores'), [])
+        db.session.commit()
+        self.assertEqual([nome for _, nome in opcoes('fornecedores')], ['Fornecedor A'])
+
+        db.session.execute(insert(Area), [{'condominio_id': self.condominio.id, 'nome': 'Academia'}])
+        db.session.commit()
+        self.assertEqual([nome for _, nome in opcoes('areas', self.condominio.id)], ['Academia', 'Piscina'])
+
+    def test_etag_nas_rotas_ajax(self):
+        """Testa que a rota de áreas responde 304 quando o cliente já tem a lista atual."""
+        client = self.app.test_client()
+        with client.session_transaction() as sessao:
+            sessao['_user_id'] = self.user.get_id()
+
+        url = f'/ordens/areas-por-condominio/{self.condominio.id}'
+        resposta = client.get(url)
+        self.assertEqual(resposta.get_json()[0]['nome'], 'Piscina')
+        self.assertEqual(resposta.headers['ETag'], f'"{opcoes_com_etag("areas", self.condominio.id)[1]}"')
+
+        resposta = client.get(url, headers={'If-None-Match': resposta.headers['ETag']})
+        self.assertEqual(resposta.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Testes de orçamento de consultas por rota.
+Este arquivo verifica, para cada rota de ordens, api, dashboard e admin, o número máximo de
+instruções SQL e de linhas lidas por requisição, para detectar N+1 e consultas extras.
+"""
+import unittest
+from app import create_app, db
+from app.models import OrdemServico
+from app.utils.contador_consultas import ContadorConsultas
+from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+
+# Endpoint -> (usuário, método, URL, máximo de instruções, máximo de linhas lidas, dados)
+# Medidos com o cache do usuário e das opções aquecidos (segunda requisição) sobre a base de
+# setUp. Ao alterar uma rota, ajuste o orçamento só se o aumento for intencional.
+# Os dados vão como formulário, ou como JSON nas rotas /api/; um valor só com o marcador
+# (ex.: '{ordem}') é enviado como o próprio ID.
+ORCAMENTOS = {
+    'ordens.painel': ('usuario', 'GET', '/ordens/painel', 6, 15, None),
+    'ordens.listar': ('usuario', 'GET', '/ordens/', 2, 15, None),
+    'ordens.detalhe': ('usuario', 'GET', '/ordens/detalhe/{ordem}', 3, 15, None),
+    'ordens.editar': ('usuario', 'GET', '/ordens/editar/{ordem}', 2, 5, None),
+    'ordens.nova': ('usuario', 'POST', '/ordens/nova', 5, 5, {
+        'titulo': 'Ordem de teste', 'descricao': 'Descrição', 'prioridade': 'Normal', 'tipo': 'Manutenção',
+        'condominio_id': '{condominio}', 'area_id': 0, 'fornecedor_id': 0,
+    }),
+    'ordens.atualizar_status': ('usuario', 'POST', '/ordens/atualizar-status/{ordem}', 9, 5,
+                                {'status': 'Aguardando Material'}),
+    'ordens.areas_por_condominio': ('usuario', 'GET', '/ordens/areas-por-condominio/{condominio}', 0, 0, None),
+    'ordens.usuarios_por_condominio': ('usuario', 'GET', '/ordens/usuarios-por-condominio/{condominio}', 0, 0, None),
+    'api.get_ordens': ('usuario', 'GET', '/api/ordens', 2, 15, None),
+    'api.get_ordem': ('usuario', 'GET', '/api/ordens/{ordem}', 4, 15, None),
+    'api.get_condominios': ('usuario', 'GET', '/api/condominios', 1, 5, None),
+    'api.get_areas': ('usuario', 'GET', '/api/areas/{condominio}', 1, 5, None),
+    'api.get_fornecedores': ('usuario', 'GET', '/api/fornecedores', 1, 20, None),
+    'api.get_bootstrap': ('usuario', 'GET', '/api/bootstrap', 4, 40, None),
+    'api.get_estatisticas': ('admin', 'GET', '/api/estatisticas', 1, 1, None),
+    'api.sync_pull': ('usuario', 'GET', '/api/sync?token=0', 2, 1, None),
+    'api.create_ordem': ('usuario', 'POST', '/api/ordens', 7, 6, {
+        'titulo': 'Ordem de teste', 'descricao': 'Descrição', 'prioridade': 'Normal', 'condominio_id': '{condominio}',
+    }),
+    'api.update_ordem_status': ('usuario', 'PUT', '/api/ordens/{ordem}/status', 6, 3, {'status': 'Em Andamento'}),
+    'api.add_comentario': ('usuario', 'POST', '/api/ordens/{ordem}/comentarios', 4, 2, {'texto': 'Comentário'}),
+    'api.sync_push': ('usuario', 'POST', '/api/sync', 8, 1, {'operacoes': [
+        {'id': 'op-1', 'tipo': 'status', 'ordem_id': '{ordem_sync}', 'versao': '{versao_sync}', 'status': 'Em Andamento'},
+        {'id': 'op-2', 'tipo': 'comentario', 'ordem_id': '{ordem_sync}', 'texto': 'Comentário sem conexão'},
+    ]}),
+    'dashboard.dashboard_data': ('admin', 'GET', '/dashboard/data?periodo=ano', 5, 40, None),
+    'dashboard.percentis': ('usuario', 'GET', '/dashboard/percentis', 1, 25, None),
+    'dashboard.custos': ('usuario', 'GET', '/dashboard/custos', 2, 50, None),
+    'dashboard.relatorios': ('usuario', 'GET', '/dashboard/relatorios', 0, 0, None),
+    'admin.importar': ('admin', 'GET', '/admin/importar', 1, 0, None),
+    'admin.slow_queries': ('admin', 'GET', '/admin/consultas-lentas', 0, 0, None),
+    'admin.pool_metrics': ('admin', 'GET', '/admin/metricas/pool', 0, 0, None),
+    'admin.password_hash_metrics': ('admin', 'GET', '/admin/metricas/senhas', 0, 0, None),
+}
+
+# Rotas sem orçamento: exclusões por GET (alteram a base do teste) e páginas ainda sem template
+SEM_ORCAMENTO = {
+    'ordens.excluir', 'ordens.concluidas', 'dashboard.index',
+    'admin.dashboard', 'admin.activity_logs', 'admin.relatorios', 'admin.approve_user', 'admin.clear_slow_queries',
+    'admin.users', 'admin.create_user', 'admin.edit_user', 'admin.delete_user',
+    'admin.roles', 'admin.create_role', 'admin.edit_role', 'admin.delete_role',
+    'admin.administradoras', 'admin.create_administradora', 'admin.edit_administradora', 'admin.delete_administradora',
+    'admin.condominios', 'admin.create_condominio', 'admin.edit_condominio', 'admin.delete_condominio',
+    'admin.areas', 'admin.create_area', 'admin.edit_area', 'admin.delete_area',
+    'admin.fornecedores', 'admin.create_fornecedor', 'admin.edit_fornecedor', 'admin.delete_fornecedor',
+}
+
+BLUEPRINTS = ('ordens', 'api', 'dashboard', 'admin')
+
+
+class OrcamentoConsultasTestCase(unittest.TestCase):
+    """Orçamento de instruções SQL e linhas lidas por rota."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        # Sem contexto de aplicação ativo durante as requisições: o Flask-Login guarda o
+        # usuário em g, que seria compartilhado entre os clientes
+        with self.app.app_context():
+            db.create_all()
+            ids = gerar_dados(1, 3, 60)
+            self.engines = list(db.engines.values())
+
+            # Outra ordem do condomínio do usuário, aberta, para o lote de sincronização
+            condominio = ids['condominios'][0]
+            ordem_sync = OrdemServico.query.filter(
+                OrdemServico.condominio_id == condominio, OrdemServico.id != ids['ordens'][0]
+            ).order_by(OrdemServico.id).first()
+            ordem_sync.status = 'Aberta'
+            db.session.commit()
+            self.parametros = {
+                'condominio': condominio, 'ordem': ids['ordens'][0],
+                'ordem_sync': ordem_sync.id, 'versao_sync': ordem_sync.versao,
+            }
+
+        self.clientes = {
+            'admin': self._login('admin@exemplo.com'),
+            'usuario': self._login(f"usuario{ids['usuarios'][condominio][0]}@exemplo.com"),
+        }
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _login(self, email):
+        cliente = self.app.test_client()
+        resposta = cliente.post('/login', data={'email': email, 'password': SENHA_PADRAO})
+        self.assertEqual(resposta.status_code, 302)
+        return cliente
+
+    def _formatar(self, valor):
+        """Preenche os marcadores de self.parametros nos dados, inclusive em listas e dicionários."""
+        if isinstance(valor, dict):
+            return {chave: self._formatar(item) for chave, item in valor.items()}
+        if isinstance(valor, list):
+            return [self._formatar(item) for item in valor]
+        if isinstance(valor, str) and valor.startswith('{') and valor[1:-1] in self.parametros:
+            return self.parametros[valor[1:-1]]
+        return valor.format(**self.parametros) if isinstance(valor, str) else valor
+
+    def _requisitar(self, usuario, metodo, url, dados):
+        dados = self._formatar(dados or {})
+        url = url.format(**self.parametros)
+        if url.startswith('/api/') and metodo != 'GET':
+            return self.clientes[usuario].open(url, method=metodo, json=dados)
+        dados = {chave: str(valor) for chave, valor in dados.items()}
+        return self.clientes[usuario].open(url, method=metodo, data=dados)
+
+    def test_rotas_com_orcamento(self):
+        """Testa que toda rota dos blueprints tem orçamento ou está explicitamente excluída."""
+        endpoints = {
+            regra.endpoint for regra in self.app.url_map.iter_rules()
+            if regra.endpoint.split('.')[0] in BLUEPRINTS
+        }
+        self.assertEqual(endpoints - set(ORCAMENTOS) - SEM_ORCAMENTO, set())
+        self.assertEqual((set(ORCAMENTOS) | SEM_ORCAMENTO) - endpoints, set())
+
+    def test_orcamentos(self):
+        """Testa o número de instruções e de linhas lidas de cada rota."""
+        for endpoint, (usuario, metodo, url, max_instrucoes, max_linhas, dados) in ORCAMENTOS.items():
+            with self.subTest(endpoint=endpoint):
+                # Aquecimento dos caches do usuário e das opções (só em GET: repetir um POST alteraria os dados)
+                if metodo == 'GET':
+                    self._requisitar(usuario, metodo, url, dados)
+
+                with ContadorConsultas(*self.engines) as contador:
+                    resposta = self._requisitar(usuario, metodo, url, dados)
+
+                self.assertLess(resposta.status_code, 400)
+                self.assertLessEqual(
+                    contador.total, max_instrucoes,
+                    f'{endpoint}: {contador.total} instruções (máximo {max_instrucoes})\n'
+                    f'{contador.relatorio()}\nRepetidas: {contador.repetidas()}'
+                )
+                self.assertLessEqual(
+                    contador.linhas, max_linhas,
+                    f'{endpoint}: {contador.linhas} linhas lidas (máximo {max_linhas})\n{contador.relatorio()}'
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
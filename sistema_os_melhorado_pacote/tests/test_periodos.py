@@ -0,0 +1,103 @@
+"""
+Testes unitários para os agrupamentos de período das ordens.
+Este arquivo contém testes para o cálculo dos períodos no fuso de Fortaleza, a atualização
+das colunas de período pelos eventos do mapper e o comando preencher-periodos.
+"""
+import unittest
+from datetime import date, datetime, timezone
+from sqlalchemy import update
+from app import create_app, db
+from app.models.user import User
+from app.models.condominio import Condominio, Administradora
+from app.models.ordem import OrdemServico
+from app.utils.periodos import calcular_periodos, formatar_periodo
+
+
+class PeriodosTestCase(unittest.TestCase):
+    """Testes para app.utils.periodos e as colunas periodo_* de OrdemServico."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        administradora = Administradora(nome='Administradora Teste')
+        self.condominio = Condominio(nome='Condomínio Teste', administradora=administradora)
+        self.user = User(name='Usuário Teste', email='teste@exemplo.com', password='Senha@123')
+        db.session.add_all([administradora, self.condominio, self.user])
+        db.session.commit()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _criar_ordem(self, data_criacao):
+        """Cria uma ordem com a data de criação informada."""
+        ordem = OrdemServico(
+            titulo='Vazamento', descricao='Vazamento na garagem', prioridade='Alta',
+            condominio_id=self.condominio.id, criador_id=self.user.id, data_criacao=data_criacao
+        )
+        db.session.add(ordem)
+        db.session.commit()
+        return ordem
+
+    def test_calcular_periodos_no_fuso_de_fortaleza(self):
+        """Testa que uma data em UTC é agrupada pelo dia local, com a semana iniciando na segunda."""
+        periodos = calcular_periodos(datetime(2025, 1, 6, 2, 0, tzinfo=timezone.utc))
+
+        self.assertEqual(periodos, {
+            'dia': date(2025, 1, 5),
+            'semana': date(2024, 12, 30),
+            'mes': date(2025, 1, 1),
+            'ano': 2025
+        })
+        self.assertEqual(calcular_periodos(datetime(2025, 1, 6, 2, 0))['dia'], date(2025, 1, 6))
+
+    def test_formatar_periodo(self):
+        """Testa a formatação dos valores retornados pelos diferentes bancos."""
+        self.assertEqual(formatar_periodo(date(2025, 3, 1), 'mes'), '2025-03')
+        self.assertEqual(formatar_periodo('2025-03-10 00:00:00', 'semana'), '2025-03-10')
+        self.assertEqual(formatar_periodo(2025, 'ano'), '2025')
+
+    def test_colunas_atualizadas_pelos_eventos(self):
+        """Testa o preenchimento na inclusão e o recálculo quando data_criacao muda."""
+        ordem = self._criar_ordem(datetime(2025, 2, 28, 22, 0))
+        self.assertEqual(
+            (ordem.periodo_dia, ordem.periodo_semana, ordem.periodo_mes, ordem.periodo_ano),
+            (date(2025, 2, 28), date(2025, 2, 24), date(2025, 2, 1), 2025)
+        )
+
+        ordem.data_criacao = datetime(2026, 1, 1, 9, 0)
+        db.session.commit()
+        self.assertEqual(
+            (ordem.periodo_dia, ordem.periodo_semana, ordem.periodo_mes, ordem.periodo_ano),
+            (date(2026, 1, 1), date(2025, 12, 29), date(2026, 1, 1), 2026)
+        )
+
+    def test_comando_preencher_periodos(self):
+        """Testa que o comando recalcula, em lotes, os períodos de ordens sem agrupamento."""
+        ordens = [self._criar_ordem(datetime(2025, mes, 15, 12, 0)) for mes in (1, 2, 3)]
+        ids = [ordem.id for ordem in ordens]
+        versoes = [ordem.versao for ordem in ordens]
+        db.session.execute(update(OrdemServico).values(
+            periodo_dia=None, periodo_semana=None, periodo_mes=None, periodo_ano=None
+        ))
+        db.session.commit()
+
+        resultado = self.app.test_cli_runner().invoke(args=['preencher-periodos', '--lote', '2'])
+
+        self.assertEqual(resultado.exit_code, 0, resultado.output)
+        self.assertIn('3 ordens atualizadas.', resultado.output)
+        db.session.expire_all()
+        ordens = [db.session.get(OrdemServico, ordem_id) for ordem_id in ids]
+        self.assertEqual([o.periodo_mes for o in ordens], [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)])
+        # Colunas derivadas não contam como alteração para a sincronização
+        self.assertEqual([o.versao for o in ordens], versoes)
+
+
+if __name__ == '__main__':
+    unittest.main()
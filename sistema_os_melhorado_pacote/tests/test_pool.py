@@ -0,0 +1,116 @@
+"""
+Testes unitários para o pool de conexões do banco de dados.
+Este arquivo contém testes para as métricas de espera do PoolMonitorado, a verificação de
+conexões ociosas no checkout e o aviso de dimensionamento acima do limite do banco.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.utils.pool import PoolMonitorado, configurar_pool, init_pool_metrics
+
+
+class PoolTestCase(unittest.TestCase):
+    """Testes para app.utils.pool com um QueuePool pequeno sobre SQLite em arquivo."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.diretorio = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.engine = create_engine(
+            'sqlite:///' + os.path.join(self.diretorio, 'pool.db'),
+            poolclass=PoolMonitorado, pool_size=1, max_overflow=0, pool_timeout=0.2
+        )
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        self.engine.dispose()
+        shutil.rmtree(self.diretorio)
+
+    def test_metricas_de_espera(self):
+        """Testa o tempo de espera no checkout, os timeouts e o estado atual do pool."""
+        estatisticas = init_pool_metrics(self.app, self.engine, 'teste')
+        self.assertIs(self.app.extensions['pool_stats']['teste'], estatisticas)
+
+        conexao = self.engine.connect()
+        metricas = estatisticas.metricas()
+        self.assertEqual((metricas['checkouts'], metricas['em_uso'], metricas['tamanho']), (1, 1, 1))
+
+        # Com o pool esgotado, o checkout espera até o timeout
+        with self.assertRaises(PoolTimeoutError):
+            self.engine.connect()
+        self.assertEqual(estatisticas.metricas()['timeouts'], 1)
+
+        # Conexão devolvida por outra thread durante a espera
+        devolucao = threading.Timer(0.1, conexao.close)
+        devolucao.start()
+        with self.engine.connect() as segunda:
+            segunda.execute(text('SELECT 1'))
+        devolucao.join()
+
+        metricas = estatisticas.metricas()
+        self.assertEqual((metricas['checkouts'], metricas['timeouts'], metricas['em_uso']), (2, 1, 0))
+        self.assertGreaterEqual(metricas['espera_maxima_ms'], 90)
+        self.assertLess(metricas['espera_media_ms'], metricas['espera_maxima_ms'])
+
+        estatisticas.limpar()
+        self.assertEqual(estatisticas.metricas()['checkouts'], 0)
+        # As métricas acompanham o pool recriado por dispose()
+        self.engine.dispose()
+        with self.engine.connect():
+            self.assertEqual(estatisticas.metricas()['checkouts'], 1)
+
+    def test_verificacao_so_de_conexoes_ociosas(self):
+        """Testa que conexões usadas há pouco não são verificadas no checkout."""
+        self.app.config['DB_PING_IDLE_SECONDS'] = 30
+        estatisticas = init_pool_metrics(self.app, self.engine, 'teste')
+
+        for _ in range(3):
+            with self.engine.connect() as conexao:
+                conexao.execute(text('SELECT 1'))
+
+        self.assertEqual(estatisticas.metricas()['verificacoes'], 0)
+
+    def test_conexao_ociosa_invalida_descartada(self):
+        """Testa que uma conexão ociosa que falha na verificação é trocada por uma nova."""
+        self.app.config['DB_PING_IDLE_SECONDS'] = 0.05
+        estatisticas = init_pool_metrics(self.app, self.engine, 'teste')
+
+        with self.engine.connect() as conexao:
+            antiga = conexao.connection.dbapi_connection
+        # Conexão encerrada do lado do banco enquanto ociosa no pool
+        antiga.close()
+        time.sleep(0.1)
+
+        with self.assertLogs('app.utils.pool', 'WARNING') as logs:
+            with self.engine.connect() as conexao:
+                self.assertEqual(conexao.execute(text('SELECT 1')).scalar(), 1)
+                self.assertIsNot(conexao.connection.dbapi_connection, antiga)
+
+        self.assertIn('Conexão ociosa inválida descartada (teste)', logs.output[0])
+        metricas = estatisticas.metricas()
+        self.assertEqual((metricas['verificacoes'], metricas['falhas_verificacao']), (1, 1))
+
+    def test_aviso_de_limite_de_conexoes(self):
+        """Testa o aviso quando workers x (pool + overflow) passa de DB_MAX_CONNECTIONS."""
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(self.diretorio, 'app.db'),
+            GUNICORN_WORKERS=4, DB_POOL_SIZE=5, DB_MAX_OVERFLOW=3, DB_MAX_CONNECTIONS=30
+        )
+        with self.assertLogs('app.utils.pool', 'WARNING') as logs:
+            configurar_pool(self.app)
+        self.assertIn('4 worker(s) x 8 conexões = 32 (limite 30)', logs.output[0])
+        self.assertEqual(self.app.config['SQLALCHEMY_ENGINE_OPTIONS']['poolclass'], PoolMonitorado)
+
+        self.app.config.update(DB_MAX_CONNECTIONS=32, SQLALCHEMY_ENGINE_OPTIONS={})
+        with self.assertNoLogs('app.utils.pool', 'WARNING'):
+            configurar_pool(self.app)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Testes unitários para a preparação dos workers criados por fork.
+Este arquivo contém testes para o aquecimento antes do fork e para a reabertura das conexões
+SQLite herdadas pelos workers.
+"""
+import gc
+import os
+import tempfile
+import unittest
+from sqlalchemy import select
+from app import create_app, db
+from app.models import User
+from app.utils.prefork import apos_fork, preparar_prefork
+from app.utils.sessoes import ArmazenamentoSQLite
+
+
+class PreforkTestCase(unittest.TestCase):
+    """Testes para app.utils.prefork."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        gc.unfreeze()
+        gc.enable()
+
+    def test_preparar_e_apos_fork(self):
+        """Testa o aquecimento no mestre e o descarte dos pools no worker."""
+        gc.disable()
+        preparar_prefork(self.app)
+
+        self.assertGreater(gc.get_freeze_count(), 0)
+        self.assertIn('base.html', {nome for _, nome in self.app.jinja_env.cache.keys()})
+
+        apos_fork(self.app)
+        self.assertTrue(gc.isenabled())
+        with self.app.app_context():
+            db.create_all()
+            self.assertEqual(db.session.scalars(select(User)).all(), [])
+            db.session.remove()
+
+    def test_conexao_sqlite_reaberta_apos_fork(self):
+        """Testa que o worker não reutiliza a conexão SQLite aberta pelo processo pai."""
+        with tempfile.TemporaryDirectory() as diretorio:
+            armazenamento = ArmazenamentoSQLite(os.path.join(diretorio, 'sessoes.db'), intervalo_limpeza=0)
+            conexao_pai = armazenamento._conexao()
+
+            leitura, escrita = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    reaberta = armazenamento._conexao() is not conexao_pai
+                    armazenamento.gravar('sid', b'dados', '1', 4102444800)
+                    os.write(escrita, b'1' if reaberta else b'0')
+                finally:
+                    os._exit(0)
+            os.close(escrita)
+            with os.fdopen(leitura, 'rb') as arquivo:
+                resultado = arquivo.read()
+            os.waitpid(pid, 0)
+
+            self.assertEqual(resultado, b'1')
+            self.assertIs(armazenamento._conexao(), conexao_pai)
+            self.assertIsNotNone(armazenamento.ler('sid', 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
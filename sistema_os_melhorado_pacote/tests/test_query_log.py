@@ -0,0 +1,90 @@
+"""
+Testes unitários para o registro de consultas lentas.
+Este arquivo contém testes para o buffer circular, o limite de tempo, a captura do plano
+de execução e as rotas de consulta e limpeza do registro.
+"""
+import unittest
+from sqlalchemy import select
+from app import create_app, db
+from app.models import User
+from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+from app.utils.query_log import SlowQueryLog, init_query_log
+
+
+class SlowQueryLogTestCase(unittest.TestCase):
+    """Testes para app.utils.query_log."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _ativar(self, limite_ms):
+        """Registra os listeners no engine com o limite informado."""
+        self.app.config['SLOW_QUERY_THRESHOLD_MS'] = limite_ms
+        return init_query_log(self.app, db.engine)
+
+    def test_desativado_por_padrao_fora_do_desenvolvimento(self):
+        """Testa que só o ambiente de desenvolvimento ativa o registro por padrão."""
+        self.assertFalse(self.app.config['SLOW_QUERY_LOG_ENABLED'])
+        self.assertNotIn('slow_query_log', self.app.extensions)
+
+    def test_buffer_circular(self):
+        """Testa que o buffer mantém só as últimas entradas, da mais recente para a mais antiga."""
+        query_log = SlowQueryLog(maxlen=3)
+        for i in range(5):
+            query_log.registrar({'sql': str(i)})
+
+        self.assertEqual(len(query_log), 3)
+        self.assertEqual([e['sql'] for e in query_log.entradas()], ['4', '3', '2'])
+        query_log.limpar()
+        self.assertEqual(query_log.entradas(), [])
+
+    def test_limite_de_tempo(self):
+        """Testa que consultas abaixo do limite não são registradas."""
+        query_log = self._ativar(60000)
+        db.session.execute(select(User).where(User.email == 'teste@exemplo.com')).all()
+
+        self.assertEqual(len(query_log), 0)
+
+    def test_captura_do_plano(self):
+        """Testa a entrada de uma consulta acima do limite, com o plano e sem os valores."""
+        query_log = self._ativar(0)
+        db.session.execute(select(User).where(User.email == 'teste@exemplo.com')).all()
+
+        entrada = query_log.entradas()[0]
+        self.assertTrue(entrada['sql'].lstrip().upper().startswith('SELECT'))
+        self.assertEqual(entrada['parametros'], ['str'])
+        self.assertTrue(entrada['plano'])
+        self.assertIsNone(entrada['rota'])
+        # O EXPLAIN usa um cursor separado e não é registrado
+        self.assertFalse(any('EXPLAIN' in e['sql'] for e in query_log.entradas()))
+
+    def test_rotas_consulta_e_limpeza(self):
+        """Testa a listagem filtrada por rota e a limpeza do registro pelo administrador."""
+        gerar_dados(1, 1, 0)
+        query_log = self._ativar(0)
+        cliente = self.app.test_client()
+        cliente.post('/login', data={'email': 'admin@exemplo.com', 'password': SENHA_PADRAO})
+
+        resposta = cliente.get('/admin/consultas-lentas?rota=auth.login')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('POST auth.login', resposta.get_data(as_text=True))
+        self.assertTrue(any(e['rota'] == 'POST auth.login' for e in query_log.entradas()))
+
+        resposta = cliente.post('/admin/consultas-lentas/limpar')
+        self.assertEqual(resposta.status_code, 302)
+        # Só as consultas feitas depois da limpeza (carregamento do usuário) permanecem
+        self.assertFalse(any(e['rota'] == 'POST auth.login' for e in query_log.entradas()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Testes unitários para a limitação de taxa de requisições.
+Este arquivo contém testes para o contador de janela deslizante e o armazenamento SQLite.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from app.utils.rate_limit import ArmazenamentoMemoria, criar_armazenamento, interpretar_limite
+
+
+class RateLimitTestCase(unittest.TestCase):
+    """Testes para app.utils.rate_limit."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.diretorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def test_janela_deslizante(self):
+        """Testa que a janela anterior é ponderada pelo tempo decorrido na janela atual."""
+        armazenamento = ArmazenamentoMemoria()
+        permitidos = [armazenamento.registrar('login:ip:1', 5, 60, 1190.0)[0] for _ in range(6)]
+        self.assertEqual(permitidos, [True] * 5 + [False])
+
+        # Início da janela seguinte: a anterior ainda conta inteira
+        self.assertFalse(armazenamento.registrar('login:ip:1', 5, 60, 1200.0)[0])
+        # Metade da janela seguinte: 5 * 0,5 = 2,5 requisições estimadas
+        self.assertTrue(armazenamento.registrar('login:ip:1', 5, 60, 1230.0)[0])
+        self.assertTrue(armazenamento.registrar('login:ip:2', 5, 60, 1201.0)[0])
+
+    def test_armazenamento_sqlite_compartilhado(self):
+        """Testa que duas instâncias sobre o mesmo arquivo compartilham os contadores."""
+        uri = 'sqlite:///' + os.path.join(self.diretorio, 'rate_limit.db')
+        worker_a, worker_b = criar_armazenamento(uri), criar_armazenamento(uri)
+
+        self.assertTrue(worker_a.registrar('api:user:1', 2, 60, 1000.0)[0])
+        self.assertTrue(worker_b.registrar('api:user:1', 2, 60, 1000.0)[0])
+        self.assertFalse(worker_a.registrar('api:user:1', 2, 60, 1000.0)[0])
+
+    def test_interpretar_limite(self):
+        """Testa a leitura das expressões de limite."""
+        self.assertEqual(interpretar_limite('100/hour'), (100, 3600))
+        self.assertEqual(interpretar_limite('10 per 5 minutes'), (10, 300))
+        with self.assertRaises(ValueError):
+            interpretar_limite('muitas/hora')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Testes unitários para o roteamento entre banco primário e réplica de leitura.
+Este arquivo usa dois arquivos SQLite locais no papel de primário e réplica.
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from flask import g, jsonify, session
+from app import create_app, db
+from app.config import config, TestingConfig
+from app.models.condominio import Administradora
+from app.utils.decorators import use_replica
+from app.utils.replica import BIND_REPLICA, CHAVE_PRIMARIO_ATE
+
+
+class ReplicaTestCase(unittest.TestCase):
+    """Testes para a sessão com roteamento de leituras."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.diretorio = tempfile.mkdtemp()
+
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(self.diretorio, 'primario.db')
+            SQLALCHEMY_BINDS = {BIND_REPLICA: 'sqlite:///' + os.path.join(self.diretorio, 'replica.db')}
+
+        config['testing_replica'] = ReplicaConfig
+        self.app = create_app('testing_replica')
+        self._registrar_rotas()
+
+        # Sem contexto de aplicação fixo: cada requisição do cliente de teste tem o próprio g
+        with self.app.app_context():
+            # Mesmo esquema nos dois bancos, com dados diferentes para identificar a origem
+            db.create_all()
+            db.metadata.create_all(db.engines[BIND_REPLICA])
+            db.session.add(Administradora(nome='Primário'))
+            db.session.commit()
+            with db.engines[BIND_REPLICA].begin() as conexao:
+                conexao.execute(Administradora.__table__.insert(), {'nome': 'Réplica'})
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        del config['testing_replica']
+        # O init_app registra um metadata por bind; sem remover, o create_all das outras
+        # aplicações de teste procuraria o bind da réplica
+        db.metadatas.pop(BIND_REPLICA, None)
+        shutil.rmtree(self.diretorio)
+
+    def _registrar_rotas(self):
+        """Registra uma rota de escrita e uma de leitura marcada para a réplica."""
+        @self.app.route('/teste/administradoras', methods=['POST'])
+        def criar_administradora():
+            db.session.add(Administradora(nome='Nova'))
+            db.session.commit()
+            return jsonify(self._nomes())
+
+        @self.app.route('/teste/administradoras')
+        @use_replica
+        def listar_administradoras():
+            return jsonify(self._nomes())
+
+    def _nomes(self):
+        """Lista os nomes das administradoras visíveis para a sessão."""
+        return [a.nome for a in Administradora.query.order_by(Administradora.id)]
+
+    def test_rota_nao_marcada_usa_primario(self):
+        """Testa que rotas sem marcação leem do primário."""
+        with self.app.test_request_context('/'):
+            self.assertEqual(self._nomes(), ['Primário'])
+
+    def test_rota_marcada_usa_replica(self):
+        """Testa que rotas marcadas leem da réplica."""
+        with self.app.test_request_context('/'):
+            g.usar_replica = True
+            self.assertEqual(self._nomes(), ['Réplica'])
+
+    def test_leitura_apos_commit_usa_primario(self):
+        """Testa que, após um commit do usuário, as leituras voltam ao primário."""
+        with self.app.test_request_context('/'):
+            g.usar_replica = True
+            db.session.add(Administradora(nome='Nova'))
+            db.session.commit()
+
+            self.assertEqual(self._nomes(), ['Primário', 'Nova'])
+            self.assertGreater(session[CHAVE_PRIMARIO_ATE], time.time())
+
+    def test_primario_fixado_entre_requisicoes(self):
+        """Testa que a marca gravada na escrita mantém a próxima leitura do usuário no primário."""
+        cliente = self.app.test_client()
+        self.assertEqual(cliente.get('/teste/administradoras').get_json(), ['Réplica'])
+
+        self.assertEqual(cliente.post('/teste/administradoras').get_json(), ['Primário', 'Nova'])
+
+        # Requisição seguinte, com o cookie de sessão gravado pela escrita
+        self.assertEqual(cliente.get('/teste/administradoras').get_json(), ['Primário', 'Nova'])
+        # Outro usuário, sem a marca, continua lendo da réplica
+        self.assertEqual(self.app.test_client().get('/teste/administradoras').get_json(), ['Réplica'])
+
+        # Encerrada a janela de consistência, o mesmo usuário volta à réplica
+        # (a sessão é decodificada sob demanda, o que exige um contexto de requisição)
+        with self.app.test_request_context(), cliente.session_transaction() as sessao:
+            self.assertGreater(sessao[CHAVE_PRIMARIO_ATE], time.time())
+            sessao[CHAVE_PRIMARIO_ATE] = time.time() - 1
+        self.assertEqual(cliente.get('/teste/administradoras').get_json(), ['Réplica'])
+
+
+if __name__ == '__main__':
+    unittest.main()
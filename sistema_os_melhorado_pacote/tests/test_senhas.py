@@ -0,0 +1,126 @@
+"""
+Testes unitários para o hash de senhas.
+Este arquivo contém testes para a verificação e o rehash transparente de senhas e para a
+fila limitada do pool de processos.
+"""
+import time
+import unittest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models.user import User
+from app.utils import senhas
+from app.utils.senhas import (
+    SenhasIndisponivel, custo_bcrypt, encerrar_executor, gerar_hash_senha, gerar_hashes_senhas, metricas,
+    verificar_senha
+)
+
+
+class SenhasTestCase(unittest.TestCase):
+    """Testes para app.utils.senhas e User.check_password."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        self.app_context.pop()
+
+    def test_hash_usa_custo_configurado(self):
+        """Testa que o hash gerado usa BCRYPT_LOG_ROUNDS."""
+        user = User(name='Teste', email='teste@exemplo.com', password='Senha@123')
+
+        self.assertEqual(custo_bcrypt(user.password), 4)
+        self.assertTrue(user.check_password('Senha@123'))
+        self.assertFalse(user.check_password('Errada@123'))
+
+    def test_rehash_quando_custo_muda(self):
+        """Testa que o login refaz o hash quando o custo configurado muda."""
+        user = User(name='Teste', email='teste@exemplo.com', password='Senha@123')
+        hash_antigo = user.password
+
+        self.app.config['BCRYPT_LOG_ROUNDS'] = 5
+        self.assertTrue(user.check_password('Senha@123'))
+        self.assertNotEqual(user.password, hash_antigo)
+        self.assertEqual(custo_bcrypt(user.password), 5)
+
+    def test_rehash_de_hash_pbkdf2(self):
+        """Testa que hashes PBKDF2 antigos ainda são aceitos e migrados para bcrypt."""
+        user = User(name='Teste', email='teste@exemplo.com')
+        user.password = generate_password_hash('Senha@123', method='pbkdf2:sha256:150000')
+
+        self.assertTrue(user.check_password('Senha@123'))
+        self.assertEqual(custo_bcrypt(user.password), 4)
+
+    def test_gerar_hashes_em_lote(self):
+        """Testa a geração de vários hashes de uma vez."""
+        hashes = gerar_hashes_senhas(['Senha@123', 'Outra@456'])
+
+        self.assertTrue(verificar_senha('Senha@123', hashes[0]))
+        self.assertTrue(verificar_senha('Outra@456', hashes[1]))
+
+
+class SenhasPoolTestCase(unittest.TestCase):
+    """Testes para o pool de processos de senhas, com um processo e uma vaga na fila."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1, PASSWORD_HASH_TIMEOUT=0.5)
+        encerrar_executor()
+        self.addCleanup(encerrar_executor)
+
+    def _ocupar_pool(self, segundos):
+        """Ocupa o único processo do pool; a chamada desiste no prazo, mas a vaga continua ocupada."""
+        with self.assertRaises(SenhasIndisponivel):
+            senhas._executar('hash', time.sleep, segundos)
+
+    def test_hash_e_verificacao_no_pool(self):
+        """Testa hash e verificação executados no pool de processos."""
+        with self.app.app_context():
+            hash_senha = gerar_hash_senha('Senha@123')
+
+            self.assertEqual(custo_bcrypt(hash_senha), 4)
+            self.assertTrue(verificar_senha('Senha@123', hash_senha))
+            self.assertFalse(verificar_senha('Errada@123', hash_senha))
+            self.assertEqual(len(gerar_hashes_senhas(['Senha@123', 'Outra@456'])), 2)
+
+    def test_fila_cheia_falha_no_prazo(self):
+        """Testa que, sem vaga na fila, a operação é recusada no prazo e volta a funcionar depois."""
+        with self.app.app_context():
+            recusadas = metricas()['hash']['recusadas']
+            inicio = time.monotonic()
+            self._ocupar_pool(1.5)
+            self.assertLess(time.monotonic() - inicio, 1.0)
+
+            inicio = time.monotonic()
+            with self.assertRaises(SenhasIndisponivel):
+                gerar_hash_senha('Senha@123')
+            self.assertLess(time.monotonic() - inicio, 1.0)
+            self.assertEqual(metricas()['hash']['recusadas'], recusadas + 2)
+
+            # Encerrada a operação lenta, a vaga é devolvida
+            time.sleep(1.0)
+            self.assertTrue(verificar_senha('Senha@123', gerar_hash_senha('Senha@123')))
+
+    def test_login_com_pool_sobrecarregado(self):
+        """Testa que o login responde 503 com Retry-After enquanto o pool está sobrecarregado."""
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(name='Teste', email='teste@exemplo.com', password='Senha@123', is_pending=False))
+            db.session.commit()
+            self._ocupar_pool(1.5)
+
+        resposta = self.app.test_client().post('/login', data={'email': 'teste@exemplo.com', 'password': 'Senha@123'})
+
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta.headers['Retry-After'], '1')
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
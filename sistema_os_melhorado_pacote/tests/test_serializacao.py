@@ -0,0 +1,72 @@
+"""
+Testes unitários para a serialização leve da API.
+Este arquivo contém testes para o cache de planos de consulta por conjunto de campos
+e para a ordem das chaves nas respostas.
+"""
+import unittest
+from app.api.serializacao import MAX_PLANOS, Campo, Recurso, ORDEM_DETALHE
+from app.models import OrdemServico
+
+
+class SerializacaoTestCase(unittest.TestCase):
+    """Testes para app.api.serializacao.Recurso."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.recurso = Recurso(OrdemServico, {
+            'id': Campo(OrdemServico.id),
+            'numero': Campo(OrdemServico.numero),
+            'status': Campo(OrdemServico.status),
+        })
+
+    def test_plano_compartilhado_entre_ordens_de_campos(self):
+        """Testa que a ordem de ?fields= não cria outro plano nem muda a ordem das colunas."""
+        plano = self.recurso._plano(('status', 'id'))
+
+        self.assertIs(self.recurso._plano(('id', 'status')), plano)
+        self.assertEqual(len(self.recurso._planos), 1)
+        self.assertEqual(
+            [c.name for c in self.recurso.consulta(('status', 'id')).selected_columns],
+            ['id_0', 'status_0']
+        )
+
+    def test_ordem_das_chaves_na_resposta(self):
+        """Testa que as chaves seguem a ordem pedida, com e sem colunas extras."""
+        linhas = [(7, 'OS-2025-0001', 'Aberta')]
+        self.assertEqual(
+            list(self.recurso.serializar(linhas, ('status', 'numero', 'id'))[0].items()),
+            [('status', 'Aberta'), ('numero', 'OS-2025-0001'), ('id', 7)]
+        )
+        self.assertEqual(
+            list(self.recurso.serializar([(99, 7, 'Aberta')], ('status', 'id'), deslocamento=1)[0].items()),
+            [('status', 'Aberta'), ('id', 7)]
+        )
+
+        # Campos aninhados, com a coluna da junção na ordem da especificação
+        nomes = ('condominio', 'id')
+        colunas = [c.name for c in ORDEM_DETALHE.consulta(nomes).selected_columns]
+        self.assertEqual(colunas, ['id_0', 'condominio_0', 'condominio_1'])
+        self.assertEqual(
+            list(ORDEM_DETALHE.serializar([(5, 3, 'Residencial Sol')], nomes)[0].items()),
+            [('condominio', {'id': 3, 'nome': 'Residencial Sol'}), ('id', 5)]
+        )
+
+    def test_limite_de_planos(self):
+        """Testa que o cache descarta o plano usado há mais tempo ao passar do limite."""
+        campos = {f'c{i}': Campo(OrdemServico.id) for i in range(8)}
+        recurso = Recurso(OrdemServico, campos)
+        nomes = list(campos)
+        combinacoes = [tuple(n for j, n in enumerate(nomes) if i >> j & 1) for i in range(1, MAX_PLANOS + 2)]
+
+        for combinacao in combinacoes[:MAX_PLANOS]:
+            recurso._plano(combinacao)
+        recurso._plano(combinacoes[0])
+        recurso._plano(combinacoes[MAX_PLANOS])
+
+        self.assertEqual(len(recurso._planos), MAX_PLANOS)
+        self.assertIn(frozenset(combinacoes[0]), recurso._planos)
+        self.assertNotIn(frozenset(combinacoes[1]), recurso._planos)
+
+
+if __name__ == '__main__':
+    unittest.main()
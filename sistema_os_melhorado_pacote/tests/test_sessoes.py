@@ -0,0 +1,69 @@
+"""
+Testes unitários para as sessões no servidor.
+Este arquivo contém testes para o cookie compacto, a troca de identificador no login
+e o encerramento das sessões de um usuário.
+"""
+import unittest
+from flask import session
+from app import create_app
+from app.utils.sessoes import encerrar_sessoes_usuario
+
+
+class SessoesTestCase(unittest.TestCase):
+    """Testes para app.utils.sessoes."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+
+        @self.app.route('/_teste/sessao/<valor>')
+        def gravar(valor):
+            session['_user_id'] = valor
+            return ''
+
+        @self.app.route('/_teste/sessao')
+        def ler():
+            return session.get('_user_id', '')
+
+        @self.app.route('/_teste/encerrar/<user_id>')
+        def encerrar(user_id):
+            return str(encerrar_sessoes_usuario(user_id))
+
+        self.client = self.app.test_client()
+        self.armazenamento = self.app.session_interface.armazenamento
+
+    def _cookie(self, client=None):
+        """Retorna o identificador da sessão no cookie do cliente."""
+        cookies = {c.name: c.value for c in (client or self.client).cookie_jar}
+        return cookies.get('session')
+
+    def test_cookie_compacto_e_dados_no_servidor(self):
+        """Testa que o cookie leva só o identificador e os dados ficam no armazenamento."""
+        self.client.get('/_teste/sessao/42')
+        sid = self._cookie()
+
+        self.assertLessEqual(len(sid), 24)
+        self.assertIsNotNone(self.armazenamento.ler(sid, 0))
+        self.assertEqual(self.client.get('/_teste/sessao').get_data(as_text=True), '42')
+
+    def test_troca_identificador_ao_mudar_usuario(self):
+        """Testa que o identificador muda no login, evitando fixação de sessão."""
+        self.client.get('/_teste/sessao/1')
+        anterior = self._cookie()
+        self.client.get('/_teste/sessao/2')
+
+        self.assertNotEqual(self._cookie(), anterior)
+        self.assertIsNone(self.armazenamento.ler(anterior, 0))
+
+    def test_encerrar_sessoes_usuario(self):
+        """Testa que as sessões de um usuário são encerradas para todos os clientes."""
+        outro = self.app.test_client()
+        self.client.get('/_teste/sessao/7')
+        outro.get('/_teste/sessao/7')
+
+        self.assertEqual(self.client.get('/_teste/encerrar/7').get_data(as_text=True), '2')
+        self.assertEqual(outro.get('/_teste/sessao').get_data(as_text=True), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+"""
+Testes unitários para a sincronização do aplicativo dos técnicos.
+Este arquivo contém testes para a cópia completa, as alterações desde o token, a troca de
+responsável, a limpeza das alterações antigas e o envio de operações em lote com detecção de
+conflitos e reenvios.
+"""
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from app import create_app, db
+from app.models import OrdemServico, OrdemAlteracao
+from app.ordens.sla import verificar_sla
+from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+
+
+class SincronizacaoTestCase(unittest.TestCase):
+    """Testes para /api/sync."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        # Sem margem: as alterações do teste já contam como definitivas
+        self.app.config['SYNC_MARGEM_SEGUNDOS'] = 0
+        with self.app.app_context():
+            db.create_all()
+            ids = gerar_dados(1, 3, 30)
+            condominio = ids['condominios'][0]
+            self.tecnico, self.outro = ids['usuarios'][condominio][:2]
+
+            # Três ordens abertas do condomínio atribuídas ao técnico
+            ordens = OrdemServico.query.filter_by(condominio_id=condominio).order_by(OrdemServico.id).all()
+            for ordem in ordens:
+                if ordem.user_id == self.tecnico:
+                    ordem.user_id = self.outro
+            for ordem in ordens[:3]:
+                ordem.user_id = self.tecnico
+                ordem.status = 'Aberta'
+            db.session.commit()
+            self.ordens = [ordem.id for ordem in ordens[:3]]
+
+        self.cliente = self.app.test_client()
+        resposta = self.cliente.post('/login', data={
+            'email': f'usuario{self.tecnico}@exemplo.com', 'password': SENHA_PADRAO
+        })
+        self.assertEqual(resposta.status_code, 302)
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _enviar(self, operacoes):
+        return self.cliente.post('/api/sync', json={'operacoes': operacoes})
+
+    def _limpar(self, *opcoes):
+        # Com o contexto desta aplicação ativo, o comando não usa o de outra que tenha ficado aberto
+        with self.app.app_context():
+            return self.app.test_cli_runner().invoke(args=['limpar-alteracoes', *opcoes])
+
+    def test_copia_e_alteracoes(self):
+        """Testa a cópia completa e o envio apenas das ordens alteradas ou removidas depois do token."""
+        copia = self.cliente.get('/api/sync').get_json()
+        self.assertTrue(copia['copia_completa'])
+        self.assertEqual(sorted(o['id'] for o in copia['ordens']), self.ordens)
+
+        self.assertEqual(self.cliente.get(f"/api/sync?token={copia['token']}").get_json()['ordens'], [])
+        self.assertEqual(self.cliente.get('/api/sync?token=x').status_code, 400)
+
+        with self.app.app_context():
+            db.session.get(OrdemServico, self.ordens[0]).atualizar_status('Em Andamento', self.outro)
+            db.session.get(OrdemServico, self.ordens[1]).user_id = self.outro
+            db.session.commit()
+
+        delta = self.cliente.get(f"/api/sync?token={copia['token']}").get_json()
+        self.assertFalse(delta['copia_completa'])
+        self.assertEqual([(o['id'], o['status']) for o in delta['ordens']], [(self.ordens[0], 'Em Andamento')])
+        self.assertEqual(delta['removidas'], [self.ordens[1]])
+        self.assertGreater(int(delta['token']), int(copia['token']))
+
+    def test_remocao_e_reatribuicao(self):
+        """Testa uma ordem que fica sem responsável e volta ao técnico, e outra passada a outro técnico."""
+        token = self.cliente.get('/api/sync').get_json()['token']
+
+        with self.app.app_context():
+            db.session.get(OrdemServico, self.ordens[0]).user_id = None
+            db.session.get(OrdemServico, self.ordens[1]).user_id = self.outro
+            db.session.commit()
+
+        delta = self.cliente.get(f'/api/sync?token={token}').get_json()
+        self.assertEqual(delta['ordens'], [])
+        self.assertEqual(delta['removidas'], self.ordens[:2])
+
+        with self.app.app_context():
+            # O novo responsável também recebe a alteração
+            self.assertEqual(db.session.scalar(select(func.count()).where(
+                OrdemAlteracao.ordem_id == self.ordens[1], OrdemAlteracao.responsavel_id == self.outro
+            )), 1)
+            db.session.get(OrdemServico, self.ordens[0]).user_id = self.tecnico
+            db.session.commit()
+
+        delta = self.cliente.get(f"/api/sync?token={delta['token']}").get_json()
+        self.assertEqual([o['id'] for o in delta['ordens']], [self.ordens[0]])
+        self.assertEqual(delta['removidas'], [])
+
+    def test_limpeza_e_token_expirado(self):
+        """Testa a exclusão das alterações antigas e a cópia completa para um token anterior a elas."""
+        antigo = self.cliente.get('/api/sync').get_json()['token']
+
+        with self.app.app_context():
+            db.session.get(OrdemServico, self.ordens[0]).status = 'Em Andamento'
+            db.session.commit()
+            db.session.execute(update(OrdemAlteracao).values(data=datetime.now() - timedelta(days=60)))
+            db.session.get(OrdemServico, self.ordens[1]).status = 'Em Andamento'
+            db.session.commit()
+            total = OrdemAlteracao.query.count()
+
+        resultado = self._limpar('--lote', '2')
+        self.assertEqual(resultado.output.strip(), f'{total - 1} alterações excluídas.')
+
+        # O token antigo perdeu a alteração da primeira ordem: volta a receber a cópia completa
+        delta = self.cliente.get(f'/api/sync?token={antigo}').get_json()
+        self.assertTrue(delta['copia_completa'])
+        self.assertEqual(sorted(o['id'] for o in delta['ordens']), self.ordens)
+
+        self.assertEqual(self.cliente.get(f"/api/sync?token={delta['token']}").get_json()['ordens'], [])
+
+        # Sem alterações recentes, a última é mantida para que o seu ID não volte a ser usado
+        with self.app.app_context():
+            db.session.get(OrdemServico, self.ordens[2]).status = 'Em Andamento'
+            db.session.commit()
+            ultima = db.session.scalar(select(func.max(OrdemAlteracao.id)))
+            db.session.execute(update(OrdemAlteracao).values(data=datetime.now() - timedelta(days=60)))
+            db.session.commit()
+        resultado = self._limpar('--dias', '90')
+        self.assertEqual(resultado.output.strip(), '0 alterações excluídas.')
+        resultado = self._limpar()
+        self.assertEqual(resultado.output.strip(), '1 alterações excluídas.')
+        with self.app.app_context():
+            self.assertEqual(db.session.scalars(select(OrdemAlteracao.id)).all(), [ultima])
+
+    def test_verificacao_de_sla_sem_conflito(self):
+        """Testa que a marcação de SLA entre a sincronização e o envio não gera conflito nem alteração."""
+        with self.app.app_context():
+            # Vencida: a próxima verificação marca a violação
+            db.session.get(OrdemServico, self.ordens[0]).data_previsao = datetime.now() - timedelta(days=1)
+            db.session.commit()
+
+        copia = self.cliente.get('/api/sync').get_json()
+        ordem = next(o for o in copia['ordens'] if o['id'] == self.ordens[0])
+
+        with self.app.app_context():
+            self.assertIn(self.ordens[0], [o.id for o in verificar_sla()['violadas']])
+            self.assertIsNotNone(db.session.get(OrdemServico, self.ordens[0]).sla_violada_em)
+        self.assertEqual(self.cliente.get(f"/api/sync?token={copia['token']}").get_json()['ordens'], [])
+
+        resultado = self._enviar([
+            {'id': 'a', 'tipo': 'status', 'ordem_id': ordem['id'], 'versao': ordem['versao'], 'status': 'Em Andamento'},
+        ]).get_json()['resultados'][0]
+        self.assertEqual(resultado['resultado'], 'aplicada')
+
+    def test_envio_conflito_e_duplicada(self):
+        """Testa a aplicação do lote, o reenvio sem efeito e o conflito com uma versão antiga."""
+        ordem = self.cliente.get('/api/sync').get_json()['ordens'][0]
+        versao = ordem['versao']
+        lote = [
+            {'id': 'a', 'tipo': 'status', 'ordem_id': ordem['id'], 'versao': versao, 'status': 'Em Andamento'},
+            {'id': 'b', 'tipo': 'comentario', 'ordem_id': ordem['id'], 'texto': 'Peça trocada'},
+            # Feita offline sobre a mesma versão base da primeira
+            {'id': 'c', 'tipo': 'status', 'ordem_id': ordem['id'], 'versao': versao, 'status': 'Concluída'},
+        ]
+
+        resultados = self._enviar(lote).get_json()['resultados']
+        self.assertEqual([r['resultado'] for r in resultados], ['aplicada'] * 3)
+        self.assertEqual(resultados[2]['versao'], versao + 2)
+
+        resultados = self._enviar(lote).get_json()['resultados']
+        self.assertEqual([r['resultado'] for r in resultados], ['duplicada'] * 3)
+
+        resultado = self._enviar([
+            {'id': 'd', 'tipo': 'status', 'ordem_id': ordem['id'], 'versao': versao, 'status': 'Cancelada'},
+        ]).get_json()['resultados'][0]
+        self.assertEqual(resultado['resultado'], 'conflito')
+        self.assertEqual((resultado['ordem']['status'], resultado['ordem']['versao']), ('Concluída', versao + 2))
+        self.assertEqual(len(resultado['ordem']['comentarios']), 1)
+
+        self.assertEqual(self._enviar([{'id': 'e', 'tipo': 'excluir', 'ordem_id': ordem['id']}]).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
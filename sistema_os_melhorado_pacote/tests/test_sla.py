@@ -0,0 +1,144 @@
+"""
+Testes unitários para a verificação de SLA das ordens.
+Este arquivo contém testes para a primeira varredura completa, os cursores incrementais,
+a reavaliação de ordens com data prevista alterada e o email consolidado por destinatário.
+"""
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import update
+from app import create_app, db
+from app.models import SlaCursor
+from app.models.user import User
+from app.models.condominio import Condominio, Administradora
+from app.models.ordem import OrdemServico
+from app.ordens.sla import verificar_sla
+
+
+class SlaTestCase(unittest.TestCase):
+    """Testes para app.ordens.sla."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        administradora = Administradora(nome='Administradora Teste')
+        self.condominio = Condominio(nome='Condomínio Teste', administradora=administradora)
+        self.tecnico = User(name='Técnico', email='tecnico@exemplo.com', password='Senha@123')
+        self.sindico = User(name='Síndico', email='sindico@exemplo.com', password='Senha@123')
+        db.session.add_all([administradora, self.condominio, self.tecnico, self.sindico])
+        db.session.commit()
+
+        self.agora = datetime(2025, 6, 10, 12, 0)
+        self.vencida = self._criar_ordem(self.agora - timedelta(hours=2))
+        self.proxima = self._criar_ordem(self.agora + timedelta(hours=3))
+        self.futura = self._criar_ordem(self.agora + timedelta(days=3))
+        self.sem_responsavel = self._criar_ordem(self.agora - timedelta(hours=1), responsavel=None)
+        self.concluida = self._criar_ordem(self.agora - timedelta(days=1), status='Concluída')
+
+        self.relatadas = {'alertas': Counter(), 'violadas': Counter()}
+        envio = patch('app.ordens.sla.send_notification_email')
+        self.envio = envio.start()
+        self.addCleanup(envio.stop)
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _criar_ordem(self, data_previsao, responsavel=True, status='Aberta'):
+        """Cria uma ordem pendente do técnico (ou só do síndico) com a data prevista informada."""
+        ordem = OrdemServico(
+            titulo='Vazamento', descricao='Vazamento na garagem', prioridade='Alta', status=status,
+            condominio_id=self.condominio.id, criador_id=self.sindico.id,
+            user_id=self.tecnico.id if responsavel else None, data_previsao=data_previsao
+        )
+        db.session.add(ordem)
+        db.session.commit()
+        return ordem.id
+
+    def _verificar(self, horas=0):
+        """Executa a verificação com lotes de uma ordem e acumula as ordens relatadas."""
+        resultado = verificar_sla(agora=self.agora + timedelta(hours=horas), lote=1)
+        relatadas = {tipo: sorted(o.id for o in ordens) for tipo, ordens in resultado.items()}
+        for tipo, ids in relatadas.items():
+            self.relatadas[tipo].update(ids)
+        return relatadas
+
+    def test_primeira_varredura_completa(self):
+        """Testa que, sem cursor, a primeira execução lê todas as datas previstas até o limite."""
+        db.session.execute(update(OrdemServico).values(sla_reavaliar=False))
+        db.session.commit()
+
+        self.assertEqual(self._verificar(), {
+            'alertas': [self.proxima], 'violadas': sorted([self.vencida, self.sem_responsavel])
+        })
+        posicoes = {c.nome: c.posicao for c in SlaCursor.query}
+        self.assertEqual(posicoes, {'violacao': self.agora, 'alerta': self.agora + timedelta(hours=24)})
+
+    def test_cursor_incremental(self):
+        """Testa que, com o avanço do cursor, cada ordem é relatada uma única vez por tipo."""
+        self._verificar()
+        self.assertEqual(self._verificar(), {'alertas': [], 'violadas': []})
+
+        # A ordem em alerta vence; a futura entra na janela de alerta
+        self.assertEqual(self._verificar(4), {'alertas': [], 'violadas': [self.proxima]})
+        self.assertEqual(self._verificar(50), {'alertas': [self.futura], 'violadas': []})
+        self.assertEqual(self._verificar(80), {'alertas': [], 'violadas': [self.futura]})
+        self.assertEqual(self._verificar(80), {'alertas': [], 'violadas': []})
+
+        self.assertEqual(self.relatadas['alertas'], Counter([self.proxima, self.futura]))
+        self.assertEqual(
+            self.relatadas['violadas'],
+            Counter([self.vencida, self.sem_responsavel, self.proxima, self.futura])
+        )
+        self.assertNotIn(self.concluida, self.relatadas['violadas'])
+
+    def test_reavaliar_data_prevista_alterada(self):
+        """Testa a reavaliação de ordens cuja nova data prevista fica atrás dos cursores."""
+        self._verificar()
+
+        # Prorrogada: sai da violação e volta a ser verificada quando vencer de novo
+        ordem = db.session.get(OrdemServico, self.vencida)
+        ordem.data_previsao = self.agora + timedelta(hours=6)
+        # Antecipada para antes da posição dos cursores: só a reavaliação encontra a ordem
+        db.session.get(OrdemServico, self.futura).data_previsao = self.agora + timedelta(hours=1)
+        db.session.commit()
+        self.assertIsNone(ordem.sla_violada_em)
+
+        self.assertEqual(self._verificar(4), {
+            'alertas': [self.vencida], 'violadas': sorted([self.proxima, self.futura])
+        })
+        self.assertEqual(self._verificar(7), {'alertas': [], 'violadas': [self.vencida]})
+        self.assertEqual(self._verificar(7), {'alertas': [], 'violadas': []})
+
+        self.assertEqual(self.relatadas['violadas'][self.futura], 1)
+        self.assertEqual(self.relatadas['violadas'][self.vencida], 2)
+        self.assertFalse(any(db.session.get(OrdemServico, i).sla_reavaliar for i in (self.vencida, self.futura)))
+
+    def test_email_consolidado_por_destinatario(self):
+        """Testa um único email por destinatário, com o criador quando não há responsável."""
+        self._verificar()
+
+        enviados = {chamada.args[2]: chamada.args[1] for chamada in self.envio.call_args_list}
+        self.assertEqual(sorted(enviados), ['sindico@exemplo.com', 'tecnico@exemplo.com'])
+        numeros = {o.id: o.numero for o in OrdemServico.query}
+        corpo = enviados['tecnico@exemplo.com']
+        self.assertIn(f'#{numeros[self.vencida]}</strong>', corpo)
+        self.assertIn(f'#{numeros[self.proxima]}</strong>', corpo)
+        self.assertIn('vencida em 10/06/2025 10:00', corpo)
+        self.assertIn('vence em 10/06/2025 15:00', corpo)
+        self.assertIn(f'#{numeros[self.sem_responsavel]}</strong>', enviados['sindico@exemplo.com'])
+
+        self.envio.reset_mock()
+        self._verificar()
+        self.envio.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
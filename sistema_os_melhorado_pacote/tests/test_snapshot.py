@@ -0,0 +1,165 @@
+"""
+Testes unitários para o snapshot analítico.
+Este arquivo contém testes para a escolha entre snapshot e banco, o cache da data de geração,
+a substituição atômica do arquivo e os dados servidos pelo dashboard a partir do snapshot.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, select
+from app import create_app, db
+from app.models import OrdemServico
+from app.dashboard.snapshot import CABECALHO_SNAPSHOT, data_snapshot, gerar_snapshot, sessao_historico
+from app.utils.dados_sinteticos import SENHA_PADRAO, gerar_dados
+
+FORTALEZA_TZ = ZoneInfo('America/Fortaleza')
+
+
+class SnapshotTestCase(unittest.TestCase):
+    """Testes para app.dashboard.snapshot."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.diretorio = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.diretorio, 'snapshot.db')
+        self.app = create_app('testing')
+        self.app.config.update(ANALYTICS_SNAPSHOT_ENABLED=True, ANALYTICS_SNAPSHOT_PATH=self.caminho)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        gerar_dados(1, 2, 60, usuarios_por_condominio=1)
+        self.ontem = datetime.now(FORTALEZA_TZ) - timedelta(days=1)
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.diretorio)
+
+    def _total_snapshot(self):
+        """Quantidade de ordens no arquivo de snapshot atual."""
+        with sqlite3.connect(self.caminho) as conexao:
+            return conexao.execute('SELECT count(*) FROM ordens_servico').fetchone()[0]
+
+    def test_escolha_da_sessao(self):
+        """Testa que só intervalos encerrados antes da geração usam o snapshot."""
+        self.assertIs(sessao_historico(self.ontem), db.session)
+
+        gerar_snapshot()
+        sessao = sessao_historico(self.ontem)
+        self.assertIsNot(sessao, db.session)
+        self.assertEqual(sessao.get_bind().url.database, f'file:{self.caminho}')
+        self.assertEqual(sessao.info['snapshot_gerado_em'], data_snapshot())
+        self.assertEqual(
+            sessao.scalar(select(func.count()).select_from(OrdemServico)),
+            OrdemServico.query.count()
+        )
+        sessao.close()
+
+        self.assertIs(sessao_historico(datetime.now(FORTALEZA_TZ) + timedelta(days=1)), db.session)
+        self.assertIs(sessao_historico(None), db.session)
+        self.app.config['ANALYTICS_SNAPSHOT_ENABLED'] = False
+        self.assertIs(sessao_historico(self.ontem), db.session)
+
+    def test_data_de_geracao_em_cache(self):
+        """Testa que a data de geração só é relida quando o arquivo muda."""
+        gerar_snapshot()
+        gerado_em = data_snapshot()
+
+        modificado = os.stat(self.caminho).st_mtime_ns
+        with sqlite3.connect(self.caminho) as conexao:
+            conexao.execute("UPDATE snapshot_info SET gerado_em = '2020-01-01 00:00:00.000000'")
+        os.utime(self.caminho, ns=(modificado, modificado))
+        self.assertEqual(data_snapshot(), gerado_em)
+
+        os.utime(self.caminho, ns=(modificado + 10 ** 9, modificado + 10 ** 9))
+        self.assertEqual(data_snapshot(), datetime(2020, 1, 1))
+
+    def test_substituicao_atomica(self):
+        """Testa que uma geração com erro mantém o snapshot anterior e não deixa o temporário."""
+        gerar_snapshot()
+        gerado_em = data_snapshot()
+        total = self._total_snapshot()
+        leitura = sessao_historico(self.ontem)
+        leitura.scalar(select(func.count()).select_from(OrdemServico))
+
+        gerar_dados(1, 1, 10, usuarios_por_condominio=1)
+        with patch('app.dashboard.snapshot.Index', side_effect=RuntimeError('falha na carga')):
+            with self.assertRaises(RuntimeError):
+                gerar_snapshot()
+
+        self.assertFalse(os.path.exists(self.caminho + '.tmp'))
+        self.assertEqual((data_snapshot(), self._total_snapshot()), (gerado_em, total))
+
+        gerar_snapshot()
+        self.assertFalse(os.path.exists(self.caminho + '.tmp'))
+        self.assertEqual(self._total_snapshot(), total + 10)
+        self.assertGreater(data_snapshot(), gerado_em)
+        # Uma sessão aberta antes da substituição continua lendo o arquivo anterior
+        self.assertEqual(leitura.scalar(select(func.count()).select_from(OrdemServico)), total)
+        leitura.close()
+
+
+class DashboardSnapshotTestCase(unittest.TestCase):
+    """Testes para os gráficos do dashboard calculados no snapshot."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.diretorio = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config.update(
+            ANALYTICS_SNAPSHOT_ENABLED=True,
+            ANALYTICS_SNAPSHOT_PATH=os.path.join(self.diretorio, 'snapshot.db')
+        )
+        ontem = datetime.now(FORTALEZA_TZ) - timedelta(days=1)
+        self.url = f"/dashboard/data?data_inicial=2000-01-01&data_final={ontem:%Y-%m-%d}"
+
+        with self.app.app_context():
+            db.create_all()
+            gerar_dados(1, 2, 60, usuarios_por_condominio=1)
+            gerar_snapshot()
+            self.gerado_em = data_snapshot()
+
+            # Alterada depois do snapshot, criada antes do fim do intervalo
+            ordem = OrdemServico.query.filter(
+                OrdemServico.data_criacao < ontem.replace(tzinfo=None) - timedelta(days=1),
+                OrdemServico.status != 'Cancelada'
+            ).first()
+            ordem.status = 'Cancelada'
+            ordem.tipo = 'Tipo alterado'
+            db.session.commit()
+
+        self.cliente = self.app.test_client()
+        self.cliente.post('/login', data={'email': 'admin@exemplo.com', 'password': SENHA_PADRAO})
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        shutil.rmtree(self.diretorio)
+
+    def test_status_do_banco_e_demais_agregados_do_snapshot(self):
+        """Testa o status atual lido do banco e os demais agregados na data do snapshot."""
+        resposta = self.cliente.get(self.url)
+        self.assertEqual(resposta.headers[CABECALHO_SNAPSHOT], self.gerado_em.isoformat())
+        dados = resposta.get_json()
+
+        self.app.config['ANALYTICS_SNAPSHOT_ENABLED'] = False
+        resposta = self.cliente.get(self.url)
+        self.assertNotIn(CABECALHO_SNAPSHOT, resposta.headers)
+        atuais = resposta.get_json()
+
+        self.assertEqual(dados['ordens_por_status'], atuais['ordens_por_status'])
+        self.assertNotIn('Tipo alterado', [item['tipo'] for item in dados['ordens_por_tipo']])
+        self.assertIn('Tipo alterado', [item['tipo'] for item in atuais['ordens_por_tipo']])
+
+
+if __name__ == '__main__':
+    unittest.main()
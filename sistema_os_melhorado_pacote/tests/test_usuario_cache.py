@@ -0,0 +1,176 @@
+"""
+Testes unitários para o carregamento do usuário da sessão.
+Este arquivo contém testes para o retrato em cache, a revalidação por versão, a invalidação
+e a versão da credencial no identificador da sessão e do cookie "lembrar-me".
+"""
+import unittest
+from datetime import datetime
+from flask_login import current_user
+from sqlalchemy import select, update
+from app import create_app, db
+from app.models import User, Role, UserRole, UserCondominio
+from app.models.condominio import Administradora, Condominio
+from app.utils.usuario_cache import carregar_usuario, invalidar_usuario, invalidar_usuarios_papel, limpar_cache
+from app.utils.sessoes import encerrar_sessoes_usuario
+
+
+class UsuarioCacheTestCase(unittest.TestCase):
+    """Testes para app.utils.usuario_cache."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        limpar_cache()
+
+        administradora = Administradora(nome='Administradora Teste')
+        condominio = Condominio(nome='Condomínio Teste', administradora=administradora)
+        self.role = Role(name='Síndico', permissions='ver_ordens')
+        self.user = User(name='Usuário Teste', email='usuario@teste.com', password='senha12345',
+                         is_pending=False)
+        db.session.add_all([administradora, condominio, self.role, self.user])
+        db.session.flush()
+        db.session.add(UserCondominio(user_id=self.user.id, condominio_id=condominio.id))
+        db.session.add(UserRole(user_id=self.user.id, role_id=self.role.id))
+        db.session.commit()
+        self.condominio_id = condominio.id
+        self.identificador = self.user.get_id()
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        limpar_cache()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_retrato_do_usuario(self):
+        """Testa que o retrato traz condomínios e permissões sem carregar o User completo."""
+        usuario = carregar_usuario(self.identificador)
+
+        self.assertEqual(usuario.condominio_ids, {self.condominio_id})
+        self.assertTrue(usuario.has_permission('ver_ordens'))
+        self.assertTrue(usuario.has_condominio_access(self.condominio_id))
+        self.assertIsNone(usuario._usuario)
+        self.assertEqual([c.id for c in usuario.condominios], [self.condominio_id])
+
+    def test_invalidacao(self):
+        """Testa que o cache é mantido até a invalidação explícita."""
+        carregar_usuario(self.identificador)
+        db.session.execute(update(User).where(User.id == self.user.id).values(name='Outro Nome'))
+        self.assertEqual(carregar_usuario(self.identificador).name, 'Usuário Teste')
+
+        invalidar_usuario(self.user.id)
+        db.session.commit()
+        self.assertEqual(carregar_usuario(self.identificador).name, 'Outro Nome')
+
+    def test_revalidacao_por_versao(self):
+        """Testa que, vencido o TTL, só uma alteração de versão (de outro worker) remonta o retrato."""
+        self.app.config['USER_CACHE_TTL'] = 0
+        carregar_usuario(self.identificador)
+
+        db.session.execute(update(Role).where(Role.id == self.role.id).values(permissions='editar_ordens'))
+        self.assertFalse(carregar_usuario(self.identificador).has_permission('editar_ordens'))
+
+        # Alterações sem invalidação (ex.: último login) não mudam a versão
+        db.session.execute(
+            update(User).where(User.id == self.user.id).values(updated_at=datetime(2030, 1, 1))
+        )
+        self.assertFalse(carregar_usuario(self.identificador).has_permission('editar_ordens'))
+
+        db.session.execute(
+            update(User).where(User.id == self.user.id).values(versao_retrato=User.versao_retrato + 1)
+        )
+        self.assertTrue(carregar_usuario(self.identificador).has_permission('editar_ordens'))
+
+    def test_invalidacao_por_papel(self):
+        """Testa que invalidar um papel avança a versão de todos os seus usuários."""
+        carregar_usuario(self.identificador)
+        db.session.execute(update(Role).where(Role.id == self.role.id).values(permissions='editar_ordens'))
+
+        invalidar_usuarios_papel(self.role.id)
+        invalidar_usuario(self.user.id)
+        db.session.commit()
+
+        self.assertEqual(db.session.scalar(select(User.versao_retrato).where(User.id == self.user.id)), 2)
+        self.assertTrue(carregar_usuario(self.identificador).has_permission('editar_ordens'))
+
+    def test_usuario_inativo(self):
+        """Testa que usuários inativos não são carregados."""
+        self.user.is_active = False
+        db.session.commit()
+        self.assertIsNone(carregar_usuario(self.identificador))
+
+    def test_versao_da_credencial(self):
+        """Testa que a troca de senha invalida o identificador anterior e recusa o formato antigo."""
+        self.assertEqual(self.identificador, f'{self.user.id}:0')
+        self.assertIsNone(carregar_usuario(str(self.user.id)))
+        self.assertIsNone(carregar_usuario('abc:1'))
+
+        self.user.set_password('outrasenha123')
+        invalidar_usuario(self.user.id)
+        db.session.commit()
+
+        self.assertIsNone(carregar_usuario(self.identificador))
+        self.assertEqual(carregar_usuario(self.user.get_id()).get_id(), f'{self.user.id}:1')
+
+
+class CookieLembrarTestCase(unittest.TestCase):
+    """Testes para o cookie "lembrar-me" depois do encerramento das sessões."""
+
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.app = create_app('testing')
+
+        @self.app.route('/_teste/usuario')
+        def usuario_atual():
+            return current_user.get_id() if current_user.is_authenticated else ''
+
+        with self.app.app_context():
+            db.create_all()
+            limpar_cache()
+            user = User(name='Usuário Teste', email='usuario@teste.com', password='senha12345', is_pending=False)
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+    def tearDown(self):
+        """Limpeza após cada teste."""
+        with self.app.app_context():
+            limpar_cache()
+            db.session.remove()
+            db.drop_all()
+
+    def _cliente_com_cookie(self, valor):
+        """Cliente sem sessão, só com o cookie "lembrar-me"."""
+        cliente = self.app.test_client()
+        cliente.set_cookie('localhost', 'remember_token', valor)
+        return cliente
+
+    def _autenticado(self, cliente):
+        """Indica se o cliente está autenticado (pela sessão ou pelo cookie)."""
+        return bool(cliente.get('/_teste/usuario').get_data(as_text=True))
+
+    def test_cookie_recusado_apos_troca_de_senha(self):
+        """Testa que o cookie emitido antes da troca de senha não autentica de novo."""
+        cliente = self.app.test_client()
+        cliente.post('/login', data={'email': 'usuario@teste.com', 'password': 'senha12345', 'remember_me': 'y'})
+        cookie = {c.name: c.value for c in cliente.cookie_jar}['remember_token']
+
+        # O cookie sozinho restaura o login enquanto a senha não muda
+        self.assertTrue(self._autenticado(self._cliente_com_cookie(cookie)))
+
+        with self.app.test_request_context():
+            user = db.session.get(User, self.user_id)
+            user.set_password('outrasenha123')
+            invalidar_usuario(user.id)
+            db.session.commit()
+            encerrar_sessoes_usuario(user.id)
+
+        self.assertFalse(self._autenticado(cliente))
+        self.assertFalse(self._autenticado(self._cliente_com_cookie(cookie)))
+
+
+if __name__ == '__main__':
+    unittest.main()